@@ -1,5 +1,5 @@
 import logging
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify
 from flask_cors import CORS
 from datetime import timedelta
 from flask_swagger_ui import get_swaggerui_blueprint
@@ -7,11 +7,20 @@ import os
 import secrets
 from dotenv import load_dotenv
 from flask import redirect, url_for
+from app.middleware.cors import init_preflight_cache, DEFAULT_MAX_AGE
+from app.json_provider import init_json_provider
+from app.middleware.compression import (
+    init_compression, init_precompressed_static,
+    DEFAULT_MIN_SIZE, DEFAULT_STATIC_MAX_AGE
+)
 
 def create_app(config_name=None):
     # Initialize Flask app
     app = Flask(__name__, static_folder='static')
 
+    # Serialize responses with orjson/msgspec when available
+    init_json_provider(app)
+
     # Load environment variables
     load_dotenv()
 
@@ -26,21 +35,36 @@ def create_app(config_name=None):
         "https://9000-monospace-iqrawartqui-academy-1712137068075.cluster-nxnw2gov3naqkvuxb437f67u5e.cloudworkstations.dev"  # Cloud Workstations dev frontend
     ]
 
+    cors_allow_headers = [
+        "Content-Type", "Authorization", "Accept",
+        "X-File-Name", "Upload-Offset", "Upload-Checksum", "Idempotency-Key"
+    ]
+    # Let browser clients read the resumable upload state and list totals.
+    cors_expose_headers = ["Location", "Upload-Offset", "Upload-Length", "X-Total-Count"]
+    cors_methods = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+    # How long browsers may cache a preflight result; 0 disables caching.
+    cors_max_age = int(os.getenv('CORS_MAX_AGE', DEFAULT_MAX_AGE))
+
     CORS(
         app,
         resources={r"/api/v1/*": {"origins": allowed_origins}},
         supports_credentials=True,
-        allow_headers=["Content-Type", "Authorization", "Accept"],
-        methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+        allow_headers=cors_allow_headers,
+        expose_headers=cors_expose_headers,
+        methods=cors_methods,
+        max_age=cors_max_age or None
     )
 
-    # Ensure preflight requests are handled early and not redirected by auth middleware
-    @app.before_request
-    def handle_options_and_bypass_auth_for_preflight():
-        # If a browser sends an OPTIONS preflight, return 204 directly
-        if request.method == 'OPTIONS':
-            # Flask-CORS will add the appropriate Access-Control-Allow-* headers
-            return "", 204
+    # Answer preflights before auth middleware or Flask-CORS run, using
+    # header sets precomputed per allowed origin.
+    init_preflight_cache(
+        app,
+        allowed_origins,
+        allow_headers=cors_allow_headers,
+        methods=cors_methods,
+        max_age=cors_max_age,
+        origin_regex=os.getenv('CORS_ORIGIN_REGEX')
+    )
 
     # Configure logging
     from config.logging_config import init_logging
@@ -72,11 +96,95 @@ def create_app(config_name=None):
     from app.routes.admin import admin_bp as admin_api_bp
     from app.routes.student import student_bp as student_api_bp
     from app.routes.courses import courses_bp as courses_api_bp
+    from app.routes.uploads import uploads_bp as uploads_api_bp
+    from app.routes.files import files_bp as files_api_bp
+
+    # Per-file limit for streamed assignment and submission uploads
+    from app.services.upload_service import DEFAULT_MAX_FILE_SIZE_MB
+    app.config['MAX_FILE_SIZE_MB'] = int(os.getenv('MAX_FILE_SIZE_MB', DEFAULT_MAX_FILE_SIZE_MB))
+
+    # Chunk state for resumable uploads lives on local disk
+    from app.services.resumable_upload_service import configure_resumable_uploads
+    configure_resumable_uploads(os.getenv('UPLOAD_TMP_DIR'))
+
+    # Signed download URLs are cached until shortly before they expire
+    from app.services.signed_url_service import configure_signed_urls, DEFAULT_DOWNLOAD_URL_TTL
+    configure_signed_urls(
+        expires_in=int(os.getenv('SIGNED_URL_EXPIRES_IN', DEFAULT_DOWNLOAD_URL_TTL)),
+        redis_url=os.getenv('REDIS_URL')
+    )
+
+    # Per-(student, course) assignment listings, dropped on submit and grade
+    from app.services.assignment_service import configure_student_assignment_cache, DEFAULT_STUDENT_ASSIGNMENTS_TTL
+    configure_student_assignment_cache(
+        ttl=float(os.getenv('STUDENT_ASSIGNMENTS_CACHE_TTL', DEFAULT_STUDENT_ASSIGNMENTS_TTL)),
+        redis_url=os.getenv('REDIS_URL')
+    )
+
+    # Course rows read by id, dropped on every course change
+    from app.services.courses_service import configure_course_cache, DEFAULT_COURSE_CACHE_TTL
+    configure_course_cache(
+        ttl=float(os.getenv('COURSE_CACHE_TTL', DEFAULT_COURSE_CACHE_TTL)),
+        redis_url=os.getenv('REDIS_URL')
+    )
+
+    # Course search falls back to an in-memory index without search_courses
+    from app.services.course_search_service import configure_course_search, DEFAULT_INDEX_TTL
+    configure_course_search(index_ttl=float(os.getenv('COURSE_SEARCH_INDEX_TTL', DEFAULT_INDEX_TTL)))
+
+    # Process assignment deadlines as they pass, and re-verify the dashboard
+    # counters and prune the change outbox periodically, in one elected process.
+    from app.services.deadline_service import (
+        configure_deadline_scheduler, DEFAULT_LOOKAHEAD, DEFAULT_RELOAD_INTERVAL,
+        DEFAULT_RECONCILE_INTERVAL, DEFAULT_PRUNE_INTERVAL
+    )
+    configure_deadline_scheduler(
+        enabled=os.getenv('DEADLINE_SCHEDULER', '').strip().lower() in ('1', 'true', 'yes', 'on'),
+        redis_url=os.getenv('REDIS_URL'),
+        lock_file=os.getenv('DEADLINE_LOCK_FILE'),
+        lookahead=int(os.getenv('DEADLINE_LOOKAHEAD', DEFAULT_LOOKAHEAD)),
+        reload_interval=int(os.getenv('DEADLINE_RELOAD_INTERVAL', DEFAULT_RELOAD_INTERVAL)),
+        reconcile_interval=int(os.getenv('DASHBOARD_RECONCILE_INTERVAL', DEFAULT_RECONCILE_INTERVAL)),
+        prune_interval=int(os.getenv('CHANGE_EVENTS_PRUNE_INTERVAL', DEFAULT_PRUNE_INTERVAL))
+    )
+
+    # Slow operations run as background jobs, queued in Redis when configured
+    # and in the database otherwise; every process runs JOB_WORKERS threads
+    # claiming them.
+    from app.services.job_service import configure_jobs, DEFAULT_JOB_WORKERS, DEFAULT_MAX_ATTEMPTS
+    configure_jobs(
+        queue=os.getenv('JOB_QUEUE'),
+        redis_url=os.getenv('REDIS_URL'),
+        workers=int(os.getenv('JOB_WORKERS', DEFAULT_JOB_WORKERS)),
+        max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+    )
+
+    # Share dashboard snapshots between pollers (and workers, with Redis)
+    from app.services.admin_service import configure_dashboard_cache
+    from app.database.snapshot_cache import DEFAULT_TTL, DEFAULT_STALE_TTL
+    configure_dashboard_cache(
+        ttl=float(os.getenv('DASHBOARD_CACHE_TTL', DEFAULT_TTL)),
+        stale_ttl=float(os.getenv('DASHBOARD_CACHE_STALE_TTL', DEFAULT_STALE_TTL)),
+        redis_url=os.getenv('REDIS_URL')
+    )
+
+    # Writes publish cache invalidations to the other workers and instances
+    # (Redis pub/sub, the Postgres outbox, or local sockets by default).
+    from app.database.change_feed import configure_change_feed, make_transport
+    configure_change_feed(make_transport(
+        os.getenv('CHANGE_FEED'),
+        redis_url=os.getenv('REDIS_URL'),
+        database_url=os.getenv('DATABASE_URL'),
+        socket_dir=os.getenv('CHANGE_FEED_DIR')
+    ))
+    # The threads of the three above start with start_background_threads().
 
     app.register_blueprint(auth_api_bp)
     app.register_blueprint(admin_api_bp)
     app.register_blueprint(student_api_bp)
     app.register_blueprint(courses_api_bp)
+    app.register_blueprint(uploads_api_bp)
+    app.register_blueprint(files_api_bp)
 
     # --- Swagger UI Setup ---
     SWAGGER_URL = '/api/docs'  # URL for exposing Swagger UI
@@ -92,6 +200,10 @@ def create_app(config_name=None):
     app.register_blueprint(swaggerui_blueprint)
     # --- End Swagger UI Setup ---
 
+    # Compress static assets once at startup; compress large API responses per request
+    init_precompressed_static(app, max_age=int(os.getenv('STATIC_MAX_AGE', DEFAULT_STATIC_MAX_AGE)))
+    init_compression(app, min_size=int(os.getenv('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)))
+
     @app.route('/')
     def index():
         return jsonify({"message": "Welcome to the e-learning platform API. See /api/docs for documentation."})
@@ -102,3 +214,20 @@ def create_app(config_name=None):
         return response
 
     return app
+
+
+def start_background_threads():
+    """
+    Start this process's background threads: the change feed listener, the
+    job workers and the deadline scheduler, as configured by create_app().
+    Only serving entrypoints call this (gunicorn's post_worker_init, the
+    ASGI lifespan startup, ``python run.py``), so CLI commands, scripts and
+    mere imports of the app start nothing. Safe to call again, and again
+    after a fork: the child starts its own threads.
+    """
+    from app.database.change_feed import start_change_feed
+    from app.services.job_service import start_job_workers
+    from app.services.deadline_service import start_deadline_scheduler
+    start_change_feed()
+    start_job_workers()
+    start_deadline_scheduler()
@@ -0,0 +1,151 @@
+"""
+ASGI serving mode.
+
+A thin ASGI adapter in front of the Flask app. The I/O-bound read routes
+listed in ``ASYNC_ROUTES`` are served natively on the event loop with the
+asyncio Supabase client, so one worker can keep many of them in flight at
+once. Native handlers see only the headers, so they serve requests without
+a query string; every other request (e.g. ``/courses/?ids=...``, CORS
+preflights) is handed to the Flask WSGI app through ``asgiref``'s
+``WsgiToAsgi`` thread pool.
+
+Native routes reuse the Flask app's JSON encoder, CORS origin table and
+response compression so clients see the same headers either way.
+"""
+import logging
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+from app.json_provider import get_encoder
+from app.middleware.compression import choose_encoding, compress_bytes, DEFAULT_MIN_SIZE
+from app.services.admin_service import get_dashboard_data_cached_async
+from app.services.courses_service import get_courses_service_async
+from app.services.jwt_service import decode_token
+from app.services.student_service import get_student_courses_async
+
+logger = logging.getLogger(__name__)
+
+
+class _AuthError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _authenticate(headers, admin=False):
+    """Mirror of the require_auth / require_admin decorators."""
+    auth_header = headers.get('Authorization')
+    if not auth_header:
+        raise _AuthError(401, 'Authorization header is missing')
+
+    parts = auth_header.split()
+    if parts[0].lower() != 'bearer' or len(parts) != 2:
+        raise _AuthError(401, 'Invalid Authorization header format. Expected "Bearer <token>"')
+
+    payload = decode_token(parts[1])
+    if not payload or payload.get('type') != 'access':
+        raise _AuthError(401, 'Invalid or expired access token')
+    if admin and not payload.get('isAdmin'):
+        logger.warning(f"Admin access denied for user {payload.get('user_id', 'Unknown')}. User is not an admin.")
+        raise _AuthError(403, 'Admin access required.')
+    return payload
+
+
+async def dashboard_data(headers):
+    _authenticate(headers, admin=True)
+    try:
+        return 200, await get_dashboard_data_cached_async()
+    except Exception as e:
+        logger.error(f"Error getting dashboard data: {str(e)}")
+        return 500, {'error': 'حدث خطأ أثناء جلب بيانات لوحة التحكم'}
+
+
+async def list_courses(headers):
+    try:
+        return 200, await get_courses_service_async()
+    except Exception as e:
+        logger.error(f"Error getting courses: {str(e)}", exc_info=True)
+        return 500, {"error": "Failed to retrieve courses"}
+
+
+async def list_student_courses(headers):
+    user = _authenticate(headers)
+    try:
+        return 200, await get_student_courses_async(user['user_id'])
+    except Exception as e:
+        logger.error(f"Error fetching courses for student {user.get('user_id')}: {str(e)}", exc_info=True)
+        return 500, {"error": "Failed to retrieve courses"}
+
+
+ASYNC_ROUTES = {
+    ('GET', '/api/v1/admin/dashboard-data'): dashboard_data,
+    ('GET', '/api/v1/courses/'): list_courses,
+    ('GET', '/api/v1/student/courses'): list_student_courses,
+}
+
+
+def create_asgi_app(flask_app, routes=None, on_startup=None):
+    """
+    Wrap ``flask_app`` in an ASGI callable serving ``routes`` natively.
+    ``on_startup`` is called when the server starts the app (lifespan).
+    """
+    routes = ASYNC_ROUTES if routes is None else routes
+    wsgi_fallback = WsgiToAsgi(flask_app)
+    _name, encode = get_encoder()
+    cors = flask_app.extensions.get('cors_preflight')
+    compression = flask_app.extensions.get('compression')
+    min_size = compression['min_size'] if compression else DEFAULT_MIN_SIZE
+
+    def response_headers(request_headers, body):
+        headers = [(b'content-type', b'application/json')]
+        origin = request_headers.get('Origin')
+        if cors and origin and cors['headers_for_origin'](origin):
+            headers += [
+                (b'access-control-allow-origin', origin.encode('latin-1')),
+                (b'access-control-allow-credentials', b'true'),
+                (b'vary', b'Origin'),
+            ]
+        headers.append((b'x-frame-options', b'ALLOWALL'))
+
+        if compression is not None:
+            headers.append((b'vary', b'Accept-Encoding'))
+            encoding = choose_encoding(parse_accept_header(request_headers.get('Accept-Encoding')))
+            if encoding and len(body) >= min_size:
+                body = compress_bytes(body, encoding)
+                headers.append((b'content-encoding', encoding.encode('ascii')))
+        headers.append((b'content-length', str(len(body)).encode('ascii')))
+        return headers, body
+
+    async def asgi_app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    if on_startup is not None:
+                        on_startup()
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+
+        handler = None
+        if scope['type'] == 'http' and not scope.get('query_string'):
+            handler = routes.get((scope['method'], scope['path']))
+        if handler is None:
+            await wsgi_fallback(scope, receive, send)
+            return
+
+        request_headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope['headers']])
+        try:
+            status, payload = await handler(request_headers)
+        except _AuthError as e:
+            status, payload = e.status, {'error': e.message}
+
+        headers, body = response_headers(request_headers, encode(payload) + b"\n")
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    return asgi_app
@@ -1,5 +1,8 @@
 """Database package for the e-learning platform."""
 
-from app.database.supabase_db import get_supabase_client
+from app.database.supabase_db import get_supabase_client, reset_supabase_client
+from app.database.snapshot_cache import SnapshotCache
+from app.database.single_flight import SingleFlight, single_flight
 
-__all__ = ['get_supabase_client']
+__all__ = ['get_supabase_client', 'reset_supabase_client', 'SnapshotCache', 'SingleFlight',
+           'single_flight']
@@ -0,0 +1,336 @@
+"""
+Change feed for cache invalidation across processes.
+
+Writes publish what they changed as ``(topic, ids)`` events, e.g.
+``publish('courses', [course_id])``; caches subscribe handlers that evict
+the affected keys. Handlers run at once in the publishing process, and in
+every other process when the event arrives through the transport, so a
+cache held in process memory stays correct in all gunicorn workers:
+
+* ``redis``: events go to a Redis pub/sub channel (every instance);
+* ``postgres``: triggers append each committed change of the watched tables
+  to the ``change_events`` outbox and NOTIFY; listeners LISTEN with a
+  direct connection (DATABASE_URL) and replay the outbox after a reconnect,
+  so writes made by SQL functions or other services are seen too (the
+  outbox is pruned by pg_cron or the elected scheduler, see
+  deadline_service);
+* ``socket``: datagrams between the processes of one host, through Unix
+  sockets in a shared directory (no external service);
+* ``off``: in-process only.
+
+Topics and their ids: ``students``, ``courses``, ``instructors`` (row ids),
+``enrollments`` (student ids), ``course_assignments`` (course ids) and
+``student_assignments`` (student ids).
+
+Handlers receive ``(ids, remote)``. ``ids`` is None when the event stands
+for "anything in this topic" (e.g. too many ids to send). ``remote`` is True
+for events from other processes: caches whose backend is shared (Redis)
+were already invalidated by the publisher and can ignore those.
+"""
+
+import collections
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from app.runtime import host_path
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cache_invalidation'
+# Above this many ids an event is sent as "the whole topic changed".
+MAX_EVENT_IDS = 1000
+RECONNECT_DELAY = 1.0
+# Seconds of change_events kept for listeners replaying after a reconnect.
+OUTBOX_RETENTION = 86400
+
+_handlers = collections.defaultdict(list)
+_origin = None
+_origin_pid = None
+
+
+def _process_origin():
+    """An id for this process, new after a fork."""
+    global _origin, _origin_pid
+    if _origin_pid != os.getpid():
+        _origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        _origin_pid = os.getpid()
+    return _origin
+
+
+def _event(topic, ids):
+    if ids is not None:
+        ids = sorted({str(i) for i in ids if i is not None})
+        if len(ids) > MAX_EVENT_IDS:
+            ids = None
+    return {'topic': topic, 'ids': ids, 'origin': _process_origin(), 'ts': time.time()}
+
+
+class NullTransport:
+    """No other process to tell."""
+
+    name = 'off'
+
+    def send(self, event):
+        pass
+
+    def listen(self):
+        return iter(())
+
+    def close(self):
+        pass
+
+
+class SocketTransport:
+    """
+    The processes of one host: each binds ``<directory>/<pid>.sock`` and an
+    event is sent to every socket there. Sockets of processes that are gone
+    refuse the datagram and are removed. Sends never block: a process whose
+    queue is full misses the event. The default directory is per deployment
+    (see app.runtime).
+    """
+
+    name = 'socket'
+    MAX_DATAGRAM = 65000
+
+    def __init__(self, directory=None):
+        self.directory = directory or host_path('change-feed')
+        os.makedirs(self.directory, exist_ok=True)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # A process that stopped reading must not block the writer publishing.
+        self._sender.setblocking(False)
+        self._receiver = None
+        self._path = None
+
+    def send(self, event):
+        data = json.dumps(event).encode()
+        if len(data) > self.MAX_DATAGRAM:
+            data = json.dumps(dict(event, ids=None)).encode()
+        for path in glob.glob(os.path.join(self.directory, '*.sock')):
+            if path == self._path:
+                continue
+            try:
+                self._sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                # BlockingIOError: that process's queue is full (stalled or
+                # stopped); the event is dropped for it only.
+                logger.warning(f"Could not send change event to {path}: {str(e)}")
+
+    def listen(self):
+        self._path = os.path.join(self.directory, f"{os.getpid()}.sock")
+        try:
+            os.unlink(self._path)
+        except FileNotFoundError:
+            pass
+        self._receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._receiver.bind(self._path)
+        self._receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        while True:
+            data = self._receiver.recv(self.MAX_DATAGRAM + 1024)
+            yield json.loads(data)
+
+    def close(self):
+        if self._receiver is not None:
+            self._receiver.close()
+        if self._path:
+            try:
+                os.unlink(self._path)
+            except OSError:
+                pass
+
+
+class RedisTransport:
+    """Every process on every instance using the same Redis."""
+
+    name = 'redis'
+
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url, socket_connect_timeout=1, health_check_interval=30)
+        self._pubsub = None
+
+    def send(self, event):
+        self._redis.publish(CHANNEL, json.dumps(event))
+
+    def listen(self):
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(CHANNEL)
+        for message in self._pubsub.listen():
+            yield json.loads(message['data'])
+
+    def close(self):
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+class PostgresTransport:
+    """
+    The ``change_events`` outbox: rows are written by triggers in the
+    transaction that made the change, and announced with NOTIFY on commit.
+    Python publishers have nothing to send.
+    """
+
+    name = 'postgres'
+
+    def __init__(self, dsn):
+        import psycopg2
+        self._psycopg2 = psycopg2
+        self.dsn = dsn
+        self._conn = None
+        self._last_id = None
+
+    def send(self, event):
+        pass
+
+    def _row_event(self, row_id, topic, ids, created_at):
+        self._last_id = max(self._last_id or 0, row_id)
+        return {'topic': topic, 'ids': ids, 'origin': 'postgres', 'ts': created_at}
+
+    def listen(self):
+        import select
+        self._conn = self._psycopg2.connect(self.dsn)
+        self._conn.autocommit = True
+        with self._conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+            if self._last_id is None:
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM public.change_events")
+                self._last_id = cur.fetchone()[0]
+            else:
+                # Changes committed while disconnected.
+                cur.execute("SELECT id, topic, ids, EXTRACT(EPOCH FROM created_at) FROM public.change_events "
+                            "WHERE id > %s ORDER BY id", (self._last_id,))
+                for row in cur.fetchall():
+                    yield self._row_event(row[0], row[1], row[2], float(row[3]))
+        while True:
+            if select.select([self._conn], [], [], 60) == ([], [], []):
+                continue
+            self._conn.poll()
+            while self._conn.notifies:
+                payload = json.loads(self._conn.notifies.pop(0).payload)
+                yield self._row_event(payload['id'], payload['topic'], payload.get('ids'), payload['ts'])
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+def make_transport(kind=None, redis_url=None, database_url=None, socket_dir=None):
+    """
+    Return the transport for ``kind`` (redis, postgres, socket or off). By
+    default: Redis when ``redis_url`` is set, otherwise sockets.
+    """
+    kind = (kind or ('redis' if redis_url else 'socket')).strip().lower()
+    try:
+        if kind == 'redis':
+            if not redis_url:
+                raise ValueError("CHANGE_FEED=redis requires REDIS_URL")
+            return RedisTransport(redis_url)
+        if kind == 'postgres':
+            if not database_url:
+                raise ValueError("CHANGE_FEED=postgres requires DATABASE_URL")
+            return PostgresTransport(database_url)
+    except ImportError as e:
+        logger.warning(f"Change feed '{kind}' is unavailable ({str(e)}); using local sockets")
+        kind = 'socket'
+    if kind == 'socket':
+        return SocketTransport(socket_dir)
+    if kind == 'off':
+        return NullTransport()
+    raise ValueError(f"Unknown CHANGE_FEED '{kind}'. Expected redis, postgres, socket or off")
+
+
+_transport = NullTransport()
+_listener = None
+_listener_pid = None
+# Publish-to-eviction delays (seconds) of remote events seen by this process.
+_delays = collections.deque(maxlen=1000)
+_received = 0
+
+
+def configure_change_feed(transport):
+    global _transport
+    _transport = transport
+
+
+def subscribe(topic, handler):
+    """Call ``handler(ids, remote)`` for every event of ``topic``."""
+    _handlers[topic].append(handler)
+
+
+def _dispatch(event, remote):
+    for handler in _handlers.get(event['topic'], ()):
+        try:
+            handler(event.get('ids'), remote)
+        except Exception as e:
+            logger.warning(f"Change handler for '{event['topic']}' failed: {str(e)}")
+
+
+def publish(topic, ids=None):
+    """
+    Announce that rows of ``topic`` changed (``ids`` None: any of them).
+    Local handlers run before this returns; other processes follow.
+    """
+    event = _event(topic, ids)
+    _dispatch(event, remote=False)
+    try:
+        _transport.send(event)
+    except Exception as e:
+        logger.warning(f"Could not publish change of '{topic}': {str(e)}")
+
+
+def _listen():
+    global _received
+    while True:
+        try:
+            for event in _transport.listen():
+                if event.get('origin') == _process_origin():
+                    continue
+                _dispatch(event, remote=True)
+                _received += 1
+                _delays.append(time.time() - event['ts'])
+        except Exception as e:
+            logger.warning(f"Change feed listener ({_transport.name}) disconnected: {str(e)}")
+        try:
+            _transport.close()
+        except Exception:
+            pass
+        time.sleep(RECONNECT_DELAY)
+
+
+def start_change_feed():
+    """
+    Start this process's listener thread. Safe to call again, and again
+    after a fork: the child listens on its own.
+    """
+    global _listener, _listener_pid
+    if isinstance(_transport, NullTransport) or _listener_pid == os.getpid():
+        return _listener
+    _listener = threading.Thread(target=_listen, name='change-feed', daemon=True)
+    _listener_pid = os.getpid()
+    _listener.start()
+    return _listener
+
+
+def get_change_feed_stats():
+    """Events received from other processes and their propagation delay (ms)."""
+    delays = sorted(_delays)
+
+    def percentile(p):
+        return round(delays[min(int(len(delays) * p), len(delays) - 1)] * 1000, 2) if delays else None
+
+    return {
+        'transport': _transport.name,
+        'listening': _listener_pid == os.getpid(),
+        'received': _received,
+        'delay_ms': {'p50': percentile(0.5), 'p99': percentile(0.99), 'max': percentile(1.0)}
+    }
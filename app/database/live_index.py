@@ -0,0 +1,92 @@
+"""
+In-process indexes over a table, kept current from the change feed.
+
+A ``LiveIndex`` loads every row of a table into an index (anything with
+``add(id, row)``, ``add_many(pairs)`` and ``remove(id)``) on first use. Rows
+named in change feed events of its topic are re-read, in one query, by the
+next ``get``; an event
+without ids, or ``ttl`` seconds, trigger a full reload. Lookups between
+changes never touch the database.
+"""
+
+import logging
+import threading
+import time
+
+from app.database.change_feed import subscribe
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+IN_BATCH_SIZE = 500
+
+
+class LiveIndex:
+    def __init__(self, table, columns, topic, factory, ttl=600):
+        self.table = table
+        self.columns = columns
+        self.factory = factory
+        self.ttl = ttl
+        self._index = None
+        self._loaded_at = 0.0
+        self._load_lock = threading.Lock()
+        self._changes_lock = threading.Lock()
+        self._pending = set()
+        self._stale = False
+        subscribe(topic, self._on_change)
+
+    def _on_change(self, ids, remote):
+        with self._changes_lock:
+            if ids is None:
+                self._stale = True
+            else:
+                self._pending.update(ids)
+
+    def _load(self, supabase):
+        rows_by_id = {}
+        last_id = None
+        while True:
+            # Keyset pages: each one starts from the primary key index.
+            query = supabase.from_(self.table).select(self.columns).order('id').limit(PAGE_SIZE)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            rows = query.execute().data or []
+            rows_by_id.update((row['id'], row) for row in rows)
+            if len(rows) < PAGE_SIZE:
+                break
+            last_id = rows[-1]['id']
+        index = self.factory()
+        index.add_many(rows_by_id.items())
+        return index
+
+    def _apply(self, supabase, ids):
+        ids = list(ids)
+        found = {}
+        for start in range(0, len(ids), IN_BATCH_SIZE):
+            rows = supabase.from_(self.table).select(self.columns) \
+                .in_('id', ids[start:start + IN_BATCH_SIZE]).execute().data
+            found.update((row['id'], row) for row in rows or [])
+        for row_id in ids:
+            if row_id in found:
+                self._index.add(row_id, found[row_id])
+            else:
+                self._index.remove(row_id)
+
+    def get(self, supabase):
+        """Return the index, loading it or applying pending changes first."""
+        with self._load_lock:
+            with self._changes_lock:
+                expired = self._index is None or self._stale or time.time() - self._loaded_at > self.ttl
+                changed = set(self._pending)
+                self._pending.clear()
+                if expired:
+                    self._stale = False
+            if expired:
+                # Changes made while loading stay pending and are re-read next time.
+                started = time.time()
+                self._index = self._load(supabase)
+                self._loaded_at = started
+                logger.info(f"Loaded {len(self._index)} {self.table} into an index in {time.time() - started:.2f}s")
+            elif changed:
+                self._apply(supabase, changed)
+            return self._index
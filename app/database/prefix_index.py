@@ -0,0 +1,81 @@
+"""
+Prefix index for typeahead.
+
+Each name is stored as sorted keys, one per word it contains, running from
+that word to the end of the name ("machine learning", "learning"), case-
+and accent-folded. A lookup bisects to the first key starting with the typed
+text and walks forward, so it costs O(log n + k) however many names match.
+Names starting with the text come before names with a later word matching;
+within each group, order is alphabetical (so shorter names first).
+"""
+
+import bisect
+import threading
+
+from app.database.search_index import TOKEN_RE, fold
+
+
+def _keys(name):
+    words = [fold(m.group()) for m in TOKEN_RE.finditer(name or '')]
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """Rows by id, looked up by prefixes of the words of ``field``."""
+
+    def __init__(self, field):
+        self.field = field
+        self._docs = {}
+        # (key, id) pairs: whole names in _starts, from a later word in _words.
+        self._starts = []
+        self._words = []
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id, doc):
+        with self._lock:
+            self._remove(doc_id)
+            self._docs[doc_id] = doc
+            for position, key in enumerate(_keys(doc.get(self.field))):
+                bisect.insort(self._starts if position == 0 else self._words, (key, doc_id))
+
+    def add_many(self, items):
+        """Add ``(id, row)`` pairs, sorting once rather than per key."""
+        with self._lock:
+            for doc_id, doc in items:
+                self._remove(doc_id)
+                self._docs[doc_id] = doc
+                for position, key in enumerate(_keys(doc.get(self.field))):
+                    (self._starts if position == 0 else self._words).append((key, doc_id))
+            self._starts.sort()
+            self._words.sort()
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for position, key in enumerate(_keys(doc.get(self.field))):
+            entries = self._starts if position == 0 else self._words
+            i = bisect.bisect_left(entries, (key, doc_id))
+            if i < len(entries) and entries[i] == (key, doc_id):
+                del entries[i]
+
+    def lookup(self, prefix, k=10):
+        """Return up to ``k`` rows with a word run starting with ``prefix``."""
+        prefix = ' '.join(fold(m.group()) for m in TOKEN_RE.finditer(prefix or ''))
+        if not prefix:
+            return []
+        found = {}
+        with self._lock:
+            for entries in (self._starts, self._words):
+                i = bisect.bisect_left(entries, (prefix,))
+                while i < len(entries) and len(found) < k and entries[i][0].startswith(prefix):
+                    found.setdefault(entries[i][1], self._docs[entries[i][1]])
+                    i += 1
+        return list(found.values())
@@ -0,0 +1,176 @@
+"""
+In-memory full-text index with typo tolerance.
+
+For where the database's full-text search is not available (e.g. the local
+Supabase stand-in). Documents are split into case- and accent-folded terms;
+postings map each term to its field-weighted frequency per document. Query
+terms missing from the vocabulary are matched to close terms through a
+trigram index, like pg_trgm. Every query term (or a close one) must match;
+results are ranked BM25-style and can be highlighted with ``<mark>``.
+"""
+
+import heapq
+import html
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r'\w+')
+DEFAULT_SIMILARITY = 0.3
+# Close terms considered for a misspelled query term.
+MAX_EXPANSIONS = 8
+# BM25 term-frequency saturation.
+K1 = 1.2
+
+
+def fold(term):
+    """Lowercase ``term`` and strip its accents."""
+    decomposed = unicodedata.normalize('NFKD', term)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return [fold(m.group()) for m in TOKEN_RE.finditer(text or '')]
+
+
+def trigrams(term):
+    """pg_trgm's trigrams: the term padded with two spaces before, one after."""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def highlight(text, terms, max_words=None):
+    """
+    HTML-escape ``text`` and wrap the words in ``terms`` (folded) in
+    ``<mark>``. With ``max_words``, keep that many words starting shortly
+    before the first match.
+    """
+    text = text or ''
+    words = list(TOKEN_RE.finditer(text))
+    if max_words and len(words) > max_words:
+        first = next((i for i, m in enumerate(words) if fold(m.group()) in terms), 0)
+        start = max(0, min(first - max_words // 4, len(words) - max_words))
+        words = words[start:start + max_words]
+        text_start, text_end = words[0].start(), words[-1].end()
+    else:
+        text_start, text_end = 0, len(text)
+
+    out, position = [], text_start
+    for m in words:
+        if fold(m.group()) in terms:
+            out.append(html.escape(text[position:m.start()]))
+            out.append(f"<mark>{html.escape(m.group())}</mark>")
+            position = m.end()
+    out.append(html.escape(text[position:text_end]))
+    return ''.join(out)
+
+
+class InvertedIndex:
+    """
+    Documents (dicts) by id, searchable over ``fields``, a mapping of field
+    name to weight. Thread-safe; ``add`` replaces a document with the same id.
+    """
+
+    def __init__(self, fields, similarity=DEFAULT_SIMILARITY):
+        self.fields = dict(fields)
+        self.similarity = similarity
+        self._docs = {}
+        self._doc_terms = {}
+        self._postings = {}
+        self._trigrams = defaultdict(set)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    def add(self, doc_id, doc):
+        weights = defaultdict(float)
+        for field, weight in self.fields.items():
+            for term in tokenize(doc.get(field)):
+                weights[term] += weight
+        with self._lock:
+            self._remove(doc_id)
+            self._docs[doc_id] = doc
+            self._doc_terms[doc_id] = weights
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    for gram in trigrams(term):
+                        self._trigrams[gram].add(term)
+                postings[doc_id] = weight
+
+    def add_many(self, items):
+        for doc_id, doc in items:
+            self.add(doc_id, doc)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        self._docs.pop(doc_id, None)
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if postings:
+                continue
+            del self._postings[term]
+            for gram in trigrams(term):
+                self._trigrams[gram].discard(term)
+                if not self._trigrams[gram]:
+                    del self._trigrams[gram]
+
+    def expand(self, term):
+        """``{term: closeness}``: the term itself if indexed, else close ones."""
+        if term in self._postings:
+            return {term: 1.0}
+        grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self._trigrams.get(gram, ()):
+                shared[candidate] += 1
+        close = {}
+        for candidate, count in shared.items():
+            similarity = count / (len(grams) + len(trigrams(candidate)) - count)
+            if similarity >= self.similarity:
+                close[candidate] = similarity
+        return dict(heapq.nlargest(MAX_EXPANSIONS, close.items(), key=lambda item: item[1]))
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Return ``(total, hits, terms)``: the number of matching documents,
+        ``(doc_id, score, doc)`` for the requested page, best first, and the
+        indexed terms that matched (for ``highlight``).
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms:
+            return 0, [], set()
+        with self._lock:
+            total_docs = len(self._docs)
+            scores = None
+            matched_terms = set()
+            for term in query_terms:
+                term_scores = {}
+                for candidate, closeness in self.expand(term).items():
+                    matched_terms.add(candidate)
+                    postings = self._postings[candidate]
+                    idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, frequency in postings.items():
+                        score = closeness * idf * frequency * (K1 + 1) / (frequency + K1)
+                        if score > term_scores.get(doc_id, 0):
+                            term_scores[doc_id] = score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc_id: score + term_scores[doc_id]
+                              for doc_id, score in scores.items() if doc_id in term_scores}
+                if not scores:
+                    return 0, [], matched_terms
+            page = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], item[0]))[offset:]
+            return len(scores), [(doc_id, score, self._docs[doc_id]) for doc_id, score in page], matched_terms
@@ -0,0 +1,169 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+While a call for a given key is in progress, further callers with the same
+key wait for it and receive its result (or its exception) instead of issuing
+their own query. Nothing is cached: once the call finishes, the next caller
+starts a new one. Coalescing is per process.
+
+Use the ``single_flight`` decorator to opt a service read function in; it
+works for plain and ``async def`` functions. The shared result is the same
+object for every waiter, so callers must treat it as read-only.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """One in-progress call that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls by key across threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` unless a call for ``key`` is in flight; return its result."""
+        call, leader = self._join(key)
+        if leader:
+            self._run(key, call, fn, args, kwargs)
+        else:
+            call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    def background(self, key, fn, *args, **kwargs):
+        """
+        Start ``fn`` in a daemon thread unless a call for ``key`` is already in
+        flight. Returns True if a new call was started. Errors are logged.
+        """
+        with self._lock:
+            if key in self._calls:
+                return False
+            call = self._calls[key] = _Call()
+
+        def run():
+            self._run(key, call, fn, args, kwargs)
+            if call.error is not None:
+                logger.error(f"Background call for {key!r} failed: {str(call.error)}")
+
+        threading.Thread(target=run, name=f"single-flight-{key}", daemon=True).start()
+        return True
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def _join(self, key):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def _run(self, key, call, fn, args, kwargs):
+        try:
+            call.value = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutine calls by key within each event loop."""
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Await ``fn(*args, **kwargs)`` unless a call for ``key`` is in flight on this loop."""
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        future = self._calls.get(loop_key)
+        if future is not None:
+            # shield: a cancelled waiter must not cancel the shared call
+            return await asyncio.shield(future)
+
+        future = self._calls[loop_key] = loop.create_future()
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a call without waiters doesn't warn.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(loop_key, None)
+
+
+_default_group = SingleFlight()
+_default_async_group = AsyncSingleFlight()
+
+
+def _call_key(func, args, kwargs):
+    key = (func.__module__, func.__qualname__, args, frozenset(kwargs.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def single_flight(func=None, *, key=None):
+    """
+    Opt a read function into single-flight coalescing.
+
+    By default calls are identical when the function and its arguments are
+    equal; pass ``key=lambda *args, **kwargs: ...`` to choose otherwise.
+    Calls with unhashable arguments run uncoalesced.
+    """
+    def decorator(fn):
+        def make_key(args, kwargs):
+            if key is not None:
+                return (fn.__module__, fn.__qualname__, key(*args, **kwargs))
+            return _call_key(fn, args, kwargs)
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                call_key = make_key(args, kwargs)
+                if call_key is None:
+                    return await fn(*args, **kwargs)
+                return await _default_async_group.do(call_key, fn, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            call_key = make_key(args, kwargs)
+            if call_key is None:
+                return fn(*args, **kwargs)
+            return _default_group.do(call_key, fn, *args, **kwargs)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,228 @@
+"""
+Stale-while-revalidate snapshot cache for expensive read payloads.
+
+A ``SnapshotCache`` wraps a zero-argument loader (for example the admin
+dashboard query fan-out) and keeps its last result:
+
+* younger than ``ttl``: served as is;
+* older than ``ttl`` but younger than ``ttl + stale_ttl``: served immediately
+  while one background thread rebuilds it;
+* missing or older than that: rebuilt synchronously.
+
+Rebuilds are single-flighted per process, so any number of concurrent callers
+trigger one loader call and share its result. Snapshots live in process
+memory by default; with a Redis backend they are shared by every worker and
+instance, and a short Redis lock keeps background refreshes to one process.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from app.database.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 5
+DEFAULT_STALE_TTL = 60
+
+
+class MemorySnapshotBackend:
+    """Process-local snapshot storage; entries expire like Redis keys."""
+
+    SWEEP_EVERY = 1024
+    # Each process has its own entries to invalidate.
+    shared = False
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at, deadline = entry
+            if deadline <= time.time():
+                del self._entries[key]
+                return None
+            return value, stored_at
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, stored_at, expire):
+        with self._lock:
+            now = time.time()
+            self._entries[key] = (value, stored_at, now + max(expire, 1))
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                # Drop keys that expired without being read again.
+                for stale in [k for k, e in self._entries.items() if e[2] <= now]:
+                    del self._entries[stale]
+
+    def set_many(self, items, stored_at, expire):
+        for key, value in items:
+            self.set(key, value, stored_at, expire)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def try_lock(self, key, timeout):
+        # Threads in this process are already coordinated by the cache.
+        return True
+
+    def unlock(self, key):
+        pass
+
+
+class RedisSnapshotBackend:
+    """Snapshot storage shared through Redis; values must be JSON-serializable."""
+
+    shared = True
+
+    def __init__(self, url, prefix='snapshot:'):
+        import redis
+        self._redis = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._redis.get(self._prefix + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry['value'], entry['stored_at']
+
+    def get_many(self, keys):
+        """Like ``get`` for each key, in one round trip."""
+        if not keys:
+            return []
+        entries = []
+        for raw in self._redis.mget([self._prefix + key for key in keys]):
+            entry = json.loads(raw) if raw is not None else None
+            entries.append((entry['value'], entry['stored_at']) if entry else None)
+        return entries
+
+    def set(self, key, value, stored_at, expire):
+        payload = json.dumps({'value': value, 'stored_at': stored_at}, default=str)
+        self._redis.set(self._prefix + key, payload, ex=max(int(expire), 1))
+
+    def set_many(self, items, stored_at, expire):
+        pipeline = self._redis.pipeline(transaction=False)
+        for key, value in items:
+            payload = json.dumps({'value': value, 'stored_at': stored_at}, default=str)
+            pipeline.set(self._prefix + key, payload, ex=max(int(expire), 1))
+        pipeline.execute()
+
+    def delete(self, key):
+        self._redis.delete(self._prefix + key)
+
+    def try_lock(self, key, timeout):
+        return bool(self._redis.set(self._prefix + key + ':refresh', '1', nx=True, ex=max(int(timeout), 1)))
+
+    def unlock(self, key):
+        self._redis.delete(self._prefix + key + ':refresh')
+
+
+class SnapshotCache:
+    """Stale-while-revalidate cache around a single loader."""
+
+    def __init__(self, key, loader, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL, backend=None):
+        self.key = key
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.backend = backend or MemorySnapshotBackend()
+        self._flights = SingleFlight()
+
+    def get(self):
+        """Return the snapshot, rebuilding it synchronously only when unusable."""
+        value = self.peek()
+        if value is not None:
+            return value
+        return self.refresh()
+
+    def peek(self):
+        """
+        Return the snapshot if it is fresh or stale, else None, without
+        blocking on the loader. A stale hit schedules a background refresh.
+        """
+        entry = self._read()
+        if entry is None:
+            return None
+        value, stored_at = entry
+        age = time.time() - stored_at
+        if age < self.ttl:
+            return value
+        if age < self.ttl + self.stale_ttl:
+            self._refresh_in_background()
+            return value
+        return None
+
+    def set(self, value):
+        """Store a snapshot built elsewhere (e.g. by an async loader)."""
+        try:
+            self.backend.set(self.key, value, time.time(), self.ttl + self.stale_ttl)
+        except Exception as e:
+            logger.warning(f"Could not store snapshot '{self.key}': {str(e)}")
+
+    def invalidate(self):
+        """Drop the snapshot so the next read rebuilds it."""
+        try:
+            self.backend.delete(self.key)
+        except Exception as e:
+            logger.warning(f"Could not invalidate snapshot '{self.key}': {str(e)}")
+
+    def refresh(self):
+        """Rebuild the snapshot, joining a rebuild already in progress."""
+        value = self._flights.do(self.key, self._load)
+        if value is None:
+            # Joined a background refresh that deferred to another process.
+            value = self._flights.do(self.key, self._load)
+        return value
+
+    def _read(self):
+        try:
+            return self.backend.get(self.key)
+        except Exception as e:
+            logger.warning(f"Could not read snapshot '{self.key}': {str(e)}")
+            return None
+
+    def _load(self):
+        value = self.loader()
+        self.set(value)
+        return value
+
+    def _load_unless_locked(self):
+        # Another process already refreshing the shared snapshot is enough.
+        try:
+            locked = self.backend.try_lock(self.key, self.ttl + 30)
+        except Exception as e:
+            logger.warning(f"Could not lock snapshot '{self.key}': {str(e)}")
+            locked = True
+        if not locked:
+            return None
+        try:
+            return self._load()
+        finally:
+            try:
+                self.backend.unlock(self.key)
+            except Exception:
+                pass
+
+    def _refresh_in_background(self):
+        self._flights.background(self.key, self._load_unless_locked)
+
+
+def make_backend(redis_url=None):
+    """Return a Redis backend for ``redis_url``, or process memory when unset."""
+    if redis_url:
+        try:
+            return RedisSnapshotBackend(redis_url)
+        except ImportError:
+            logger.warning("redis is not installed; snapshot cache falls back to process memory")
+    return MemorySnapshotBackend()
@@ -0,0 +1,41 @@
+"""
+Asyncio Supabase client for the ASGI serving mode.
+
+The async client wraps an ``httpx.AsyncClient`` that is bound to the event
+loop it was created on, so it is created lazily inside the running loop and
+cached per loop.
+"""
+
+import asyncio
+import logging
+
+from supabase import AsyncClient, acreate_client
+
+from app.database.supabase_db import SUPABASE_URL, SUPABASE_SERVICE_KEY
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+_locks = {}
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """Return the async Supabase client for the current event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is not None:
+        return client
+
+    async with _locks.setdefault(loop, asyncio.Lock()):
+        client = _clients.get(loop)
+        if client is None:
+            client = await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+            _clients[loop] = client
+            logger.info("Async Supabase client initialized with Service Role Key.")
+    return client
+
+
+def reset_async_supabase_client():
+    """Drop cached async clients, e.g. after a fork."""
+    _clients.clear()
+    _locks.clear()
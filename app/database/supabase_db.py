@@ -24,3 +24,16 @@ logger.info("Supabase client initialized with Service Role Key.")
 
 def get_supabase_client():
     return supabase_client
+
+def reset_supabase_client():
+    """
+    Rebuild the shared client.
+
+    Called in each forked server worker so workers don't share the HTTP
+    connection pool created in the parent process.
+    """
+    global supabase_client
+    supabase_client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    logger.info("Supabase client re-initialized for worker process.")
+    return supabase_client
+
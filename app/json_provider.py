@@ -0,0 +1,146 @@
+"""
+Fast JSON provider for Flask responses.
+
+``jsonify`` goes through ``app.json``. This module swaps the stdlib-based
+provider for one backed by orjson (preferred) or msgspec, falling back to the
+stdlib encoder when neither is installed. Datetimes, dates and UUIDs are
+serialized natively as ISO 8601 / canonical strings.
+
+The backend can be forced with the ``JSON_BACKEND`` environment variable
+(``orjson``, ``msgspec`` or ``stdlib``); by default the fastest available one
+is used. Output is compact unless the app runs in debug mode.
+"""
+import dataclasses
+import decimal
+import json
+import logging
+import os
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+BACKENDS = ('orjson', 'msgspec', 'stdlib')
+
+
+def _default(o):
+    """Serialize types the fast encoders don't handle themselves."""
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _orjson_encoder():
+    base = orjson.OPT_NON_STR_KEYS
+
+    def encode(obj, pretty=False):
+        option = (base | orjson.OPT_INDENT_2) if pretty else base
+        return orjson.dumps(obj, default=_default, option=option)
+    return encode
+
+
+def _msgspec_encoder():
+    encoder = msgspec.json.Encoder(enc_hook=_default)
+
+    def encode(obj, pretty=False):
+        data = encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if pretty else data
+    return encode
+
+
+def _stdlib_encoder():
+    def encode(obj, pretty=False):
+        if pretty:
+            text = json.dumps(obj, default=_default, ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':'))
+        return text.encode('utf-8')
+    return encode
+
+
+def available_backends():
+    """Return the names of the JSON backends importable in this process."""
+    names = []
+    if orjson is not None:
+        names.append('orjson')
+    if msgspec is not None:
+        names.append('msgspec')
+    names.append('stdlib')
+    return names
+
+
+def get_encoder(backend=None):
+    """
+    Return ``(name, encode)`` for the requested backend.
+
+    ``encode(obj, pretty=False)`` returns UTF-8 bytes. An unavailable backend
+    falls back to the next fastest one with a warning.
+    """
+    backend = (backend or os.getenv('JSON_BACKEND') or '').lower() or None
+    if backend is not None and backend not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{backend}'. Expected one of: {', '.join(BACKENDS)}")
+
+    available = available_backends()
+    if backend is not None and backend not in available:
+        logger.warning(f"JSON backend '{backend}' is not installed; falling back to '{available[0]}'")
+        backend = None
+    name = backend or available[0]
+
+    factories = {'orjson': _orjson_encoder, 'msgspec': _msgspec_encoder, 'stdlib': _stdlib_encoder}
+    return name, factories[name]()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes responses straight to bytes."""
+
+    ensure_ascii = False
+    sort_keys = False
+
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        self.backend, self._encode = get_encoder(backend)
+
+    def dumps(self, obj, **kwargs):
+        # Callers asking for stdlib-specific options keep the stdlib behaviour.
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._encode(obj, pretty) + b"\n", mimetype=self.mimetype)
+
+
+def init_json_provider(app, backend=None):
+    """Install :class:`FastJSONProvider` as ``app.json``."""
+    app.json = FastJSONProvider(app, backend)
+    logger.info(f"JSON provider initialized with '{app.json.backend}' backend")
+    return app.json
@@ -0,0 +1,196 @@
+"""
+Response compression.
+
+Two pieces:
+
+* ``init_compression`` registers an ``after_request`` hook that gzip- or
+  brotli-encodes API responses whose content type is in an allowlist and whose
+  body is at least ``min_size`` bytes. Streamed responses are compressed chunk
+  by chunk without buffering the whole body.
+* ``init_precompressed_static`` compresses files in the static folder once at
+  startup and serves the encoded variant (with an ETag and a long-lived
+  ``Cache-Control`` header) to clients that accept it.
+
+Brotli is used when the ``brotli`` package is installed and the client sends
+``br`` in ``Accept-Encoding``; gzip otherwise.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import zlib
+
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_CONTENT_TYPES = frozenset([
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'text/javascript',
+    'image/svg+xml',
+])
+STATIC_EXTENSIONS = ('.json', '.js', '.css', '.html', '.svg', '.txt')
+DEFAULT_STATIC_MAX_AGE = 7 * 24 * 3600  # one week
+STREAM_FLUSH_SIZE = 16 * 1024
+
+
+def choose_encoding(accept_encodings):
+    """Pick ``'br'``, ``'gzip'`` or ``None`` from a parsed Accept-Encoding."""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_bytes(data, encoding, level=None):
+    """Compress a whole body. ``level`` is the gzip level or brotli quality."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=4 if level is None else level)
+    return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+
+
+def compress_stream(chunks, encoding, level=None, flush_size=STREAM_FLUSH_SIZE):
+    """
+    Compress an iterable of chunks incrementally.
+
+    The compressor is flushed whenever ``flush_size`` input bytes have
+    accumulated, so a streaming client receives data steadily without the
+    per-chunk flush overhead blowing up the output for small chunks.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=4 if level is None else level)
+        compress, flush = compressor.process, compressor.flush
+    else:
+        compressor = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+        compress, flush = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        out = compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_size:
+            out += flush()
+            pending = 0
+        if out:
+            yield out
+    yield compressor.finish() if encoding == 'br' else compressor.flush()
+
+
+def _add_vary(response, value):
+    vary = response.headers.get('Vary')
+    if not vary:
+        response.headers['Vary'] = value
+    elif value.lower() not in [v.strip().lower() for v in vary.split(',')]:
+        response.headers['Vary'] = f"{vary}, {value}"
+
+
+def init_compression(app, min_size=DEFAULT_MIN_SIZE, content_types=DEFAULT_CONTENT_TYPES, level=None):
+    """Register an ``after_request`` hook that compresses eligible responses."""
+    content_types = frozenset(content_types)
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in content_types:
+            return response
+        _add_vary(response, 'Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code >= 300
+                or response.status_code == 204
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or request.method == 'HEAD'):
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress_bytes(data, encoding, level))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    app.extensions['compression'] = {'min_size': min_size, 'content_types': content_types}
+    logger.info(f"Response compression enabled (min_size={min_size}, brotli={'yes' if brotli else 'no'})")
+
+
+def precompress_file(path):
+    """Return ``{'identity'|'gzip'|'br': bytes}`` variants plus an ETag for ``path``."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    variants = {'identity': data, 'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    etag = hashlib.sha256(data).hexdigest()[:32]
+    return variants, etag
+
+
+def init_precompressed_static(app, max_age=DEFAULT_STATIC_MAX_AGE, min_size=DEFAULT_MIN_SIZE):
+    """
+    Compress static assets once and serve them from memory.
+
+    Only files with text-like extensions and at least ``min_size`` bytes are
+    handled; everything else keeps going through Flask's static view.
+    """
+    if not app.static_folder or not os.path.isdir(app.static_folder):
+        return
+
+    assets = {}
+    for root, _dirs, files in os.walk(app.static_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            if not name.endswith(STATIC_EXTENSIONS) or os.path.getsize(path) < min_size:
+                continue
+            rel = os.path.relpath(path, app.static_folder).replace(os.sep, '/')
+            variants, etag = precompress_file(path)
+            assets[f"{app.static_url_path}/{rel}"] = {
+                'variants': variants,
+                'etag': etag,
+                'mimetype': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+            }
+
+    cache_control = f"public, max-age={int(max_age)}"
+
+    @app.before_request
+    def serve_precompressed_static():
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        asset = assets.get(request.path)
+        if asset is None:
+            return None
+
+        encoding = choose_encoding(request.accept_encodings) or 'identity'
+        etag = asset['etag'] if encoding == 'identity' else f"{asset['etag']}-{encoding}"
+
+        response = app.response_class(asset['variants'][encoding], mimetype=asset['mimetype'])
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = cache_control
+        response.headers['Vary'] = 'Accept-Encoding'
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        return response.make_conditional(request)
+
+    app.extensions['precompressed_static'] = assets
+    logger.info(f"Precompressed {len(assets)} static assets")
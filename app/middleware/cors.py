@@ -0,0 +1,94 @@
+"""
+CORS preflight fast path.
+
+Browsers send an OPTIONS preflight before most cross-origin API calls made by
+the SPA (any request carrying an Authorization header or a JSON body). This
+module answers those preflights directly from a table of header sets that is
+built once at startup, and advertises ``Access-Control-Max-Age`` so browsers
+can cache the result instead of preflighting every call.
+
+Flask-CORS still decorates the actual (non-preflight) responses.
+"""
+from functools import lru_cache
+import logging
+import re
+
+from flask import request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_AGE = 7200  # seconds; Chromium caps preflight caching at 2 hours
+
+
+def build_preflight_headers(origin, allow_headers, methods, max_age, supports_credentials=True):
+    """Build the header list returned for a preflight from ``origin``."""
+    headers = [
+        ('Access-Control-Allow-Origin', origin),
+        ('Access-Control-Allow-Methods', ', '.join(sorted(methods))),
+        ('Access-Control-Allow-Headers', ', '.join(allow_headers)),
+        ('Vary', 'Origin'),
+    ]
+    if supports_credentials:
+        headers.append(('Access-Control-Allow-Credentials', 'true'))
+    if max_age:
+        headers.append(('Access-Control-Max-Age', str(int(max_age))))
+    return tuple(headers)
+
+
+def init_preflight_cache(app, allowed_origins, allow_headers, methods,
+                         path_prefix='/api/v1/', max_age=DEFAULT_MAX_AGE,
+                         origin_regex=None, supports_credentials=True):
+    """
+    Register a ``before_request`` hook that answers CORS preflights.
+
+    Exact origins are matched through a frozenset; ``origin_regex`` (a pattern
+    string) optionally admits additional origins such as preview deployments.
+    Headers for each allowed origin are precomputed so the hook does no string
+    building per request.
+
+    Preflights from origins that are not allowed get a bare ``204`` without
+    ``Access-Control-Allow-*`` headers, which the browser treats as a denial.
+    """
+    origins = frozenset(allowed_origins)
+    pattern = re.compile(origin_regex) if origin_regex else None
+
+    precomputed = {
+        origin: build_preflight_headers(origin, allow_headers, methods, max_age, supports_credentials)
+        for origin in origins
+    }
+
+    @lru_cache(maxsize=256)
+    def headers_for_pattern_origin(origin):
+        if pattern is not None and pattern.fullmatch(origin):
+            return build_preflight_headers(origin, allow_headers, methods, max_age, supports_credentials)
+        return None
+
+    def headers_for_origin(origin):
+        headers = precomputed.get(origin)
+        if headers is None and pattern is not None:
+            headers = headers_for_pattern_origin(origin)
+        return headers
+
+    @app.before_request
+    def answer_cors_preflight():
+        # Only genuine preflights are short-circuited; a plain OPTIONS falls
+        # through to Flask's automatic OPTIONS handling.
+        if request.method != 'OPTIONS' or 'Access-Control-Request-Method' not in request.headers:
+            return None
+        if not request.path.startswith(path_prefix):
+            return None
+
+        origin = request.headers.get('Origin')
+        headers = headers_for_origin(origin) if origin else None
+        if headers is None:
+            logger.debug(f"Rejected CORS preflight from origin {origin!r} for {request.path}")
+            return "", 204, {'Vary': 'Origin'}
+        return "", 204, headers
+
+    app.extensions['cors_preflight'] = {
+        'origins': origins,
+        'origin_regex': origin_regex,
+        'max_age': max_age,
+        'headers_for_origin': headers_for_origin,
+    }
+    logger.info(f"CORS preflight fast path enabled for {len(origins)} origins (max-age={max_age}s)")
@@ -1,16 +1,22 @@
 """Admin routes module for the e-learning platform."""
 
-from flask import Blueprint, jsonify, request, g, current_app
+from flask import Blueprint, jsonify, request, g, current_app, url_for
 from app.middleware.auth import require_auth, require_admin
 from app.services.admin_service import (
-    get_dashboard_data_service,
+    get_dashboard_data_cached,
+    reconcile_dashboard_statistics_service,
     get_students_service,
+    get_students_by_ids_service,
     create_student_service,
+    stage_student_import,
+    IMPORT_BATCH_SIZE,
     update_student_service,
     delete_student_service,
     get_instructors_service,
-    create_instructor_service,
-    delete_instructor_service
+    create_instructor_account_service,
+    INSTRUCTOR_PROFILE_FIELDS,
+    delete_instructor_service,
+    InstructorHasCoursesError
 )
 from app.services.courses_service import (
     get_courses_service,
@@ -19,12 +25,82 @@ from app.services.courses_service import (
     delete_course_service,
     get_course_by_id_service
 )
-from app.services.assignment_service import get_assignments_service, update_assignment
+from app.services.assignment_service import (
+    get_assignments_service,
+    create_assignment,
+    get_assignment_by_id,
+    update_assignment,
+    delete_assignment,
+    grade_submissions_service,
+    AssignmentNotFoundError
+)
+from app.services.upload_service import (
+    upload_assignment_file, FileTooLargeError, BLOB_GC_GRACE_SECONDS, BLOB_GC_BATCH_SIZE
+)
+from app.services.deadline_service import process_due_deadlines, get_scheduler_status
+from app.database.change_feed import get_change_feed_stats
+from app.services.autocomplete_service import autocomplete, DEFAULT_AUTOCOMPLETE_LIMIT, MAX_AUTOCOMPLETE_LIMIT
+from app.services.job_service import enqueue_job, find_job, get_job, public_job, IdempotencyKeyReused
 from app.database.supabase_db import get_supabase_client
 import logging
 logger = logging.getLogger(__name__)
 admin_bp = Blueprint('admin_api', __name__, url_prefix='/api/v1/admin')
 
+MAX_BULK_DELETE_IDS = 10000
+MAX_BATCH_GRADES = 5000
+
+def _job_response(job):
+    """Answer 202 with the job's status, which the Location header points at."""
+    response = jsonify(public_job(job))
+    response.headers['Location'] = url_for('admin_api.get_job_status', job_id=job['id'])
+    return response, 202
+
+def _job_accepted(name, *args):
+    """
+    Queue a background job and answer 202 with its status. An
+    Idempotency-Key header makes retries of the same request return the
+    job already queued.
+    """
+    try:
+        job, created = enqueue_job(name, *args, idempotency_key=request.headers.get('Idempotency-Key'))
+    except IdempotencyKeyReused as e:
+        return jsonify({"error": str(e)}), 422
+    if created:
+        logger.info(f"Queued job {job['id']} ({name})")
+    return _job_response(job)
+
+def _bulk_delete(job_name, resource):
+    """Shared handler for the bulk-delete endpoints: body is {"ids": [...]}; runs as a job."""
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return jsonify({"error": "Body must be a JSON object with a non-empty 'ids' list"}), 400
+        if len(ids) > MAX_BULK_DELETE_IDS:
+            return jsonify({"error": f"At most {MAX_BULK_DELETE_IDS} ids per request"}), 400
+
+        return _job_accepted(job_name, ids)
+    except Exception as e:
+        logger.error(f"Error bulk deleting {resource}: {str(e)}")
+        return jsonify({"error": f"Failed to delete {resource}"}), 500
+
+@admin_bp.route('/jobs/<job_id>', methods=['GET'])
+@require_auth
+@require_admin
+def get_job_status(job_id):
+    """
+    Status of a background job: ``status`` is queued, running, succeeded or
+    failed; ``result`` holds what the operation returned once it succeeded.
+    """
+    try:
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(public_job(job)), 200
+    except Exception as e:
+        logger.error(f"Error getting job {job_id}: {str(e)}")
+        return jsonify({"error": "Failed to get job"}), 500
+
 @admin_bp.route('/ping', methods=['GET'])
 def ping():
     return jsonify({"message": "pong"})
@@ -64,13 +140,26 @@ def get_course_assignments_api(course_id):
 def get_dashboard_data():
     """Get dashboard statistics and data."""
     try:
-        data = get_dashboard_data_service()
+        data = get_dashboard_data_cached()
         return jsonify(data), 200
     except Exception as e:
         logger.error(f"Error getting dashboard data: {str(e)}")
         return jsonify({'error': 'حدث خطأ أثناء جلب بيانات لوحة التحكم'}), 500
 
 
+@admin_bp.route('/statistics/reconcile', methods=['POST'])
+@require_auth
+@require_admin
+def reconcile_statistics():
+    """Verify the dashboard counters against real counts and repair drift."""
+    try:
+        drift = reconcile_dashboard_statistics_service()
+        return jsonify({'reconciled': True, 'drift': drift}), 200
+    except Exception as e:
+        logger.error(f"Error reconciling dashboard statistics: {str(e)}")
+        return jsonify({'error': 'Failed to reconcile dashboard statistics'}), 500
+
+
 @admin_bp.route('/assignments/recent')
 @require_auth
 @require_admin
@@ -101,7 +190,10 @@ def recent_progress():
             'student_name': p['students']['name'] if p['students'] else 'غير معروف',
             'course_title': p['courses']['title'] if p['courses'] else 'غير معروف',
             'progress_percentage': p['progress_percentage'],
-            'completed': p['completed']
+            'completed': p['completed'],
+            'completed_assignments': p.get('completed_assignments'),
+            'total_assignments': p.get('total_assignments'),
+            'average_grade': p.get('average_grade')
         } for p in response.data]
         
         return jsonify(progress)
@@ -113,8 +205,11 @@ def recent_progress():
 @require_auth
 @require_admin
 def get_students():
-    """Get list of all students."""
+    """Get list of all students, or with ``?ids=a,b,c`` just those students, in that order."""
     try:
+        if 'ids' in request.args:
+            ids = [i.strip() for i in request.args['ids'].split(',') if i.strip()]
+            return jsonify(get_students_by_ids_service(ids)), 200
         students = get_students_service()
         return jsonify(students), 200
     except ValueError as e:
@@ -154,21 +249,210 @@ def create_student():
         logger.error(f"Error creating student: {str(e)}")
         return jsonify({"error": "Failed to create student"}), 500
 
+@admin_bp.route('/students/import', methods=['POST'])
+@require_auth
+@require_admin
+def import_students():
+    """
+    Bulk-import students from CSV, NDJSON or a JSON array.
+
+    The format is taken from the Content-Type header. The body is streamed
+    to storage here; a background job parses and imports it, and its
+    result is the per-row report.
+    """
+    try:
+        batch_size = request.args.get('batch_size', type=int) or IMPORT_BATCH_SIZE
+        path = stage_student_import(request.stream, request.content_type)
+        return _job_accepted('import_students', path, request.content_type, min(batch_size, 1000))
+    except FileTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        logger.error(f"Validation error in student import: {str(e)}")
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error importing students: {str(e)}")
+        return jsonify({"error": "Failed to import students"}), 500
+
+@admin_bp.route('/submissions/grades', methods=['POST'])
+@require_auth
+@require_admin
+def grade_submissions():
+    """
+    Grade many submissions in one request.
+
+    Body: {"grades": [{"submission_id": ..., "grade": ..., "feedback": ...}]}.
+    Returns a per-entry report.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        grades = data.get('grades')
+        if not isinstance(grades, list) or not grades:
+            return jsonify({"error": "Body must be a JSON object with a non-empty 'grades' list"}), 400
+        if len(grades) > MAX_BATCH_GRADES:
+            return jsonify({"error": f"At most {MAX_BATCH_GRADES} grades per request"}), 400
+
+        report = grade_submissions_service(grades)
+        logger.info(f"Batch grading finished: {report['graded']} graded, {report['failed']} failed")
+        return jsonify(report), 200
+    except Exception as e:
+        logger.error(f"Error grading submissions: {str(e)}")
+        return jsonify({"error": "Failed to grade submissions"}), 500
+
+@admin_bp.route('/assignments/<assignment_id>/files', methods=['POST'])
+@require_auth
+@require_admin
+def upload_assignment_file_api(assignment_id):
+    """
+    Stream a file into the assignment's storage folder.
+
+    The request body is the raw file; its name comes from the X-File-Name
+    header (or ?filename=) and its type from Content-Type.
+    """
+    max_size_mb = current_app.config['MAX_FILE_SIZE_MB']
+    if request.content_length and request.content_length > max_size_mb * 1024 * 1024:
+        return jsonify({"error": f"File exceeds the maximum size of {max_size_mb} MB"}), 413
+    try:
+        file_row = upload_assignment_file(
+            assignment_id,
+            request.stream,
+            request.headers.get('X-File-Name') or request.args.get('filename'),
+            request.mimetype,
+            max_size_mb=max_size_mb
+        )
+        return jsonify(file_row), 201
+    except FileTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error uploading file for assignment {assignment_id}: {str(e)}")
+        return jsonify({"error": "Failed to upload file"}), 500
+
+@admin_bp.route('/files/gc', methods=['POST'])
+@require_auth
+@require_admin
+def collect_file_blobs():
+    """
+    Remove stored file contents no assignment file has referenced for the
+    grace period, and direct uploads that were never completed. Optional
+    body: ``{"grace_seconds", "limit"}``. Runs as a background job.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        grace_seconds = int(data.get('grace_seconds', BLOB_GC_GRACE_SECONDS))
+        limit = int(data.get('limit', BLOB_GC_BATCH_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'grace_seconds and limit must be integers'}), 400
+    if grace_seconds < 0 or not 1 <= limit <= 1000:
+        return jsonify({'error': 'grace_seconds must be >= 0 and limit between 1 and 1000'}), 400
+    try:
+        return _job_accepted('collect_file_blobs', grace_seconds, limit)
+    except Exception as e:
+        logger.error(f"Error collecting file blobs: {str(e)}")
+        return jsonify({'error': 'Failed to collect file blobs'}), 500
+
+@admin_bp.route('/deadlines/run', methods=['POST'])
+@require_auth
+@require_admin
+def run_deadlines():
+    """
+    Process every assignment deadline that has passed and is still pending,
+    e.g. from a cron job when the in-process scheduler is off.
+    """
+    try:
+        results = process_due_deadlines()
+        return jsonify({
+            'processed': len(results),
+            'late_marked': sum(row['late_marked'] for row in results),
+            'missing': sum(row['missing'] for row in results),
+            'assignments': results
+        }), 200
+    except Exception as e:
+        logger.error(f"Error running deadlines: {str(e)}")
+        return jsonify({'error': 'Failed to process deadlines'}), 500
+
+@admin_bp.route('/deadlines/status', methods=['GET'])
+@require_auth
+@require_admin
+def deadlines_status():
+    """State of this worker's deadline scheduler (only the leader loads deadlines)."""
+    return jsonify(get_scheduler_status()), 200
+
+@admin_bp.route('/change-feed/status', methods=['GET'])
+@require_auth
+@require_admin
+def change_feed_status():
+    """Cache invalidations this worker received from others, with their delay."""
+    return jsonify(get_change_feed_stats()), 200
+
+@admin_bp.route('/courses/<course_id>/assignments', methods=['POST'])
+@require_auth
+@require_admin
+def create_assignment_api(course_id):
+    """
+    Create an assignment with its files and links.
+
+    Body: ``{"title", "description"?, "assignment_type"?, "due_date"?,
+    "max_points"?, "files"?: [{"sha256", "file_name", "mime_type"?}],
+    "links"?: [{"url", "title"?}]}``. Files reference content uploaded
+    beforehand (POST /api/v1/files/upload-url without an assignment_id).
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "No data provided"}), 400
+    try:
+        assignment = create_assignment(
+            course_id,
+            data.get('title'),
+            data.get('description'),
+            data.get('assignment_type'),
+            due_date=data.get('due_date'),
+            max_points=data.get('max_points'),
+            files=data.get('files'),
+            links=data.get('links')
+        )
+        return jsonify(assignment), 201
+    except AssignmentNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error creating assignment in course {course_id}: {str(e)}")
+        return jsonify({"error": "Failed to create assignment"}), 500
+
+@admin_bp.route('/assignments/<assignment_id>', methods=['GET'])
+@require_auth
+@require_admin
+def get_assignment_api(assignment_id):
+    """Get an assignment with its files and links."""
+    try:
+        assignment = get_assignment_by_id(assignment_id)
+        if assignment:
+            return jsonify(assignment), 200
+        return jsonify({"error": "Assignment not found"}), 404
+    except Exception as e:
+        logger.error(f"Error getting assignment {assignment_id}: {str(e)}")
+        return jsonify({"error": "Failed to get assignment"}), 500
+
 @admin_bp.route('/courses/<course_id>/assignments/<assignment_id>', methods=['PUT'])
 @require_auth
 @require_admin
-def update_assignment(course_id, assignment_id):
-    """Update an existing assignment."""
+def update_assignment_api(course_id, assignment_id):
+    """
+    Update an assignment. Only the fields present change; ``files`` and
+    ``links``, when given, replace the current sets.
+    """
     try:
-        data = request.get_json()
-        if not data:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
             return jsonify({"error": "No data provided for update"}), 400
 
         logger.info(f"Attempting to update assignment {assignment_id} in course {course_id}")
-        # Assuming update_assignment takes assignment_id and data
         updated_assignment = update_assignment(assignment_id, data)
         return jsonify(updated_assignment), 200
 
+    except AssignmentNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
     except ValueError as e:
         logger.error(f"Validation error: {str(e)}")
         return jsonify({"error": str(e)}), 400
@@ -176,6 +460,20 @@ def update_assignment(course_id, assignment_id):
         logger.error(f"Error updating assignment: {str(e)}")
         return jsonify({"error": "Failed to update assignment"}), 500
 
+@admin_bp.route('/assignments/<assignment_id>', methods=['DELETE'])
+@require_auth
+@require_admin
+def delete_assignment_api(assignment_id):
+    """Delete an assignment with its files, links and submissions."""
+    try:
+        delete_assignment(assignment_id)
+        return jsonify({"message": "Assignment deleted successfully"}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error deleting assignment {assignment_id}: {str(e)}")
+        return jsonify({"error": "Failed to delete assignment"}), 500
+
 @admin_bp.route('/students/<student_id>', methods=['DELETE'])
 @require_auth
 @require_admin
@@ -190,6 +488,13 @@ def delete_student(student_id):
         logger.error(f"Error deleting student: {str(e)}")
         return jsonify({"error": "Failed to delete student"}), 500
 
+@admin_bp.route('/students/bulk-delete', methods=['POST'])
+@require_auth
+@require_admin
+def bulk_delete_students():
+    """Delete many students by id."""
+    return _bulk_delete('delete_students', 'students')
+
 @admin_bp.route('/students/<student_id>', methods=['GET'])
 @require_auth
 @require_admin
@@ -259,6 +564,28 @@ def update_student(student_id):
         logger.error(f"Route error: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+@admin_bp.route('/autocomplete/<kind>')
+@require_auth
+@require_admin
+def autocomplete_api(kind):
+    """
+    Typeahead for the pickers: ``kind`` is ``courses`` (by title) or
+    ``instructors`` (by name), ``?q=`` the typed text, ``?limit=`` at most 50.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 1 <= limit <= MAX_AUTOCOMPLETE_LIMIT:
+        return jsonify({'error': f"limit must be between 1 and {MAX_AUTOCOMPLETE_LIMIT}"}), 400
+    try:
+        return jsonify(autocomplete(kind, request.args.get('q'), limit=limit)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error autocompleting {kind}: {str(e)}")
+        return jsonify({'error': 'Failed to autocomplete'}), 500
+
 @admin_bp.route('/courses')
 @require_auth
 @require_admin
@@ -408,6 +735,13 @@ def delete_course(course_id):
         logger.error(f"Error deleting course: {str(e)}")
         return jsonify({"error": "Failed to delete course"}), 500
 
+@admin_bp.route('/courses/bulk-delete', methods=['POST'])
+@require_auth
+@require_admin
+def bulk_delete_courses():
+    """Delete many courses by id."""
+    return _bulk_delete('delete_courses', 'courses')
+
 @admin_bp.route('/instructors', methods=['GET'])
 @require_auth
 @require_admin
@@ -424,12 +758,11 @@ def get_instructors():
 @require_auth
 @require_admin
 def add_instructor():
-    """Create a new instructor."""
+    """Create a new instructor's auth account, then its record (background job)."""
     try:
         logger.info("Received instructor creation request")
         logger.info(f"Request Content-Type: {request.content_type}")
         logger.info(f"Request Headers: {dict(request.headers)}")
-        logger.info(f"Request Data: {request.get_data(as_text=True)}")
         
         if not request.is_json:
             logger.warning(f"Invalid content type: {request.content_type}")
@@ -447,7 +780,7 @@ def add_instructor():
                 'raw_data': raw_data
             }), 400
             
-        logger.info(f"Parsed JSON data: {data}")
+        logger.info(f"Parsed JSON data: {dict(data, password='***') if isinstance(data, dict) else data}")
         
         required_fields = ['name', 'email', 'phone', 'password']
         missing_fields = [field for field in required_fields if not data.get(field)]
@@ -458,9 +791,33 @@ def add_instructor():
                 'missing_fields': missing_fields
             }), 400
         
-        instructor = create_instructor_service(data)
-        logger.info("Successfully created instructor")
-        return jsonify(instructor), 201
+        # The auth account is created here so the password is never queued;
+        # a job records the instructor and keeps the row as its result. A
+        # retry with the same Idempotency-Key gets that job back.
+        profile = {field: data[field] for field in INSTRUCTOR_PROFILE_FIELDS}
+        idempotency_key = request.headers.get('Idempotency-Key')
+        try:
+            job = find_job('create_instructor', idempotency_key, [profile]) if idempotency_key else None
+        except IdempotencyKeyReused as e:
+            return jsonify({"error": str(e)}), 422
+        if job is not None:
+            return _job_response(job)
+
+        user_id = create_instructor_account_service(data)
+        try:
+            job, created = enqueue_job('create_instructor', user_id, profile,
+                                       idempotency_key=idempotency_key, request=[profile])
+        except Exception as e:
+            get_supabase_client().auth.admin.delete_user(user_id)
+            if isinstance(e, IdempotencyKeyReused):
+                return jsonify({"error": str(e)}), 422
+            raise
+        if created:
+            logger.info(f"Queued job {job['id']} (create_instructor)")
+        else:
+            # A concurrent retry queued its job first.
+            get_supabase_client().auth.admin.delete_user(user_id)
+        return _job_response(job)
     except ValueError as e:
         logger.warning(f"Validation error: {str(e)}")
         return jsonify({'error': str(e)}), 400
@@ -476,8 +833,17 @@ def delete_instructor(email):
     try:
         delete_instructor_service(email)
         return '', 204
+    except InstructorHasCoursesError as e:
+        return jsonify({'error': str(e)}), 409
     except ValueError as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
         logger.error(f"Error deleting instructor: {str(e)}")
         return jsonify({'error': 'حدث خطأ أثناء حذف المدرس'}), 500
+
+@admin_bp.route('/instructors/bulk-delete', methods=['POST'])
+@require_auth
+@require_admin
+def bulk_delete_instructors():
+    """Delete many instructors (and their auth users) by id."""
+    return _bulk_delete('delete_instructors', 'instructors')
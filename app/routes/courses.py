@@ -3,8 +3,9 @@ Public Courses API Routes
 -------------------------
 This module provides public API endpoints for browsing courses.
 """
-from flask import Blueprint, jsonify
-from app.services.courses_service import get_courses_service, get_course_by_id_service
+from flask import Blueprint, jsonify, request
+from app.services.courses_service import get_courses_service, get_course_by_id_service, get_courses_by_ids_service
+from app.services.course_search_service import search_courses, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,16 +14,48 @@ courses_bp = Blueprint('courses_api', __name__, url_prefix='/api/v1/courses')
 @courses_bp.route('/', methods=['GET'])
 def list_courses():
     """
-    Get a list of all available courses.
+    Get a list of all available courses, or with ``?ids=a,b,c`` just those
+    courses, in that order (unknown ids are left out).
     This is a public endpoint and does not require authentication.
     """
     try:
+        if 'ids' in request.args:
+            ids = [i.strip() for i in request.args['ids'].split(',') if i.strip()]
+            return jsonify(get_courses_by_ids_service(ids)), 200
         courses = get_courses_service()
         return jsonify(courses), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error getting courses: {str(e)}", exc_info=True)
         return jsonify({"error": "Failed to retrieve courses"}), 500
 
+@courses_bp.route('/search', methods=['GET'])
+def search_courses_api():
+    """
+    Search courses by title and description with ``?q=``, tolerating typos.
+    Best matches first, each with its ``rank`` and ``highlights``; paginated
+    with ``?limit=`` (max 100) and ``?offset=``, the total in X-Total-Count.
+    This is a public endpoint and does not require authentication.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_SEARCH_LIMIT))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if not 1 <= limit <= MAX_SEARCH_LIMIT or offset < 0:
+        return jsonify({'error': f"limit must be between 1 and {MAX_SEARCH_LIMIT} and offset >= 0"}), 400
+    try:
+        courses, total = search_courses(request.args.get('q'), limit=limit, offset=offset)
+        response = jsonify(courses)
+        response.headers['X-Total-Count'] = str(total)
+        return response, 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error searching courses: {str(e)}", exc_info=True)
+        return jsonify({"error": "Failed to search courses"}), 500
+
 @courses_bp.route('/<course_id>', methods=['GET'])
 def get_course(course_id):
     """
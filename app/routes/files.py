@@ -0,0 +1,114 @@
+"""
+File Transfer API Routes
+------------------------
+Signed URLs for uploading assignment files straight to storage and for
+downloading them, so the bytes never pass through the API workers.
+"""
+from flask import Blueprint, request, jsonify, g, current_app
+from app.middleware.auth import require_auth
+from app.services.upload_service import FileTooLargeError
+from app.services.signed_url_service import (
+    create_upload_url, complete_upload, get_download_url, get_download_urls,
+    FilePendingError, MAX_DOWNLOAD_URL_BATCH
+)
+import logging
+
+logger = logging.getLogger(__name__)
+files_bp = Blueprint('files_api', __name__, url_prefix='/api/v1/files')
+
+
+@files_bp.route('/upload-url', methods=['POST'])
+@require_auth
+def create_upload_url_api():
+    """
+    Get a signed URL to upload a file directly to storage.
+
+    Body: ``{"file_name", "size", "sha256", "content_type"?}`` plus
+    ``submission_id`` (students, own submission) or ``assignment_id`` (admins).
+    Admins may leave both out to store content first and reference it by
+    sha256 when creating an assignment.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        result = create_upload_url(
+            g.user['user_id'],
+            bool(g.user.get('isAdmin')),
+            data.get('file_name'),
+            data.get('size'),
+            data.get('sha256'),
+            content_type=data.get('content_type'),
+            assignment_id=data.get('assignment_id'),
+            submission_id=data.get('submission_id'),
+            max_size_mb=current_app.config['MAX_FILE_SIZE_MB']
+        )
+        return jsonify(result), 200
+    except FileTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error creating upload URL: {str(e)}")
+        return jsonify({"error": "Failed to create upload URL"}), 500
+
+
+@files_bp.route('/complete', methods=['POST'])
+@require_auth
+def complete_upload_api():
+    """Register a directly uploaded file. Body: ``{"ticket"}``."""
+    data = request.get_json(silent=True) or {}
+    try:
+        file_row = complete_upload(g.user['user_id'], data.get('ticket'),
+                                   max_size_mb=current_app.config['MAX_FILE_SIZE_MB'])
+        return jsonify(file_row), 201
+    except FileTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error completing upload: {str(e)}")
+        return jsonify({"error": "Failed to complete upload"}), 500
+
+
+@files_bp.route('/<file_id>/download-url', methods=['GET'])
+@require_auth
+def get_download_url_api(file_id):
+    """Get a signed download URL for a file (``?inline=1`` to open in place)."""
+    try:
+        result = get_download_url(file_id, g.user['user_id'], bool(g.user.get('isAdmin')),
+                                  attachment=request.args.get('inline') not in ('1', 'true'))
+        return jsonify(result), 200
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except FilePendingError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error getting download URL for file {file_id}: {str(e)}")
+        return jsonify({"error": "Failed to get download URL"}), 500
+
+
+@files_bp.route('/download-urls', methods=['POST'])
+@require_auth
+def get_download_urls_api():
+    """Get signed download URLs for several files. Body: ``{"file_ids": [...]}``."""
+    data = request.get_json(silent=True) or {}
+    file_ids = data.get('file_ids')
+    if not isinstance(file_ids, list) or not file_ids:
+        return jsonify({"error": "file_ids must be a non-empty list"}), 400
+    if len(file_ids) > MAX_DOWNLOAD_URL_BATCH:
+        return jsonify({"error": f"At most {MAX_DOWNLOAD_URL_BATCH} files per request"}), 400
+    try:
+        urls = get_download_urls([str(i) for i in file_ids], g.user['user_id'], bool(g.user.get('isAdmin')))
+        return jsonify(urls), 200
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error getting download URLs: {str(e)}")
+        return jsonify({"error": "Failed to get download URLs"}), 500
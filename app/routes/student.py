@@ -1,12 +1,15 @@
 """Student routes module."""
 
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from app.middleware.auth import require_auth
 from app.services.assignment_service import (
-    get_course_assignments,
+    get_student_course_assignments,
     submit_assignment,
-    get_student_progress
+    get_student_progress,
+    DEFAULT_STUDENT_ASSIGNMENTS_PAGE,
+    MAX_STUDENT_ASSIGNMENTS_PAGE
 )
+from app.services.upload_service import upload_submission_file, FileTooLargeError
 from app.services.student_service import get_student_profile, update_student_profile, enroll_student_in_course, get_student_courses
 import logging
 
@@ -83,10 +86,25 @@ def list_student_courses():
 @student_bp.route('/assignments/<course_id>')
 @require_auth
 def get_assignments_api(course_id):
-    """Get assignments for a course (API endpoint)."""
+    """
+    Get a course's assignments with the student's submission status, grade
+    and due state, soonest due first. Paginated with ``?limit=`` (max 200)
+    and ``?offset=``; the total is in X-Total-Count.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_STUDENT_ASSIGNMENTS_PAGE))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if not 1 <= limit <= MAX_STUDENT_ASSIGNMENTS_PAGE or offset < 0:
+        return jsonify({'error': f"limit must be between 1 and {MAX_STUDENT_ASSIGNMENTS_PAGE} and offset >= 0"}), 400
     try:
-        assignments = get_course_assignments(course_id)
-        return jsonify(assignments), 200
+        assignments, total = get_student_course_assignments(g.user['user_id'], course_id, limit=limit, offset=offset)
+        response = jsonify(assignments)
+        response.headers['X-Total-Count'] = str(total)
+        return response, 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         logger.error(f"Error getting assignments: {str(e)}")
         return jsonify({'error': 'Failed to get assignments'}), 500
@@ -109,10 +127,44 @@ def submit_assignment_api():
             submission_text=data['submission_text']
         )
         return jsonify(submission), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         logger.error(f"Error submitting assignment: {str(e)}")
         return jsonify({'error': 'Failed to submit assignment'}), 500
 
+@student_bp.route('/submissions/<submission_id>/files', methods=['POST'])
+@require_auth
+def upload_submission_file_api(submission_id):
+    """
+    Stream a file attached to one of the student's submissions.
+
+    The request body is the raw file; its name comes from the X-File-Name
+    header (or ?filename=) and its type from Content-Type.
+    """
+    max_size_mb = current_app.config['MAX_FILE_SIZE_MB']
+    if request.content_length and request.content_length > max_size_mb * 1024 * 1024:
+        return jsonify({'error': f"File exceeds the maximum size of {max_size_mb} MB"}), 413
+    try:
+        file_row = upload_submission_file(
+            submission_id,
+            g.user['user_id'],
+            request.stream,
+            request.headers.get('X-File-Name') or request.args.get('filename'),
+            request.mimetype,
+            max_size_mb=max_size_mb
+        )
+        return jsonify(file_row), 201
+    except FileTooLargeError as e:
+        return jsonify({'error': str(e)}), 413
+    except PermissionError as e:
+        return jsonify({'error': str(e)}), 403
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error uploading submission file: {str(e)}")
+        return jsonify({'error': 'Failed to upload file'}), 500
+
 @student_bp.route('/progress/<course_id>')
 @require_auth
 def get_progress_api(course_id):
@@ -120,8 +172,10 @@ def get_progress_api(course_id):
     try:
         # Get user_id from the g object populated by @require_auth
         student_id = g.user['user_id']
-        progress = get_student_progress(course_id, student_id)
+        progress = get_student_progress(student_id=student_id, course_id=course_id)
         return jsonify(progress if progress else {}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         logger.error(f"Error getting progress: {str(e)}")
         return jsonify({'error': 'Failed to get progress'}), 500
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+Resumable Upload API Routes
+---------------------------
+Chunked uploads of assignment and submission files that survive dropped
+connections. See app.services.resumable_upload_service for the protocol.
+"""
+from flask import Blueprint, request, jsonify, g, current_app
+from werkzeug.exceptions import ClientDisconnected
+from app.middleware.auth import require_auth
+from app.services.upload_service import FileTooLargeError
+from app.services.resumable_upload_service import (
+    create_upload, get_upload, append_chunk, cancel_upload, parse_checksum_header,
+    UploadOffsetMismatchError, UploadNotFoundError, ChunkChecksumError
+)
+import logging
+
+logger = logging.getLogger(__name__)
+uploads_bp = Blueprint('uploads_api', __name__, url_prefix='/api/v1/uploads')
+
+
+def _status_response(status, code):
+    response = jsonify(status)
+    response.status_code = code
+    response.headers['Upload-Offset'] = str(status['offset'])
+    response.headers['Upload-Length'] = str(status['size'])
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@uploads_bp.route('', methods=['POST'])
+@require_auth
+def create_upload_api():
+    """
+    Start a resumable upload.
+
+    Body: ``{"file_name", "size", "content_type"?}`` plus ``submission_id``
+    (students, own submission) or ``assignment_id`` (admins).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        status = create_upload(
+            g.user['user_id'],
+            data.get('file_name'),
+            data.get('size'),
+            content_type=data.get('content_type'),
+            assignment_id=data.get('assignment_id'),
+            submission_id=data.get('submission_id'),
+            is_admin=bool(g.user.get('isAdmin')),
+            max_size_mb=current_app.config['MAX_FILE_SIZE_MB']
+        )
+        response = _status_response(status, 201)
+        response.headers['Location'] = f"{uploads_bp.url_prefix}/{status['upload_id']}"
+        return response
+    except FileTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error creating upload: {str(e)}")
+        return jsonify({"error": "Failed to create upload"}), 500
+
+
+@uploads_bp.route('/<upload_id>', methods=['GET'])
+@require_auth
+def get_upload_api(upload_id):
+    """Return the current offset of an upload (also answers HEAD)."""
+    try:
+        return _status_response(get_upload(upload_id, g.user['user_id']), 200)
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@uploads_bp.route('/<upload_id>', methods=['PATCH'])
+@require_auth
+def append_chunk_api(upload_id):
+    """
+    Append the raw request body at the offset given in ``Upload-Offset``.
+
+    ``Upload-Checksum: sha256 <base64>`` is verified when present. Returns
+    204 with the new ``Upload-Offset``, or 201 with the assignment_files row
+    once the file is complete. A wrong offset gets 409 with the current one.
+    An empty PATCH at the final offset retries finishing a complete file.
+    """
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({"error": "Upload-Offset header is required"}), 400
+    try:
+        checksum = parse_checksum_header(request.headers.get('Upload-Checksum'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        status, file_row = append_chunk(upload_id, g.user['user_id'], offset, request.stream, checksum)
+        if file_row:
+            response = jsonify(file_row)
+            response.status_code = 201
+        else:
+            response = current_app.response_class(status=204)
+        response.headers['Upload-Offset'] = str(status['offset'])
+        return response
+    except UploadOffsetMismatchError as e:
+        response = jsonify({"error": str(e), "offset": e.offset})
+        response.status_code = 409
+        response.headers['Upload-Offset'] = str(e.offset)
+        return response
+    except ChunkChecksumError as e:
+        return jsonify({"error": str(e)}), 422
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except UploadNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ClientDisconnected:
+        # Bytes received so far are kept unless a checksum was sent.
+        return jsonify({"error": "Connection closed before the chunk was complete"}), 400
+    except Exception as e:
+        logger.error(f"Error writing chunk for upload {upload_id}: {str(e)}")
+        return jsonify({"error": "Failed to write chunk"}), 500
+
+
+@uploads_bp.route('/<upload_id>', methods=['DELETE'])
+@require_auth
+def cancel_upload_api(upload_id):
+    """Abandon an upload and discard its chunks."""
+    try:
+        cancel_upload(upload_id, g.user['user_id'])
+        return '', 204
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
@@ -0,0 +1,23 @@
+"""
+Host-local paths shared by the processes of one deployment.
+
+Sockets and lock files live in the system temp directory under a name
+derived from the deployment (the code's location and its Supabase
+project), so two deployments on the same host never share them.
+"""
+import hashlib
+import os
+import tempfile
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def deployment_id():
+    """A short stable id for this checkout and Supabase project."""
+    key = f"{APP_ROOT}|{os.getenv('SUPABASE_URL', '')}"
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+def host_path(name):
+    """``<tmp>/elearning-<deployment id>-<name>``."""
+    return os.path.join(tempfile.gettempdir(), f"elearning-{deployment_id()}-{name}")
@@ -6,49 +6,105 @@ dashboard statistics, student management, and instructor management.
 
 Functions:
     get_dashboard_data_service: Retrieve dashboard statistics
+    get_dashboard_data_service_async: Retrieve dashboard statistics (asyncio)
+    get_dashboard_data_cached: Dashboard statistics through the snapshot cache
+    get_dashboard_data_cached_async: Cached dashboard statistics (asyncio)
+    configure_dashboard_cache: Set the dashboard cache TTLs and backend
+    reconcile_dashboard_statistics_service: Verify and repair dashboard counters
     get_students_service: Get all students with their course information
+    get_students_by_ids_service: Get students by id list, in one query
     create_student_service: Create new student
+    bulk_import_students_service: Import many students in batched inserts
+    stage_student_import: Stream an import body to storage for a job
+    import_staged_students_service: Import a staged body (background job)
     update_student_service: Update student information
     delete_student_service: Remove student from system
+    delete_students_service: Remove many students by id
     get_instructors_service: Get list of all instructors
     create_instructor_service: Create a new instructor
+    create_instructor_account_service: Create a new instructor's auth account
+    create_instructor_record_service: Record an instructor for its account (background job)
     delete_instructor_service: Delete an instructor
+    delete_instructors_service: Delete many instructors by id
 """
 
 from app.database.supabase_db import get_supabase_client
+from app.database.supabase_async import get_async_supabase_client
+from app.database.snapshot_cache import SnapshotCache, make_backend, DEFAULT_TTL, DEFAULT_STALE_TTL
+from app.database.single_flight import AsyncSingleFlight
+from app.database.change_feed import publish, subscribe
+from app.services.bulk_delete_service import delete_by_ids_rpc, normalize_ids
+from app.services.signed_url_service import STAGING_PREFIX
+from app.services.upload_service import (
+    ASSIGNMENTS_BUCKET, UPLOAD_CHUNK_SIZE, UPLOAD_SPOOL_SIZE, FileTooLargeError, stream_to_storage
+)
+from postgrest.exceptions import APIError
+import httpx
+import asyncio
+import csv
+import io
+import json
 import logging
+import tempfile
+import uuid
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+DASHBOARD_STATISTICS_SELECT = 'key, value'
+DASHBOARD_REGISTRATIONS_SELECT = 'id, created_at, student:students(id, name, email), course:courses(id, title)'
+# Use LEFT join to include students without enrollments
+STUDENT_SELECT = 'id, name, email, phone, status, created_at, enrollments!left(id, courses!inner(id, title))'
+# Ids accepted by one batch read.
+MAX_BATCH_IDS = 100
+
+
+class InstructorHasCoursesError(ValueError):
+    """The instructor still owns courses, which must be deleted or reassigned first."""
+
+
+def _build_dashboard_payload(statistics_res, recent_students_res, recent_courses_res, recent_registrations):
+    """Shape dashboard query results into the response payload."""
+    # Counters are maintained by triggers (see the dashboard_statistics migration);
+    # a missing row means nothing has been counted yet.
+    counters = {row['key']: row['value'] for row in (statistics_res.data or [])}
+    total_students = counters.get('students', 0)
+    total_courses = counters.get('courses', 0)
+    total_instructors = counters.get('instructors', 0)
+
+    # Safely access data attribute
+    recent_students = recent_students_res.data if recent_students_res.data else []
+    recent_courses = recent_courses_res.data if recent_courses_res.data else []
+
+    return {
+        'statistics': {
+            'total_students': total_students,
+            'total_courses': total_courses,
+            'total_instructors': total_instructors
+        },
+        'recent_activities': {
+            'students': recent_students,
+            'courses': recent_courses
+        },
+        'recent_registrations': recent_registrations
+    }
+
 def get_dashboard_data_service():
     """Get statistics and data for the admin dashboard."""
     try:
         supabase_client = get_supabase_client() # Uses Service Key now
 
-        # Get counts using supabase - select only 'id' for counting
-        students_count_res = supabase_client.from_('students').select('id', count='exact').execute()
-        courses_count_res = supabase_client.from_('courses').select('id', count='exact').execute()
-        instructors_count_res = supabase_client.from_('instructors').select('id', count='exact').execute()
-
-        # Safely access count attribute
-        total_students = students_count_res.count if hasattr(students_count_res, 'count') else 0
-        total_courses = courses_count_res.count if hasattr(courses_count_res, 'count') else 0
-        total_instructors = instructors_count_res.count if hasattr(instructors_count_res, 'count') else 0
-
+        # Read the trigger-maintained counters instead of counting each table
+        statistics_res = supabase_client.from_('dashboard_statistics').select(DASHBOARD_STATISTICS_SELECT).execute()
 
         # Get recent activities (last 5 items) using supabase
         recent_students_res = supabase_client.from_('students').select('*').order('created_at', desc=True).limit(5).execute()
         recent_courses_res = supabase_client.from_('courses').select('*').order('created_at', desc=True).limit(5).execute()
 
-        # Safely access data attribute
-        recent_students = recent_students_res.data if recent_students_res.data else []
-        recent_courses = recent_courses_res.data if recent_courses_res.data else []
-
         # Fetch recent registrations (enrollments) with error handling
         try:
             recent_registrations_res = supabase_client.from_('enrollments').select(
-                'id, created_at, student:students(id, name, email), course:courses(id, title)'
+                DASHBOARD_REGISTRATIONS_SELECT
             ).order('created_at', desc=True).limit(5).execute()
 
             recent_registrations = recent_registrations_res.data if recent_registrations_res.data else []
@@ -56,33 +112,126 @@ def get_dashboard_data_service():
             logger.error(f"Error fetching recent registrations: {str(enroll_err)}")
             recent_registrations = []
 
-        return {
-            'statistics': {
-                'total_students': total_students,
-                'total_courses': total_courses,
-                'total_instructors': total_instructors
-            },
-            'recent_activities': {
-                'students': recent_students,
-                'courses': recent_courses
-            },
-            'recent_registrations': recent_registrations
-        }
+        return _build_dashboard_payload(
+            statistics_res, recent_students_res, recent_courses_res, recent_registrations
+        )
     except Exception as e:
         logger.error(f"Error getting dashboard data: {str(e)}")
         raise
 
+async def get_dashboard_data_service_async():
+    """Async variant of get_dashboard_data_service; runs all queries concurrently."""
+    try:
+        supabase_client = await get_async_supabase_client()
+
+        async def fetch_recent_registrations():
+            try:
+                res = await supabase_client.from_('enrollments').select(
+                    DASHBOARD_REGISTRATIONS_SELECT
+                ).order('created_at', desc=True).limit(5).execute()
+                return res.data if res.data else []
+            except Exception as enroll_err:
+                logger.error(f"Error fetching recent registrations: {str(enroll_err)}")
+                return []
+
+        results = await asyncio.gather(
+            supabase_client.from_('dashboard_statistics').select(DASHBOARD_STATISTICS_SELECT).execute(),
+            supabase_client.from_('students').select('*').order('created_at', desc=True).limit(5).execute(),
+            supabase_client.from_('courses').select('*').order('created_at', desc=True).limit(5).execute(),
+            fetch_recent_registrations()
+        )
+        return _build_dashboard_payload(*results)
+    except Exception as e:
+        logger.error(f"Error getting dashboard data: {str(e)}")
+        raise
+
+_dashboard_cache = SnapshotCache('admin:dashboard', get_dashboard_data_service)
+
+def configure_dashboard_cache(ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL, redis_url=None):
+    """
+    Configure the shared dashboard snapshot.
+
+    Snapshots younger than ``ttl`` seconds are served as is; for ``stale_ttl``
+    seconds after that they are served while one background refresh runs.
+    With ``redis_url`` the snapshot is shared across workers. A ``ttl`` of 0
+    disables the cache.
+    """
+    global _dashboard_cache
+    if ttl <= 0:
+        _dashboard_cache = None
+        return None
+    _dashboard_cache = SnapshotCache(
+        'admin:dashboard', get_dashboard_data_service,
+        ttl=ttl, stale_ttl=stale_ttl, backend=make_backend(redis_url)
+    )
+    return _dashboard_cache
+
+def _on_dashboard_change(ids, remote):
+    # A snapshot shared through Redis was already dropped by the writer.
+    if _dashboard_cache is None or (remote and _dashboard_cache.backend.shared):
+        return
+    _dashboard_cache.invalidate()
+
+for _topic in ('students', 'courses', 'instructors', 'enrollments'):
+    subscribe(_topic, _on_dashboard_change)
+
+def get_dashboard_data_cached():
+    """Get the dashboard payload, served from the snapshot cache when possible."""
+    if _dashboard_cache is None:
+        return get_dashboard_data_service()
+    return _dashboard_cache.get()
+
+_dashboard_async_flights = AsyncSingleFlight()
+
+async def _rebuild_dashboard_async(cache):
+    data = await get_dashboard_data_service_async()
+    if cache.backend.shared:
+        await asyncio.to_thread(cache.set, data)
+    else:
+        cache.set(data)
+    return data
+
+async def get_dashboard_data_cached_async():
+    """
+    Async variant of get_dashboard_data_cached; a miss is rebuilt once on the
+    event loop however many pollers are waiting for it.
+    """
+    cache = _dashboard_cache
+    if cache is None:
+        return await get_dashboard_data_service_async()
+    # Redis reads block; process memory does not.
+    data = await asyncio.to_thread(cache.peek) if cache.backend.shared else cache.peek()
+    if data is None:
+        data = await _dashboard_async_flights.do(cache.key, _rebuild_dashboard_async, cache)
+    return data
+
+def reconcile_dashboard_statistics_service():
+    """Recount the dashboard counters and repair any drift.
+
+    Returns a dict of the counters that were wrong, keyed by counter name,
+    with their stored and actual values. An empty dict means no drift.
+    """
+    try:
+        supabase_client = get_supabase_client()
+        response = supabase_client.rpc('reconcile_dashboard_statistics', {}).execute()
+        drift = response.data or {}
+        if _dashboard_cache is not None:
+            _dashboard_cache.invalidate()
+        if drift:
+            logger.warning(f"Dashboard counters drifted and were repaired: {drift}")
+        return drift
+    except Exception as e:
+        logger.error(f"Error reconciling dashboard statistics: {str(e)}")
+        raise RuntimeError(f"Failed to reconcile dashboard statistics: {str(e)}")
+
 def get_students_service():
     """Get list of all students with their course information."""
     try:
         supabase_client = get_supabase_client()
         students = []
         try:
-            # Use LEFT join to include students without enrollments
             # Select specific columns for clarity and potentially better performance
-            response = supabase_client.from_('students').select(
-                'id, name, email, phone, status, created_at, enrollments!left(id, courses!inner(id, title))'
-            ).execute()
+            response = supabase_client.from_('students').select(STUDENT_SELECT).execute()
 
             if response.data is None:
                  logger.warning("Supabase query for students returned None data.")
@@ -93,30 +242,7 @@ def get_students_service():
             students_data = response.data
             
             for student_data in students_data:
-                student = {
-                    'id': student_data['id'],
-                    'name': student_data['name'],
-                    'email': student_data['email'],
-                    'phone': student_data['phone'],
-                    'status': student_data['status'],
-                    'created_at': student_data.get('created_at'),
-                }
-                
-                enrollments = student_data.get('enrollments', [])
-                if enrollments:
-                    first_enrollment = enrollments[0]
-                    course_data = first_enrollment.get('courses')
-                    if course_data:
-                         student['course'] = {
-                             'id': course_data.get('id'),
-                             'title': course_data.get('title')
-                         }
-                    else:
-                         student['course'] = None
-                else:
-                    student['course'] = None
-
-                students.append(student)
+                students.append(_student_summary(student_data))
                 
             return students
         except Exception as e:
@@ -126,8 +252,70 @@ def get_students_service():
         logger.error(f"Error in get_students_service: {e}")
         raise
 
+def _student_summary(student_data):
+    """A student row as listed to admins, with their first enrolled course."""
+    student = {
+        'id': student_data['id'],
+        'name': student_data['name'],
+        'email': student_data['email'],
+        'phone': student_data['phone'],
+        'status': student_data['status'],
+        'created_at': student_data.get('created_at'),
+    }
+
+    enrollments = student_data.get('enrollments', [])
+    if enrollments:
+        first_enrollment = enrollments[0]
+        course_data = first_enrollment.get('courses')
+        if course_data:
+             student['course'] = {
+                 'id': course_data.get('id'),
+                 'title': course_data.get('title')
+             }
+        else:
+             student['course'] = None
+    else:
+        student['course'] = None
+    return student
+
+def get_students_by_ids_service(student_ids):
+    """
+    Get the students with the given ids, as listed by get_students_service,
+    in the order asked for and with one query. Duplicates are returned once
+    and unknown or malformed ids are left out.
+    """
+    try:
+        if not student_ids:
+            raise ValueError("ids must list at least one student id")
+        if len(student_ids) > MAX_BATCH_IDS:
+            raise ValueError(f"At most {MAX_BATCH_IDS} ids can be requested at once")
+        student_ids, _ = normalize_ids(student_ids)
+        if not student_ids:
+            return []
+
+        supabase_client = get_supabase_client()
+        response = supabase_client.from_('students').select(STUDENT_SELECT).in_('id', student_ids).execute()
+        students = {row['id']: _student_summary(row) for row in response.data or []}
+        return [students[student_id] for student_id in student_ids if student_id in students]
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting students by id: {str(e)}")
+        raise RuntimeError(f"Failed to get students: {str(e)}")
+
+def _raise_for_rpc_error(e):
+    """Map 'not found' errors raised by the admin RPCs (ERRCODE P0002) to ValueError."""
+    if isinstance(e, APIError) and e.code == 'P0002':
+        raise ValueError(e.message) from e
+    raise e
+
 def create_student_service(data):
-    """Create a new student."""
+    """
+    Create a new student.
+
+    One round trip: the admin_create_student RPC inserts the student, enrolls
+    it in ``course_id`` when given, and returns the row with its course.
+    """
     try:
         required_fields = ['name', 'email', 'phone']
         missing_fields = [field for field in required_fields if not data.get(field)]
@@ -135,74 +323,40 @@ def create_student_service(data):
             raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
 
         supabase_client = get_supabase_client()
-        
-        student_data = {
-            'name': data['name'],
-            'email': data['email'],
-            'phone': data['phone'],
-            'status': 'active',
-            'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
-        }
-
-        insert_response = supabase_client.from_('students').insert(student_data).execute()
-
-        if hasattr(insert_response, 'error') and insert_response.error:
-             logger.error(f"Supabase error during student insert: {insert_response.error.message}")
-             raise Exception(f"Failed to insert student record: {insert_response.error.message}")
-        if not insert_response.data:
-             logger.error(f"Student insert seemed successful but no data returned. Response: {insert_response}")
-             raise Exception("Failed to retrieve student data after creation (no data in insert response).")
-
-        if not isinstance(insert_response.data, list) or not insert_response.data:
-             logger.error(f"Unexpected data format in insert response: {insert_response.data}")
-             raise Exception("Unexpected response format after student insert.")
-
-        created_student_partial = insert_response.data[0]
-        created_student_id = created_student_partial.get('id')
-        if not created_student_id:
-             logger.error(f"Could not find 'id' in insert response data: {created_student_partial}")
-             raise Exception("Could not determine created student ID.")
-
-        select_response = supabase_client.from_('students').select('*').eq('id', created_student_id).single().execute()
-
-        if hasattr(select_response, 'error') and select_response.error:
-             logger.error(f"Supabase error selecting student after insert: {select_response.error.message}")
-             raise Exception(f"Failed to select student record after creation: {select_response.error.message}")
-        if not select_response.data:
-             logger.error(f"Could not select student record (ID: {created_student_id}) after successful insert.")
-             raise Exception("Failed to retrieve full student record after creation.")
-
-        created_student = select_response.data
-        
-        if 'course_id' in data:
-            try:
-                course_response = supabase_client.from_('courses').select('title').eq('id', data['course_id']).execute()
-                if not course_response.data:
-                    raise ValueError("Invalid course_id")
-                    
-                course_title = course_response.data[0].get('title', 'Unknown Course')
-                
-                enrollment_data = {
-                    'student_id': created_student['id'],
-                    'course_id': data['course_id'],
-                    'enrolled_at': datetime.utcnow().isoformat(),
-                    'status': 'active',
-                    'course_title': course_title
-                }
-                
-                enrollment_response = supabase_client.from_('enrollments').insert(enrollment_data).execute()
-                if enrollment_response.error:
-                    raise Exception(enrollment_response.error.message)
-                    
-                created_student['course'] = {
-                    'id': data['course_id'],
-                    'title': course_title
-                }
-                
-            except Exception as e:
-                logger.warning(f"Course enrollment failed but student created: {str(e)}")
+        course_id = data.get('course_id') or None
+        if course_id:
+            valid, _ = normalize_ids([course_id])
+            if not valid:
+                # Like an unknown course: the student is still created.
+                logger.warning(f"Course enrollment skipped but student created: Invalid course_id {course_id}")
+                course_id = None
+            else:
+                course_id = valid[0]
 
+        try:
+            response = supabase_client.rpc('admin_create_student', {
+                'p_name': data['name'],
+                'p_email': data['email'],
+                'p_phone': data['phone'],
+                'p_course_id': course_id
+            }).execute()
+        except APIError as e:
+            logger.error(f"Supabase error during student insert: {e.message}")
+            raise Exception(f"Failed to insert student record: {e.message}")
+
+        created_student = response.data
+        if not created_student or not created_student.get('id'):
+            logger.error(f"Student insert seemed successful but no data returned. Response: {response}")
+            raise Exception("Failed to retrieve student data after creation (no data in insert response).")
+
+        if course_id and not created_student.get('course'):
+            logger.warning(f"Course enrollment failed but student created: Invalid course_id {course_id}")
+        if not course_id:
+            created_student.pop('course', None)
+
+        publish('students', [created_student['id']])
+        if created_student.get('course'):
+            publish('enrollments', [created_student['id']])
         return created_student
 
     except ValueError as e:
@@ -212,8 +366,290 @@ def create_student_service(data):
         logger.error(f"Error creating student: {str(e)}")
         raise RuntimeError(f"Failed to create student: {str(e)}")
 
+IMPORT_BATCH_SIZE = 500
+IMPORT_CONTENT_TYPES = ('text/csv', 'application/csv', 'application/x-ndjson', 'application/jsonl',
+                        'application/x-jsonlines', 'application/json')
+MAX_IMPORT_SIZE_MB = 50
+IMPORT_DOWNLOAD_URL_TTL = 300
+
+# Whether the existing_student_emails RPC is installed: None until the first
+# import finds out, False on a database without it (e.g. the local Supabase
+# stand-in), where emails are matched with ilike and compared here.
+_email_lookup_sql = None
+
+
+def parse_import_rows(stream, content_type):
+    """
+    Yield student dicts from an uploaded import body.
+
+    ``stream`` is a binary file-like object. CSV (with a header row) and NDJSON
+    are read line by line; a JSON array is decoded in one piece. Rows that
+    cannot be parsed are yielded as ``{'_error': message}`` so they still get
+    a line in the import report.
+    """
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    if mimetype in ('text/csv', 'application/csv'):
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        for row in csv.DictReader(text):
+            yield {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+    elif mimetype in ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines'):
+        for line in io.TextIOWrapper(stream, encoding='utf-8'):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield {'_error': f"Invalid JSON: {str(e)}"}
+                continue
+            yield row if isinstance(row, dict) else {'_error': "Each line must be a JSON object"}
+    elif mimetype == 'application/json':
+        rows = json.load(stream)
+        if not isinstance(rows, list):
+            raise ValueError("JSON import body must be an array of student objects")
+        for row in rows:
+            yield row if isinstance(row, dict) else {'_error': "Each item must be a JSON object"}
+    else:
+        raise ValueError("Unsupported import format. Use text/csv, application/x-ndjson or application/json")
+
+
+def stage_student_import(stream, content_type):
+    """
+    Stream an import body to a ``staging/`` object in storage, where any
+    job worker can read it, and return its path. Only the format is checked
+    here; rows are parsed by the job.
+    """
+    if (content_type or '').split(';')[0].strip().lower() not in IMPORT_CONTENT_TYPES:
+        raise ValueError("Unsupported import format. Use text/csv, application/x-ndjson or application/json")
+    path = f"{STAGING_PREFIX}/import-{uuid.uuid4().hex}"
+    try:
+        stored = stream_to_storage(stream, path, content_type, MAX_IMPORT_SIZE_MB * 1024 * 1024)
+    except FileTooLargeError:
+        raise
+    except Exception as e:
+        logger.error(f"Error staging student import: {str(e)}")
+        raise RuntimeError(f"Failed to stage student import: {str(e)}")
+    logger.info(f"Staged student import of {stored['size']} bytes at {path}")
+    return path
+
+
+def import_staged_students_service(path, content_type, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Background job behind POST /admin/students/import: spool the staged
+    body from storage to a temporary file and import it with
+    bulk_import_students_service, parsing rows as they are read. The staged
+    object is removed once the import is done.
+    """
+    storage = get_supabase_client().storage.from_(ASSIGNMENTS_BUCKET)
+    url = storage.create_signed_url(path, IMPORT_DOWNLOAD_URL_TTL)['signedURL']
+    with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE) as spool:
+        with httpx.stream('GET', url, timeout=30) as response:
+            if response.status_code in (400, 404):
+                raise ValueError("The import body is no longer in storage.")
+            response.raise_for_status()
+            for data in response.iter_bytes(UPLOAD_CHUNK_SIZE):
+                spool.write(data)
+        spool.seek(0)
+        report = bulk_import_students_service(parse_import_rows(spool, content_type), batch_size)
+    try:
+        storage.remove([path])
+    except Exception as e:
+        # Left for the staged upload purge.
+        logger.warning(f"Could not remove staged import {path}: {str(e)}")
+    return report
+
+
+def _validate_import_row(row, seen_emails):
+    """Return ``(student_data, course_id, error)`` for one import row."""
+    if '_error' in row:
+        return None, None, row['_error']
+    missing_fields = [field for field in ('name', 'email', 'phone') if not str(row.get(field) or '').strip()]
+    if missing_fields:
+        return None, None, f"Missing required fields: {', '.join(missing_fields)}"
+
+    email = str(row['email']).strip().lower()
+    if '@' not in email:
+        return None, None, f"Invalid email: {row['email']}"
+    if email in seen_emails:
+        return None, None, f"Duplicate email in import: {email}"
+    seen_emails.add(email)
+
+    course_id = str(row.get('course_id') or '').strip() or None
+    if course_id:
+        try:
+            course_id = str(uuid.UUID(course_id))
+        except ValueError:
+            return None, None, f"Invalid course_id: {course_id}"
+
+    now = datetime.utcnow().isoformat()
+    student_data = {
+        'name': str(row['name']).strip(),
+        'email': email,
+        'phone': str(row['phone']).strip(),
+        'status': 'active',
+        'created_at': now,
+        'updated_at': now
+    }
+    return student_data, course_id, None
+
+
+def _existing_emails(supabase_client, emails):
+    """Return which of ``emails`` (lowercase) belong to a student, ignoring case."""
+    global _email_lookup_sql
+    if _email_lookup_sql is not False:
+        try:
+            response = supabase_client.rpc('existing_student_emails', {'p_emails': emails}).execute()
+            _email_lookup_sql = True
+            return {email.lower() for email in response.data or []}
+        except APIError as e:
+            if e.code != 'PGRST202':
+                raise
+            logger.warning("existing_student_emails is not installed; matching import emails with ilike")
+            _email_lookup_sql = False
+    # ilike treats '_' as a wildcard, so keep only exact (case-folded) matches.
+    quoted = (email.replace('\\', '\\\\').replace('"', '\\"') for email in emails)
+    candidates = ','.join(f'email.ilike."{email}"' for email in quoted)
+    response = supabase_client.from_('students').select('email').or_(candidates).execute()
+    wanted = set(emails)
+    return {r['email'].lower() for r in response.data or [] if r['email'] and r['email'].lower() in wanted}
+
+
+def _fail_rows(rows, results, error):
+    for row_number, student, _ in rows:
+        results[row_number] = {'row': row_number, 'status': 'error', 'email': student['email'], 'error': error}
+
+
+def _import_batch(supabase_client, batch, course_titles, results):
+    """Insert one batch of validated rows: at most four round trips."""
+    emails = [student['email'] for _, student, _ in batch]
+    try:
+        existing = _existing_emails(supabase_client, emails)
+    except Exception as e:
+        # Earlier batches are already in; report this one and carry on.
+        logger.error(f"Duplicate email check failed for an import batch: {str(e)}")
+        _fail_rows(batch, results, f"Failed to check existing students: {str(e)}")
+        return
+
+    to_insert = []
+    for row_number, student, course_id in batch:
+        if student['email'] in existing:
+            results[row_number] = {'row': row_number, 'status': 'error', 'email': student['email'],
+                                   'error': f"Student with email {student['email']} already exists"}
+        else:
+            to_insert.append((row_number, student, course_id))
+    if not to_insert:
+        return
+
+    unknown_courses = {c for _, _, c in to_insert if c and c not in course_titles}
+    if unknown_courses:
+        try:
+            course_res = supabase_client.from_('courses').select('id, title').in_('id', list(unknown_courses)).execute()
+        except Exception as e:
+            logger.error(f"Course lookup failed for an import batch: {str(e)}")
+            _fail_rows(to_insert, results, f"Failed to look up courses: {str(e)}")
+            return
+        for course in course_res.data or []:
+            course_titles[course['id']] = course.get('title') or 'Unknown Course'
+        for course_id in unknown_courses:
+            course_titles.setdefault(course_id, None)
+
+    try:
+        insert_res = supabase_client.from_('students').insert([s for _, s, _ in to_insert]).execute()
+        created_rows = insert_res.data or []
+        if len(created_rows) != len(to_insert):
+            raise Exception(f"Expected {len(to_insert)} inserted rows, got {len(created_rows)}")
+    except Exception as e:
+        # One bad row fails the whole multi-row insert; report it per row.
+        logger.error(f"Batch student insert failed: {str(e)}")
+        _fail_rows(to_insert, results, f"Failed to insert student: {str(e)}")
+        return
+    publish('students', [created.get('id') for created in created_rows])
+
+    enrollments = []
+    enrollment_rows = []
+    for (row_number, student, course_id), created in zip(to_insert, created_rows):
+        result = {'row': row_number, 'status': 'created', 'id': created.get('id'), 'email': student['email']}
+        if course_id:
+            course_title = course_titles.get(course_id)
+            if course_title is None:
+                result['enrollment_error'] = "Invalid course_id"
+            else:
+                enrollments.append({
+                    'student_id': created.get('id'),
+                    'course_id': course_id,
+                    'enrolled_at': datetime.utcnow().isoformat(),
+                    'status': 'active',
+                    'course_title': course_title
+                })
+                enrollment_rows.append(result)
+                result['course'] = {'id': course_id, 'title': course_title}
+        results[row_number] = result
+
+    if enrollments:
+        try:
+            supabase_client.from_('enrollments').insert(enrollments).execute()
+            publish('enrollments', [enrollment['student_id'] for enrollment in enrollments])
+        except Exception as e:
+            logger.warning(f"Batch enrollment insert failed but students created: {str(e)}")
+            for result in enrollment_rows:
+                result.pop('course', None)
+                result['enrollment_error'] = str(e)
+
+
+def bulk_import_students_service(rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import many students (and optional enrollments) in batched requests.
+
+    ``rows`` is any iterable of dicts with ``name``, ``email``, ``phone`` and an
+    optional ``course_id``, e.g. from parse_import_rows. Rows are validated as
+    they stream in; each full batch costs one duplicate check, one course
+    lookup (for course ids not seen yet), one multi-row student insert and one
+    multi-row enrollment insert.
+
+    Returns a report with a result per input row (1-based ``row`` numbers).
+    """
+    try:
+        supabase_client = get_supabase_client()
+        results = {}
+        course_titles = {}
+        seen_emails = set()
+        batch = []
+        total = 0
+
+        for total, row in enumerate(rows, start=1):
+            student, course_id, error = _validate_import_row(row, seen_emails)
+            if error:
+                results[total] = {'row': total, 'status': 'error', 'email': row.get('email'), 'error': error}
+                continue
+            batch.append((total, student, course_id))
+            if len(batch) >= batch_size:
+                _import_batch(supabase_client, batch, course_titles, results)
+                batch = []
+        if batch:
+            _import_batch(supabase_client, batch, course_titles, results)
+
+        ordered = [results[i] for i in sorted(results)]
+        created = sum(1 for r in ordered if r['status'] == 'created')
+        return {
+            'total': total,
+            'created': created,
+            'failed': total - created,
+            'results': ordered
+        }
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error importing students: {str(e)}")
+        raise RuntimeError(f"Failed to import students: {str(e)}")
+
 def update_student_service(student_id, data):
-    """Update a student's information."""
+    """
+    Update a student's information.
+
+    One round trip: the admin_update_student RPC updates the row, moves or
+    creates the active enrollment when ``course_id`` is given, and returns the
+    student with its active course.
+    """
     try:
         required_fields = ['name', 'email', 'phone']
         missing_fields = [field for field in required_fields if not data.get(field)]
@@ -221,64 +657,33 @@ def update_student_service(student_id, data):
             raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
 
         supabase_client = get_supabase_client()
-        
-        update_data = {
-            'name': data['name'],
-            'email': data['email'],
-            'phone': data['phone'],
-            'updated_at': datetime.utcnow().isoformat()
-        }
-
-        response = supabase_client.from_('students').update(update_data).eq('id', student_id).execute()
-        if response.error:
-            raise Exception(response.error.message)
-
-        course_id = data.get('course_id')
-        if course_id:
-            course_response = supabase_client.from_('courses').select('*').eq('id', course_id).execute()
-            if not course_response.data:
+        course_id = None
+        if data.get('course_id'):
+            valid, _ = normalize_ids([data['course_id']])
+            if not valid:
                 raise ValueError("Invalid course_id")
-            
-            enrollment_response = supabase_client.from_('enrollments') \
-                .select('*') \
-                .eq('student_id', student_id) \
-                .eq('status', 'active') \
-                .execute()
-            
-            if enrollment_response.data:
-                supabase_client.from_('enrollments') \
-                    .update({
-                        'course_id': course_id,
-                        'updated_at': datetime.utcnow().isoformat()
-                    }) \
-                    .eq('id', enrollment_response.data[0]['id']) \
-                    .execute()
-            else:
-                supabase_client.from_('enrollments').insert({
-                    'student_id': student_id,
-                    'course_id': course_id,
-                    'enrolled_at': datetime.utcnow().isoformat(),
-                    'status': 'active'
-                }).execute()
+            course_id = valid[0]
 
-        student_response = supabase_client.from_('students').select('*').eq('id', student_id).execute()
-        if not student_response.data:
+        try:
+            response = supabase_client.rpc('admin_update_student', {
+                'p_student_id': student_id,
+                'p_name': data['name'],
+                'p_email': data['email'],
+                'p_phone': data['phone'],
+                'p_course_id': course_id
+            }).execute()
+        except APIError as e:
+            _raise_for_rpc_error(e)
+
+        student_data = response.data
+        if not student_data:
             raise ValueError("Student not found after update")
-            
-        student_data = student_response.data[0]
-        
-        enrollment_response = supabase_client.from_('enrollments') \
-            .select('*, courses!inner(title)') \
-            .eq('student_id', student_id) \
-            .eq('status', 'active') \
-            .execute()
-            
-        if enrollment_response.data and enrollment_response.data[0]['courses']:
-            student_data['course'] = {
-                'id': enrollment_response.data[0]['course_id'],
-                'title': enrollment_response.data[0]['courses']['title']
-            }
+        if not student_data.get('course'):
+            student_data.pop('course', None)
 
+        publish('students', [student_id])
+        if course_id:
+            publish('enrollments', [student_id])
         return student_data
 
     except ValueError as e:
@@ -289,20 +694,15 @@ def update_student_service(student_id, data):
         raise ValueError(f"Failed to update student: {str(e)}")
 
 def delete_student_service(student_id):
-    """Delete a student."""
+    """Delete a student and its enrollments in one transactional round trip."""
     try:
-        supabase_client = get_supabase_client()
-        
-        response = supabase_client.from_('students').select('*').eq('id', student_id).execute()
-        if not response.data:
+        result = delete_by_ids_rpc('admin_delete_students', [student_id])
+        if result['failed']:
+            raise RuntimeError("admin_delete_students failed")
+        if not result['deleted']:
             raise ValueError(f"Student with ID {student_id} not found")
-            
-        delete_response = supabase_client.from_('students').delete().eq('id', student_id).execute()
-        if delete_response.error:
-            raise Exception(delete_response.error.message)
-            
-        supabase_client.from_('enrollments').delete().eq('student_id', student_id).execute()
-        
+        _after_students_deleted(result['deleted'])
+
     except ValueError as e:
         logger.error(f"Error deleting student: {str(e)}")
         raise
@@ -310,6 +710,22 @@ def delete_student_service(student_id):
         logger.error(f"Error deleting student: {str(e)}")
         raise RuntimeError(f"Failed to delete student: {str(e)}")
 
+def _after_students_deleted(student_ids):
+    if student_ids:
+        publish('students', student_ids)
+        publish('enrollments', student_ids)
+        publish('student_assignments', student_ids)
+
+def delete_students_service(student_ids):
+    """Delete many students (and their enrollments) by id."""
+    try:
+        result = delete_by_ids_rpc('admin_delete_students', student_ids)
+        _after_students_deleted(result['deleted'])
+        return result
+    except Exception as e:
+        logger.error(f"Error bulk deleting students: {str(e)}")
+        raise RuntimeError(f"Failed to delete students: {str(e)}")
+
 def get_instructors_service():
     """Get list of all instructors."""
     try:
@@ -320,8 +736,20 @@ def get_instructors_service():
         logger.error(f"Error getting instructors: {str(e)}")
         raise RuntimeError(f"Failed to get instructors: {str(e)}")
 
+INSTRUCTOR_PROFILE_FIELDS = ('name', 'email', 'phone')
+
+
 def create_instructor_service(data):
     """Create a new instructor."""
+    user_id = create_instructor_account_service(data)
+    return create_instructor_record_service(user_id, {field: data[field] for field in INSTRUCTOR_PROFILE_FIELDS})
+
+def create_instructor_account_service(data):
+    """
+    Validate a new instructor and create its auth account; returns the auth
+    user id. The password is used here only: the instructor record is
+    created from the profile fields by create_instructor_record_service.
+    """
     try:
         required_fields = ['name', 'email', 'phone', 'password']
         missing_fields = [field for field in required_fields if not data.get(field)]
@@ -329,79 +757,98 @@ def create_instructor_service(data):
             raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
 
         supabase_client = get_supabase_client()
-        
-        try:
-            existing = supabase_client.from_('instructors').select('email').eq('email', data['email']).execute()
-            if existing.data and len(existing.data) > 0:
-                raise ValueError(f"L'email {data['email']} existe déjà")
-
-            auth_response = supabase_client.auth.sign_up({
-                "email": data['email'],
-                "password": data['password'],
-                "options": {
-                    "data": {
-                        'name': data['name'],
-                        'role': 'instructor'
-                    }
-                }
-            })
-            
-            if not auth_response.user:
-                logger.error(f"Auth user creation failed: {auth_response}")
-                raise Exception("Failed to create auth user")
-                
-            user_id = auth_response.user.id
-            
-        except Exception as auth_err:
-            logger.error(f"Error creating auth user for instructor: {str(auth_err)}")
-            raise RuntimeError(f"Failed to create auth user: {str(auth_err)}")
 
-        try:
-            instructor_data = {
-                'id': user_id,
-                'name': data['name'],
-                'email': data['email'],
-                'phone': data['phone']
+        existing = supabase_client.from_('instructors').select('email').eq('email', data['email']).execute()
+        if existing.data and len(existing.data) > 0:
+            raise ValueError(f"L'email {data['email']} existe déjà")
+
+        auth_response = supabase_client.auth.sign_up({
+            "email": data['email'],
+            "password": data['password'],
+            "options": {
+                "data": {
+                    'name': data['name'],
+                    'role': 'instructor'
+                }
             }
-            
-            response = supabase_client.from_('instructors').insert(instructor_data).execute()
-            
-            if not response.data:
-                logger.error(f"Instructor record insert failed: {response}")
-                raise Exception("Failed to insert instructor record")
-                
-            return response.data[0]
-            
-        except Exception as db_err:
-            logger.error(f"Error creating instructor DB record: {str(db_err)}")
-            supabase_client.auth.admin.delete_user(user_id)
-            raise RuntimeError(f"Failed to create instructor record: {str(db_err)}")
+        })
+
+        if not auth_response.user:
+            logger.error(f"Auth user creation failed: {auth_response}")
+            raise Exception("Failed to create auth user")
+
+        return auth_response.user.id
 
     except ValueError as e:
-        logger.error(f"Validation error in create_instructor_service: {str(e)}")
+        logger.error(f"Validation error in create_instructor_account_service: {str(e)}")
         raise
     except Exception as e:
-        logger.error(f"Error creating instructor: {str(e)}")
-        raise RuntimeError(f"Failed to create instructor: {str(e)}")
+        logger.error(f"Error creating auth user for instructor: {str(e)}")
+        raise RuntimeError(f"Failed to create auth user: {str(e)}")
+
+def create_instructor_record_service(user_id, profile):
+    """
+    Record the instructor of auth account ``user_id`` (background job).
+    The row is upserted by id, so a retry after a transient error is safe;
+    a row the database rejects removes the account and fails for good.
+    """
+    supabase_client = get_supabase_client()
+    try:
+        response = supabase_client.from_('instructors') \
+            .upsert(dict(profile, id=user_id), on_conflict='id').execute()
+
+        if not response.data:
+            logger.error(f"Instructor record insert failed: {response}")
+            raise Exception("Failed to insert instructor record")
+
+        publish('instructors', [user_id])
+        return response.data[0]
+
+    except APIError as e:
+        logger.error(f"Error creating instructor DB record: {str(e)}")
+        if e.code and str(e.code).startswith('23'):
+            # Integrity violation (e.g. the email was taken meanwhile).
+            supabase_client.auth.admin.delete_user(user_id)
+            raise ValueError(f"Failed to create instructor record: {e.message}")
+        raise RuntimeError(f"Failed to create instructor record: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error creating instructor DB record: {str(e)}")
+        raise RuntimeError(f"Failed to create instructor record: {str(e)}")
 
 def delete_instructor_service(email):
-    """Delete an instructor by email."""
+    """Delete an instructor and its auth user by email in one transactional round trip."""
     try:
         supabase_client = get_supabase_client()
-        
-        response = supabase_client.from_('instructors').select('id').eq('email', email).execute()
-        if not response.data:
+
+        try:
+            response = supabase_client.rpc('admin_delete_instructors', {'p_emails': [email]}).execute()
+        except APIError as e:
+            # Raised by admin_delete_instructors before it reported blocked ids.
+            if e.code == '23503':
+                raise InstructorHasCoursesError(e.message) from e
+            raise
+        data = response.data
+        deleted = data.get('deleted') if isinstance(data, dict) else data
+        if isinstance(data, dict) and data.get('blocked'):
+            raise InstructorHasCoursesError("Instructor still has courses; delete or reassign them first")
+        if not deleted:
             raise ValueError(f"Instructor with email {email} not found")
-            
-        instructor_id = response.data[0]['id']
-        
-        supabase_client.from_('instructors').delete().eq('id', instructor_id).execute()
-        
-        supabase_client.auth.admin.delete_user(instructor_id)
-        
+        publish('instructors', deleted)
+
     except ValueError as e:
         logger.error(f"Error deleting instructor: {str(e)}")
         raise
     except Exception as e:
         logger.error(f"Error deleting instructor: {str(e)}")
         raise RuntimeError(f"Failed to delete instructor: {str(e)}")
+
+def delete_instructors_service(instructor_ids):
+    """Delete many instructors (and their auth users) by id."""
+    try:
+        result = delete_by_ids_rpc('admin_delete_instructors', instructor_ids)
+        if result['deleted']:
+            publish('instructors', result['deleted'])
+        return result
+    except Exception as e:
+        logger.error(f"Error bulk deleting instructors: {str(e)}")
+        raise RuntimeError(f"Failed to delete instructors: {str(e)}")
@@ -1,5 +1,60 @@
 """Assignment and progress tracking services."""
 
+import logging
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from postgrest.exceptions import APIError
+
+from app.database.change_feed import publish, subscribe
+from app.database.snapshot_cache import make_backend
+from app.database.supabase_db import get_supabase_client
+from app.services.upload_service import clean_filename
+
+logger = logging.getLogger(__name__)
+
+# Pairs per refresh_course_progress call (or per Python fallback batch).
+PROGRESS_BATCH_SIZE = 200
+
+# Grades per admin_grade_submissions call.
+GRADE_BATCH_SIZE = 1000
+
+ASSIGNMENT_TYPES = ('assignment', 'quiz')
+ASSIGNMENT_FIELDS = ('title', 'description', 'assignment_type', 'due_date', 'max_points')
+
+# An assignment with its own files and links, read in one request; filter
+# with .is_('files.submission_id', 'null') to leave out submission files.
+ASSIGNMENT_SELECT = ('*, files:assignment_files(id, file_name, file_path, mime_type, size, blob_sha256, created_at), '
+                     'links:assignment_links(id, url, title, created_at)')
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+# A course's assignments with one student's submissions embedded; filter
+# with .eq('submissions.student_id', ...) to keep only that student's.
+STUDENT_ASSIGNMENT_SELECT = ('id, course_id, title, description, assignment_type, due_date, max_points, created_at, '
+                             'submissions:assignment_submissions(id, status, grade, feedback, submitted_at)')
+DEFAULT_STUDENT_ASSIGNMENTS_PAGE = 50
+MAX_STUDENT_ASSIGNMENTS_PAGE = 200
+DUE_SOON_WINDOW = timedelta(hours=48)
+
+DEFAULT_STUDENT_ASSIGNMENTS_TTL = 60
+LISTING_VERSION_TTL = 3600
+LISTING_MAX_CACHED_PAGES = 16
+_listing_cache = make_backend()
+_listing_ttl = DEFAULT_STUDENT_ASSIGNMENTS_TTL
+
+# Whether the refresh_course_progress RPC and its triggers are installed:
+# None until the first call finds out, False on a database without the
+# migration (e.g. the local Supabase stand-in), where progress is computed
+# in Python and written by the service after each change.
+_progress_sql = None
+
+# Same for the admin_create_assignment / admin_update_assignment RPCs; without
+# them files and links are written with one bulk statement per table.
+_assignment_rpc = None
+
 def get_recent_assignments_service(limit=10):
     """
     Fetch recent assignments and exams with course info ordered by creation date.
@@ -22,22 +77,192 @@ def get_recent_assignments_service(limit=10):
     logger = logging.getLogger(__name__)
     logger.error(f"Error fetching recent assignments: {str(e)}")
     return []
-def create_assignment(course_id, title, description, assignment_type, due_date=None, max_points=None, files=None, links=None, max_size_mb=10):
-    """
-    Create a new assignment with optional files and links.
-    """
-    # Placeholder implementation
-    return {
-        "id": "new-assignment-id",
-        "course_id": course_id,
-        "title": title,
-        "description": description,
-        "assignment_type": assignment_type,
-        "due_date": due_date,
-        "max_points": max_points,
-        "files": files or [],
-        "links": links or []
-    }
+class AssignmentNotFoundError(ValueError):
+    """The assignment, or the course it is created in, does not exist."""
+
+def _clean_assignment_fields(data, partial=False):
+    """Validate assignment fields; with ``partial``, only those present."""
+    fields = {field: data[field] for field in ASSIGNMENT_FIELDS if field in data}
+    if not partial or 'title' in fields:
+        fields['title'] = str(fields.get('title') or '').strip()
+        if not fields['title']:
+            raise ValueError("title is required.")
+    if not partial or 'assignment_type' in fields:
+        fields['assignment_type'] = fields.get('assignment_type') or 'assignment'
+        if fields['assignment_type'] not in ASSIGNMENT_TYPES:
+            raise ValueError(f"assignment_type must be one of: {', '.join(ASSIGNMENT_TYPES)}.")
+    if fields.get('description') is not None:
+        fields['description'] = str(fields['description'])
+    max_points = fields.get('max_points')
+    if max_points is not None and (isinstance(max_points, bool) or not isinstance(max_points, int) or max_points <= 0):
+        raise ValueError("max_points must be a positive integer.")
+    if fields.get('due_date'):
+        try:
+            due = datetime.fromisoformat(str(fields['due_date']))
+        except ValueError:
+            raise ValueError("due_date must be an ISO 8601 timestamp.")
+        fields['due_date'] = (due if due.tzinfo else due.replace(tzinfo=timezone.utc)).isoformat()
+    elif 'due_date' in fields:
+        fields['due_date'] = None
+    return fields
+
+def _clean_files(files):
+    """Validate file references ``[{'sha256', 'file_name', 'mime_type'?}]``."""
+    if files is None:
+        return None
+    if not isinstance(files, list):
+        raise ValueError("files must be a list.")
+    cleaned = []
+    for entry in files:
+        sha256 = str(entry.get('sha256') or '').lower() if isinstance(entry, dict) else ''
+        if not _SHA256_RE.match(sha256):
+            raise ValueError("Each file needs the hex sha256 of uploaded content.")
+        cleaned.append({'sha256': sha256, 'file_name': clean_filename(entry.get('file_name')),
+                        'mime_type': entry.get('mime_type')})
+    return cleaned
+
+def _clean_links(links):
+    """Validate links ``[{'url', 'title'?}]``."""
+    if links is None:
+        return None
+    if not isinstance(links, list):
+        raise ValueError("links must be a list.")
+    cleaned = []
+    for entry in links:
+        url = str(entry.get('url') or '').strip() if isinstance(entry, dict) else ''
+        if not url.startswith(('http://', 'https://')):
+            raise ValueError("Each link needs an http(s) url.")
+        cleaned.append({'url': url, 'title': str(entry['title']).strip() if entry.get('title') else None})
+    return cleaned
+
+def _call_assignment_rpc(supabase, name, params):
+    """Run an admin assignment RPC; returns None where it is not installed."""
+    global _assignment_rpc
+    if _assignment_rpc is False:
+        return None
+    try:
+        response = supabase.rpc(name, params).execute()
+    except APIError as e:
+        if e.code == 'P0002':
+            raise AssignmentNotFoundError(e.message) from e
+        if e.code == '22023':
+            raise ValueError(e.message) from e
+        if e.code != 'PGRST202':
+            raise
+        logger.warning(f"{name} is not installed; writing assignment files and links table by table")
+        _assignment_rpc = False
+        return None
+    _assignment_rpc = True
+    return response.data
+
+def _set_content_in_steps(supabase, assignment_id, files, links, new=False):
+    """
+    Fallback for databases without the admin assignment RPCs: make the
+    assignment's files and links match ``files``/``links`` (None leaves a
+    set as is) with a bulk insert and a bulk delete per table. Not atomic.
+    """
+    if files is not None:
+        existing = [] if new else supabase.from_('assignment_files').select('id, file_name, blob_sha256') \
+            .eq('assignment_id', assignment_id).is_('submission_id', 'null').execute().data or []
+        wanted = {(entry['sha256'], entry['file_name']): entry for entry in files}
+        stale = [row['id'] for row in existing if (row.get('blob_sha256'), row['file_name']) not in wanted]
+        for row in existing:
+            wanted.pop((row.get('blob_sha256'), row['file_name']), None)
+        if wanted:
+            blobs = supabase.from_('file_blobs').select('sha256, storage_path, size, mime_type') \
+                .in_('sha256', list({sha256 for sha256, _ in wanted})).execute().data or []
+            by_sha = {blob['sha256']: blob for blob in blobs}
+            missing = next((sha256 for sha256, _ in wanted if sha256 not in by_sha), None)
+            if missing:
+                raise ValueError(f"Unknown file content: {missing}")
+            supabase.from_('assignment_files').insert([{
+                'assignment_id': assignment_id,
+                'file_name': file_name,
+                'file_path': by_sha[sha256]['storage_path'],
+                'mime_type': entry['mime_type'] or by_sha[sha256].get('mime_type'),
+                'size': by_sha[sha256]['size'],
+                'checksum_sha256': sha256,
+                'blob_sha256': sha256
+            } for (sha256, file_name), entry in wanted.items()]).execute()
+        if stale:
+            supabase.from_('assignment_files').delete().in_('id', stale).execute()
+
+    if links is not None:
+        existing = [] if new else supabase.from_('assignment_links').select('id, url, title') \
+            .eq('assignment_id', assignment_id).execute().data or []
+        wanted = {(entry['url'], entry['title']): entry for entry in links}
+        stale = [row['id'] for row in existing if (row['url'], row.get('title')) not in wanted]
+        for row in existing:
+            wanted.pop((row['url'], row.get('title')), None)
+        if wanted:
+            supabase.from_('assignment_links').insert([
+                {'assignment_id': assignment_id, 'url': url, 'title': title} for url, title in wanted
+            ]).execute()
+        if stale:
+            supabase.from_('assignment_links').delete().in_('id', stale).execute()
+
+def _after_course_assignments_change(supabase, course_id):
+    """Refresh progress in a course after assignments are added, removed or re-weighted."""
+    if _progress_sql is True:
+        return
+    try:
+        enrolled = supabase.from_('enrollments').select('student_id').eq('course_id', course_id).execute().data or []
+        tracked = supabase.from_('course_progress').select('student_id').eq('course_id', course_id).execute().data or []
+    except Exception as e:
+        logger.error(f"Error listing students of course {course_id}: {str(e)}")
+        return
+    _after_progress_change([(row['student_id'], course_id) for row in enrolled + tracked])
+
+def create_assignment(course_id, title, description, assignment_type, due_date=None, max_points=None,
+                      files=None, links=None):
+    """
+    Create an assignment with its files and links.
+
+    ``files`` reference uploaded content, ``[{'sha256', 'file_name',
+    'mime_type'?}]``; ``links`` are ``[{'url', 'title'?}]``. Everything is
+    written in one transactional round trip by the admin_create_assignment
+    RPC. Returns the assignment with ``files`` and ``links`` embedded.
+    """
+    fields = _clean_assignment_fields({
+        'title': title,
+        'description': description,
+        'assignment_type': assignment_type,
+        'due_date': due_date,
+        'max_points': max_points
+    })
+    files = _clean_files(files) or []
+    links = _clean_links(links) or []
+    try:
+        supabase = get_supabase_client()
+        assignment = _call_assignment_rpc(supabase, 'admin_create_assignment', {
+            'p_assignment': dict(fields, course_id=course_id),
+            'p_files': files,
+            'p_links': links
+        })
+        if assignment is None:
+            course = supabase.from_('courses').select('id').eq('id', course_id).maybe_single().execute()
+            if not course or not course.data:
+                raise AssignmentNotFoundError("Course not found.")
+            response = supabase.from_('assignments').insert(dict(fields, course_id=course_id)).execute()
+            assignment_id = response.data[0]['id']
+            try:
+                _set_content_in_steps(supabase, assignment_id, files, links, new=True)
+            except Exception:
+                supabase.from_('assignments').delete().eq('id', assignment_id).execute()
+                raise
+            assignment = get_assignment_by_id(assignment_id)
+        invalidate_course_assignments(course_id)
+        _after_course_assignments_change(supabase, course_id)
+        if assignment.get('due_date'):
+            from app.services.deadline_service import schedule_deadline
+            schedule_deadline(assignment['id'], assignment['due_date'])
+        return assignment
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating assignment in course {course_id}: {str(e)}")
+        raise RuntimeError(f"Failed to create assignment: {str(e)}")
+
 def get_course_assignments(course_id):
     """
     Fetch assignments for a specific course.
@@ -58,126 +283,551 @@ def get_course_assignments(course_id):
         logger.error(f"Error fetching assignments for course {course_id}: {str(e)}")
         return []
         return []
+def _get_student_pk(supabase, user_id):
+    """Map a Supabase Auth user_id to the students table primary key."""
+    student_row = supabase.from_('students').select('id').eq('user_id', user_id).maybe_single().execute()
+    if not student_row or not student_row.data:
+        raise ValueError("Student profile not found.")
+    return student_row.data['id']
+
+def _is_past(timestamp):
+    if not timestamp:
+        return False
+    due = datetime.fromisoformat(timestamp)
+    if due.tzinfo is None:
+        due = due.replace(tzinfo=timezone.utc)
+    return due < datetime.now(timezone.utc)
+
+def _parse_timestamp(timestamp):
+    value = datetime.fromisoformat(timestamp)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def configure_student_assignment_cache(ttl=DEFAULT_STUDENT_ASSIGNMENTS_TTL, redis_url=None):
+    """
+    Configure the per-(student, course) assignment listing cache: entries
+    live ``ttl`` seconds (0 disables it) and are shared through Redis when
+    ``redis_url`` is set.
+    """
+    global _listing_cache, _listing_ttl
+    _listing_ttl = max(float(ttl), 0)
+    _listing_cache = make_backend(redis_url) if _listing_ttl else None
+
+def _listing_version(scope, key):
+    try:
+        entry = _listing_cache.get(f"student-assignments:{scope}:{key}")
+    except Exception as e:
+        logger.warning(f"Could not read assignment listing version: {str(e)}")
+        return None
+    return entry[0] if entry else 0
+
+def _bump_listing_version(scope, key):
+    if _listing_cache is None:
+        return
+    try:
+        # Outlives any listing cached under the previous version.
+        _listing_cache.set(f"student-assignments:{scope}:{key}", time.time_ns(), time.time(),
+                           max(_listing_ttl * 10, LISTING_VERSION_TTL))
+    except Exception as e:
+        logger.warning(f"Could not invalidate assignment listings: {str(e)}")
+
+def _listing_change_handler(scope):
+    def handler(ids, remote):
+        # Versions kept in Redis were already bumped by the writer.
+        if _listing_cache is None or (remote and _listing_cache.shared):
+            return
+        for key in (ids if ids is not None else ['*']):
+            _bump_listing_version(scope if ids is not None else 'all', key)
+    return handler
+
+subscribe('student_assignments', _listing_change_handler('student'))
+subscribe('course_assignments', _listing_change_handler('course'))
+
+def invalidate_student_assignments(student_pk):
+    """Drop a student's cached assignment listings, e.g. after a submission or grade."""
+    publish('student_assignments', [student_pk])
+
+def invalidate_course_assignments(course_id):
+    """Drop every student's cached listing of a course after its assignments change."""
+    publish('course_assignments', [course_id])
+
+def _cached_student_pk(supabase, user_id):
+    if _listing_cache is not None:
+        try:
+            entry = _listing_cache.get(f"student-pk:{user_id}")
+            if entry:
+                return entry[0]
+        except Exception as e:
+            logger.warning(f"Could not read cached student id: {str(e)}")
+    student_pk = _get_student_pk(supabase, user_id)
+    if _listing_cache is not None:
+        try:
+            _listing_cache.set(f"student-pk:{user_id}", student_pk, time.time(), LISTING_VERSION_TTL)
+        except Exception as e:
+            logger.warning(f"Could not cache student id: {str(e)}")
+    return student_pk
+
+def _fetch_student_assignment_page(supabase, student_pk, course_id, limit, offset):
+    response = supabase.from_('assignments').select(STUDENT_ASSIGNMENT_SELECT, count='exact') \
+        .eq('course_id', course_id).eq('submissions.student_id', student_pk) \
+        .order('due_date', nullsfirst=False).order('id') \
+        .range(offset, offset + limit - 1).execute()
+    return {'rows': response.data or [], 'total': response.count or 0}
+
+def _cached_student_assignment_page(supabase, student_pk, course_id, limit, offset):
+    """
+    One cache entry per (student, course) holds the pages read so far; its
+    key carries the student's and the course's listing versions (and one for
+    all listings), so a submission, grade or assignment change makes every
+    page miss at once.
+    """
+    if _listing_cache is None:
+        return _fetch_student_assignment_page(supabase, student_pk, course_id, limit, offset)
+    versions = [_listing_version('student', student_pk), _listing_version('course', course_id),
+                _listing_version('all', '*')]
+    if None in versions:
+        return _fetch_student_assignment_page(supabase, student_pk, course_id, limit, offset)
+
+    key = f"student-assignments:{student_pk}:{course_id}:{':'.join(map(str, versions))}"
+    page_key = f"{limit}:{offset}"
+    try:
+        entry = _listing_cache.get(key)
+    except Exception as e:
+        logger.warning(f"Could not read cached assignment listing: {str(e)}")
+        entry = None
+    pages = dict(entry[0]) if entry else {}
+    if page_key in pages:
+        return pages[page_key]
+
+    page = _fetch_student_assignment_page(supabase, student_pk, course_id, limit, offset)
+    if len(pages) >= LISTING_MAX_CACHED_PAGES:
+        pages = {}
+    pages[page_key] = page
+    try:
+        _listing_cache.set(key, pages, time.time(), _listing_ttl)
+    except Exception as e:
+        logger.warning(f"Could not cache assignment listing: {str(e)}")
+    return page
+
+def _with_submission_state(row, now):
+    """Flatten a student's submissions of one assignment into status fields."""
+    row = dict(row)
+    submissions = row.pop('submissions', None) or []
+    latest = max(submissions, key=lambda s: s.get('submitted_at') or '', default=None)
+    grades = [s['grade'] for s in submissions if s.get('grade') is not None]
+    due = _parse_timestamp(row['due_date']) if row.get('due_date') else None
+    if due is None:
+        due_state = 'no_due_date'
+    elif due < now:
+        due_state = 'past_due'
+    elif due - now <= DUE_SOON_WINDOW:
+        due_state = 'due_soon'
+    else:
+        due_state = 'upcoming'
+    row.update(
+        submission_id=latest['id'] if latest else None,
+        submission_status=latest['status'] if latest else 'not_submitted',
+        submitted_at=latest.get('submitted_at') if latest else None,
+        grade=max(grades) if grades else None,
+        feedback=latest.get('feedback') if latest else None,
+        due_state=due_state,
+        overdue=due_state == 'past_due' and latest is None
+    )
+    return row
+
+def get_student_course_assignments(user_id, course_id, limit=DEFAULT_STUDENT_ASSIGNMENTS_PAGE, offset=0):
+    """
+    List a course's assignments for a student, soonest due first (undated
+    last), each with that student's submission status, best grade and due
+    state. Assignments and the student's submissions are read in one
+    embedded query per page, cached per (student, course).
+
+    user_id is the Supabase Auth user_id. Returns ``(assignments, total)``.
+    """
+    supabase = get_supabase_client()
+    student_pk = _cached_student_pk(supabase, user_id)
+    try:
+        page = _cached_student_assignment_page(supabase, student_pk, course_id, limit, offset)
+    except Exception as e:
+        logger.error(f"Error listing assignments of course {course_id} for student {student_pk}: {str(e)}")
+        raise RuntimeError(f"Failed to get assignments: {str(e)}")
+    # Due states depend on the time of the request, not of the cache fill.
+    now = datetime.now(timezone.utc)
+    return [_with_submission_state(row, now) for row in page['rows']], page['total']
+
 def submit_assignment(assignment_id, student_id, submission_text):
     """
     Submit an assignment for a student.
+
+    student_id is the Supabase Auth user_id. Submissions after the due date
+    are stored with status 'late'. The student's course progress is updated.
     """
-    # Placeholder implementation
-    return {
-        "submission_id": "new-submission-id",
-        "assignment_id": assignment_id,
-        "student_id": student_id,
-        "submission_text": submission_text,
-        "status": "submitted"
-    }
+    supabase = get_supabase_client()
+    student_pk = _get_student_pk(supabase, student_id)
+
+    assignment = supabase.from_('assignments').select('id, course_id, due_date') \
+        .eq('id', assignment_id).maybe_single().execute()
+    if not assignment or not assignment.data:
+        raise ValueError("Assignment not found.")
+
+    response = supabase.from_('assignment_submissions').insert({
+        'assignment_id': assignment_id,
+        'student_id': student_pk,
+        'submission_text': submission_text,
+        'submitted_at': datetime.now(timezone.utc).isoformat(),
+        'status': 'late' if _is_past(assignment.data.get('due_date')) else 'submitted'
+    }).execute()
+    if not response.data:
+        raise RuntimeError("Failed to submit assignment")
+
+    invalidate_student_assignments(student_pk)
+    _after_progress_change([(student_pk, assignment.data['course_id'])])
+    submission = response.data[0]
+    return dict(submission, submission_id=submission['id'])
 
 def update_assignment(assignment_id, update_data):
     """
-    Update an existing assignment.
-    (Placeholder implementation)
+    Update an assignment's fields and, when ``files`` or ``links`` are given,
+    replace those sets (entries already attached are kept as they are).
+
+    One round trip through the admin_update_assignment RPC. Returns the
+    assignment with ``files`` and ``links`` embedded.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Updating assignment {assignment_id} with data: {update_data}")
-    # In a real implementation, you would interact with the database here.
-    # For now, just return the id and a success message.
-    return {
-        "id": assignment_id,
-        "status": "updated",
-        "message": "Assignment update placeholder executed."
-    }
+    fields = _clean_assignment_fields(update_data, partial=True)
+    files = _clean_files(update_data.get('files'))
+    links = _clean_links(update_data.get('links'))
+    if not fields and files is None and links is None:
+        raise ValueError("Nothing to update.")
+    try:
+        supabase = get_supabase_client()
+        assignment = _call_assignment_rpc(supabase, 'admin_update_assignment', {
+            'p_assignment_id': assignment_id,
+            'p_changes': fields,
+            'p_files': files,
+            'p_links': links
+        })
+        if assignment is None:
+            if fields:
+                fields['updated_at'] = datetime.now(timezone.utc).isoformat()
+                response = supabase.from_('assignments').update(fields).eq('id', assignment_id).execute()
+            else:
+                response = supabase.from_('assignments').select('id').eq('id', assignment_id).execute()
+            if not response.data:
+                raise AssignmentNotFoundError("Assignment not found.")
+            _set_content_in_steps(supabase, assignment_id, files, links)
+            assignment = get_assignment_by_id(assignment_id)
+        invalidate_course_assignments(assignment['course_id'])
+        if 'max_points' in fields:
+            _after_course_assignments_change(supabase, assignment['course_id'])
+        if 'due_date' in fields:
+            from app.services.deadline_service import schedule_deadline
+            schedule_deadline(assignment_id, assignment['due_date'])
+        return assignment
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating assignment {assignment_id}: {str(e)}")
+        raise RuntimeError(f"Failed to update assignment: {str(e)}")
 
 def grade_assignment(submission_id, grade, feedback):
     """
-    Grade an assignment submission.
-    (Placeholder implementation)
+    Grade an assignment submission and update the student's course progress.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Grading submission {submission_id} with grade {grade} and feedback: {feedback}")
-    # Placeholder: Find submission, update grade and feedback
-    return {
-        "submission_id": submission_id,
-        "status": "graded",
-        "grade": grade,
-        "message": "Grading placeholder executed."
-    }
+    supabase = get_supabase_client()
+    response = supabase.from_('assignment_submissions').update({
+        'grade': grade,
+        'feedback': feedback,
+        'status': 'graded'
+    }).eq('id', submission_id).execute()
+    if not response.data:
+        raise ValueError("Submission not found.")
+
+    submission = response.data[0]
+    invalidate_student_assignments(submission['student_id'])
+    if _progress_sql is not True:
+        assignment = supabase.from_('assignments').select('course_id') \
+            .eq('id', submission['assignment_id']).maybe_single().execute()
+        if assignment and assignment.data:
+            _after_progress_change([(submission['student_id'], assignment.data['course_id'])])
+    return submission
+
+def _validate_grade(entry, seen_ids):
+    """Return ``(submission_id, grade, feedback, error)`` for one batch entry."""
+    if not isinstance(entry, dict):
+        return None, None, None, "Each grade must be a JSON object"
+    try:
+        submission_id = str(uuid.UUID(str(entry.get('submission_id'))))
+    except ValueError:
+        return None, None, None, f"Invalid submission_id: {entry.get('submission_id')}"
+    if submission_id in seen_ids:
+        return submission_id, None, None, f"Duplicate submission_id in batch: {submission_id}"
+    seen_ids.add(submission_id)
+
+    grade = entry.get('grade')
+    if isinstance(grade, bool) or not isinstance(grade, int) or grade < 0:
+        return submission_id, None, None, "grade must be a non-negative integer"
+    feedback = entry.get('feedback')
+    if feedback is not None and not isinstance(feedback, str):
+        return submission_id, None, None, "feedback must be a string"
+    return submission_id, grade, feedback, None
+
+def _grade_batch_with_upsert(supabase, batch):
+    """Fallback for databases without admin_grade_submissions: one bulk upsert."""
+    ids = [submission_id for _, submission_id, _, _ in batch]
+    existing = supabase.from_('assignment_submissions').select('id, assignment_id, student_id') \
+        .in_('id', ids).execute().data or []
+    # Only existing submissions are upserted, so unknown ids never create rows.
+    known = {row['id']: row for row in existing}
+    rows = [{
+        'id': submission_id,
+        'assignment_id': known[submission_id]['assignment_id'],
+        'student_id': known[submission_id]['student_id'],
+        'grade': grade,
+        'feedback': feedback,
+        'status': 'graded'
+    } for _, submission_id, grade, feedback in batch if submission_id in known]
+    if not rows:
+        return []
+    return supabase.from_('assignment_submissions').upsert(rows, on_conflict='id').execute().data or []
+
+def grade_submissions_service(grades, batch_size=GRADE_BATCH_SIZE):
+    """
+    Grade many submissions at once.
+
+    ``grades`` is a list of ``{'submission_id', 'grade', 'feedback'}`` dicts.
+    Each batch is written with a single statement (the admin_grade_submissions
+    RPC, or a bulk upsert where it is not installed) and course progress is
+    refreshed once per batch. Returns ``{total, graded, failed, results}``
+    with one result per entry, in input order.
+    """
+    try:
+        supabase = get_supabase_client()
+        results = [None] * len(grades)
+        valid = []
+        seen_ids = set()
+        for index, entry in enumerate(grades):
+            submission_id, grade, feedback, error = _validate_grade(entry, seen_ids)
+            if error:
+                results[index] = {'index': index, 'submission_id': submission_id, 'status': 'error', 'error': error}
+            else:
+                valid.append((index, submission_id, grade, feedback))
+
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            try:
+                response = supabase.rpc('admin_grade_submissions', {'p_grades': [
+                    {'submission_id': submission_id, 'grade': grade, 'feedback': feedback}
+                    for _, submission_id, grade, feedback in batch
+                ]}).execute()
+                graded_rows = response.data or []
+            except APIError as e:
+                if e.code != 'PGRST202':
+                    raise
+                graded_rows = _grade_batch_with_upsert(supabase, batch)
+
+            graded = {row['id']: row for row in graded_rows}
+            for student_pk in {row['student_id'] for row in graded_rows}:
+                invalidate_student_assignments(student_pk)
+            for index, submission_id, grade, _ in batch:
+                if submission_id in graded:
+                    results[index] = {'index': index, 'submission_id': submission_id, 'status': 'graded', 'grade': grade}
+                else:
+                    results[index] = {'index': index, 'submission_id': submission_id, 'status': 'error',
+                                      'error': "Submission not found"}
+
+            if graded_rows and _progress_sql is not True:
+                assignment_ids = list({row['assignment_id'] for row in graded_rows})
+                assignments = supabase.from_('assignments').select('id, course_id') \
+                    .in_('id', assignment_ids).execute().data or []
+                course_of = {a['id']: a['course_id'] for a in assignments}
+                _after_progress_change([(row['student_id'], course_of[row['assignment_id']])
+                                        for row in graded_rows if row['assignment_id'] in course_of])
+
+        graded_count = sum(1 for r in results if r['status'] == 'graded')
+        return {
+            'total': len(results),
+            'graded': graded_count,
+            'failed': len(results) - graded_count,
+            'results': results
+        }
+    except Exception as e:
+        logger.error(f"Error grading submissions: {str(e)}")
+        raise RuntimeError(f"Failed to grade submissions: {str(e)}")
+
+def aggregate_course_progress(pairs, assignments, submissions, assignment_progress):
+    """
+    Compute course_progress rows for ``(student_id, course_id)`` pairs.
+
+    Python counterpart of the refresh_course_progress SQL function: each
+    input table is grouped in a single pass, then every pair is resolved with
+    dictionary lookups. An assignment is completed once it has a submission
+    or is marked completed; its grade is the best submission grade as a
+    percentage of max_points.
+    """
+    course_assignments = {}
+    for assignment in assignments:
+        course_assignments.setdefault(assignment['course_id'], []).append(assignment)
+
+    best_grades = {}
+    for submission in submissions:
+        key = (submission['student_id'], submission['assignment_id'])
+        grade = submission.get('grade')
+        if key not in best_grades or (grade is not None and (best_grades[key] is None or grade > best_grades[key])):
+            best_grades[key] = grade
+
+    marked_completed = {(row['student_id'], row['assignment_id'])
+                        for row in assignment_progress if row.get('completed')}
+
+    now = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for student_id, course_id in dict.fromkeys(pairs):
+        total = done = graded = 0
+        percentages = []
+        for assignment in course_assignments.get(course_id, []):
+            key = (student_id, assignment['id'])
+            total += 1
+            if key in best_grades or key in marked_completed:
+                done += 1
+            grade = best_grades.get(key)
+            if grade is not None:
+                graded += 1
+                if assignment.get('max_points'):
+                    percentages.append(grade * 100.0 / assignment['max_points'])
+        rows.append({
+            'student_id': student_id,
+            'course_id': course_id,
+            'progress_percentage': round(100.0 * done / total) if total else 0,
+            'completed': total > 0 and done >= total,
+            'completed_assignments': done,
+            'graded_assignments': graded,
+            'total_assignments': total,
+            'average_grade': round(sum(percentages) / len(percentages), 2) if percentages else None,
+            'last_accessed': now,
+            'updated_at': now
+        })
+    return rows
+
+def _materialize_progress_in_python(supabase, pairs):
+    student_ids = list(dict.fromkeys(student_id for student_id, _ in pairs))
+    course_ids = list(dict.fromkeys(course_id for _, course_id in pairs))
+
+    assignments = supabase.from_('assignments').select('id, course_id, max_points') \
+        .in_('course_id', course_ids).execute().data or []
+    assignment_ids = {a['id'] for a in assignments}
+    submissions = supabase.from_('assignment_submissions').select('student_id, assignment_id, grade') \
+        .in_('student_id', student_ids).execute().data or []
+    completions = supabase.from_('assignment_progress').select('student_id, assignment_id, completed') \
+        .in_('student_id', student_ids).execute().data or []
+
+    rows = aggregate_course_progress(
+        pairs, assignments,
+        [s for s in submissions if s['assignment_id'] in assignment_ids],
+        [c for c in completions if c['assignment_id'] in assignment_ids]
+    )
+    response = supabase.from_('course_progress').upsert(rows, on_conflict='course_id,student_id').execute()
+    return response.data or rows
+
+def materialize_course_progress(pairs):
+    """
+    Recompute and store course progress for ``(student_id, course_id)`` pairs
+    (students.id primary keys). Returns the course_progress rows.
+    """
+    global _progress_sql
+    pairs = list(dict.fromkeys(pairs))
+    supabase = get_supabase_client()
+    rows = []
+    for start in range(0, len(pairs), PROGRESS_BATCH_SIZE):
+        batch = pairs[start:start + PROGRESS_BATCH_SIZE]
+        if _progress_sql is not False:
+            try:
+                response = supabase.rpc('refresh_course_progress', {
+                    'p_student_ids': [student_id for student_id, _ in batch],
+                    'p_course_ids': [course_id for _, course_id in batch]
+                }).execute()
+                _progress_sql = True
+                rows.extend(response.data or [])
+                continue
+            except APIError as e:
+                if e.code != 'PGRST202':
+                    raise
+                logger.warning("refresh_course_progress is not installed; computing course progress in Python")
+                _progress_sql = False
+        rows.extend(_materialize_progress_in_python(supabase, batch))
+    return rows
+
+def _after_progress_change(pairs):
+    """Keep course_progress current after a write; the SQL triggers do it when installed."""
+    if _progress_sql is True:
+        return
+    try:
+        materialize_course_progress(pairs)
+    except Exception as e:
+        logger.error(f"Error updating course progress: {str(e)}")
 
 def track_progress(student_id, course_id):
     """
-    Track a student's progress in a course.
-    (Placeholder implementation)
+    Recompute a student's progress in a course and return it.
+
+    student_id is the students table primary key.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Tracking progress for student {student_id} in course {course_id}")
-    # Placeholder: Fetch assignments, submissions, grades for the student in the course
-    return {
-        "student_id": student_id,
-        "course_id": course_id,
-        "progress_status": "in_progress",
-        "completed_assignments": 0,
-        "total_assignments": 5, # Example total
-        "average_grade": None,
-        "message": "Progress tracking placeholder executed."
-    }
+    try:
+        rows = materialize_course_progress([(student_id, course_id)])
+        return rows[0] if rows else None
+    except Exception as e:
+        logger.error(f"Error tracking progress for student {student_id} in course {course_id}: {str(e)}")
+        raise RuntimeError(f"Failed to track progress: {str(e)}")
 
 def get_student_progress(student_id, course_id):
     """
-    Get a student's progress details for a specific course.
-    (Placeholder implementation - potentially redundant with track_progress)
+    Get a student's progress in a course from course_progress.
+
+    student_id is the Supabase Auth user_id. Progress is kept current on
+    every submission and grade, so this is an indexed lookup; it is only
+    computed here the first time a student's progress is read.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Getting progress details for student {student_id} in course {course_id}")
-    # This might be similar to track_progress or provide more detailed data
-    # Placeholder: Fetch detailed grades, feedback, completion status per assignment
-    return {
-        "student_id": student_id,
-        "course_id": course_id,
-        "assignments": [
-            {"id": "assign1", "title": "Intro", "status": "graded", "grade": 85},
-            {"id": "assign2", "title": "Basics", "status": "submitted", "grade": None}
-        ], # Example data
-        "overall_progress": "60%", # Example
-        "message": "Student progress details placeholder executed."
-    }
+    supabase = get_supabase_client()
+    student_pk = _get_student_pk(supabase, student_id)
+    response = supabase.from_('course_progress').select('*') \
+        .eq('course_id', course_id).eq('student_id', student_pk).maybe_single().execute()
+    if response and response.data:
+        return response.data
+    return track_progress(student_pk, course_id)
 
 def delete_assignment(assignment_id):
     """
-    Delete an assignment.
-    (Placeholder implementation)
+    Delete an assignment; its files, links, submissions and progress rows
+    cascade. Stored contents left unreferenced are removed later by
+    collect_orphaned_blobs_service. Returns the deleted assignment.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Deleting assignment {assignment_id}")
-    # Placeholder: Find assignment by ID and delete it from the database
-    # Ensure related data (submissions, grades) are handled appropriately (e.g., cascade delete or archive)
-    return {
-        "id": assignment_id,
-        "status": "deleted",
-        "message": "Assignment deletion placeholder executed."
-    }
+    try:
+        supabase = get_supabase_client()
+        response = supabase.from_('assignments').delete().eq('id', assignment_id).execute()
+        if not response.data:
+            raise AssignmentNotFoundError("Assignment not found.")
+        assignment = response.data[0]
+        invalidate_course_assignments(assignment['course_id'])
+        _after_course_assignments_change(supabase, assignment['course_id'])
+        return assignment
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting assignment {assignment_id}: {str(e)}")
+        raise RuntimeError(f"Failed to delete assignment: {str(e)}")
 
 def get_assignment_by_id(assignment_id):
     """
-    Get a specific assignment by its ID.
-    (Placeholder implementation)
+    Get an assignment with its files (not submission attachments) and links,
+    in one query. Returns None if it does not exist.
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    logger.info(f"Fetching assignment with ID: {assignment_id}")
-    # Placeholder: Find assignment by ID in the database
-    # Return some mock data for now
-    return {
-        "id": assignment_id,
-        "course_id": "course-123", # Example
-        "title": "Fetched Assignment Title", # Example
-        "description": "Details of the fetched assignment.", # Example
-        "assignment_type": "homework", # Example
-        "due_date": "2024-12-31T23:59:59", # Example
-        "max_points": 100 # Example
-    }
+    try:
+        supabase = get_supabase_client()
+        response = supabase.from_('assignments').select(ASSIGNMENT_SELECT) \
+            .eq('id', assignment_id).is_('files.submission_id', 'null') \
+            .order('created_at', foreign_table='files').order('created_at', foreign_table='links') \
+            .maybe_single().execute()
+        return response.data if response else None
+    except Exception as e:
+        logger.error(f"Error fetching assignment {assignment_id}: {str(e)}")
+        raise RuntimeError(f"Failed to get assignment: {str(e)}")
 
 def get_assignments_service():
     """
@@ -32,6 +32,13 @@ except Exception as e:
     logger.critical(f"Failed to initialize Supabase client in auth service: {str(e)}", exc_info=True)
     raise RuntimeError("Critical: Supabase client failed to initialize in auth service.") from e
 
+def reset_auth_supabase_client():
+    """Rebuild the auth service's Supabase client (e.g. after a worker fork)."""
+    global supabase
+    supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    logger.info("AuthService Supabase client re-initialized for worker process.")
+    return supabase
+
 def update_user_password(user_id: str, new_password: str):
     """
     Updates a user's password using Supabase's admin API.
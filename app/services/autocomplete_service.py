@@ -0,0 +1,42 @@
+"""
+Autocomplete Service
+--------------------
+Typeahead for the admin course and instructor pickers.
+
+Names are looked up in in-process prefix indexes, loaded on first use and
+updated row by row from the change feed, so a keystroke costs no database
+round trip.
+"""
+import logging
+
+from app.database.live_index import LiveIndex
+from app.database.prefix_index import PrefixIndex
+from app.database.supabase_db import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+_indexes = {
+    'courses': LiveIndex('courses', 'id, title, instructor_id', 'courses', lambda: PrefixIndex('title')),
+    'instructors': LiveIndex('instructors', 'id, name, email', 'instructors', lambda: PrefixIndex('name')),
+}
+
+
+def autocomplete(kind, prefix, limit=DEFAULT_AUTOCOMPLETE_LIMIT):
+    """
+    Return up to ``limit`` courses (by title) or instructors (by name) with
+    a word starting with ``prefix``; names starting with it come first.
+    """
+    try:
+        if kind not in _indexes:
+            raise ValueError(f"Unknown autocomplete type '{kind}'. Expected one of: {', '.join(_indexes)}")
+        if not (prefix or '').strip():
+            return []
+        return _indexes[kind].get(get_supabase_client()).lookup(prefix, k=limit)
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error autocompleting {kind}: {str(e)}")
+        raise RuntimeError(f"Failed to autocomplete {kind}: {str(e)}")
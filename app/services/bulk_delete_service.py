@@ -0,0 +1,72 @@
+"""
+Bulk Delete Service
+-------------------
+Shared by the student, instructor and course services: id validation and
+the batched calls to the admin_delete_* cascade-delete RPCs.
+"""
+import logging
+import uuid
+
+from app.database.supabase_db import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 1000
+
+
+def normalize_ids(ids):
+    """
+    Split ``ids`` into ``(valid, invalid)``: the well-formed UUIDs in
+    canonical form, de-duplicated in their original order, and the rest.
+    """
+    valid, invalid, seen = [], [], set()
+    for raw in ids:
+        try:
+            normalized = str(uuid.UUID(str(raw)))
+        except ValueError:
+            invalid.append(raw)
+            continue
+        if normalized not in seen:
+            seen.add(normalized)
+            valid.append(normalized)
+    return valid, invalid
+
+
+def delete_by_ids_rpc(rpc_name, ids, batch_size=DELETE_BATCH_SIZE):
+    """
+    Call a cascade-delete RPC taking ``p_ids UUID[]`` for a list of ids.
+
+    Ids are de-duplicated and sent in chunks of ``batch_size`` (one round trip
+    and one transaction per chunk). The RPC returns the deleted ids, or
+    ``{'deleted': [...], 'blocked': [...]}`` when it can refuse some of them.
+
+    Returns ``{'deleted', 'not_found', 'blocked', 'failed'}``. Malformed ids
+    are reported as not found without reaching the database. A chunk whose
+    call fails is reported in ``failed`` and the remaining chunks still run,
+    since the chunks before it are already committed.
+    """
+    valid, invalid = normalize_ids(ids)
+
+    supabase = get_supabase_client()
+    deleted, blocked, failed = [], [], []
+    for start in range(0, len(valid), batch_size):
+        chunk = valid[start:start + batch_size]
+        try:
+            data = supabase.rpc(rpc_name, {'p_ids': chunk}).execute().data
+        except Exception as e:
+            logger.error(f"{rpc_name} failed for {len(chunk)} ids: {str(e)}")
+            failed.extend(chunk)
+            continue
+        if isinstance(data, dict):
+            deleted.extend(data.get('deleted') or [])
+            blocked.extend(data.get('blocked') or [])
+        else:
+            deleted.extend(data or [])
+
+    accounted = set(deleted) | set(blocked) | set(failed)
+    return {
+        'deleted': deleted,
+        'not_found': [i for i in valid if i not in accounted] + invalid,
+        'blocked': blocked,
+        'failed': failed
+    }
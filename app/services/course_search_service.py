@@ -0,0 +1,90 @@
+"""
+Course Search Service
+---------------------
+Ranked course search over titles and descriptions, tolerant of typos, with
+highlighted matches.
+
+With the search_courses SQL function (see the course_search migration) the
+database does the work: a GIN index over the courses' tsvector and a trigram
+index on titles for misspelled words. Without it (e.g. the local Supabase
+stand-in) courses are searched in an in-memory inverted index, loaded on
+first use and kept current from the 'courses' change feed.
+"""
+import logging
+
+from postgrest.exceptions import APIError
+
+from app.database.live_index import LiveIndex
+from app.database.search_index import InvertedIndex, highlight
+from app.database.supabase_db import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+MAX_QUERY_LENGTH = 200
+# Title matches weigh like the migration's setweight 'A' over 'B'.
+SEARCH_FIELDS = {'title': 2.0, 'description': 1.0}
+HIGHLIGHT_MAX_WORDS = 35
+DEFAULT_INDEX_TTL = 600
+
+# Whether search_courses is installed: None until the first search finds out.
+_search_sql = None
+
+_index = LiveIndex('courses', '*', 'courses', lambda: InvertedIndex(SEARCH_FIELDS), ttl=DEFAULT_INDEX_TTL)
+
+
+def configure_course_search(index_ttl=DEFAULT_INDEX_TTL):
+    """
+    Reload the in-memory index (used without search_courses) at least every
+    ``index_ttl`` seconds, for changes the change feed did not carry.
+    """
+    _index.ttl = max(float(index_ttl), 0)
+
+
+def _search_in_memory(supabase, query, limit, offset):
+    total, hits, terms = _index.get(supabase).search(query, limit=limit, offset=offset)
+    results = []
+    for _, score, course in hits:
+        results.append(dict(course, rank=round(score, 4), highlights={
+            'title': highlight(course.get('title'), terms),
+            'description': highlight(course.get('description'), terms, max_words=HIGHLIGHT_MAX_WORDS)
+        }))
+    return results, total
+
+
+def search_courses(query, limit=DEFAULT_SEARCH_LIMIT, offset=0):
+    """
+    Search courses by title and description, best matches first.
+
+    Returns ``(courses, total)``. Each course carries its ``rank`` and
+    ``highlights`` of the title and description, HTML-escaped with the
+    matched words in ``<mark>``.
+    """
+    global _search_sql
+    try:
+        query = (query or '').strip()
+        if not query:
+            raise ValueError("Query parameter 'q' is required")
+        if len(query) > MAX_QUERY_LENGTH:
+            raise ValueError(f"Query must be at most {MAX_QUERY_LENGTH} characters")
+
+        supabase = get_supabase_client()
+        if _search_sql is not False:
+            try:
+                response = supabase.rpc('search_courses', {
+                    'p_query': query, 'p_limit': limit, 'p_offset': offset
+                }).execute()
+                _search_sql = True
+                return response.data['results'], response.data['total']
+            except APIError as e:
+                if e.code != 'PGRST202':
+                    raise
+                logger.warning("search_courses is not installed; searching courses in memory")
+                _search_sql = False
+        return _search_in_memory(supabase, query, limit, offset)
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching courses: {str(e)}")
+        raise RuntimeError(f"Failed to search courses: {str(e)}")
@@ -4,11 +4,29 @@ Courses Service
 This service handles the business logic for course-related operations.
 """
 import logging
+import time
 from datetime import datetime
 from app.database.supabase_db import get_supabase_client
+from app.database.supabase_async import get_async_supabase_client
+from app.database.single_flight import single_flight
+from app.database.snapshot_cache import make_backend
+from app.database.change_feed import publish, subscribe
+from app.services.bulk_delete_service import delete_by_ids_rpc, normalize_ids
 
 logger = logging.getLogger(__name__)
 
+# Ids accepted by one batch read.
+MAX_BATCH_IDS = 100
+
+# Course rows by id, dropped on every change to the course.
+DEFAULT_COURSE_CACHE_TTL = 60
+COURSE_CACHE_VERSION_TTL = 3600
+_course_cache = make_backend()
+_course_cache_ttl = DEFAULT_COURSE_CACHE_TTL
+# Bumped by every change event; a read that overlaps one does not cache what it read.
+_course_changes = 0
+
+@single_flight
 def get_courses_service():
     """Get list of all courses."""
     try:
@@ -19,6 +37,17 @@ def get_courses_service():
         logger.error(f"Error getting courses: {str(e)}")
         raise RuntimeError(f"Failed to get courses: {str(e)}")
 
+@single_flight
+async def get_courses_service_async():
+    """Async variant of get_courses_service."""
+    try:
+        supabase_client = await get_async_supabase_client()
+        response = await supabase_client.from_('courses').select('*').execute()
+        return response.data
+    except Exception as e:
+        logger.error(f"Error getting courses: {str(e)}")
+        raise RuntimeError(f"Failed to get courses: {str(e)}")
+
 def create_course_service(data):
     """Create a new course."""
     try:
@@ -46,8 +75,10 @@ def create_course_service(data):
             'updated_at': datetime.utcnow().isoformat()
         }
 
-        supabase_client.from_('courses').insert(course_data).execute()
-        return course_data
+        insert_response = supabase_client.from_('courses').insert(course_data).execute()
+        if insert_response.data:
+            publish('courses', [insert_response.data[0]['id']])
+        return insert_response.data[0] if insert_response.data else course_data
     except ValueError as e:
         logger.error(f"Validation error in create_course_service: {str(e)}")
         raise
@@ -55,18 +86,109 @@ def create_course_service(data):
         logger.error(f"Error creating course: {str(e)}")
         raise RuntimeError(f"Failed to create course: {str(e)}")
 
+def configure_course_cache(ttl=DEFAULT_COURSE_CACHE_TTL, redis_url=None):
+    """
+    Configure the cache of course rows read by id: entries live ``ttl``
+    seconds (0 disables it) and are shared through Redis when ``redis_url``
+    is set.
+    """
+    global _course_cache, _course_cache_ttl
+    _course_cache_ttl = max(float(ttl), 0)
+    _course_cache = make_backend(redis_url) if _course_cache_ttl else None
+
+def _course_cache_version():
+    entry = _course_cache.get('courses:version')
+    return entry[0] if entry else 0
+
+def _on_courses_change(ids, remote):
+    global _course_changes
+    _course_changes += 1
+    # Entries kept in Redis were already dropped by the writer.
+    if _course_cache is None or (remote and _course_cache.shared):
+        return
+    try:
+        if ids is None:
+            _course_cache.set('courses:version', time.time_ns(), time.time(),
+                              max(_course_cache_ttl * 10, COURSE_CACHE_VERSION_TTL))
+            return
+        version = _course_cache_version()
+        for course_id in ids:
+            _course_cache.delete(f"course:{version}:{course_id}")
+    except Exception as e:
+        logger.warning(f"Could not invalidate cached courses: {str(e)}")
+
+subscribe('courses', _on_courses_change)
+
+def _cached_courses(course_ids):
+    """Return ``(version, {id: course})`` for the ids found in the cache."""
+    if _course_cache is None:
+        return None, {}
+    try:
+        version = _course_cache_version()
+        entries = _course_cache.get_many([f"course:{version}:{course_id}" for course_id in course_ids])
+    except Exception as e:
+        logger.warning(f"Could not read cached courses: {str(e)}")
+        return None, {}
+    return version, {course_id: entry[0] for course_id, entry in zip(course_ids, entries) if entry}
+
+def _cache_courses(version, courses, changes):
+    if _course_cache is None or version is None or changes != _course_changes:
+        return
+    try:
+        _course_cache.set_many([(f"course:{version}:{course['id']}", course) for course in courses],
+                               time.time(), _course_cache_ttl)
+    except Exception as e:
+        logger.warning(f"Could not cache courses: {str(e)}")
+
+@single_flight
 def get_course_by_id_service(course_id):
-    """Get a specific course by ID."""
+    """Get a specific course by ID; concurrent lookups of one course share a query."""
     try:
+        version, cached = _cached_courses([course_id])
+        if course_id in cached:
+            return cached[course_id]
+        changes = _course_changes
         supabase_client = get_supabase_client()
         response = supabase_client.from_('courses').select('*').eq('id', course_id).maybe_single().execute()
-        if not response.data:
+        if not response or not response.data:
             return None
+        _cache_courses(version, [response.data], changes)
         return response.data
     except Exception as e:
         logger.error(f"Error getting course: {str(e)}")
         raise RuntimeError(f"Failed to get course: {str(e)}")
 
+def get_courses_by_ids_service(course_ids):
+    """
+    Get the courses with the given ids, in the order asked for. Duplicates
+    are returned once and unknown or malformed ids are left out; courses
+    not in the cache are read with one query.
+    """
+    try:
+        if not course_ids:
+            raise ValueError("ids must list at least one course id")
+        if len(course_ids) > MAX_BATCH_IDS:
+            raise ValueError(f"At most {MAX_BATCH_IDS} ids can be requested at once")
+        course_ids, _ = normalize_ids(course_ids)
+        if not course_ids:
+            return []
+
+        version, courses = _cached_courses(course_ids)
+        missing = [course_id for course_id in course_ids if course_id not in courses]
+        if missing:
+            changes = _course_changes
+            supabase_client = get_supabase_client()
+            response = supabase_client.from_('courses').select('*').in_('id', missing).execute()
+            rows = response.data or []
+            _cache_courses(version, rows, changes)
+            courses.update((row['id'], row) for row in rows)
+        return [courses[course_id] for course_id in course_ids if course_id in courses]
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting courses by id: {str(e)}")
+        raise RuntimeError(f"Failed to get courses: {str(e)}")
+
 def update_course_service(course_id, data):
     """Update an existing course."""
     try:
@@ -87,13 +209,13 @@ def update_course_service(course_id, data):
         # Filter out None values so we only update provided fields
         update_data = {k: v for k, v in update_data.items() if v is not None}
 
-        supabase_client.from_('courses').update(update_data).eq('id', course_id).execute()
-
-        course_response = supabase_client.from_('courses').select('*').eq('id', course_id).maybe_single().execute()
+        # The update returns the updated row (return=representation), so no re-select is needed
+        course_response = supabase_client.from_('courses').update(update_data).eq('id', course_id).execute()
         if not course_response.data:
             raise ValueError("Course not found after update")
-            
-        return course_response.data
+
+        publish('courses', [course_id])
+        return course_response.data[0]
     except ValueError as e:
         logger.error(f"Validation error in update_course_service: {str(e)}")
         raise
@@ -102,19 +224,35 @@ def update_course_service(course_id, data):
         raise RuntimeError(f"Failed to update course: {str(e)}")
 
 def delete_course_service(course_id):
-    """Delete a course."""
+    """Delete a course and its enrollments in one transactional round trip."""
     try:
-        supabase_client = get_supabase_client()
-        
-        response = supabase_client.from_('courses').select('*').eq('id', course_id).execute()
-        if not response.data:
+        result = delete_by_ids_rpc('admin_delete_courses', [course_id])
+        if result['failed']:
+            raise RuntimeError("admin_delete_courses failed")
+        if not result['deleted']:
             raise ValueError(f"Course with ID {course_id} not found")
-            
-        supabase_client.from_('courses').delete().eq('id', course_id).execute()
-        
+        _after_courses_deleted(result['deleted'])
+
     except ValueError as e:
         logger.error(f"Error deleting course: {str(e)}")
         raise
     except Exception as e:
         logger.error(f"Error deleting course: {str(e)}")
         raise RuntimeError(f"Failed to delete course: {str(e)}")
+
+def _after_courses_deleted(course_ids):
+    if course_ids:
+        publish('courses', course_ids)
+        publish('course_assignments', course_ids)
+        # Enrollments of any student may have gone with them.
+        publish('enrollments')
+
+def delete_courses_service(course_ids):
+    """Delete many courses (and their enrollments) by id."""
+    try:
+        result = delete_by_ids_rpc('admin_delete_courses', course_ids)
+        _after_courses_deleted(result['deleted'])
+        return result
+    except Exception as e:
+        logger.error(f"Error bulk deleting courses: {str(e)}")
+        raise RuntimeError(f"Failed to delete courses: {str(e)}")
@@ -0,0 +1,496 @@
+"""
+Deadline Service
+----------------
+Processes assignment due dates as they pass: submissions made after the
+due date are marked 'late' and a notification is queued for each enrolled
+student who did not submit (process_assignment_deadlines).
+
+``DeadlineScheduler`` keeps the pending due dates of the next
+``lookahead`` seconds in a min-heap and sleeps until the earliest one. The
+window is read from the database page by page through a partial index of
+pending deadlines, and re-read every ``reload_interval`` seconds to pick up
+new or moved due dates, so the assignments table is never scanned as a
+whole however many assignments it holds.
+
+Only one process runs the scheduler: every worker starts a thread that
+competes for a leader lock (a Redis key with REDIS_URL, otherwise an
+exclusive lock file, which covers the workers of one host) and only the
+holder loads and fires deadlines.
+
+The leader also runs periodic maintenance tasks, such as re-verifying the
+dashboard counters or pruning the change_events outbox; these run even
+with deadline processing turned off. A task that pg_cron already runs on
+the database is skipped.
+"""
+import fcntl
+import heapq
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from postgrest.exceptions import APIError
+
+from app.database.supabase_db import get_supabase_client
+from app.runtime import host_path
+from app.services.assignment_service import invalidate_course_assignments
+
+logger = logging.getLogger(__name__)
+
+# Assignments per process_assignment_deadlines call.
+DEADLINE_BATCH_SIZE = 500
+# Pending deadlines read per request while loading the window.
+DEADLINE_PAGE_SIZE = 1000
+# Deadlines held in memory; a window holding more is cut short and the
+# rest is loaded once the heap drains.
+MAX_SCHEDULED_DEADLINES = 20000
+DEFAULT_LOOKAHEAD = 3600
+DEFAULT_RELOAD_INTERVAL = 60
+DEFAULT_RECONCILE_INTERVAL = 900
+DEFAULT_PRUNE_INTERVAL = 3600
+LEADER_LOCK_TTL = 30
+
+# Whether process_assignment_deadlines is installed: None until the first
+# call finds out, False on a database without the migration (e.g. the local
+# Supabase stand-in), where deadlines are processed table by table.
+_deadlines_sql = None
+
+
+def _parse_timestamp(timestamp):
+    value = datetime.fromisoformat(timestamp)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def load_pending_deadlines(until, limit=MAX_SCHEDULED_DEADLINES, page_size=DEADLINE_PAGE_SIZE):
+    """
+    Return ``[(due_timestamp, assignment_id)]`` for pending deadlines up to
+    ``until`` (a datetime), earliest first, at most ``limit`` of them.
+    """
+    supabase = get_supabase_client()
+    deadlines = []
+    while len(deadlines) < limit:
+        size = min(page_size, limit - len(deadlines))
+        rows = supabase.from_('assignments').select('id, due_date') \
+            .is_('deadline_processed_at', 'null').lte('due_date', until.isoformat()) \
+            .order('due_date').order('id') \
+            .range(len(deadlines), len(deadlines) + size - 1).execute().data or []
+        deadlines.extend((_parse_timestamp(row['due_date']).timestamp(), row['id'])
+                         for row in rows if row.get('due_date'))
+        if len(rows) < size:
+            break
+    return deadlines
+
+
+def _process_in_python(supabase, assignment_ids):
+    """Fallback for databases without process_assignment_deadlines."""
+    now = datetime.now(timezone.utc)
+    assignments = supabase.from_('assignments').select('id, course_id, title, due_date') \
+        .in_('id', assignment_ids).is_('deadline_processed_at', 'null').execute().data or []
+    due = {a['id']: a for a in assignments if a.get('due_date') and _parse_timestamp(a['due_date']) <= now}
+    if not due:
+        return []
+
+    submissions = supabase.from_('assignment_submissions').select('id, assignment_id, student_id, status, submitted_at') \
+        .in_('assignment_id', list(due)).execute().data or []
+    late = [s for s in submissions if s['status'] == 'submitted' and s.get('submitted_at')
+            and _parse_timestamp(s['submitted_at']) > _parse_timestamp(due[s['assignment_id']]['due_date'])]
+    if late:
+        supabase.from_('assignment_submissions').update({'status': 'late'}) \
+            .in_('id', [s['id'] for s in late]).execute()
+
+    submitted = {(s['assignment_id'], s['student_id']) for s in submissions}
+    enrollments = supabase.from_('enrollments').select('student_id, course_id, status') \
+        .in_('course_id', list({a['course_id'] for a in due.values()})).execute().data or []
+    missing = [(assignment, e['student_id']) for assignment in due.values() for e in enrollments
+               if e['course_id'] == assignment['course_id'] and e.get('status') == 'active'
+               and (assignment['id'], e['student_id']) not in submitted]
+
+    notifications = [{'student_id': student_id, 'assignment_id': a['id'], 'kind': 'assignment_missing',
+                      'payload': {'title': a['title'], 'due_date': a['due_date']}} for a, student_id in missing]
+    notifications += [{'student_id': s['student_id'], 'assignment_id': s['assignment_id'], 'kind': 'submission_late',
+                       'payload': {'title': due[s['assignment_id']]['title'],
+                                   'due_date': due[s['assignment_id']]['due_date']}} for s in late]
+    if notifications:
+        supabase.from_('notifications').upsert(notifications, on_conflict='student_id,assignment_id,kind',
+                                               ignore_duplicates=True).execute()
+    supabase.from_('assignments').update({'deadline_processed_at': now.isoformat()}) \
+        .in_('id', list(due)).execute()
+
+    return [{
+        'assignment_id': assignment_id,
+        'course_id': assignment['course_id'],
+        'late_marked': sum(1 for s in late if s['assignment_id'] == assignment_id),
+        'missing': sum(1 for a, _ in missing if a['id'] == assignment_id)
+    } for assignment_id, assignment in due.items()]
+
+
+def process_deadlines(assignment_ids, batch_size=DEADLINE_BATCH_SIZE):
+    """
+    Process the passed, still pending deadlines among ``assignment_ids``
+    with one statement per batch. Returns one
+    ``{assignment_id, course_id, late_marked, missing}`` per processed
+    assignment; the others are skipped.
+    """
+    global _deadlines_sql
+    try:
+        supabase = get_supabase_client()
+        results = []
+        for start in range(0, len(assignment_ids), batch_size):
+            batch = assignment_ids[start:start + batch_size]
+            if _deadlines_sql is not False:
+                try:
+                    response = supabase.rpc('process_assignment_deadlines', {'p_assignment_ids': batch}).execute()
+                    _deadlines_sql = True
+                    results.extend(response.data or [])
+                    continue
+                except APIError as e:
+                    if e.code != 'PGRST202':
+                        raise
+                    logger.warning("process_assignment_deadlines is not installed; processing deadlines in Python")
+                    _deadlines_sql = False
+            results.extend(_process_in_python(supabase, batch))
+
+        for course_id in {row['course_id'] for row in results}:
+            invalidate_course_assignments(course_id)
+        return results
+    except Exception as e:
+        logger.error(f"Error processing assignment deadlines: {str(e)}")
+        raise RuntimeError(f"Failed to process deadlines: {str(e)}")
+
+
+def process_due_deadlines(limit=MAX_SCHEDULED_DEADLINES):
+    """Process every pending deadline that has already passed (up to ``limit``)."""
+    due = load_pending_deadlines(datetime.now(timezone.utc), limit=limit)
+    return process_deadlines([assignment_id for _, assignment_id in due])
+
+
+def _cron_job_scheduled(jobname):
+    """Whether pg_cron runs ``jobname``; False where that is unknown (e.g. the stand-in)."""
+    try:
+        return bool(get_supabase_client().rpc('cron_job_scheduled', {'p_jobname': jobname}).execute().data)
+    except APIError as e:
+        if e.code != 'PGRST202':
+            raise
+        return False
+
+
+def _unless_cron(jobname, func):
+    """A periodic task running ``func`` only while pg_cron does not run ``jobname``."""
+    def task():
+        if _cron_job_scheduled(jobname):
+            logger.debug(f"Skipping {func.__name__}: pg_cron runs '{jobname}'")
+            return
+        func()
+    return task
+
+
+def _prune_change_events():
+    from app.database.change_feed import OUTBOX_RETENTION
+    try:
+        deleted = get_supabase_client().rpc('prune_change_events', {'p_retention': OUTBOX_RETENTION}).execute().data
+    except APIError as e:
+        if e.code != 'PGRST202':
+            raise
+        return  # no outbox on this database
+    logger.info(f"Pruned {deleted or 0} change events")
+
+
+def _reconcile_dashboard():
+    from app.services.admin_service import reconcile_dashboard_statistics_service
+    drift = reconcile_dashboard_statistics_service()
+    logger.info(f"Dashboard counters reconciled ({len(drift or [])} drifted)")
+
+
+class FileLeaderLock:
+    """
+    Leadership among the processes of one host: an exclusive lock file,
+    named per deployment by default.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or host_path('deadlines.lock')
+        self._file = None
+
+    def acquire(self):
+        """Take or keep leadership; True while this process holds it."""
+        if self._file is not None:
+            return True
+        lock_file = open(self.path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class RedisLeaderLock:
+    """Leadership across hosts: a Redis key that the leader keeps renewing."""
+
+    KEY = 'deadline-scheduler:leader'
+
+    def __init__(self, url, ttl=LEADER_LOCK_TTL):
+        import redis
+        self._redis = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self._token = uuid.uuid4().hex
+        self._ttl = ttl
+
+    def acquire(self):
+        if self._redis.set(self.KEY, self._token, nx=True, ex=self._ttl):
+            return True
+        # Renew only our own lease; a lapsed one may have been taken over.
+        with self._redis.pipeline() as pipe:
+            try:
+                pipe.watch(self.KEY)
+                if pipe.get(self.KEY) != self._token.encode():
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.expire(self.KEY, self._ttl)
+                pipe.execute()
+                return True
+            except Exception:
+                return False
+
+    def release(self):
+        if self._redis.get(self.KEY) == self._token.encode():
+            self._redis.delete(self.KEY)
+
+
+def make_leader_lock(redis_url=None, lock_file=None):
+    """Return a Redis lock for ``redis_url``, or a lock file when unset."""
+    if redis_url:
+        try:
+            return RedisLeaderLock(redis_url)
+        except ImportError:
+            logger.warning("redis is not installed; deadline scheduler elects a leader per host")
+    return FileLeaderLock(lock_file)
+
+
+class DeadlineScheduler:
+    """
+    Fires pending assignment deadlines from a min-heap, in the elected
+    process, along with ``periodic``: ``(name, interval, func)`` tasks run
+    every ``interval`` seconds. ``deadlines=False`` runs only those.
+    """
+
+    def __init__(self, lock, lookahead=DEFAULT_LOOKAHEAD, reload_interval=DEFAULT_RELOAD_INTERVAL,
+                 max_scheduled=MAX_SCHEDULED_DEADLINES, deadlines=True, periodic=()):
+        self.lock = lock
+        self.lookahead = lookahead
+        self.reload_interval = reload_interval
+        self.max_scheduled = max_scheduled
+        self.deadlines = deadlines
+        self.periodic = list(periodic)
+        # name -> time of the next run. The first run after winning leadership
+        # is spread over one interval, so restarts and recycled workers do not
+        # each trigger one at once.
+        self._next_periodic = {}
+        self._heap = []
+        # assignment_id -> due timestamp; heap entries that disagree are stale.
+        self._scheduled = {}
+        self._loaded_until = 0.0
+        self._next_reload = 0.0
+        self._leader = False
+        self._processed = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='deadline-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        try:
+            self.lock.release()
+        except Exception as e:
+            logger.warning(f"Could not release deadline scheduler lock: {str(e)}")
+
+    def schedule(self, assignment_id, due_date):
+        """
+        Add or move one deadline (e.g. right after an assignment is written in
+        this process); ignored outside the loaded window, which the next
+        reload covers.
+        """
+        due = _parse_timestamp(due_date).timestamp() if due_date else None
+        with self._lock:
+            if due is None or due > self._loaded_until:
+                self._scheduled.pop(assignment_id, None)
+                return
+            self._scheduled[assignment_id] = due
+            heapq.heappush(self._heap, (due, assignment_id))
+        self._wake.set()
+
+    def status(self):
+        with self._lock:
+            next_due = next((due for due, assignment_id in sorted(self._heap)
+                             if self._scheduled.get(assignment_id) == due), None)
+            return {
+                'leader': self._leader,
+                'scheduled': len(self._scheduled),
+                'next_due': datetime.fromtimestamp(next_due, timezone.utc).isoformat() if next_due else None,
+                'loaded_until': datetime.fromtimestamp(self._loaded_until, timezone.utc).isoformat()
+                if self._loaded_until else None,
+                'processed': self._processed,
+                'periodic': {name: datetime.fromtimestamp(self._next_periodic[name], timezone.utc).isoformat()
+                             for name, _, _ in self.periodic if name in self._next_periodic}
+            }
+
+    def _reload(self, now):
+        until = now + self.lookahead
+        deadlines = load_pending_deadlines(datetime.fromtimestamp(until, timezone.utc), limit=self.max_scheduled)
+        if len(deadlines) >= self.max_scheduled:
+            # Too many to hold: stop the window at the last one loaded.
+            until = deadlines[-1][0]
+        with self._lock:
+            self._heap = [(due, assignment_id) for due, assignment_id in deadlines if due <= until]
+            heapq.heapify(self._heap)
+            self._scheduled = {assignment_id: due for due, assignment_id in self._heap}
+            self._loaded_until = until
+        self._next_reload = now + self.reload_interval
+
+    def _pop_due(self, now):
+        due_ids = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, assignment_id = heapq.heappop(self._heap)
+                if self._scheduled.get(assignment_id) == due:
+                    del self._scheduled[assignment_id]
+                    due_ids.append(assignment_id)
+        return due_ids
+
+    def _seconds_to_next_event(self, now):
+        with self._lock:
+            next_due = self._heap[0][0] if self._heap else None
+        events = list(self._next_periodic.values())
+        if self.deadlines:
+            events.append(self._next_reload)
+            if next_due is not None:
+                events.append(next_due)
+        # Wake up in time to renew the leader lock as well.
+        return max(0.0, min([event - now for event in events] + [LEADER_LOCK_TTL / 3]))
+
+    def _run_periodic(self, now):
+        for name, interval, func in self.periodic:
+            if name not in self._next_periodic:
+                self._next_periodic[name] = now + random.uniform(0, interval)
+            if self._next_periodic[name] > now:
+                continue
+            self._next_periodic[name] = now + interval
+            try:
+                func()
+            except Exception as e:
+                logger.error(f"Periodic task {name} failed: {str(e)}")
+
+    def tick(self, now=None):
+        """One scheduler step; returns the number of seconds to sleep."""
+        now = now or time.time()
+        self._leader = self.lock.acquire()
+        if not self._leader:
+            with self._lock:
+                self._heap, self._scheduled = [], {}
+                self._loaded_until = 0.0
+            self._next_reload = 0.0
+            self._next_periodic = {}
+            return LEADER_LOCK_TTL / 3
+        self._run_periodic(now)
+        if not self.deadlines:
+            return self._seconds_to_next_event(time.time())
+        if now >= self._next_reload or (not self._heap and self._loaded_until <= now):
+            self._reload(now)
+        due_ids = self._pop_due(now)
+        if due_ids:
+            results = process_deadlines(due_ids)
+            self._processed += len(results)
+            for row in results:
+                logger.info(f"Deadline of assignment {row['assignment_id']} processed: "
+                            f"{row['late_marked']} late, {row['missing']} missing")
+        return self._seconds_to_next_event(time.time())
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                delay = self.tick()
+            except Exception as e:
+                logger.error(f"Deadline scheduler error: {str(e)}")
+                delay = self.reload_interval
+                self._next_reload = 0.0
+            self._wake.wait(delay)
+            self._wake.clear()
+
+
+_settings = None
+_scheduler = None
+_scheduler_pid = None
+
+
+def configure_deadline_scheduler(enabled=False, redis_url=None, lock_file=None,
+                                 lookahead=DEFAULT_LOOKAHEAD, reload_interval=DEFAULT_RELOAD_INTERVAL,
+                                 reconcile_interval=DEFAULT_RECONCILE_INTERVAL,
+                                 prune_interval=DEFAULT_PRUNE_INTERVAL):
+    """
+    Remember how to run the scheduler; start it with start_deadline_scheduler().
+    ``enabled`` turns on deadline processing; a ``reconcile_interval`` of 0
+    stops the periodic dashboard counter check and a ``prune_interval`` of
+    0 the outbox pruning. With none of them, no thread runs.
+    """
+    global _settings
+    periodic = []
+    if reconcile_interval:
+        periodic.append(('reconcile_dashboard', reconcile_interval,
+                         _unless_cron('reconcile-dashboard-statistics', _reconcile_dashboard)))
+    if prune_interval:
+        periodic.append(('prune_change_events', prune_interval,
+                         _unless_cron('prune-change-events', _prune_change_events)))
+    _settings = {'enabled': enabled, 'redis_url': redis_url, 'lock_file': lock_file,
+                 'lookahead': lookahead, 'reload_interval': reload_interval,
+                 'periodic': periodic} if enabled or periodic else None
+
+
+def start_deadline_scheduler():
+    """
+    Start this process's scheduler thread if configured. Safe to call again,
+    and again after a fork (threads do not survive one): the child gets its
+    own thread and lock.
+    """
+    global _scheduler, _scheduler_pid
+    if not _settings or _scheduler_pid == os.getpid():
+        return _scheduler
+    _scheduler = DeadlineScheduler(
+        make_leader_lock(_settings['redis_url'], _settings['lock_file']),
+        lookahead=_settings['lookahead'],
+        reload_interval=_settings['reload_interval'],
+        deadlines=_settings['enabled'],
+        periodic=_settings['periodic']
+    )
+    _scheduler_pid = os.getpid()
+    _scheduler.start()
+    return _scheduler
+
+
+def schedule_deadline(assignment_id, due_date):
+    """Tell this process's scheduler about a new or moved due date."""
+    if _scheduler is not None and _scheduler_pid == os.getpid():
+        _scheduler.schedule(assignment_id, due_date)
+
+
+def get_scheduler_status():
+    if _scheduler is None or _scheduler_pid != os.getpid():
+        return {'running': False}
+    return dict(_scheduler.status(), running=True)
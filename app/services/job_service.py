@@ -0,0 +1,489 @@
+"""
+Job Service
+-----------
+Background jobs for slow operations (creating an instructor's auth
+account, bulk imports and deletes, storage cleanup, verifying direct
+uploads). The endpoint enqueues a job and answers with its id; worker
+threads run it and record the result, which GET /api/v1/admin/jobs/<id>
+reports.
+
+The queue is shared by every web worker (and any ``python worker.py``
+process), so a job's status can be read from any of them and a job whose
+worker died, or was recycled, is claimed again once its lease expires:
+
+* ``redis`` (the default with REDIS_URL): sorted sets in Redis;
+* ``database`` (the default otherwise): the ``background_jobs`` table (see
+  the background_jobs migration), polled by the worker threads;
+* ``memory``: process memory only, for a single process in development;
+  jobs are lost with it and other processes cannot see them.
+
+Jobs run a function from ``JOB_HANDLERS`` with the stored arguments. A
+``ValueError`` fails the job for good; other errors are retried with
+exponential backoff up to ``max_attempts``. An idempotency key returns the
+job already created for it instead of enqueueing another one.
+"""
+import hashlib
+import heapq
+import importlib
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from postgrest.exceptions import APIError
+
+from app.database.supabase_db import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+# Job name -> "module:function"; imported when the job first runs.
+JOB_HANDLERS = {
+    'create_instructor': 'app.services.admin_service:create_instructor_record_service',
+    'import_students': 'app.services.admin_service:import_staged_students_service',
+    'delete_students': 'app.services.admin_service:delete_students_service',
+    'delete_instructors': 'app.services.admin_service:delete_instructors_service',
+    'delete_courses': 'app.services.courses_service:delete_courses_service',
+    'collect_file_blobs': 'app.services.signed_url_service:collect_file_storage_service',
+    'verify_staged_upload': 'app.services.signed_url_service:verify_staged_upload_service',
+}
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2
+RETRY_MAX_DELAY = 300
+# A claimed job not finished within the lease is handed to another worker.
+JOB_LEASE = 900
+# How long finished jobs (and idempotency keys) can be looked up.
+JOB_TTL = 24 * 3600
+# How often idle workers look for due jobs in the database queue.
+DATABASE_POLL_INTERVAL = 2.0
+
+
+class IdempotencyKeyReused(ValueError):
+    """The idempotency key was already used for a different request."""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _fingerprint(name, args):
+    return hashlib.sha256(json.dumps([name, args], sort_keys=True, default=str).encode()).hexdigest()
+
+
+class MemoryJobBackend:
+    """Process-local queue; jobs are lost with the process."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._args = {}
+        self._keys = {}
+        self._ready = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def create(self, job, args, idempotency_key=None):
+        """Store and enqueue ``job``; returns ``(job, created)``."""
+        with self._cond:
+            if idempotency_key:
+                existing = self._jobs.get(self._keys.get(idempotency_key))
+                if existing:
+                    return dict(existing), False
+                self._keys[idempotency_key] = job['id']
+            self._jobs[job['id']] = dict(job)
+            self._args[job['id']] = args
+            heapq.heappush(self._ready, (time.time(), next(self._seq), job['id']))
+            self._cond.notify()
+        return dict(job), True
+
+    def get(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def find(self, idempotency_key):
+        with self._cond:
+            job = self._jobs.get(self._keys.get(idempotency_key))
+            return dict(job) if job else None
+
+    def claim(self, lease):
+        """Return ``(job, args)`` for the next due job, or None."""
+        with self._cond:
+            if not self._ready or self._ready[0][0] > time.time():
+                return None
+            _, _, job_id = heapq.heappop(self._ready)
+            return dict(self._jobs[job_id]), self._args.get(job_id)
+
+    def save(self, job, finished=False):
+        with self._cond:
+            self._jobs[job['id']] = dict(job)
+            if finished:
+                self._args.pop(job['id'], None)
+
+    def requeue(self, job, delay):
+        with self._cond:
+            self._jobs[job['id']] = dict(job)
+            heapq.heappush(self._ready, (time.time() + delay, next(self._seq), job['id']))
+            self._cond.notify()
+
+    def wait(self, timeout):
+        with self._cond:
+            delay = timeout
+            if self._ready:
+                delay = min(timeout, max(self._ready[0][0] - time.time(), 0))
+            if delay > 0:
+                self._cond.wait(delay)
+
+
+# Hand out the next due job: re-queue jobs whose lease expired, then move
+# the earliest due one from the queue to the lease set.
+_CLAIM_SCRIPT = """
+local now = tonumber(ARGV[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, 100)
+for _, id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], id)
+    redis.call('ZADD', KEYS[1], now, id)
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, 1)
+if #ids == 0 then
+    return false
+end
+redis.call('ZREM', KEYS[1], ids[1])
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), ids[1])
+return ids[1]
+"""
+
+
+class RedisJobBackend:
+    """Queue shared through Redis by every process using the same URL."""
+
+    def __init__(self, url, prefix='jobs:'):
+        import redis
+        self._redis = redis.Redis.from_url(url, socket_timeout=5, socket_connect_timeout=1)
+        self._prefix = prefix
+        self._queue = prefix + 'queue'
+        self._leases = prefix + 'leases'
+        self._wakeup = prefix + 'wakeup'
+        self._claim = self._redis.register_script(_CLAIM_SCRIPT)
+
+    def _job_key(self, job_id):
+        return f"{self._prefix}job:{job_id}"
+
+    def _args_key(self, job_id):
+        return f"{self._prefix}args:{job_id}"
+
+    def _signal(self, pipe):
+        pipe.lpush(self._wakeup, 1)
+        pipe.ltrim(self._wakeup, 0, 63)
+
+    def create(self, job, args, idempotency_key=None):
+        job_id = job['id']
+        with self._redis.pipeline() as pipe:
+            pipe.set(self._job_key(job_id), json.dumps(job, default=str), ex=JOB_TTL)
+            pipe.set(self._args_key(job_id), json.dumps(args, default=str), ex=JOB_TTL)
+            pipe.execute()
+        if idempotency_key:
+            key = f"{self._prefix}key:{idempotency_key}"
+            if not self._redis.set(key, job_id, nx=True, ex=JOB_TTL):
+                self._redis.delete(self._job_key(job_id), self._args_key(job_id))
+                existing_id = self._redis.get(key)
+                existing = self.get(existing_id.decode()) if existing_id else None
+                return existing or dict(job, id=existing_id.decode() if existing_id else job_id), False
+        with self._redis.pipeline() as pipe:
+            pipe.zadd(self._queue, {job_id: time.time()})
+            self._signal(pipe)
+            pipe.execute()
+        return job, True
+
+    def get(self, job_id):
+        raw = self._redis.get(self._job_key(job_id))
+        return json.loads(raw) if raw else None
+
+    def find(self, idempotency_key):
+        job_id = self._redis.get(f"{self._prefix}key:{idempotency_key}")
+        return self.get(job_id.decode()) if job_id else None
+
+    def claim(self, lease):
+        job_id = self._claim(keys=[self._queue, self._leases], args=[time.time(), lease])
+        if job_id is None:
+            return None
+        job_id = job_id.decode()
+        job = self.get(job_id)
+        raw_args = self._redis.get(self._args_key(job_id))
+        if job is None or raw_args is None:
+            # Expired or deleted meanwhile.
+            self._redis.zrem(self._leases, job_id)
+            return None
+        return job, json.loads(raw_args)
+
+    def save(self, job, finished=False):
+        with self._redis.pipeline() as pipe:
+            pipe.set(self._job_key(job['id']), json.dumps(job, default=str), ex=JOB_TTL)
+            if finished:
+                pipe.zrem(self._leases, job['id'])
+                pipe.delete(self._args_key(job['id']))
+            pipe.execute()
+
+    def requeue(self, job, delay):
+        with self._redis.pipeline() as pipe:
+            pipe.set(self._job_key(job['id']), json.dumps(job, default=str), ex=JOB_TTL)
+            pipe.zrem(self._leases, job['id'])
+            pipe.zadd(self._queue, {job['id']: time.time() + delay})
+            self._signal(pipe)
+            pipe.execute()
+
+    def wait(self, timeout):
+        self._redis.brpop(self._wakeup, timeout=max(int(timeout), 1))
+
+
+class DatabaseJobBackend:
+    """
+    Queue in the ``background_jobs`` table, shared by every process using
+    the same Supabase project. ``run_at`` is when a job is due, or when the
+    lease of the worker running it ends; finished jobs have none.
+    """
+
+    def __init__(self, poll_interval=DATABASE_POLL_INTERVAL):
+        self._poll_interval = poll_interval
+        # Jobs queued by this process are picked up without waiting for a poll.
+        self._wakeup = threading.Event()
+
+    @staticmethod
+    def _call(action, *args):
+        try:
+            return action(*args)
+        except APIError as e:
+            if e.code in ('PGRST202', 'PGRST205', '42P01'):
+                raise RuntimeError("The background_jobs table is not installed; apply its migration "
+                                   "or set REDIS_URL")
+            raise
+
+    @staticmethod
+    def _expires_at():
+        return (datetime.now(timezone.utc) + timedelta(seconds=JOB_TTL)).isoformat()
+
+    def create(self, job, args, idempotency_key=None):
+        response = self._call(lambda: get_supabase_client().rpc('enqueue_background_job', {
+            'p_job': job, 'p_args': args, 'p_idempotency_key': idempotency_key, 'p_ttl': JOB_TTL
+        }).execute())
+        if response.data['created']:
+            self._wakeup.set()
+        return response.data['job'], response.data['created']
+
+    def get(self, job_id):
+        response = self._call(lambda: get_supabase_client().from_('background_jobs').select('job')
+                              .eq('id', job_id).maybe_single().execute())
+        return response.data['job'] if response and response.data else None
+
+    def find(self, idempotency_key):
+        response = self._call(lambda: get_supabase_client().from_('background_jobs').select('job')
+                              .eq('idempotency_key', idempotency_key).maybe_single().execute())
+        return response.data['job'] if response and response.data else None
+
+    def claim(self, lease):
+        response = self._call(lambda: get_supabase_client().rpc('claim_background_job', {
+            'p_lease': int(lease)
+        }).execute())
+        if not response.data:
+            return None
+        return response.data['job'], response.data['args']
+
+    def save(self, job, finished=False):
+        changes = {'job': job, 'expires_at': self._expires_at()}
+        if finished:
+            changes.update(run_at=None, args=None)
+        self._call(lambda: get_supabase_client().from_('background_jobs').update(changes)
+                   .eq('id', job['id']).execute())
+
+    def requeue(self, job, delay):
+        run_at = datetime.fromtimestamp(time.time() + delay, timezone.utc).isoformat()
+        self._call(lambda: get_supabase_client().from_('background_jobs').update({
+            'job': job, 'run_at': run_at, 'expires_at': self._expires_at()
+        }).eq('id', job['id']).execute())
+
+    def wait(self, timeout):
+        if self._wakeup.wait(max(timeout, self._poll_interval)):
+            self._wakeup.clear()
+
+
+def make_job_backend(kind=None, redis_url=None):
+    """
+    Return the job backend for ``kind`` (redis, database or memory). By
+    default: Redis when ``redis_url`` is set, otherwise the database.
+    """
+    kind = (kind or ('redis' if redis_url else 'database')).strip().lower()
+    if kind == 'redis':
+        if not redis_url:
+            raise ValueError("JOB_QUEUE=redis requires REDIS_URL")
+        try:
+            return RedisJobBackend(redis_url)
+        except ImportError:
+            logger.warning("redis is not installed; background jobs are queued in the database")
+            kind = 'database'
+    if kind == 'database':
+        return DatabaseJobBackend()
+    if kind == 'memory':
+        return MemoryJobBackend()
+    raise ValueError(f"Unknown JOB_QUEUE '{kind}'. Expected redis, database or memory")
+
+
+_backend = MemoryJobBackend()
+_settings = {'workers': DEFAULT_JOB_WORKERS, 'max_attempts': DEFAULT_MAX_ATTEMPTS}
+_workers = []
+_workers_pid = None
+_stop = threading.Event()
+
+
+def configure_jobs(queue=None, redis_url=None, workers=DEFAULT_JOB_WORKERS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Select the queue backend (see make_job_backend) and how many worker threads each process runs."""
+    global _backend
+    _backend = make_job_backend(queue, redis_url)
+    _settings.update(workers=workers, max_attempts=max_attempts)
+
+
+def enqueue_job(name, *args, idempotency_key=None, max_attempts=None, request=None):
+    """
+    Queue ``JOB_HANDLERS[name](*args)`` and return ``(job, created)``.
+
+    Arguments must be JSON-serializable; they are kept only until the job
+    finishes and are never part of the job status. With an
+    ``idempotency_key`` already used for this job name the existing job is
+    returned (``created`` False); IdempotencyKeyReused if it was used for a
+    different request, which is ``args`` unless ``request`` says otherwise
+    (see find_job).
+    """
+    if name not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job '{name}'")
+    fingerprint = _fingerprint(name, args if request is None else request)
+    job = {
+        'id': str(uuid.uuid4()),
+        'name': name,
+        'status': 'queued',
+        'attempts': 0,
+        'max_attempts': max_attempts or _settings['max_attempts'],
+        'fingerprint': fingerprint,
+        'result': None,
+        'error': None,
+        'created_at': _now(),
+        'started_at': None,
+        'finished_at': None,
+        'next_attempt_at': None
+    }
+    try:
+        job, created = _backend.create(job, list(args), f"{name}:{idempotency_key}" if idempotency_key else None)
+    except Exception as e:
+        logger.error(f"Error enqueueing job {name}: {str(e)}")
+        raise RuntimeError(f"Failed to enqueue job: {str(e)}")
+    if not created and job.get('fingerprint') != fingerprint:
+        raise IdempotencyKeyReused("Idempotency-Key was already used for a different request.")
+    return job, created
+
+
+def find_job(name, idempotency_key, request):
+    """
+    Return the ``name`` job created for ``idempotency_key``, or None;
+    IdempotencyKeyReused if it was created for another ``request``. For
+    endpoints that do some work before queueing the job: a retry finds the
+    job here instead of doing that work again, and the job is then queued
+    with the same ``request`` (e.g. the body without its secrets).
+    """
+    try:
+        job = _backend.find(f"{name}:{idempotency_key}")
+    except Exception as e:
+        logger.error(f"Error finding job {name}: {str(e)}")
+        raise RuntimeError(f"Failed to find job: {str(e)}")
+    if job is not None and job.get('fingerprint') != _fingerprint(name, request):
+        raise IdempotencyKeyReused("Idempotency-Key was already used for a different request.")
+    return job
+
+
+def get_job(job_id):
+    """Return the job's status record, or None if unknown or expired."""
+    try:
+        return _backend.get(job_id)
+    except Exception as e:
+        logger.error(f"Error getting job {job_id}: {str(e)}")
+        raise RuntimeError(f"Failed to get job: {str(e)}")
+
+
+def public_job(job):
+    """The job as shown to clients."""
+    return {key: value for key, value in job.items() if key != 'fingerprint'}
+
+
+def _resolve(name):
+    module, _, function = JOB_HANDLERS[name].partition(':')
+    return getattr(importlib.import_module(module), function)
+
+
+def run_next_job(lease=JOB_LEASE):
+    """Claim and run one due job; returns it, or None when nothing is due."""
+    claimed = _backend.claim(lease)
+    if claimed is None:
+        return None
+    job, args = claimed
+    job.update(status='running', attempts=job['attempts'] + 1, started_at=_now(), next_attempt_at=None)
+    if job['attempts'] > job['max_attempts']:
+        # Claimed again after its worker died on the last attempt.
+        job.update(status='failed', attempts=job['max_attempts'], finished_at=_now(),
+                   error=job.get('error') or "Worker stopped before the job finished")
+        _backend.save(job, finished=True)
+        return job
+    _backend.save(job)
+    try:
+        result = _resolve(job['name'])(*args)
+        job.update(status='succeeded', result=result, error=None, finished_at=_now())
+        _backend.save(job, finished=True)
+    except Exception as e:
+        job['error'] = str(e)
+        if isinstance(e, ValueError) or job['attempts'] >= job['max_attempts']:
+            logger.error(f"Job {job['id']} ({job['name']}) failed: {str(e)}")
+            job.update(status='failed', finished_at=_now())
+            _backend.save(job, finished=True)
+        else:
+            delay = min(RETRY_BASE_DELAY * 2 ** (job['attempts'] - 1), RETRY_MAX_DELAY)
+            logger.warning(f"Job {job['id']} ({job['name']}) attempt {job['attempts']} failed, "
+                           f"retrying in {delay}s: {str(e)}")
+            job.update(status='queued', next_attempt_at=datetime.fromtimestamp(
+                time.time() + delay, timezone.utc).isoformat())
+            _backend.requeue(job, delay)
+    return job
+
+
+def _work():
+    while not _stop.is_set():
+        try:
+            if run_next_job() is None:
+                _backend.wait(1.0)
+        except Exception as e:
+            logger.error(f"Job worker error: {str(e)}")
+            _stop.wait(1.0)
+
+
+def start_job_workers(count=None):
+    """
+    Start this process's worker threads (``JOB_WORKERS`` of them). Safe to
+    call again, and again after a fork: the child starts its own.
+    """
+    global _workers, _workers_pid
+    count = _settings['workers'] if count is None else count
+    if _workers_pid == os.getpid() or count <= 0:
+        return _workers
+    _stop.clear()
+    _workers = [threading.Thread(target=_work, name=f"job-worker-{i}", daemon=True) for i in range(count)]
+    _workers_pid = os.getpid()
+    for worker in _workers:
+        worker.start()
+    return _workers
+
+
+def stop_job_workers(timeout=5):
+    global _workers, _workers_pid
+    _stop.set()
+    for worker in _workers:
+        worker.join(timeout)
+    _workers, _workers_pid = [], None
@@ -35,6 +35,16 @@ def create_refresh_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_upload_ticket(data: dict, expires_in_seconds: int):
+    """
+    Generates a short-lived token describing a pending direct-to-storage
+    upload. Its type keeps it from being accepted as an access token.
+    """
+    to_encode = data.copy()
+    expire = datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in_seconds)
+    to_encode.update({"exp": expire, "type": "upload"})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
 def decode_token(token: str):
     """
     Decodes a token and returns its payload.
@@ -0,0 +1,396 @@
+"""
+Resumable Upload Service
+------------------------
+Chunked, resumable uploads of assignment and submission files.
+
+A client creates an upload session with the final size, then sends the file
+in any number of PATCH requests, each carrying the ``Upload-Offset`` it
+starts at. Chunks are written to a local directory (one part file per chunk,
+with its SHA-256 recorded in the session's ``meta.json``), so a dropped
+connection only costs the chunk in flight: the client asks for the current
+offset and carries on from there.
+
+When the last byte arrives the part files are re-hashed in parallel against
+the recorded digests while the whole-file SHA-256 is computed alongside;
+the parts are then streamed one after the other into the ``assignments``
+bucket through ``put_blob`` (skipped when that content is already stored)
+and recorded in ``assignment_files``. Chunks are read and written in ``UPLOAD_CHUNK_SIZE``
+pieces throughout, so memory use does not depend on the file size.
+
+Session state lives on the local disk of the instance; deployments with
+several instances need sticky routing for ``/api/v1/uploads`` or a shared
+``UPLOAD_TMP_DIR`` volume.
+"""
+import base64
+import binascii
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from app.services.upload_service import (
+    UPLOAD_CHUNK_SIZE, DEFAULT_MAX_FILE_SIZE_MB, FileTooLargeError,
+    clean_filename, put_blob, record_assignment_file, resolve_upload_target
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_DIR = os.path.join(tempfile.gettempdir(), 'elearning-uploads')
+UPLOAD_SESSION_TTL = 24 * 3600
+VERIFY_WORKERS = 4
+VERIFY_READ_SIZE = 256 * 1024
+
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+_upload_dir = DEFAULT_UPLOAD_DIR
+
+
+class UploadOffsetMismatchError(Exception):
+    """Raised when a chunk does not start at the upload's current offset."""
+
+    def __init__(self, offset):
+        super().__init__(f"Upload-Offset does not match the current offset {offset}")
+        self.offset = offset
+
+
+class UploadNotFoundError(ValueError):
+    """Raised for unknown, expired or finished upload sessions."""
+
+    def __init__(self):
+        super().__init__("Upload not found.")
+
+
+class ChunkChecksumError(ValueError):
+    """Raised when a chunk does not match its Upload-Checksum."""
+
+
+def configure_resumable_uploads(directory=None):
+    """Set the directory holding upload sessions (created on demand)."""
+    global _upload_dir
+    _upload_dir = directory or DEFAULT_UPLOAD_DIR
+    os.makedirs(_upload_dir, exist_ok=True)
+
+
+def parse_checksum_header(value):
+    """
+    Parse ``Upload-Checksum: sha256 <base64 digest>`` into a hex digest.
+    Returns None when the header is absent.
+    """
+    if not value:
+        return None
+    algorithm, _, encoded = value.strip().partition(' ')
+    if algorithm.lower() != 'sha256':
+        raise ValueError("Only sha256 upload checksums are supported.")
+    try:
+        digest = base64.b64decode(encoded.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Upload-Checksum is not valid base64.")
+    if len(digest) != 32:
+        raise ValueError("Upload-Checksum is not a SHA-256 digest.")
+    return digest.hex()
+
+
+def _session_dir(upload_id):
+    if not _UPLOAD_ID_RE.match(upload_id or ''):
+        raise UploadNotFoundError()
+    return os.path.join(_upload_dir, upload_id)
+
+
+@contextmanager
+def _locked_session(upload_id):
+    """Hold an exclusive lock on the session for the duration of the block."""
+    directory = _session_dir(upload_id)
+    try:
+        lock_file = open(os.path.join(directory, '.lock'), 'a')
+    except FileNotFoundError:
+        raise UploadNotFoundError()
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            meta = _read_meta(directory)
+            if meta is None:
+                raise UploadNotFoundError()
+            yield directory, meta
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_meta(directory, meta):
+    tmp_path = os.path.join(directory, 'meta.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+
+def _part_path(directory, offset):
+    return os.path.join(directory, f"{offset:016d}.part")
+
+
+def _check_owner(meta, user_id):
+    if meta['user_id'] != user_id:
+        raise PermissionError("Upload belongs to another user.")
+
+
+def _public_status(meta):
+    return {
+        'upload_id': meta['id'],
+        'assignment_id': meta['assignment_id'],
+        'submission_id': meta['submission_id'],
+        'file_name': meta['file_name'],
+        'size': meta['size'],
+        'offset': meta['offset'],
+        'expires_at': meta['expires_at']
+    }
+
+
+def purge_expired_uploads(now=None):
+    """Remove sessions past their expiry. Returns the number removed."""
+    now = now or time.time()
+    removed = 0
+    try:
+        entries = os.listdir(_upload_dir)
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not _UPLOAD_ID_RE.match(entry):
+            continue
+        directory = os.path.join(_upload_dir, entry)
+        meta = _read_meta(directory)
+        # Sessions without metadata are half-created; give them the full TTL.
+        expires_at = meta['expires_at'] if meta else os.path.getmtime(directory) + UPLOAD_SESSION_TTL
+        if expires_at < now:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def create_upload(user_id, file_name, size, content_type=None, assignment_id=None,
+                  submission_id=None, is_admin=False, max_size_mb=DEFAULT_MAX_FILE_SIZE_MB):
+    """
+    Start a resumable upload of ``size`` bytes.
+
+    Students attach files to their own submission (``submission_id``);
+    admins upload to an assignment (``assignment_id``). Returns the session
+    status, with ``offset`` 0.
+    """
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        raise ValueError("size must be a positive integer.")
+    max_bytes = max_size_mb * 1024 * 1024
+    if size > max_bytes:
+        raise FileTooLargeError(max_bytes)
+
+    assignment_id = resolve_upload_target(user_id, is_admin, assignment_id, submission_id)
+
+    purge_expired_uploads()
+
+    upload_id = uuid.uuid4().hex
+    directory = _session_dir(upload_id)
+    os.makedirs(directory)
+    now = time.time()
+    meta = {
+        'id': upload_id,
+        'user_id': user_id,
+        'assignment_id': assignment_id,
+        'submission_id': submission_id,
+        'file_name': clean_filename(file_name),
+        'content_type': content_type or 'application/octet-stream',
+        'size': size,
+        'offset': 0,
+        'parts': [],
+        'created_at': now,
+        'expires_at': now + UPLOAD_SESSION_TTL
+    }
+    _write_meta(directory, meta)
+    open(os.path.join(directory, '.lock'), 'a').close()
+    logger.info(f"Started resumable upload {upload_id} ({size} bytes) for assignment {assignment_id}")
+    return _public_status(meta)
+
+
+def get_upload(upload_id, user_id):
+    """Return the status of an upload session owned by ``user_id``."""
+    meta = _read_meta(_session_dir(upload_id))
+    if meta is None:
+        raise UploadNotFoundError()
+    _check_owner(meta, user_id)
+    return _public_status(meta)
+
+
+def cancel_upload(upload_id, user_id):
+    """Discard an upload session and its chunks."""
+    with _locked_session(upload_id) as (directory, meta):
+        _check_owner(meta, user_id)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def append_chunk(upload_id, user_id, offset, stream, checksum=None):
+    """
+    Write the chunk read from ``stream`` at ``offset``.
+
+    ``checksum`` is the chunk's hex SHA-256, if the client sent one; a
+    mismatching chunk is discarded. Without a checksum, the bytes received
+    before a dropped connection are kept so the client can resume after them.
+
+    Returns ``(status, file_row)``; ``file_row`` is the assignment_files row
+    once the last chunk has been written and the file assembled, else None.
+    If assembling failed after the last chunk (e.g. a storage error), an
+    empty chunk at the final offset retries it.
+    """
+    with _locked_session(upload_id) as (directory, meta):
+        _check_owner(meta, user_id)
+        if offset != meta['offset']:
+            raise UploadOffsetMismatchError(meta['offset'])
+
+        remaining = meta['size'] - offset
+        part_path = _part_path(directory, offset)
+        tmp_path = part_path + '.tmp'
+        sha256 = hashlib.sha256()
+        written = 0
+        interrupted = None
+        with open(tmp_path, 'wb') as part:
+            while True:
+                try:
+                    data = stream.read(UPLOAD_CHUNK_SIZE)
+                except Exception as e:
+                    interrupted = e
+                    break
+                if not data:
+                    break
+                written += len(data)
+                if written > remaining:
+                    part.close()
+                    os.remove(tmp_path)
+                    raise ValueError(f"Chunk runs past the declared size of {meta['size']} bytes.")
+                sha256.update(data)
+                part.write(data)
+
+        digest = sha256.hexdigest()
+        if checksum and (interrupted or digest != checksum):
+            os.remove(tmp_path)
+            if interrupted:
+                raise interrupted
+            raise ChunkChecksumError("Chunk does not match Upload-Checksum.")
+        if written == 0:
+            os.remove(tmp_path)
+            if interrupted:
+                raise interrupted
+        else:
+            os.replace(tmp_path, part_path)
+            meta['parts'].append({'offset': offset, 'length': written, 'sha256': digest})
+            meta['offset'] = offset + written
+            meta['expires_at'] = time.time() + UPLOAD_SESSION_TTL
+            _write_meta(directory, meta)
+            if interrupted:
+                logger.info(f"Upload {upload_id} interrupted at offset {meta['offset']}; kept {written} bytes")
+                raise interrupted
+
+        if meta['offset'] < meta['size']:
+            return _public_status(meta), None
+
+        file_row = _assemble(directory, meta)
+        shutil.rmtree(directory, ignore_errors=True)
+        return _public_status(meta), file_row
+
+
+def _hash_part(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(VERIFY_READ_SIZE)
+            if not data:
+                return sha256.hexdigest()
+            sha256.update(data)
+
+
+def verify_parts(directory, parts):
+    """
+    Re-hash every part file in parallel and check it against the digest
+    recorded when it was written, while this thread hashes the whole file.
+
+    Returns ``(bad_offsets, sha256)``.
+    """
+    paths = [_part_path(directory, part['offset']) for part in parts]
+    with ThreadPoolExecutor(max_workers=min(VERIFY_WORKERS, len(paths) or 1)) as pool:
+        digests = pool.map(_hash_part, paths)
+        whole = hashlib.sha256()
+        reader = PartsReader(directory, parts)
+        try:
+            while True:
+                data = reader.read(VERIFY_READ_SIZE)
+                if not data:
+                    break
+                whole.update(data)
+        finally:
+            reader.close()
+        bad = [part['offset'] for part, digest in zip(parts, digests) if digest != part['sha256']]
+    return bad, whole.hexdigest()
+
+
+class PartsReader:
+    """Sequential file-like view over a session's part files."""
+
+    def __init__(self, directory, parts):
+        self._paths = [_part_path(directory, part['offset']) for part in parts]
+        self._current = None
+
+    def read(self, n=-1):
+        while True:
+            if self._current is None:
+                if not self._paths:
+                    return b''
+                self._current = open(self._paths.pop(0), 'rb')
+            data = self._current.read(n)
+            if data:
+                return data
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+
+def _assemble(directory, meta):
+    parts = sorted(meta['parts'], key=lambda part: part['offset'])
+    expected = 0
+    for part in parts:
+        if part['offset'] != expected:
+            raise RuntimeError(f"Upload {meta['id']} has a gap at offset {expected}")
+        expected += part['length']
+
+    bad, sha256 = verify_parts(directory, parts)
+    if bad:
+        # Drop everything from the first corrupted chunk so the client resends it.
+        first_bad = min(bad)
+        for part in parts:
+            if part['offset'] >= first_bad:
+                os.remove(_part_path(directory, part['offset']))
+        meta['parts'] = [part for part in parts if part['offset'] < first_bad]
+        meta['offset'] = first_bad
+        _write_meta(directory, meta)
+        raise ChunkChecksumError(f"Stored chunk at offset {first_bad} is corrupted; resume from there.")
+
+    reader = PartsReader(directory, parts)
+    try:
+        stored = put_blob(reader, sha256, meta['size'], meta['content_type'])
+    finally:
+        reader.close()
+    logger.info(f"Assembled upload {meta['id']} as {stored['path']} ({stored['size']} bytes, "
+                f"{'deduplicated' if stored['deduplicated'] else 'new'})")
+    return record_assignment_file(meta['assignment_id'], meta['file_name'], stored,
+                                  meta['content_type'], meta['submission_id'])
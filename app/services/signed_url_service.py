@@ -0,0 +1,475 @@
+"""
+Signed URL Service
+------------------
+Direct-to-storage transfers for assignment files, so file bytes do not pass
+through the API workers.
+
+Uploads: the client hashes the file, asks for an upload URL and receives a
+signed upload URL for a one-off ``staging/`` object plus an upload ticket (a
+short-lived JWT describing the pending file). It PUTs the bytes straight to
+storage, then completes with the ticket: the staged object's size is checked
+against storage's object metadata and the file is recorded in
+``assignment_files`` at once, pointing at the staged object with
+``blob_sha256`` still NULL. A background job then hashes the object (in a
+job worker, never in the request), moves it to its content-addressed blob
+path (or drops it, if that content is already stored) and points the row at
+the blob; content not matching the declared SHA-256 is removed together with
+its row. Admins uploading content that is already stored get
+``upload_required: false`` and can complete straight away.
+
+Downloads: signed download URLs are cached (in process, or in Redis when
+configured) and reused until ``DOWNLOAD_URL_MARGIN`` seconds before they
+expire, so repeated downloads of course materials do not re-sign each time.
+"""
+import hashlib
+import logging
+import re
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from postgrest.exceptions import APIError
+from storage3.utils import StorageException
+
+from app.database.single_flight import SingleFlight
+from app.database.snapshot_cache import make_backend
+from app.database.supabase_db import get_supabase_client
+from app.services.job_service import enqueue_job, find_job
+from app.services.jwt_service import create_upload_ticket, decode_token
+from app.services.upload_service import (
+    ASSIGNMENTS_BUCKET, UPLOAD_CHUNK_SIZE, DEFAULT_MAX_FILE_SIZE_MB, FileTooLargeError,
+    BLOB_GC_GRACE_SECONDS, BLOB_GC_BATCH_SIZE, collect_orphaned_blobs_service,
+    blob_path, clean_filename, find_blob, get_owned_submission_assignment,
+    record_assignment_file, resolve_upload_target
+)
+
+logger = logging.getLogger(__name__)
+
+STAGING_PREFIX = 'staging'
+# Supabase signed upload URLs are valid for two hours.
+UPLOAD_TICKET_TTL = 2 * 3600
+DEFAULT_DOWNLOAD_URL_TTL = 3600
+DOWNLOAD_URL_MARGIN = 300
+VERIFY_URL_TTL = 300
+MAX_DOWNLOAD_URL_BATCH = 200
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+class FilePendingError(ValueError):
+    """The file's direct upload has not been verified yet."""
+
+
+_url_cache = make_backend()
+_download_url_ttl = DEFAULT_DOWNLOAD_URL_TTL
+_flights = SingleFlight()
+
+
+def configure_signed_urls(expires_in=DEFAULT_DOWNLOAD_URL_TTL, redis_url=None):
+    """Set the lifetime of download URLs and where they are cached."""
+    global _url_cache, _download_url_ttl
+    _download_url_ttl = max(int(expires_in), DOWNLOAD_URL_MARGIN * 2)
+    _url_cache = make_backend(redis_url)
+
+
+def create_upload_url(user_id, is_admin, file_name, size, sha256, content_type=None,
+                      assignment_id=None, submission_id=None, max_size_mb=DEFAULT_MAX_FILE_SIZE_MB):
+    """
+    Prepare a direct upload of a file with the given size and hex SHA-256.
+
+    Returns ``{'upload_required', 'ticket', 'expires_in'}`` and, when the
+    bytes must be sent, ``upload_url``, ``path`` and ``token``.
+    """
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        raise ValueError("size must be a positive integer.")
+    max_bytes = max_size_mb * 1024 * 1024
+    if size > max_bytes:
+        raise FileTooLargeError(max_bytes)
+    sha256 = (sha256 or '').lower()
+    if not _SHA256_RE.match(sha256):
+        raise ValueError("sha256 must be a hex SHA-256 digest.")
+    assignment_id = resolve_upload_target(user_id, is_admin, assignment_id, submission_id, allow_unattached=True)
+
+    ticket = {
+        'user_id': user_id,
+        'assignment_id': assignment_id,
+        'submission_id': submission_id,
+        'file_name': clean_filename(file_name),
+        'content_type': content_type or 'application/octet-stream',
+        'size': size,
+        'sha256': sha256,
+        'staging_path': None
+    }
+    # Skipping the transfer proves nothing about holding the content, so it
+    # is only offered to admins.
+    if is_admin and find_blob(sha256):
+        return {'upload_required': False, 'ticket': create_upload_ticket(ticket, UPLOAD_TICKET_TTL),
+                'expires_in': UPLOAD_TICKET_TTL}
+
+    try:
+        staging_path = f"{STAGING_PREFIX}/{uuid.uuid4().hex}"
+        signed = get_supabase_client().storage.from_(ASSIGNMENTS_BUCKET).create_signed_upload_url(staging_path)
+    except Exception as e:
+        logger.error(f"Error signing upload URL: {str(e)}")
+        raise RuntimeError(f"Failed to create upload URL: {str(e)}")
+    ticket['staging_path'] = staging_path
+    return {
+        'upload_required': True,
+        'upload_url': signed['signed_url'],
+        'path': staging_path,
+        'token': signed['token'],
+        'ticket': create_upload_ticket(ticket, UPLOAD_TICKET_TTL),
+        'expires_in': UPLOAD_TICKET_TTL
+    }
+
+
+def _staged_object_size(storage, staging_path):
+    """The staged object's size from storage metadata, without reading it."""
+    try:
+        info = storage.info(staging_path)
+    except StorageException as e:
+        if str(getattr(e, 'status', '')) in ('400', '404'):
+            raise ValueError("The file has not been uploaded to storage.")
+        raise
+    size = info.get('size')
+    if size is None:
+        size = (info.get('metadata') or {}).get('size')
+    return int(size) if size is not None else None
+
+
+def _hash_staged_object(storage, staging_path, max_bytes):
+    """Stream the staged object back from storage; return (size, sha256)."""
+    url = storage.create_signed_url(staging_path, VERIFY_URL_TTL)['signedURL']
+    sha256 = hashlib.sha256()
+    size = 0
+    with httpx.stream('GET', url, timeout=30) as response:
+        if response.status_code in (400, 404):
+            raise ValueError("The staged upload is no longer in storage.")
+        response.raise_for_status()
+        for data in response.iter_bytes(UPLOAD_CHUNK_SIZE):
+            size += len(data)
+            if size > max_bytes:
+                raise FileTooLargeError(max_bytes)
+            sha256.update(data)
+    return size, sha256.hexdigest()
+
+
+def _promote_staged_object(ticket, max_bytes):
+    """Verify the staged upload and turn it into (or match it to) a blob."""
+    supabase = get_supabase_client()
+    storage = supabase.storage.from_(ASSIGNMENTS_BUCKET)
+    staging_path = ticket['staging_path']
+    sha256 = ticket['sha256']
+    try:
+        size, actual_sha256 = _hash_staged_object(storage, staging_path, max_bytes)
+    except FileTooLargeError:
+        storage.remove([staging_path])
+        raise
+    if size != ticket['size'] or actual_sha256 != sha256:
+        storage.remove([staging_path])
+        raise ValueError("Uploaded content does not match the declared size and sha256.")
+
+    existing = find_blob(sha256)
+    if existing:
+        storage.remove([staging_path])
+        return {'path': existing['storage_path'], 'size': existing['size'],
+                'checksum_sha256': sha256, 'deduplicated': True}
+
+    path = blob_path(sha256)
+    try:
+        storage.move(staging_path, path)
+    except Exception as e:
+        # A concurrent upload of the same content got there first.
+        logger.info(f"Blob {sha256} already in storage ({str(e)}); dropping staged copy")
+        storage.remove([staging_path])
+    supabase.from_('file_blobs').upsert({
+        'sha256': sha256,
+        'storage_path': path,
+        'size': size,
+        'mime_type': ticket['content_type']
+    }, on_conflict='sha256', ignore_duplicates=True).execute()
+    return {'path': path, 'size': size, 'checksum_sha256': sha256, 'deduplicated': False}
+
+
+def verify_staged_upload_service(ticket, file_id, max_bytes):
+    """
+    Background job behind a completed direct upload: hash the staged
+    object, promote it to its blob and point the assignment_files row
+    ``file_id`` (if any) at it. Content that does not match the ticket is
+    removed along with the row, and the job fails.
+    """
+    supabase = get_supabase_client()
+    try:
+        stored = _promote_staged_object(ticket, max_bytes)
+    except ValueError:
+        if file_id:
+            supabase.from_('assignment_files').delete().eq('id', file_id) \
+                .eq('file_path', ticket['staging_path']).execute()
+        raise
+    if file_id:
+        supabase.from_('assignment_files').update({
+            'file_path': stored['path'],
+            'size': stored['size'],
+            'blob_sha256': stored['checksum_sha256']
+        }).eq('id', file_id).execute()
+    logger.info(f"Verified direct upload of {ticket['file_name']} as {stored['path']}")
+    return {'file_id': file_id, 'file_path': stored['path'], 'sha256': stored['checksum_sha256'],
+            'deduplicated': stored['deduplicated']}
+
+
+def purge_stale_staged_uploads(max_age=UPLOAD_TICKET_TTL, limit=1000):
+    """
+    Remove staged objects older than their upload ticket, i.e. uploads that
+    were never completed. Returns the number removed.
+    """
+    supabase = get_supabase_client()
+    storage = supabase.storage.from_(ASSIGNMENTS_BUCKET)
+    try:
+        entries = storage.list(STAGING_PREFIX, {'limit': limit, 'sortBy': {'column': 'created_at', 'order': 'asc'}})
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+        stale = [f"{STAGING_PREFIX}/{entry['name']}" for entry in entries
+                 if entry.get('created_at')
+                 and datetime.fromisoformat(entry['created_at'].replace('Z', '+00:00')) < cutoff]
+        if stale:
+            # Completed uploads still waiting for their verification job.
+            pending = supabase.from_('assignment_files').select('file_path').in_('file_path', stale).execute().data
+            stale = [path for path in stale if path not in {row['file_path'] for row in pending or []}]
+        if stale:
+            storage.remove(stale)
+        return len(stale)
+    except Exception as e:
+        logger.error(f"Error purging staged uploads: {str(e)}")
+        raise RuntimeError(f"Failed to purge staged uploads: {str(e)}")
+
+
+def collect_file_storage_service(grace_seconds=BLOB_GC_GRACE_SECONDS, limit=BLOB_GC_BATCH_SIZE):
+    """
+    Storage cleanup behind POST /admin/files/gc: orphaned blobs, then
+    staged uploads that were never completed.
+    """
+    result = collect_orphaned_blobs_service(grace_seconds, limit)
+    result['staged_removed'] = purge_stale_staged_uploads()
+    return result
+
+
+def complete_upload(user_id, ticket_token, max_size_mb=DEFAULT_MAX_FILE_SIZE_MB):
+    """
+    Register the file described by an upload ticket once its bytes are in
+    storage. Returns the assignment_files row, or for content uploaded
+    without an assignment the ``sha256`` to reference it by.
+
+    A staged upload is only checked against storage's metadata here; the
+    row it gets is pending (``blob_sha256`` NULL, no download URL) until the
+    job named by ``verification_job_id`` has verified its SHA-256.
+    Completing the same ticket again returns the same row and job.
+    """
+    ticket = decode_token(ticket_token or '')
+    if not ticket or ticket.get('type') != 'upload':
+        raise ValueError("Invalid or expired upload ticket.")
+    if ticket['user_id'] != user_id:
+        raise PermissionError("Upload ticket belongs to another user.")
+
+    try:
+        if ticket['staging_path']:
+            return _record_staged_upload(ticket, max_size_mb * 1024 * 1024)
+        blob = find_blob(ticket['sha256'])
+        if not blob:
+            raise ValueError("The content is no longer stored; request a new upload URL.")
+        stored = {'path': blob['storage_path'], 'size': blob['size'],
+                  'checksum_sha256': ticket['sha256'], 'deduplicated': True}
+        logger.info(f"Completed direct upload of {ticket['file_name']} as {stored['path']}")
+        if not ticket['assignment_id']:
+            return {'sha256': ticket['sha256'], 'file_name': ticket['file_name'], 'file_path': stored['path'],
+                    'mime_type': ticket['content_type'], 'size': stored['size'],
+                    'deduplicated': stored['deduplicated']}
+        return record_assignment_file(ticket['assignment_id'], ticket['file_name'], stored,
+                                      ticket['content_type'], ticket['submission_id'])
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error completing upload for assignment {ticket['assignment_id']}: {str(e)}")
+        raise RuntimeError(f"Failed to complete upload: {str(e)}")
+
+
+def _staged_file_row(staging_path):
+    rows = get_supabase_client().from_('assignment_files').select('*') \
+        .eq('staging_path', staging_path).limit(1).execute().data
+    return rows[0] if rows else None
+
+
+def _staged_upload_result(ticket, file_row, job):
+    if not file_row:
+        result = job.get('result') or {}
+        return {'sha256': ticket['sha256'], 'file_name': ticket['file_name'],
+                'file_path': result.get('file_path', ticket['staging_path']),
+                'mime_type': ticket['content_type'], 'size': ticket['size'],
+                'deduplicated': result.get('deduplicated', False), 'verification_job_id': job['id']}
+    return dict(file_row, deduplicated=False, verification_job_id=job['id'])
+
+
+def _record_staged_upload(ticket, max_bytes):
+    staging_path = ticket['staging_path']
+    # Completing a ticket again (e.g. a client retry) returns what the first
+    # completion recorded; the staged object may already be gone by then.
+    job = find_job('verify_staged_upload', staging_path, [ticket])
+    if job is not None:
+        file_row = _staged_file_row(staging_path) if ticket['assignment_id'] else None
+        if ticket['assignment_id'] and not file_row:
+            raise ValueError(job.get('error') or "The uploaded file no longer exists.")
+        return _staged_upload_result(ticket, file_row, job)
+
+    storage = get_supabase_client().storage.from_(ASSIGNMENTS_BUCKET)
+    size = _staged_object_size(storage, staging_path)
+    if size is not None and size > max_bytes:
+        storage.remove([staging_path])
+        raise FileTooLargeError(max_bytes)
+    if size is not None and size != ticket['size']:
+        storage.remove([staging_path])
+        raise ValueError("Uploaded content does not match the declared size and sha256.")
+
+    file_row = None
+    if ticket['assignment_id']:
+        try:
+            file_row = record_assignment_file(ticket['assignment_id'], ticket['file_name'], {
+                'path': staging_path, 'size': ticket['size'], 'checksum_sha256': ticket['sha256'],
+                'blob_sha256': None, 'staging_path': staging_path
+            }, ticket['content_type'], ticket['submission_id'])
+        except APIError as e:
+            if e.code != '23505':
+                raise
+            # A concurrent completion of the same ticket recorded it first.
+            file_row = _staged_file_row(staging_path)
+    job, _ = enqueue_job('verify_staged_upload', ticket, file_row['id'] if file_row else None, max_bytes,
+                         idempotency_key=staging_path, request=[ticket])
+    logger.info(f"Completed direct upload of {ticket['file_name']} to {staging_path}; verification job {job['id']}")
+    return _staged_upload_result(ticket, file_row, job)
+
+
+def _check_file_access(rows, user_id, is_admin):
+    """Submission files are private to their student (and admins)."""
+    if is_admin:
+        return
+    for submission_id in {row['submission_id'] for row in rows if row.get('submission_id')}:
+        get_owned_submission_assignment(submission_id, user_id)
+
+
+def _cache_key(path, download_name):
+    return f"signed-url:{path}:{download_name or ''}"
+
+
+def _cached_url(path, download_name):
+    try:
+        entry = _url_cache.get(_cache_key(path, download_name))
+    except Exception as e:
+        logger.warning(f"Could not read signed URL cache: {str(e)}")
+        return None
+    if entry is None:
+        return None
+    value, _ = entry
+    if value['expires_at'] - time.time() < DOWNLOAD_URL_MARGIN:
+        return None
+    return value
+
+
+def _cache_url(path, download_name, url, expires_at):
+    value = {'url': url, 'expires_at': expires_at}
+    try:
+        _url_cache.set(_cache_key(path, download_name), value, time.time(),
+                       expires_at - DOWNLOAD_URL_MARGIN - time.time())
+    except Exception as e:
+        logger.warning(f"Could not cache signed URL: {str(e)}")
+    return value
+
+
+def _sign_download(path, download_name):
+    cached = _cached_url(path, download_name)
+    if cached:
+        return cached
+    expires_at = int(time.time()) + _download_url_ttl
+    options = {'download': download_name} if download_name else None
+    signed = get_supabase_client().storage.from_(ASSIGNMENTS_BUCKET).create_signed_url(
+        path, _download_url_ttl, options)
+    return _cache_url(path, download_name, signed['signedURL'], expires_at)
+
+
+def _file_payload(row, signed):
+    return {
+        'file_id': row['id'],
+        'file_name': row['file_name'],
+        'mime_type': row.get('mime_type'),
+        'size': row.get('size'),
+        'url': signed['url'],
+        'expires_at': signed['expires_at']
+    }
+
+
+FILE_SELECT = 'id, file_name, file_path, mime_type, size, submission_id, blob_sha256, staging_path'
+
+
+def _is_pending(row):
+    """A direct upload whose verification job has not run yet."""
+    return bool(row.get('staging_path')) and not row.get('blob_sha256')
+
+
+def get_download_url(file_id, user_id, is_admin, attachment=True):
+    """
+    Return a signed download URL for one assignment file. With
+    ``attachment`` the URL makes browsers save it under its file name.
+    FilePendingError until a direct upload's verification job has run.
+    """
+    supabase = get_supabase_client()
+    response = supabase.from_('assignment_files').select(FILE_SELECT) \
+        .eq('id', file_id).maybe_single().execute()
+    if not response or not response.data:
+        raise ValueError("File not found.")
+    row = response.data
+    _check_file_access([row], user_id, is_admin)
+    if _is_pending(row):
+        raise FilePendingError("The file is still being verified; try again shortly.")
+    download_name = row['file_name'] if attachment else None
+    try:
+        # Concurrent requests for the same URL share one signing call.
+        signed = _flights.do(_cache_key(row['file_path'], download_name),
+                             lambda: _sign_download(row['file_path'], download_name))
+    except Exception as e:
+        logger.error(f"Error signing download URL for file {file_id}: {str(e)}")
+        raise RuntimeError(f"Failed to sign download URL: {str(e)}")
+    return _file_payload(row, signed)
+
+
+def get_download_urls(file_ids, user_id, is_admin):
+    """
+    Return signed (inline) download URLs for several files in request order,
+    signing every URL missing from the cache in one storage call. Unknown
+    ids, and files still being verified, are left out.
+    """
+    ids = list(dict.fromkeys(file_ids))
+    if not ids:
+        return []
+    supabase = get_supabase_client()
+    rows = supabase.from_('assignment_files').select(FILE_SELECT).in_('id', ids).execute().data or []
+    _check_file_access(rows, user_id, is_admin)
+    rows = [row for row in rows if not _is_pending(row)]
+
+    signed = {}
+    missing = []
+    for row in rows:
+        cached = _cached_url(row['file_path'], None)
+        if cached:
+            signed[row['file_path']] = cached
+        elif row['file_path'] not in missing:
+            missing.append(row['file_path'])
+    if missing:
+        try:
+            expires_at = int(time.time()) + _download_url_ttl
+            results = supabase.storage.from_(ASSIGNMENTS_BUCKET).create_signed_urls(missing, _download_url_ttl)
+        except Exception as e:
+            logger.error(f"Error signing {len(missing)} download URLs: {str(e)}")
+            raise RuntimeError(f"Failed to sign download URLs: {str(e)}")
+        for result in results:
+            if result.get('signedURL') and not result.get('error'):
+                signed[result['path']] = _cache_url(result['path'], None, result['signedURL'], expires_at)
+
+    by_id = {row['id']: row for row in rows}
+    return [_file_payload(by_id[file_id], signed[by_id[file_id]['file_path']])
+            for file_id in ids if file_id in by_id and by_id[file_id]['file_path'] in signed]
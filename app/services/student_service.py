@@ -5,6 +5,8 @@ This service handles business logic for student-related operations.
 """
 import logging
 from app.database.supabase_db import get_supabase_client
+from app.database.supabase_async import get_async_supabase_client
+from app.database.change_feed import publish
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -41,16 +43,13 @@ def update_student_profile(student_id: str, data: dict):
             raise ValueError("No valid fields to update. Only 'name' and 'phone' are allowed.")
 
         supabase = get_supabase_client()
-        # Update by user_id to target the authenticated user's profile
+        # Update by user_id to target the authenticated user's profile; the
+        # updated row comes back in the response (return=representation)
         response = supabase.from_('students').update(update_data).eq('user_id', student_id).execute()
 
-        # After update, fetch the updated record to return it
         if response.data:
-            updated_profile_response = supabase.from_('students').select('*').eq('user_id', student_id).maybe_single().execute()
-            if not updated_profile_response.data:
-                logger.warning(f"Student profile not found after update for student_id: {student_id}")
-                raise ValueError("Student not found after update.")
-            return updated_profile_response.data
+            publish('students', [response.data[0]['id']])
+            return response.data[0]
         else:
             # This case might indicate the student_id didn't exist
             logger.warning(f"Student not found for update, student_id: {student_id}")
@@ -104,6 +103,7 @@ def enroll_student_in_course(student_id: str, course_id: str):
             'status': 'active'
         }
         new_enrollment_res = supabase.from_('enrollments').insert(enrollment_data).execute()
+        publish('enrollments', [student_pk])
 
         return new_enrollment_res.data[0] if new_enrollment_res.data else None
 
@@ -143,3 +143,29 @@ def get_student_courses(student_id: str):
     except Exception as e:
         logger.error(f"Error fetching courses for student {student_id}: {str(e)}", exc_info=True)
         raise
+
+
+async def get_student_courses_async(student_id: str):
+    """
+    Async variant of get_student_courses.
+
+    student_id here is the Supabase Auth user_id; resolve to students.id.
+    """
+    try:
+        supabase = await get_async_supabase_client()
+        student_row = await supabase.from_('students').select('id').eq('user_id', student_id).maybe_single().execute()
+        if not student_row or not student_row.data:
+            return []
+        student_pk = student_row.data['id']
+
+        response = await (
+            supabase
+            .from_('enrollments')
+            .select('courses(*)')
+            .eq('student_id', student_pk)
+            .execute()
+        )
+        return [item['courses'] for item in (response.data or []) if item.get('courses')]
+    except Exception as e:
+        logger.error(f"Error fetching courses for student {student_id}: {str(e)}", exc_info=True)
+        raise
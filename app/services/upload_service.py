@@ -0,0 +1,306 @@
+"""
+Upload Service
+--------------
+Streams assignment and submission files into the ``assignments`` storage
+bucket and records them in ``assignment_files``.
+
+Request bodies are read in fixed-size chunks, so a file is never held in
+memory as a whole. The size limit is enforced as bytes arrive and the
+SHA-256 checksum is computed on the same pass.
+
+Storage is content-addressed: each distinct content is stored once, under
+``blobs/sha256/<ab>/<digest>``, and described by a ``file_blobs`` row that
+every matching ``assignment_files`` row references. Bodies are spooled to a
+temporary file while they are hashed, so an upload whose content is already
+stored skips the storage write entirely. Database triggers keep
+``file_blobs.ref_count`` current; ``collect_orphaned_blobs_service`` removes
+content nothing has referenced for a grace period.
+"""
+import hashlib
+import io
+import logging
+import tempfile
+
+from werkzeug.utils import secure_filename
+
+from app.database.supabase_db import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+ASSIGNMENTS_BUCKET = 'assignments'
+BLOB_PREFIX = 'blobs/sha256'
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Bodies up to this size are spooled in memory, larger ones on disk.
+UPLOAD_SPOOL_SIZE = 1024 * 1024
+DEFAULT_MAX_FILE_SIZE_MB = 10
+BLOB_GC_GRACE_SECONDS = 3600
+BLOB_GC_BATCH_SIZE = 100
+
+
+class FileTooLargeError(ValueError):
+    """Raised while streaming once an upload exceeds its size limit."""
+
+    def __init__(self, max_bytes):
+        super().__init__(f"File exceeds the maximum size of {max_bytes // (1024 * 1024)} MB")
+        self.max_bytes = max_bytes
+
+
+class HashingReader(io.RawIOBase):
+    """
+    Read-only, non-seekable view of ``source`` that counts and hashes bytes
+    as they are read and raises FileTooLargeError past ``max_bytes``.
+    """
+
+    def __init__(self, source, max_bytes):
+        self._source = source
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._source.read(len(buffer))
+        if not data:
+            return 0
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise FileTooLargeError(self.max_bytes)
+        self._sha256.update(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+
+def clean_filename(filename):
+    """Return a storage-safe file name, falling back to 'file'."""
+    return secure_filename(filename or '') or 'file'
+
+
+def stream_to_storage(stream, path, content_type, max_bytes, upsert=False):
+    """
+    Upload ``stream`` to ``path`` in the assignments bucket.
+
+    Returns ``{'path', 'size', 'checksum_sha256'}``. Raises FileTooLargeError
+    (and aborts the upload) as soon as more than ``max_bytes`` are read.
+    """
+    reader = HashingReader(stream, max_bytes)
+    supabase = get_supabase_client()
+    file_options = {'content-type': content_type or 'application/octet-stream'}
+    if upsert:
+        file_options['upsert'] = 'true'
+    supabase.storage.from_(ASSIGNMENTS_BUCKET).upload(
+        path,
+        io.BufferedReader(reader, buffer_size=UPLOAD_CHUNK_SIZE),
+        file_options
+    )
+    return {'path': path, 'size': reader.size, 'checksum_sha256': reader.sha256}
+
+
+def blob_path(sha256):
+    """Storage path of the content with hex digest ``sha256``."""
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}"
+
+
+def find_blob(sha256):
+    """
+    Return the file_blobs row for ``sha256``, or None if not stored (or
+    being garbage-collected). The blob is claimed for a new reference
+    (claim_file_blob), so the collector leaves it alone for another grace
+    period while the caller records that reference.
+    """
+    supabase = get_supabase_client()
+    rows = supabase.rpc('claim_file_blob', {'p_sha256': sha256}).execute().data
+    return rows[0] if rows else None
+
+
+def put_blob(stream, sha256, size, content_type):
+    """
+    Make sure the content ``stream`` (whose digest and size the caller has
+    already computed) is stored, writing it only if no blob has that digest.
+    A stored blob is claimed first (see find_blob), so it cannot be
+    collected between this check and the caller's reference to it.
+
+    Returns ``{'path', 'size', 'checksum_sha256', 'deduplicated'}``.
+    """
+    existing = find_blob(sha256)
+    if existing:
+        return {'path': existing['storage_path'], 'size': existing['size'],
+                'checksum_sha256': sha256, 'deduplicated': True}
+
+    supabase = get_supabase_client()
+    path = blob_path(sha256)
+    # Concurrent first uploads of the same content write identical bytes.
+    stored = stream_to_storage(stream, path, content_type, size, upsert=True)
+    if stored['checksum_sha256'] != sha256 or stored['size'] != size:
+        supabase.storage.from_(ASSIGNMENTS_BUCKET).remove([path])
+        raise RuntimeError(f"Content changed while uploading blob {sha256}")
+    supabase.from_('file_blobs').upsert({
+        'sha256': sha256,
+        'storage_path': path,
+        'size': size,
+        'mime_type': content_type
+    }, on_conflict='sha256', ignore_duplicates=True).execute()
+    return dict(stored, deduplicated=False)
+
+
+def store_content_addressed(stream, content_type, max_bytes):
+    """
+    Hash ``stream`` into a spool file, then store it with put_blob.
+
+    Raises FileTooLargeError once more than ``max_bytes`` are read, before
+    anything is written to storage.
+    """
+    reader = HashingReader(stream, max_bytes)
+    with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE) as spool:
+        while True:
+            data = reader.read(UPLOAD_CHUNK_SIZE)
+            if not data:
+                break
+            spool.write(data)
+        spool.seek(0)
+        return put_blob(spool, reader.sha256, reader.size, content_type)
+
+
+def record_assignment_file(assignment_id, file_name, stored, content_type, submission_id=None):
+    """
+    Insert the assignment_files row referencing a blob stored by put_blob
+    (or, with ``stored['blob_sha256']`` None, an object not yet verified,
+    whose ``stored['staging_path']`` is recorded).
+
+    If the insert fails the blob is left in place: it may be shared, and an
+    unreferenced one is collected by collect_orphaned_blobs_service.
+    """
+    supabase = get_supabase_client()
+    row = {
+        'assignment_id': assignment_id,
+        'file_name': file_name,
+        'file_path': stored['path'],
+        'mime_type': content_type,
+        'size': stored['size'],
+        'checksum_sha256': stored['checksum_sha256'],
+        'blob_sha256': stored.get('blob_sha256', stored['checksum_sha256'])
+    }
+    if submission_id:
+        row['submission_id'] = submission_id
+    if stored.get('staging_path'):
+        row['staging_path'] = stored['staging_path']
+    response = supabase.from_('assignment_files').insert(row).execute()
+    return dict(response.data[0], deduplicated=stored.get('deduplicated', False))
+
+
+def ensure_assignment_exists(assignment_id):
+    supabase = get_supabase_client()
+    assignment = supabase.from_('assignments').select('id').eq('id', assignment_id).maybe_single().execute()
+    if not assignment or not assignment.data:
+        raise ValueError("Assignment not found.")
+
+
+def get_owned_submission_assignment(submission_id, user_id):
+    """
+    Return the assignment id of ``submission_id`` after checking that it
+    belongs to the student with Supabase Auth ``user_id``.
+    """
+    supabase = get_supabase_client()
+    submission = supabase.from_('assignment_submissions') \
+        .select('id, assignment_id, student:students(user_id)') \
+        .eq('id', submission_id).maybe_single().execute()
+    if not submission or not submission.data:
+        raise ValueError("Submission not found.")
+    owner = (submission.data.get('student') or {}).get('user_id')
+    if owner != user_id:
+        raise PermissionError("Submission belongs to another student.")
+    return submission.data['assignment_id']
+
+
+def resolve_upload_target(user_id, is_admin, assignment_id=None, submission_id=None, allow_unattached=False):
+    """
+    Return the assignment a new file is attached to, after checking access:
+    students attach files to their own submission, admins to any assignment.
+    With ``allow_unattached``, admins may also store content to reference
+    later (e.g. when creating an assignment); None is returned then.
+    """
+    if submission_id:
+        return get_owned_submission_assignment(submission_id, user_id)
+    if assignment_id:
+        if not is_admin:
+            raise PermissionError("Only admins can upload assignment files.")
+        ensure_assignment_exists(assignment_id)
+        return assignment_id
+    if allow_unattached and is_admin:
+        return None
+    raise ValueError("assignment_id or submission_id is required.")
+
+
+def upload_assignment_file(assignment_id, stream, filename, content_type,
+                           max_size_mb=DEFAULT_MAX_FILE_SIZE_MB, submission_id=None):
+    """
+    Store a file for an assignment (or one of its submissions) and record it
+    in assignment_files. Returns the assignment_files row, with
+    ``deduplicated`` set when the content was already stored.
+    """
+    try:
+        ensure_assignment_exists(assignment_id)
+        file_name = clean_filename(filename)
+        stored = store_content_addressed(stream, content_type, max_size_mb * 1024 * 1024)
+        logger.info(f"Stored {file_name} as {stored['path']} ({stored['size']} bytes, "
+                    f"{'deduplicated' if stored['deduplicated'] else 'new'})")
+        return record_assignment_file(assignment_id, file_name, stored, content_type, submission_id)
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Error uploading file for assignment {assignment_id}: {str(e)}")
+        raise RuntimeError(f"Failed to upload file: {str(e)}")
+
+
+def upload_submission_file(submission_id, user_id, stream, filename, content_type,
+                           max_size_mb=DEFAULT_MAX_FILE_SIZE_MB):
+    """
+    Stream a file attached to a student's own submission.
+
+    user_id is the Supabase Auth user_id; the submission must belong to it.
+    """
+    assignment_id = get_owned_submission_assignment(submission_id, user_id)
+    return upload_assignment_file(assignment_id, stream, filename, content_type,
+                                  max_size_mb=max_size_mb, submission_id=submission_id)
+
+
+def collect_orphaned_blobs_service(grace_seconds=BLOB_GC_GRACE_SECONDS, limit=BLOB_GC_BATCH_SIZE):
+    """
+    Delete up to ``limit`` blobs unreferenced for ``grace_seconds`` and
+    remove their objects. Returns ``{'collected', 'bytes_freed', 'paths'}``.
+    """
+    supabase = get_supabase_client()
+    try:
+        claimed = supabase.rpc('claim_orphaned_file_blobs', {
+            'p_grace_seconds': int(grace_seconds),
+            'p_limit': int(limit)
+        }).execute().data or []
+    except Exception as e:
+        logger.error(f"Error claiming orphaned file blobs: {str(e)}")
+        raise RuntimeError(f"Failed to collect file blobs: {str(e)}")
+    if not claimed:
+        return {'collected': 0, 'bytes_freed': 0, 'paths': []}
+
+    paths = [blob['storage_path'] for blob in claimed]
+    try:
+        supabase.storage.from_(ASSIGNMENTS_BUCKET).remove(paths)
+    except Exception as e:
+        # Put the rows back so the next run retries the objects.
+        logger.error(f"Error removing {len(paths)} orphaned blobs: {str(e)}")
+        supabase.from_('file_blobs').upsert([
+            {'sha256': blob['sha256'], 'storage_path': blob['storage_path'],
+             'size': blob['size'], 'mime_type': blob.get('mime_type')}
+            for blob in claimed
+        ], on_conflict='sha256', ignore_duplicates=True).execute()
+        raise RuntimeError(f"Failed to collect file blobs: {str(e)}")
+    logger.info(f"Collected {len(paths)} orphaned file blobs")
+    return {
+        'collected': len(paths),
+        'bytes_freed': sum(blob['size'] or 0 for blob in claimed),
+        'paths': paths
+    }
@@ -0,0 +1,20 @@
+import sys
+import os
+
+# Optional ASGI entrypoint: serves the I/O-bound read routes natively on the
+# event loop with the asyncio Supabase client, everything else via Flask.
+#   uvicorn asgi:application --workers 2
+project_path = os.getenv('APP_PATH', os.getcwd())
+if project_path not in sys.path:
+    sys.path.append(project_path)
+
+os.environ.setdefault('FLASK_APP', 'run.py')
+os.environ.setdefault('FLASK_ENV', 'production')
+os.environ.setdefault('FLASK_DEBUG', '0')
+
+from run import app as flask_app
+from app import start_background_threads
+from app.asgi import create_asgi_app
+
+# Background threads start with the server, once per uvicorn worker.
+application = create_asgi_app(flask_app, on_startup=start_background_threads)
@@ -0,0 +1,121 @@
+"""
+Gunicorn configuration for production.
+
+    gunicorn -c config/gunicorn_config.py run:app
+
+Everything can be overridden from the environment:
+
+    GUNICORN_WORKER_CLASS   sync | gthread | gevent        (default: gthread; gevent needs `pip install gevent`)
+    WEB_CONCURRENCY         number of worker processes     (default: from CPU count)
+    GUNICORN_THREADS        threads per gthread worker     (default: 4)
+    GUNICORN_WORKER_CONNECTIONS  greenlets per gevent worker (default: 500)
+    GUNICORN_TIMEOUT        hard worker timeout, seconds   (default: 30)
+    GUNICORN_GRACEFUL_TIMEOUT    shutdown grace, seconds   (default: 30)
+    GUNICORN_KEEPALIVE      keep-alive, seconds            (default: 5)
+    GUNICORN_MAX_REQUESTS   recycle workers after N requests (default: 1000, 0 disables)
+    GUNICORN_MAX_REQUESTS_JITTER  random spread on recycling (default: 10% of max)
+    GUNICORN_PRELOAD        preload the app in the master  (default: on, off for gevent)
+    PORT                    listen port                    (default: 5000)
+"""
+import multiprocessing
+import os
+import sys
+
+WORKER_CLASSES = ('sync', 'gthread', 'gevent')
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def select_worker_class(name=None):
+    """Return the validated worker model name (from ``GUNICORN_WORKER_CLASS`` by default)."""
+    name = (name or os.getenv('GUNICORN_WORKER_CLASS') or 'gthread').strip().lower()
+    if name not in WORKER_CLASSES:
+        raise ValueError(f"Unsupported GUNICORN_WORKER_CLASS '{name}'. Expected one of: {', '.join(WORKER_CLASSES)}")
+    return name
+
+
+def default_worker_count(worker_model, cpu_count=None):
+    """
+    Size the worker pool from the CPU count.
+
+    Sync workers handle one request each, so use the classic ``2 * CPU + 1``.
+    Threaded and gevent workers multiplex requests inside the process, so one
+    worker per CPU (plus one) is enough.
+    """
+    cpus = cpu_count or multiprocessing.cpu_count()
+    if worker_model == 'sync':
+        return cpus * 2 + 1
+    return cpus + 1
+
+
+# --- Server socket ---
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# --- Worker processes ---
+worker_class = select_worker_class()
+workers = _env_int('WEB_CONCURRENCY', default_worker_count(worker_class))
+threads = _env_int('GUNICORN_THREADS', 4) if worker_class == 'gthread' else 1
+worker_connections = _env_int('GUNICORN_WORKER_CONNECTIONS', 500)
+
+# --- Timeouts ---
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# --- Worker recycling (jitter keeps workers from restarting in lockstep) ---
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+
+# --- App loading ---
+# Preloading shares the imported app copy-on-write across workers. gevent must
+# monkey-patch before the app imports its HTTP clients, so it loads per worker.
+preload_app = _env_bool('GUNICORN_PRELOAD', worker_class != 'gevent')
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """
+    Give each worker its own Supabase clients.
+
+    With ``preload_app`` the clients are created in the master; their HTTP
+    connection pools must not be shared across forked processes. Without
+    preloading nothing has been imported yet and there is nothing to rebuild.
+    """
+    if 'app.database.supabase_db' in sys.modules:
+        sys.modules['app.database.supabase_db'].reset_supabase_client()
+    if 'app.services.auth_service' in sys.modules:
+        sys.modules['app.services.auth_service'].reset_auth_supabase_client()
+    if 'app.database.supabase_async' in sys.modules:
+        sys.modules['app.database.supabase_async'].reset_async_supabase_client()
+    server.log.info(f"Worker {worker.pid} ready with its own Supabase clients")
+
+
+def post_worker_init(worker):
+    """
+    Start the worker's background threads: job workers, the change feed
+    listener, and the deadline scheduler (deadlines and periodic maintenance).
+    Threads started in a preloaded master do not survive the fork, so each
+    worker starts its own; one of them wins the deadline leader lock.
+    """
+    from app import start_background_threads
+    start_background_threads()
+
+
+def when_ready(server):
+    server.log.info(
+        f"Serving with {workers} {worker_class} worker(s)"
+        + (f" x {threads} threads" if worker_class == 'gthread' else '')
+        + f", max_requests={max_requests}±{max_requests_jitter}, preload={preload_app}"
+    )
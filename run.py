@@ -1,7 +1,7 @@
 from dotenv import load_dotenv
 load_dotenv()  # This should load environment variables from .env file
 
-from app import create_app
+from app import create_app, start_background_threads
 from config.logging_config import init_logging
 
 init_logging()
@@ -14,4 +14,5 @@ app.logger.info('E-learning platform application started')
 app.logger.info('E-learning platform application started')
 
 if __name__ == '__main__':
+    start_background_threads()
     app.run(host="0.0.0.0", port=5000, debug=False, use_reloader=False)
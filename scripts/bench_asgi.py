@@ -0,0 +1,73 @@
+"""
+Benchmark: sync gunicorn deployment vs. the ASGI serving mode.
+
+Starts the Supabase stand-in with a fixed upstream latency, then runs the
+same closed-loop load against:
+
+* ``gunicorn run:app`` exactly as in the Procfile (one sync worker), and
+* ``uvicorn asgi:application`` with one worker,
+
+for the catalog, dashboard and student-courses routes. Run from the
+repository root:
+
+    python scripts/bench_asgi.py --latency-ms 40 --concurrency 32 --requests 500
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.loadgen import (
+    HEADER, app_env, format_row, run_load, start_process, start_standin, stop_process, wait_until_ready
+)
+
+APP_PORT = 8765
+
+SERVERS = {
+    'gunicorn (Procfile, sync)': ['gunicorn', '--bind', f"127.0.0.1:{APP_PORT}", 'run:app'],
+    'uvicorn asgi:application': [sys.executable, '-m', 'uvicorn', 'asgi:application',
+                                 '--port', str(APP_PORT), '--log-level', 'warning'],
+}
+
+
+def auth_headers(standin_url):
+    from scripts.supabase_standin import TABLES
+    from app.services.jwt_service import create_access_token
+    student = TABLES['students'][0]
+    admin_token = create_access_token({'user_id': 'bench-admin', 'isAdmin': True})
+    student_token = create_access_token({'user_id': student['user_id'], 'isAdmin': False})
+    return {
+        '/api/v1/courses/': {},
+        '/api/v1/admin/dashboard-data': {'Authorization': f"Bearer {admin_token}"},
+        '/api/v1/student/courses': {'Authorization': f"Bearer {student_token}"},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=int, default=40, help='simulated Supabase round trip')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=500, help='requests per route and server')
+    args = parser.parse_args()
+
+    standin, standin_url = start_standin(args.latency_ms)
+    try:
+        routes = auth_headers(standin_url)
+        print(HEADER)
+        for name, cmd in SERVERS.items():
+            server = start_process(cmd, env=app_env(standin_url))
+            try:
+                base = f"http://127.0.0.1:{APP_PORT}"
+                wait_until_ready(base + '/api/v1/admin/ping')
+                for path, headers in routes.items():
+                    stats = run_load(base + path, args.concurrency, args.requests, headers)
+                    print(format_row(f"{name.split()[0]} {path}", stats))
+            finally:
+                stop_process(server)
+    finally:
+        stop_process(standin)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: typeahead over course titles and instructor names.
+
+Times the prefix index directly on --courses generated titles (build, top-10
+lookups for PREFIXES, single updates), then starts the Supabase stand-in
+with that many courses and, through the Flask test client, checks
+GET /api/v1/admin/autocomplete/<kind>:
+
+* names starting with the typed text come first, then later-word matches;
+* a course created, renamed or deleted through the admin API shows up at
+  once, re-reading only that course; a new instructor is found by name;
+* lookups between changes make no database request.
+
+Exits non-zero on any failed check. Run from the repository root:
+
+    python scripts/bench_autocomplete.py --courses 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.harness import Checks, standin_env
+
+PREFIXES = ['i', 'intro', 'machine lea', 'learn', 'workshop on quantum physics 9', 'zz']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--courses', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=2000, help='lookups per prefix')
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with standin_env(latency_ms=0, courses=args.courses) as standin_url:
+        from app.database.prefix_index import PrefixIndex
+        from scripts.supabase_standin import _course_text
+
+        index = PrefixIndex('title')
+        start = time.perf_counter()
+        index.add_many((str(i), {'id': str(i), 'title': _course_text(i)[0]}) for i in range(args.courses))
+        print(f"Prefix index: {args.courses} titles in {time.perf_counter() - start:.2f}s")
+        print(f"{'prefix':<32}{'found':>6}{'p50 us':>10}{'p99 us':>10}")
+        for prefix in PREFIXES:
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                found = index.lookup(prefix, k=10)
+                samples.append(time.perf_counter() - start)
+            samples.sort()
+            print(f"{prefix:<32}{len(found):>6}{statistics.median(samples) * 1e6:>10.1f}"
+                  f"{samples[int(len(samples) * 0.99)] * 1e6:>10.1f}")
+        samples = []
+        for i in range(200):
+            start = time.perf_counter()
+            index.add(str(i), {'id': str(i), 'title': f"Renamed course {i}"})
+            samples.append(time.perf_counter() - start)
+        print(f"{'update one title':<32}{'':>6}{statistics.median(samples) * 1e6:>10.1f}"
+              f"{sorted(samples)[int(len(samples) * 0.99)] * 1e6:>10.1f}\n")
+        del index
+
+        from app import create_app, start_background_threads
+        from app.services.jwt_service import create_access_token
+        from app.database.supabase_db import get_supabase_client
+        app = create_app()
+        start_background_threads()
+        client = app.test_client()
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+
+        def lookup(kind, q, **params):
+            return client.get(f"/api/v1/admin/autocomplete/{kind}", headers=admin,
+                              query_string=dict(params, q=q)).get_json()
+
+        def course_reads():
+            return httpx.get(f"{standin_url}/_standin/stats").json().get('GET /rest/v1/courses', 0)
+
+        start = time.perf_counter()
+        lookup('courses', 'intro')
+        print(f"First course lookup (loads the index): {time.perf_counter() - start:.2f}s")
+        httpx.delete(f"{standin_url}/_standin/stats")
+        samples = []
+        for _ in range(200):
+            start = time.perf_counter()
+            found = lookup('courses', 'machine lea')
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        check("lookups make no database request", course_reads() == 0,
+              f"p50 {statistics.median(samples) * 1000:.2f} ms through the API")
+        check("top 10 returned", len(found) == 10 and all('Machine Learning' in c['title'] for c in found),
+              found[0]['title'])
+        resp = client.get('/api/v1/admin/autocomplete/students', headers=admin, query_string={'q': 'a'})
+        check("unknown kind is 404", resp.status_code == 404)
+
+        instructor_id = get_supabase_client().from_('instructors').select('id').limit(1).execute().data[0]['id']
+        created = client.post('/api/v1/admin/courses', headers=admin, json={
+            'title': 'Écologie des zones humides', 'instructor_id': instructor_id}).get_json()
+        httpx.delete(f"{standin_url}/_standin/stats")
+        found = lookup('courses', 'ecolo')
+        check("new course found at once", [c['id'] for c in found] == [created['id']] and course_reads() == 1,
+              f"{course_reads()} course read(s)")
+        check("later word matches", [c['id'] for c in lookup('courses', 'zones hum')] == [created['id']])
+        starting = client.post('/api/v1/admin/courses', headers=admin, json={
+            'title': 'Chemistry for everyone', 'instructor_id': instructor_id}).get_json()
+        mixed = lookup('courses', 'chemi')
+        check("names starting with it come first", [c['id'] for c in mixed[:1]] == [starting['id']]
+              and len(mixed) == 10 and all('Chemistry' in c['title'] for c in mixed), mixed[1]['title'])
+        client.put(f"/api/v1/admin/courses/{created['id']}", headers=admin,
+                   json={'title': 'Hydrologie appliquée', 'instructor_id': instructor_id})
+        check("renamed course follows", lookup('courses', 'ecolo') == []
+              and [c['id'] for c in lookup('courses', 'hydro')] == [created['id']])
+        client.delete(f"/api/v1/admin/courses/{created['id']}", headers=admin)
+        client.delete(f"/api/v1/admin/courses/{starting['id']}", headers=admin)
+        check("deleted course disappears", lookup('courses', 'hydro') == [])
+
+        lookup('instructors', 'instr')
+        name = f"Zélie {uuid.uuid4().hex[:6]}"
+        job = client.post('/api/v1/admin/instructors', headers=admin, json={
+            'name': name, 'email': f"{uuid.uuid4().hex[:8]}@example.com", 'phone': '+21600000000',
+            'password': 'S3cure-pass!'}).get_json()
+        end = time.time() + 10
+        while time.time() < end and job['status'] not in ('succeeded', 'failed'):
+            time.sleep(0.05)
+            job = client.get(f"/api/v1/admin/jobs/{job['id']}", headers=admin).get_json()
+        check("new instructor found by name", [i['name'] for i in lookup('instructors', 'zelie')] == [name])
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
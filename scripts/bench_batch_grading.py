@@ -0,0 +1,64 @@
+"""
+Benchmark: batch grading vs. grading one submission at a time.
+
+Starts the Supabase stand-in with a fixed round-trip latency and measures
+grades/sec for grade_assignment (one request per submission) and for
+grade_submissions_service on a batch, both including the course progress
+update. With --upsert the stand-in hides the admin_grade_submissions RPC so
+the bulk-upsert fallback is measured instead. Run from the repository root:
+
+    python scripts/bench_batch_grading.py --latency-ms 40 --single 100 --batch 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.loadgen import app_env, start_standin, stop_process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=int, default=40, help='simulated Supabase round trip')
+    parser.add_argument('--single', type=int, default=100)
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--upsert', action='store_true', help='measure the bulk-upsert fallback')
+    args = parser.parse_args()
+
+    standin, standin_url = start_standin(
+        args.latency_ms, disabled_rpcs=('admin_grade_submissions',) if args.upsert else ()
+    )
+    try:
+        os.environ.update(app_env(standin_url))
+        from app.services.assignment_service import grade_assignment, grade_submissions_service
+        from scripts.supabase_standin import TABLES
+        submissions = TABLES['assignment_submissions']
+        if len(submissions) < args.single + args.batch:
+            sys.exit(f"Stand-in has only {len(submissions)} submissions; lower --single/--batch")
+
+        start = time.perf_counter()
+        for submission in submissions[:args.single]:
+            grade_assignment(submission['id'], 80, 'Good work')
+        single_elapsed = time.perf_counter() - start
+
+        grades = [{'submission_id': s['id'], 'grade': 90, 'feedback': 'Well done'}
+                  for s in submissions[args.single:args.single + args.batch]]
+        start = time.perf_counter()
+        report = grade_submissions_service(grades)
+        batch_elapsed = time.perf_counter() - start
+
+        single_rate = args.single / single_elapsed
+        batch_rate = args.batch / batch_elapsed
+        batch_label = 'batch (bulk upsert)' if args.upsert else 'batch (rpc)'
+        print(f"{'path':<28}{'grades':>8}{'seconds':>10}{'grades/s':>10}")
+        print(f"{'grade_assignment':<28}{args.single:>8}{single_elapsed:>10.2f}{single_rate:>10.1f}")
+        print(f"{batch_label:<28}{args.batch:>8}{batch_elapsed:>10.2f}{batch_rate:>10.1f}")
+        print(f"speedup: {batch_rate / single_rate:.1f}x  (graded={report['graded']}, failed={report['failed']})")
+    finally:
+        stop_process(standin)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark: batch reads of courses and students by id list.
+
+Starts the Supabase stand-in (with --latency-ms per request, like a remote
+database) and, through the Flask test client, compares fetching --batch
+courses one GET /api/v1/courses/<id> at a time with one
+GET /api/v1/courses/?ids=..., then checks:
+
+* the batch keeps the requested order, returns duplicates once and leaves
+  unknown or malformed ids out;
+* it reads the database once, and not at all when the courses are cached;
+  a changed or deleted course is re-read or dropped at once;
+* empty and oversized id lists are 400;
+* the ASGI serving mode answers ``?ids=`` the same way, not with the
+  whole catalog;
+* GET /api/v1/admin/students?ids=... does the same for students, in one
+  query, and requires an admin.
+
+Exits non-zero on any failed check. Run from the repository root:
+
+    python scripts/bench_batch_reads.py --batch 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.harness import Checks, standin_env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch', type=int, default=50, help='ids per request (max 100)')
+    parser.add_argument('--latency-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with standin_env(latency_ms=args.latency_ms, rows=max(500, args.batch * 5)) as standin_url:
+        from app import create_app
+        from app.services.jwt_service import create_access_token
+        from app.database.supabase_db import get_supabase_client
+        from app.services.courses_service import configure_course_cache
+        app = create_app()
+        client = app.test_client()
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+        supabase = get_supabase_client()
+
+        def reads(table):
+            return httpx.get(f"{standin_url}/_standin/stats").json().get(f"GET /rest/v1/{table}", 0)
+
+        def reset():
+            httpx.delete(f"{standin_url}/_standin/stats")
+
+        def batch(ids):
+            return client.get('/api/v1/courses/', query_string={'ids': ','.join(ids)})
+
+        course_ids = [row['id'] for row in supabase.from_('courses').select('id').execute().data]
+        random.seed(7)
+        wanted = random.sample(course_ids, min(args.batch, len(course_ids)))
+
+        reset()
+        start = time.perf_counter()
+        for course_id in wanted:
+            client.get(f"/api/v1/courses/{course_id}")
+        one_by_one = time.perf_counter() - start
+        one_by_one_reads = reads('courses')
+
+        # The batch starts from an empty cache, like the loop above.
+        configure_course_cache()
+        reset()
+        start = time.perf_counter()
+        resp = batch(wanted)
+        batched = time.perf_counter() - start
+        print(f"{len(wanted)} courses one by one: {one_by_one * 1000:.1f} ms, {one_by_one_reads} queries; "
+              f"in one batch: {batched * 1000:.1f} ms, {reads('courses')} query\n")
+        found = resp.get_json()
+        check("batch is one query", resp.status_code == 200 and reads('courses') == 1, f"{reads('courses')} read(s)")
+        check("order is kept", [c['id'] for c in found] == wanted)
+
+        reset()
+        start = time.perf_counter()
+        cached = batch(wanted).get_json()
+        check("cached batch reads nothing", cached == found and reads('courses') == 0,
+              f"{(time.perf_counter() - start) * 1000:.2f} ms")
+        single = client.get(f"/api/v1/courses/{wanted[0]}").get_json()
+        check("single course comes from the same cache", single == found[0] and reads('courses') == 0)
+
+        unknown = str(uuid.uuid4())
+        mixed = [wanted[2], wanted[0], wanted[2].upper(), unknown, 'not-a-uuid', wanted[1]]
+        check("duplicates once, unknown ids left out",
+              [c['id'] for c in batch(mixed).get_json()] == [wanted[2], wanted[0], wanted[1]])
+
+        instructor_id = found[0]['instructor_id']
+        client.put(f"/api/v1/admin/courses/{wanted[0]}", headers=admin,
+                   json={'title': 'Renamed for batch check', 'instructor_id': instructor_id})
+        reset()
+        renamed = batch(wanted[:3]).get_json()
+        check("changed course is re-read", renamed[0]['title'] == 'Renamed for batch check'
+              and [c['id'] for c in renamed] == wanted[:3] and reads('courses') == 1)
+        created = client.post('/api/v1/admin/courses', headers=admin,
+                              json={'title': 'Batch check course', 'instructor_id': instructor_id}).get_json()
+        batch([created['id']])
+        client.delete(f"/api/v1/admin/courses/{created['id']}", headers=admin)
+        check("deleted course disappears", batch([created['id'], wanted[1]]).get_json() == [found[1]])
+
+        async def asgi_batch(ids):
+            from asgi import application
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=application),
+                                         base_url='http://asgi') as asgi_client:
+                return (await asgi_client.get('/api/v1/courses/', params={'ids': ','.join(ids)})).json()
+
+        check("ASGI mode honours ?ids=", [c['id'] for c in asyncio.run(asgi_batch(wanted[:3]))] == wanted[:3])
+
+        too_many = [str(uuid.uuid4()) for _ in range(101)]
+        check("empty and oversized lists are 400",
+              batch([]).status_code == 400 and batch(too_many).status_code == 400)
+
+        student_ids = [row['id'] for row in supabase.from_('students').select('id').execute().data]
+        students = random.sample(student_ids, min(args.batch, len(student_ids)))
+        reset()
+        resp = client.get('/api/v1/admin/students', headers=admin,
+                          query_string={'ids': ','.join(students + [students[0], unknown])})
+        check("students batch is one query, in order", resp.status_code == 200 and reads('students') == 1
+              and [s['id'] for s in resp.get_json()] == students, f"{reads('students')} read(s)")
+        check("students batch has the list's shape", set(resp.get_json()[0]) ==
+              {'id', 'name', 'email', 'phone', 'status', 'created_at', 'course'})
+        resp = client.get('/api/v1/admin/students', query_string={'ids': students[0]})
+        check("students batch requires a login", resp.status_code == 401)
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
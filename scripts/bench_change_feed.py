@@ -0,0 +1,155 @@
+"""
+Benchmark: cache invalidation across processes through the change feed.
+
+Starts the Supabase stand-in and several app instances (gunicorn, one
+worker each, sharing one change feed) with a long dashboard cache TTL. Each
+round warms every instance's cached dashboard, creates a student through one
+instance and polls the others until their dashboard counts it, then reports:
+
+* how long after the write returned the other instances served fresh data;
+* the publish-to-eviction delay each instance measured for the events it
+  received (GET /api/v1/admin/change-feed/status);
+* with --compare, the same rounds with CHANGE_FEED=off, where the other
+  instances keep serving the stale snapshot until its TTL runs out.
+
+Exits non-zero if an instance is still stale after --timeout. Run from the
+repository root:
+
+    python scripts/bench_change_feed.py --instances 4 --rounds 50
+    python scripts/bench_change_feed.py --compare
+    python scripts/bench_change_feed.py --feed redis --redis redis://localhost:6379/0
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.loadgen import app_env, start_process, start_standin, stop_process, wait_until_ready
+
+BASE_PORT = 8770
+
+
+def start_instances(count, env):
+    servers, urls = [], []
+    for i in range(count):
+        port = BASE_PORT + i
+        servers.append(start_process(['gunicorn', '-c', 'config/gunicorn_config.py', 'run:app'],
+                                     env=dict(env, PORT=str(port))))
+        urls.append(f"http://127.0.0.1:{port}")
+    for url in urls:
+        wait_until_ready(url + '/api/v1/admin/ping')
+    return servers, urls
+
+
+def total_students(client, url, headers):
+    return client.get(url + '/api/v1/admin/dashboard-data', headers=headers).json()['statistics']['total_students']
+
+
+def run_rounds(urls, rounds, headers, timeout):
+    """Return the per-reader visibility delays (seconds) and the stale count."""
+    clients = [httpx.Client(timeout=10.0) for _ in urls]
+    delays, stale = [], 0
+    try:
+        for r in range(rounds):
+            writer = r % len(urls)
+            readers = [i for i in range(len(urls)) if i != writer]
+            before = {i: total_students(clients[i], urls[i], headers) for i in readers}
+            resp = clients[writer].post(urls[writer] + '/api/v1/admin/students', headers=headers, json={
+                'name': f"Feed {r}", 'email': f"feed-{uuid.uuid4().hex[:10]}@example.com", 'phone': '+21600000000'})
+            resp.raise_for_status()
+            written = time.perf_counter()
+            results = {}
+
+            def poll(i):
+                end = written + timeout
+                while time.perf_counter() < end:
+                    if total_students(clients[i], urls[i], headers) > before[i]:
+                        results[i] = time.perf_counter() - written
+                        return
+                    time.sleep(0.002)
+
+            threads = [threading.Thread(target=poll, args=(i,)) for i in readers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            delays.extend(results.values())
+            stale += len(readers) - len(results)
+    finally:
+        for client in clients:
+            client.close()
+    return delays, stale
+
+
+def ms(seconds):
+    return f"{seconds * 1000:7.2f}"
+
+
+def report(label, delays, stale, feed_stats):
+    if delays:
+        ordered = sorted(delays)
+        p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+        print(f"{label:<10} fresh after write: p50 {ms(statistics.median(ordered))} ms  p99 {ms(p99)} ms  "
+              f"max {ms(ordered[-1])} ms  ({len(delays)} reads, {stale} stale)")
+    else:
+        print(f"{label:<10} fresh after write: none ({stale} stale)")
+    for url, stats in feed_stats:
+        delay = stats.get('delay_ms') or {}
+        print(f"{'':<10} {url}  {stats.get('transport')}: {stats.get('received')} events, "
+              f"publish-to-eviction p50 {delay.get('p50')} ms  p99 {delay.get('p99')} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instances', type=int, default=3)
+    parser.add_argument('--rounds', type=int, default=30)
+    parser.add_argument('--latency-ms', type=int, default=5, help='simulated Supabase round trip')
+    parser.add_argument('--timeout', type=float, default=2.0, help='give up on a stale instance after this')
+    parser.add_argument('--feed', default='socket', help='CHANGE_FEED of the instances')
+    parser.add_argument('--redis', help='REDIS_URL for --feed redis')
+    parser.add_argument('--database-url', help='DATABASE_URL for --feed postgres')
+    parser.add_argument('--compare', action='store_true', help='also run with CHANGE_FEED=off')
+    args = parser.parse_args()
+
+    from app.services.jwt_service import create_access_token
+    headers = {'Authorization': f"Bearer {create_access_token({'user_id': 'bench-admin', 'isAdmin': True})}"}
+
+    standin, standin_url = start_standin(latency_ms=args.latency_ms)
+    failures = 0
+    try:
+        feeds = [args.feed] + (['off'] if args.compare else [])
+        for feed in feeds:
+            env = dict(app_env(standin_url), CHANGE_FEED=feed, CHANGE_FEED_DIR=tempfile.mkdtemp(),
+                       WEB_CONCURRENCY='1', DASHBOARD_CACHE_TTL='300', JOB_WORKERS='0')
+            if args.redis:
+                env['REDIS_URL'] = args.redis
+            if args.database_url:
+                env['DATABASE_URL'] = args.database_url
+            servers, urls = start_instances(args.instances, env)
+            try:
+                # Without the feed every stale read waits out the timeout.
+                rounds = args.rounds if feed != 'off' else min(args.rounds, 3)
+                delays, stale = run_rounds(urls, rounds, headers, args.timeout)
+                feed_stats = [(url, httpx.get(url + '/api/v1/admin/change-feed/status', headers=headers).json())
+                              for url in urls]
+                report(feed, delays, stale, feed_stats)
+                if feed != 'off' and stale:
+                    failures += 1
+            finally:
+                for server in servers:
+                    stop_process(server)
+    finally:
+        stop_process(standin)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
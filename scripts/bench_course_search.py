@@ -0,0 +1,142 @@
+"""
+Benchmark: course search on a large catalog.
+
+First times the in-memory inverted index directly (build, then each query
+of QUERIES), then starts the Supabase stand-in with --courses courses (it has
+no search_courses function, so the app falls back to the index) and, through
+the Flask test client:
+
+* times the first GET /api/v1/courses/search (which loads the index) and
+  then each query end to end;
+* checks ranking, pagination (X-Total-Count, disjoint pages), typo
+  tolerance and highlights;
+* creates, renames and deletes a course through the admin API and checks
+  that search follows at once, re-reading only the changed course.
+
+Exits non-zero on any failed check. Run from the repository root:
+
+    python scripts/bench_course_search.py --courses 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.harness import Checks, standin_env
+
+QUERIES = [
+    'chemistry',                  # one word, 1 course in 40
+    'machine learning',           # two words
+    'introduction',               # broad: 1 course in 8
+    'machne lerning',             # typos
+    'QUANTUM Physics',            # case
+    'calligraphy 4244',           # narrow
+    'astronmy',                   # typo, one word
+    'zzzz',                       # no match
+]
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered) * 1000, ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)] * 1000
+
+
+def time_queries(search, repeat):
+    print(f"{'query':<22}{'matches':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for query in QUERIES:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            total = search(query)
+            samples.append(time.perf_counter() - start)
+        p50, p99 = percentiles(samples)
+        print(f"{query:<22}{total:>9}{p50:>10.2f}{p99:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--courses', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50, help='runs of each query')
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with standin_env(latency_ms=0, courses=args.courses) as standin_url:
+        from app.database.search_index import InvertedIndex
+        from app.services.course_search_service import SEARCH_FIELDS
+        from scripts.supabase_standin import _course_text
+
+        index = InvertedIndex(SEARCH_FIELDS)
+        start = time.perf_counter()
+        for i in range(args.courses):
+            title, description = _course_text(i)
+            index.add(str(i), {'title': title, 'description': description})
+        print(f"In-memory index: {args.courses} courses indexed in {time.perf_counter() - start:.2f}s")
+        time_queries(lambda q: index.search(q, limit=20)[0], args.repeat)
+        del index
+
+        from app import create_app
+        from app.services.jwt_service import create_access_token
+        from app.database.supabase_db import get_supabase_client
+        app = create_app()
+        client = app.test_client()
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+
+        def search(query, **params):
+            resp = client.get('/api/v1/courses/search', query_string=dict(params, q=query))
+            return resp, resp.get_json()
+
+        start = time.perf_counter()
+        resp, courses = search('chemistry')
+        print(f"\nThrough the API ({args.courses} courses in the stand-in, no search_courses): "
+              f"first search {time.perf_counter() - start:.2f}s (loads the index)")
+        time_queries(lambda q: int(search(q)[0].headers['X-Total-Count']), args.repeat)
+        print()
+
+        check("results are ranked", resp.status_code == 200 and len(courses) == 20
+              and [c['rank'] for c in courses] == sorted((c['rank'] for c in courses), reverse=True))
+        check("title highlighted", '<mark>Chemistry</mark>' in courses[0]['highlights']['title'],
+              courses[0]['highlights']['title'])
+        total = int(resp.headers['X-Total-Count'])
+        _, second = search('chemistry', offset=20)
+        check("pages are disjoint", total > 40 and not {c['id'] for c in courses} & {c['id'] for c in second},
+              f"{total} matches")
+        _, typo = search('machne lerning', limit=5)
+        check("typos still match", typo and all('Machine Learning' in c['title'] for c in typo),
+              typo[0]['highlights']['title'] if typo else '')
+        resp, _ = search('')
+        check("empty query is 400", resp.status_code == 400)
+        resp, _ = search('chemistry', limit=500)
+        check("limit above 100 is 400", resp.status_code == 400)
+
+        instructor_id = get_supabase_client().from_('instructors').select('id').limit(1).execute().data[0]['id']
+        created = client.post('/api/v1/admin/courses', headers=admin, json={
+            'title': 'Ethnobotanique appliquée', 'instructor_id': instructor_id,
+            'description': 'Plantes médicinales & <b>usages</b> traditionnels.'}).get_json()
+        httpx.delete(f"{standin_url}/_standin/stats")
+        _, found = search('ethnobotanique plantes medicinales')
+        stats = httpx.get(f"{standin_url}/_standin/stats").json()
+        check("new course found without reloading", [c['id'] for c in found] == [created['id']]
+              and stats.get('GET /rest/v1/courses') == 1, f"{stats.get('GET /rest/v1/courses')} course read(s)")
+        check("highlights are escaped", found and '&lt;b&gt;usages&lt;/b&gt;' in found[0]['highlights']['description']
+              and '<mark>médicinales</mark>' in found[0]['highlights']['description'],
+              found[0]['highlights']['description'] if found else '')
+
+        client.put(f"/api/v1/admin/courses/{created['id']}", headers=admin,
+                   json={'title': 'Mycologie appliquée', 'instructor_id': instructor_id})
+        _, old = search('ethnobotanique')
+        _, new = search('mycologie')
+        check("renamed course follows", not old and [c['id'] for c in new] == [created['id']])
+        client.delete(f"/api/v1/admin/courses/{created['id']}", headers=admin)
+        _, gone = search('mycologie')
+        check("deleted course disappears", gone == [])
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: admin dashboard polling with and without the snapshot cache.
+
+Starts the Supabase stand-in with a fixed round-trip latency, then has N
+threads poll the dashboard for a few seconds, first straight through
+get_dashboard_data_service and then through the stale-while-revalidate cache.
+Reports polls served, poll latency and how many Supabase requests were made.
+Run from the repository root:
+
+    python scripts/bench_dashboard_cache.py --latency-ms 40 --pollers 50 --seconds 5 --ttl 1
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.loadgen import app_env, start_standin, stop_process
+
+
+def poll(fn, pollers, seconds):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(pollers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=int, default=40, help='simulated Supabase round trip')
+    parser.add_argument('--pollers', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--ttl', type=float, default=1)
+    parser.add_argument('--stale-ttl', type=float, default=60)
+    args = parser.parse_args()
+
+    standin, standin_url = start_standin(args.latency_ms)
+    try:
+        os.environ.update(app_env(standin_url))
+        from app.services.admin_service import (
+            configure_dashboard_cache, get_dashboard_data_cached, get_dashboard_data_service
+        )
+        configure_dashboard_cache(ttl=args.ttl, stale_ttl=args.stale_ttl)
+        stats_url = f"{standin_url}/_standin/stats"
+
+        print(f"{'path':<24}{'polls':>8}{'p50 ms':>10}{'p95 ms':>10}{'upstream':>10}")
+        for label, fn in (('uncached', get_dashboard_data_service), ('snapshot cache', get_dashboard_data_cached)):
+            httpx.delete(stats_url)
+            latencies = poll(fn, args.pollers, args.seconds)
+            upstream = sum(httpx.get(stats_url).json().values())
+            p50 = statistics.median(latencies) * 1e3
+            p95 = latencies[int(len(latencies) * 0.95) - 1] * 1e3
+            print(f"{label:<24}{len(latencies):>8}{p50:>10.2f}{p95:>10.2f}{upstream:>10}")
+    finally:
+        stop_process(standin)
+
+
+if __name__ == '__main__':
+    main()
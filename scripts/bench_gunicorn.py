@@ -0,0 +1,88 @@
+"""
+Benchmark: sweep gunicorn worker/thread configurations.
+
+Starts the Supabase stand-in, then for each configuration launches
+``gunicorn -c config/gunicorn_config.py run:app`` with the matching
+environment and drives the public catalog and the admin dashboard with a
+closed-loop load. Worker models whose dependencies are missing (e.g. gevent)
+are skipped. Run from the repository root:
+
+    python scripts/bench_gunicorn.py --latency-ms 40 --concurrency 64
+    python scripts/bench_gunicorn.py --configs sync:1:1 gthread:2:8 gevent:2:0
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.loadgen import (
+    HEADER, app_env, format_row, run_load, start_process, start_standin, stop_process, wait_until_ready
+)
+
+APP_PORT = 8766
+
+# worker_class:workers:threads
+DEFAULT_CONFIGS = [
+    'sync:1:1',       # the old bare `gunicorn run:app`
+    'sync:4:1',
+    'gthread:2:4',
+    'gthread:2:16',
+    'gthread:4:8',
+    'gevent:2:0',
+]
+
+
+def parse_config(spec):
+    worker_class, workers, threads = spec.split(':')
+    return worker_class, int(workers), int(threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=int, default=40, help='simulated Supabase round trip')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=600, help='requests per route and configuration')
+    parser.add_argument('--configs', nargs='+', default=DEFAULT_CONFIGS, help='worker_class:workers:threads')
+    args = parser.parse_args()
+
+    from app.services.jwt_service import create_access_token
+    admin_token = create_access_token({'user_id': 'bench-admin', 'isAdmin': True})
+    routes = {
+        '/api/v1/courses/': {},
+        '/api/v1/admin/dashboard-data': {'Authorization': f"Bearer {admin_token}"},
+    }
+
+    standin, standin_url = start_standin(args.latency_ms)
+    try:
+        print(HEADER)
+        for spec in args.configs:
+            worker_class, workers, threads = parse_config(spec)
+            if worker_class == 'gevent' and importlib.util.find_spec('gevent') is None:
+                print(f"{spec:<42}  skipped (gevent not installed)")
+                continue
+
+            env = app_env(standin_url)
+            env.update({
+                'PORT': str(APP_PORT),
+                'GUNICORN_WORKER_CLASS': worker_class,
+                'WEB_CONCURRENCY': str(workers),
+                'GUNICORN_THREADS': str(max(threads, 1)),
+                'GUNICORN_WORKER_CONNECTIONS': str(max(args.concurrency, 1)),
+            })
+            server = start_process(['gunicorn', '-c', 'config/gunicorn_config.py', 'run:app'], env=env)
+            try:
+                base = f"http://127.0.0.1:{APP_PORT}"
+                wait_until_ready(base + '/api/v1/admin/ping')
+                for path, headers in routes.items():
+                    stats = run_load(base + path, args.concurrency, args.requests, headers)
+                    print(format_row(f"{spec} {path}", stats))
+            finally:
+                stop_process(server)
+    finally:
+        stop_process(standin)
+
+
+if __name__ == '__main__':
+    main()
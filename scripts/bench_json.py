@@ -0,0 +1,109 @@
+"""
+Benchmark: JSON encode time and payload size for the admin list endpoints.
+
+Builds 10k-row fixtures shaped like the payloads returned by
+get_students_service, get_assignments_service and get_courses_service, then
+encodes each one through Flask's stdlib provider and every fast backend
+available in this environment. Run from the repository root:
+
+    python scripts/bench_json.py --rows 10000 --repeat 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.json_provider import FastJSONProvider, available_backends
+
+
+def _ts(rng):
+    return (datetime(2025, 1, 1) + timedelta(seconds=rng.randint(0, 3e7))).isoformat()
+
+
+def students_fixture(rows, rng):
+    courses = [{'id': str(uuid.uuid4()), 'title': f"Course {i}"} for i in range(200)]
+    return [{
+        'id': str(uuid.uuid4()),
+        'name': f"Student {i}",
+        'email': f"student{i}@example.com",
+        'phone': f"+2165{rng.randint(1000000, 9999999)}",
+        'status': 'active',
+        'created_at': _ts(rng),
+        'course': rng.choice(courses) if rng.random() < 0.8 else None,
+    } for i in range(rows)]
+
+
+def assignments_fixture(rows, rng):
+    return [{
+        'id': str(uuid.uuid4()),
+        'course_id': str(uuid.uuid4()),
+        'title': f"Assignment {i}",
+        'description': "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3,
+        'assignment_type': rng.choice(['assignment', 'quiz']),
+        'due_date': _ts(rng),
+        'max_points': rng.choice([10, 20, 50, 100]),
+        'created_at': _ts(rng),
+        'updated_at': _ts(rng),
+    } for i in range(rows)]
+
+
+def courses_fixture(rows, rng):
+    return [{
+        'id': str(uuid.uuid4()),
+        'title': f"دورة رقم {i}",
+        'description': "Introduction to the subject with weekly exercises.",
+        'instructor_id': str(uuid.uuid4()),
+        'price': round(rng.uniform(0, 300), 2),
+        'status': 'active',
+        'created_at': _ts(rng),
+        'updated_at': _ts(rng),
+    } for i in range(rows)]
+
+
+def time_response(app, provider, payload, repeat):
+    app.json = provider
+    with app.app_context():
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = provider.response(payload).get_data()
+            best = min(best, time.perf_counter() - start)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    fixtures = {
+        '/admin/students': students_fixture(args.rows, rng),
+        '/admin/assignments': assignments_fixture(args.rows, rng),
+        '/admin/courses': courses_fixture(args.rows, rng),
+    }
+
+    app = Flask(__name__)
+    providers = [('flask-default', DefaultJSONProvider(app))]
+    providers += [(name, FastJSONProvider(app, name)) for name in available_backends()]
+
+    print(f"{'endpoint':<22}{'provider':<15}{'ms':>9}{'bytes':>12}{'speedup':>9}")
+    for endpoint, payload in fixtures.items():
+        baseline = None
+        for name, provider in providers:
+            seconds, size = time_response(app, provider, payload, args.repeat)
+            baseline = baseline or seconds
+            print(f"{endpoint:<22}{name:<15}{seconds * 1e3:>9.2f}{size:>12}{baseline / seconds:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: HTTP request volume from the SPA with and without preflight caching.
+
+Replays a simulated admin session against the Flask app (in-process test
+client) while modelling the browser preflight cache: an OPTIONS result is
+reused for the same (origin, method, url) until its Access-Control-Max-Age
+expires. Run from the repository root:
+
+    python scripts/bench_preflight.py --calls 2000 --session-seconds 1800
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ORIGIN = "http://localhost:5173"
+
+# Endpoints an admin session typically hits, with relative weights.
+ENDPOINTS = [
+    ('GET', '/api/v1/admin/dashboard-data', 6),
+    ('GET', '/api/v1/admin/students', 3),
+    ('GET', '/api/v1/admin/courses', 3),
+    ('GET', '/api/v1/admin/instructors', 2),
+    ('GET', '/api/v1/admin/assignments', 2),
+    ('GET', '/api/v1/admin/progress/recent', 2),
+    ('PUT', '/api/v1/admin/students/{id}', 1),
+    ('DELETE', '/api/v1/admin/students/{id}', 1),
+]
+
+
+def build_app(max_age):
+    os.environ['CORS_MAX_AGE'] = str(max_age)
+    from app import create_app
+    return create_app()
+
+
+def simulate(client, calls, session_seconds, seed=1):
+    """Return (total requests, preflights, mean preflight latency in us)."""
+    rng = random.Random(seed)
+    weighted = [(m, p) for m, p, w in ENDPOINTS for _ in range(w)]
+    preflight_cache = {}
+    preflights = 0
+    preflight_time = 0.0
+
+    for i in range(calls):
+        now = session_seconds * i / calls  # simulated wall clock
+        method, path = rng.choice(weighted)
+        url = path.format(id=rng.randint(1, 50))
+        key = (ORIGIN, method, url)
+
+        expires = preflight_cache.get(key)
+        if expires is None or expires <= now:
+            start = time.perf_counter()
+            resp = client.open(url, method='OPTIONS', headers={
+                'Origin': ORIGIN,
+                'Access-Control-Request-Method': method,
+                'Access-Control-Request-Headers': 'authorization, content-type',
+            })
+            preflight_time += time.perf_counter() - start
+            preflights += 1
+            max_age = int(resp.headers.get('Access-Control-Max-Age', 0))
+            if max_age:
+                preflight_cache[key] = now + max_age
+        # The actual request is counted but not issued: only the preflight
+        # path is under test here.
+    mean_us = (preflight_time / preflights * 1e6) if preflights else 0.0
+    return calls + preflights, preflights, mean_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=2000, help='API calls issued by the SPA')
+    parser.add_argument('--session-seconds', type=int, default=1800, help='simulated session length')
+    parser.add_argument('--max-age', type=int, default=7200, help='preflight max-age when caching is on')
+    args = parser.parse_args()
+
+    print(f"{'mode':<18}{'requests':>10}{'preflights':>12}{'overhead':>10}{'us/preflight':>14}")
+    for label, max_age in (('caching off', 0), (f'max-age={args.max_age}', args.max_age)):
+        client = build_app(max_age).test_client()
+        total, preflights, mean_us = simulate(client, args.calls, args.session_seconds)
+        overhead = preflights / args.calls * 100
+        print(f"{label:<18}{total:>10}{preflights:>12}{overhead:>9.1f}%{mean_us:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: bulk student import vs. the single-row create path.
+
+Starts the Supabase stand-in with a fixed round-trip latency and measures
+rows/sec for create_student_service (one request per student) and for
+bulk_import_students_service fed from an in-memory CSV. Run from the
+repository root:
+
+    python scripts/bench_student_import.py --latency-ms 40 --single-rows 100 --bulk-rows 5000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.loadgen import app_env, start_standin, stop_process
+
+
+def make_rows(count, prefix, course_id):
+    return [{'name': f"{prefix} {i}", 'email': f"{prefix}{i}@import.example.com",
+             'phone': f"+216{i:08d}", 'course_id': course_id} for i in range(count)]
+
+
+def to_csv(rows):
+    lines = ['name,email,phone,course_id']
+    lines += [f"{r['name']},{r['email']},{r['phone']},{r['course_id']}" for r in rows]
+    return io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=int, default=40, help='simulated Supabase round trip')
+    parser.add_argument('--single-rows', type=int, default=100)
+    parser.add_argument('--bulk-rows', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    standin, standin_url = start_standin(args.latency_ms)
+    try:
+        os.environ.update(app_env(standin_url))
+        from app.services.admin_service import (
+            bulk_import_students_service, create_student_service, parse_import_rows
+        )
+        from scripts.supabase_standin import TABLES
+        course_id = TABLES['courses'][0]['id']
+
+        start = time.perf_counter()
+        for row in make_rows(args.single_rows, 'single', course_id):
+            create_student_service(row)
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report = bulk_import_students_service(
+            parse_import_rows(to_csv(make_rows(args.bulk_rows, 'bulk', course_id)), 'text/csv'),
+            batch_size=args.batch_size
+        )
+        bulk_elapsed = time.perf_counter() - start
+
+        single_rate = args.single_rows / single_elapsed
+        bulk_rate = args.bulk_rows / bulk_elapsed
+        print(f"{'path':<28}{'rows':>8}{'seconds':>10}{'rows/s':>10}")
+        print(f"{'create_student_service':<28}{args.single_rows:>8}{single_elapsed:>10.2f}{single_rate:>10.1f}")
+        print(f"{'bulk import (csv)':<28}{args.bulk_rows:>8}{bulk_elapsed:>10.2f}{bulk_rate:>10.1f}")
+        print(f"speedup: {bulk_rate / single_rate:.1f}x  (bulk created={report['created']}, failed={report['failed']})")
+    finally:
+        stop_process(standin)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Check assignment CRUD through the admin API.
+
+Starts the Supabase stand-in and, with the Flask test client:
+
+* uploads files without an assignment (signed-URL flow), waits for their
+  verification jobs, and creates an assignment referencing them, plus
+  links, in one Supabase round trip;
+* reads it back, files and links embedded, in one round trip, without the
+  files students attached to their submissions;
+* updates it: fields change, kept files keep their rows, the rest are
+  replaced; then deletes it;
+* rejects unknown content, missing courses and missing assignments.
+
+With --fallback the stand-in runs without the admin assignment RPCs, and the
+table-by-table path is checked (its round trips are reported, not bounded).
+Exits non-zero on any failure. Run from the repository root:
+
+    python scripts/check_assignment_crud.py --files 10 --links 10
+    python scripts/check_assignment_crud.py --fallback
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.harness import Checks, standin_env
+
+ASSIGNMENT_RPCS = ('admin_create_assignment', 'admin_update_assignment')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--links', type=int, default=10)
+    parser.add_argument('--fallback', action='store_true')
+    args = parser.parse_args()
+
+    check = Checks()
+
+    def round_trips():
+        stats = httpx.get(f"{standin_url}/_standin/stats").json()
+        return sum(n for key, n in stats.items() if ' /rest/v1/' in key)
+
+    def within(trips, budget):
+        return args.fallback or trips <= budget
+
+    with standin_env(latency_ms=0, disabled_rpcs=ASSIGNMENT_RPCS if args.fallback else ()) as standin_url:
+        from app import create_app, start_background_threads
+        from app.services import assignment_service
+        from app.database.supabase_db import get_supabase_client
+        from app.services.jwt_service import create_access_token
+        from scripts.supabase_standin import TABLES
+        app = create_app()
+        start_background_threads()
+        client = app.test_client()
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+        # Course progress is kept by triggers on a migrated database; the
+        # stand-in has none, so leave progress out of the round-trip counts.
+        assignment_service._progress_sql = True
+
+        def verified(job):
+            while job['status'] not in ('succeeded', 'failed'):
+                time.sleep(0.05)
+                job = client.get(f"/api/v1/admin/jobs/{job['id']}", headers=admin).get_json()
+            return job['status'] == 'succeeded'
+
+        files, jobs = [], []
+        for i in range(args.files):
+            content = f"reading {i} ".encode() * 100
+            digest = hashlib.sha256(content).hexdigest()
+            grant = client.post('/api/v1/files/upload-url', headers=admin, json={
+                'file_name': f"reading-{i}.pdf", 'size': len(content), 'sha256': digest,
+                'content_type': 'application/pdf'}).get_json()
+            httpx.put(grant['upload_url'], content=content)
+            stored = client.post('/api/v1/files/complete', headers=admin, json={'ticket': grant['ticket']}).get_json()
+            files.append({'sha256': stored['sha256'], 'file_name': stored['file_name']})
+            jobs.append({'id': stored['verification_job_id'], 'status': 'queued'})
+        check(f"{args.files} files stored without an assignment", len({f['sha256'] for f in files}) == args.files
+              and all(verified(job) for job in jobs))
+        links = [{'url': f"https://example.com/reading/{i}", 'title': f"Reading {i}"} for i in range(args.links)]
+
+        course_id = TABLES['courses'][0]['id']
+        httpx.delete(f"{standin_url}/_standin/stats")
+        resp = client.post(f"/api/v1/admin/courses/{course_id}/assignments", headers=admin, json={
+            'title': 'Week 1', 'description': 'Read and summarise.', 'due_date': '2026-11-01T23:59:00Z',
+            'max_points': 20, 'files': files, 'links': links})
+        created = resp.get_json() or {}
+        trips = round_trips()
+        check(f"create with {args.files} files and {args.links} links", resp.status_code == 201
+              and len(created.get('files', [])) == args.files and len(created.get('links', [])) == args.links,
+              f"status {resp.status_code}")
+        check("create round trips", within(trips, 1), f"{trips} round trip(s)")
+
+        assignment_id = created['id']
+        get_supabase_client().from_('assignment_files').insert({
+            'assignment_id': assignment_id, 'submission_id': TABLES['assignment_submissions'][0]['id'],
+            'file_name': 'essay.pdf', 'file_path': 'blobs/sha256/x', 'size': 1}).execute()
+        httpx.delete(f"{standin_url}/_standin/stats")
+        resp = client.get(f"/api/v1/admin/assignments/{assignment_id}", headers=admin)
+        fetched = resp.get_json() or {}
+        trips = round_trips()
+        check("read embeds files and links only", resp.status_code == 200
+              and len(fetched.get('files', [])) == args.files and len(fetched.get('links', [])) == args.links)
+        check("read round trips", trips <= 1, f"{trips} round trip(s)")
+
+        kept = fetched['files'][:args.files // 2]
+        new_files = [{'sha256': f['blob_sha256'], 'file_name': f['file_name']} for f in kept] \
+            + [{'sha256': files[-1]['sha256'], 'file_name': 'renamed.pdf'}]
+        httpx.delete(f"{standin_url}/_standin/stats")
+        resp = client.put(f"/api/v1/admin/courses/{course_id}/assignments/{assignment_id}", headers=admin,
+                          json={'title': 'Week 1 (revised)', 'max_points': 25, 'files': new_files,
+                                'links': links[:1]})
+        updated = resp.get_json() or {}
+        trips = round_trips()
+        check("update fields, files and links", resp.status_code == 200
+              and updated.get('title') == 'Week 1 (revised)' and updated.get('max_points') == 25
+              and len(updated.get('files', [])) == len(new_files) and len(updated.get('links', [])) == 1,
+              f"status {resp.status_code}")
+        check("kept files keep their rows", {f['id'] for f in kept} <= {f['id'] for f in updated.get('files', [])})
+        check("update round trips", within(trips, 1), f"{trips} round trip(s)")
+
+        resp = client.put(f"/api/v1/admin/courses/{course_id}/assignments/{assignment_id}", headers=admin,
+                          json={'description': 'Fields only.'})
+        check("partial update keeps files and links", resp.status_code == 200
+              and len((resp.get_json() or {}).get('files', [])) == len(new_files))
+
+        unknown = [{'sha256': hashlib.sha256(b'never uploaded').hexdigest(), 'file_name': 'ghost.pdf'}]
+        resp = client.post(f"/api/v1/admin/courses/{course_id}/assignments", headers=admin,
+                           json={'title': 'Ghost', 'files': unknown})
+        check("unknown content rejected", resp.status_code == 400, f"status {resp.status_code}")
+        check("nothing left behind", not any(a['title'] == 'Ghost' for a in
+                                             client.get('/api/v1/admin/assignments', headers=admin).get_json()))
+        resp = client.post('/api/v1/admin/courses/00000000-0000-0000-0000-000000000000/assignments',
+                           headers=admin, json={'title': 'Orphan'})
+        check("missing course is 404", resp.status_code == 404, f"status {resp.status_code}")
+        resp = client.post(f"/api/v1/admin/courses/{course_id}/assignments", headers=admin,
+                           json={'title': 'Bad', 'max_points': -1})
+        check("invalid fields are 400", resp.status_code == 400, f"status {resp.status_code}")
+
+        resp = client.delete(f"/api/v1/admin/assignments/{assignment_id}", headers=admin)
+        check("delete", resp.status_code == 200, f"status {resp.status_code}")
+        missing = [client.get(f"/api/v1/admin/assignments/{assignment_id}", headers=admin).status_code,
+                   client.put(f"/api/v1/admin/courses/{course_id}/assignments/{assignment_id}", headers=admin,
+                              json={'title': 'Gone'}).status_code,
+                   client.delete(f"/api/v1/admin/assignments/{assignment_id}", headers=admin).status_code]
+        check("deleted assignment is 404 everywhere", missing == [404, 404, 404], str(missing))
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
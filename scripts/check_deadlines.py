@@ -0,0 +1,166 @@
+"""
+Check the assignment deadline scheduler.
+
+Starts the Supabase stand-in, creates assignments due a few seconds ahead
+through the admin API and runs three schedulers sharing one leader lock file
+(as three gunicorn workers would), then checks:
+
+* exactly one scheduler leads, and the deadline is processed once, shortly
+  after it passes: submissions made after it are marked 'late' and every
+  enrolled student without a submission gets one 'assignment_missing'
+  notification;
+* loading the window reads pending deadlines only (the fixture's processed
+  assignments are never fetched);
+* a moved due date is processed again at its new time, without duplicate
+  notifications;
+* when the leader stops, another scheduler takes over;
+* POST /api/v1/admin/deadlines/run processes overdue deadlines on demand.
+
+With --fallback the stand-in runs without process_assignment_deadlines and
+the table-by-table path is checked. Exits non-zero on any failure. Run from
+the repository root:
+
+    python scripts/check_deadlines.py
+    python scripts/check_deadlines.py --fallback
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.harness import Checks, standin_env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--fallback', action='store_true')
+    args = parser.parse_args()
+
+    check = Checks()
+    schedulers = []
+
+    def stop_schedulers():
+        for scheduler in schedulers:
+            scheduler.stop()
+        schedulers.clear()
+
+    def wait_for(predicate, timeout=10.0):
+        end = time.time() + timeout
+        while time.time() < end:
+            if predicate():
+                return True
+            time.sleep(0.1)
+        return False
+
+    disabled = ('process_assignment_deadlines',) if args.fallback else ()
+    with standin_env(latency_ms=0, rows=args.rows, disabled_rpcs=disabled) as standin_url, ExitStack() as cleanup:
+        cleanup.callback(stop_schedulers)
+        from app import create_app
+        from app.services import assignment_service, deadline_service
+        from app.services.jwt_service import create_access_token
+        from app.database.supabase_db import get_supabase_client
+        app = create_app()
+        client = app.test_client()
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+        assignment_service._progress_sql = True
+
+        supabase = get_supabase_client()
+
+        def rows(table, **where):
+            query = supabase.from_(table).select('*')
+            for column, value in where.items():
+                query = query.eq(column, value)
+            return query.execute().data
+
+        def create(course_id, seconds):
+            due = (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
+            return client.post(f"/api/v1/admin/courses/{course_id}/assignments", headers=admin,
+                               json={'title': f"Due in {seconds}s", 'due_date': due}).get_json()
+
+        enrolled = {}
+        for e in rows('enrollments', status='active'):
+            enrolled.setdefault(e['course_id'], []).append(e['student_id'])
+        course_id = max(enrolled, key=lambda c: len(enrolled[c]))
+        students = enrolled[course_id]
+
+        assignment = create(course_id, 3)
+        due = datetime.fromisoformat(assignment['due_date'])
+        on_time, late = students[0], students[1]
+        supabase.from_('assignment_submissions').insert([
+            {'id': 'on-time', 'assignment_id': assignment['id'], 'student_id': on_time, 'status': 'submitted',
+             'submitted_at': (due - timedelta(seconds=60)).isoformat(), 'grade': None},
+            {'id': 'after-due', 'assignment_id': assignment['id'], 'student_id': late, 'status': 'submitted',
+             'submitted_at': (due + timedelta(seconds=1)).isoformat(), 'grade': None}]).execute()
+
+        lock_file = os.path.join(tempfile.mkdtemp(), 'deadlines.lock')
+        httpx.delete(f"{standin_url}/_standin/stats")
+        schedulers.extend(deadline_service.DeadlineScheduler(deadline_service.FileLeaderLock(lock_file),
+                                                             reload_interval=1) for _ in range(3))
+        for scheduler in schedulers:
+            scheduler.start()
+        time.sleep(0.5)
+        leaders = [s for s in schedulers if s.status()['leader']]
+        check("one scheduler leads", len(leaders) == 1, f"{len(leaders)} leader(s) of {len(schedulers)}")
+        check("window holds the pending deadline only", leaders and leaders[0].status()['scheduled'] == 1,
+              f"{leaders[0].status()['scheduled'] if leaders else 0} scheduled of {args.rows + 1} assignments")
+
+        processed = wait_for(lambda: rows('assignments', id=assignment['id'])[0].get('deadline_processed_at'))
+        delay = (datetime.now(timezone.utc) - due).total_seconds()
+        check("deadline processed after it passes", processed, f"{delay:.1f}s after the due date")
+        missing = {n['student_id'] for n in rows('notifications', assignment_id=assignment['id'],
+                                                 kind='assignment_missing')}
+        check("late submission marked", rows('assignment_submissions', id='after-due')[0]['status'] == 'late'
+              and rows('assignment_submissions', id='on-time')[0]['status'] == 'submitted')
+        check("missing students notified once each", missing == set(students) - {on_time, late}
+              and len(rows('notifications', assignment_id=assignment['id'], kind='assignment_missing'))
+              == len(missing), f"{len(missing)} of {len(students)} enrolled")
+
+        stats = httpx.get(f"{standin_url}/_standin/stats").json()
+        if not args.fallback:
+            calls = stats.get('POST /rest/v1/rpc/process_assignment_deadlines', 0)
+            check("processed by one call", calls == 1, f"{calls} call(s)")
+        moved = (datetime.now(timezone.utc) + timedelta(seconds=2)).isoformat()
+        client.put(f"/api/v1/admin/courses/{course_id}/assignments/{assignment['id']}", headers=admin,
+                   json={'due_date': moved})
+        check("moved due date is pending again", rows('assignments', id=assignment['id'])[0]
+              .get('deadline_processed_at') is None)
+        wait_for(lambda: rows('assignments', id=assignment['id'])[0].get('deadline_processed_at'))
+        check("moved deadline processed without duplicates", len(rows('notifications', assignment_id=assignment['id'],
+                                                                      kind='assignment_missing')) == len(missing))
+
+        leaders[0].stop()
+        second = create(course_id, 2)
+        taken_over = wait_for(lambda: rows('assignments', id=second['id'])[0].get('deadline_processed_at'))
+        new_leaders = [s for s in schedulers if s is not leaders[0] and s.status()['leader']]
+        check("another scheduler takes over", taken_over and len(new_leaders) == 1)
+        stop_schedulers()
+
+        httpx.delete(f"{standin_url}/_standin/stats")
+        pending = deadline_service.load_pending_deadlines(datetime.now(timezone.utc) + timedelta(days=365))
+        trips = sum(n for key, n in httpx.get(f"{standin_url}/_standin/stats").json().items()
+                    if ' /rest/v1/' in key)
+        check("window load skips processed deadlines", pending == [] and trips == 1,
+              f"{len(pending)} pending of {args.rows + 1} assignments, {trips} request(s)")
+
+        overdue = create(course_id, 1)
+        time.sleep(1.2)
+        resp = client.post('/api/v1/admin/deadlines/run', headers=admin)
+        body = resp.get_json() or {}
+        check("manual run processes overdue deadlines", resp.status_code == 200
+              and [a['assignment_id'] for a in body.get('assignments', [])] == [overdue['id']],
+              f"{body.get('processed')} processed, {body.get('missing')} missing")
+        resp = client.post('/api/v1/admin/deadlines/run', headers=admin)
+        check("second run finds nothing", (resp.get_json() or {}).get('processed') == 0)
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
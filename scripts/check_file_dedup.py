@@ -0,0 +1,114 @@
+"""
+Check content-addressed deduplication of assignment files.
+
+Starts the Supabase stand-in and, with the Flask test client:
+
+* uploads the same file to several assignments and checks that only the
+  first upload writes to storage and every row references the same blob;
+* uploads it once more through the resumable protocol and checks that the
+  assembly skips the storage write too;
+* deletes every row referencing the blob, runs POST /api/v1/admin/files/gc
+  and checks that a blob just claimed for reuse survives, and that
+  otherwise only the unreferenced blob is removed.
+
+Exits non-zero on any failure. Run from the repository root:
+
+    python scripts/check_file_dedup.py --copies 5 --size-mb 4
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.harness import Checks, standin_env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--copies', type=int, default=5)
+    parser.add_argument('--size-mb', type=int, default=4)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    def storage_calls(method):
+        stats = httpx.get(f"{standin_url}/_standin/stats").json()
+        return sum(n for key, n in stats.items() if key.startswith(f"{method} /storage/v1/object/"))
+
+    with standin_env(latency_ms=0, env={'UPLOAD_TMP_DIR': tempfile.mkdtemp(prefix='dedup-check-')}) as standin_url:
+        from app import create_app, start_background_threads
+        from app.database.supabase_db import get_supabase_client
+        from app.services.jwt_service import create_access_token
+        from app.services.upload_service import find_blob
+        from scripts.supabase_standin import TABLES
+        app = create_app()
+        start_background_threads()
+        client = app.test_client()
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+
+        syllabus = os.urandom(args.size_mb * 1024 * 1024)
+        digest = hashlib.sha256(syllabus).hexdigest()
+        assignments = TABLES['assignments'][:args.copies]
+
+        httpx.delete(f"{standin_url}/_standin/stats")
+        rows = []
+        for assignment in assignments:
+            resp = client.post(f"/api/v1/admin/assignments/{assignment['id']}/files", data=syllabus,
+                               headers=dict(admin, **{'Content-Type': 'application/pdf', 'X-File-Name': 'syllabus.pdf'}))
+            rows.append(resp.get_json() or {})
+        check(f"{args.copies} uploads of the same file", all(r.get('checksum_sha256') == digest for r in rows))
+        check("one storage write", storage_calls('POST') == 1, f"{storage_calls('POST')} write(s)")
+        check("later uploads deduplicated", [r.get('deduplicated') for r in rows] == [False] + [True] * (args.copies - 1))
+        check("rows share one blob", len({r.get('file_path') for r in rows}) == 1
+              and rows[0].get('blob_sha256') == digest, rows[0].get('file_path', ''))
+
+        submission = TABLES['assignment_submissions'][0]
+        owner = next(s for s in TABLES['students'] if s['id'] == submission['student_id'])
+        student = {'Authorization': f"Bearer {create_access_token({'user_id': owner['user_id']})}"}
+        resp = client.post('/api/v1/uploads', headers=student, json={
+            'submission_id': submission['id'], 'file_name': 'copy.pdf', 'size': len(syllabus)})
+        location = resp.headers['Location']
+        half = len(syllabus) // 2
+        client.patch(location, headers=dict(student, **{'Upload-Offset': '0'}), data=syllabus[:half])
+        resp = client.patch(location, headers=dict(student, **{'Upload-Offset': str(half)}), data=syllabus[half:])
+        row = resp.get_json() or {}
+        check("resumable upload deduplicated", resp.status_code == 201 and row.get('deduplicated') is True
+              and row.get('blob_sha256') == digest, f"status {resp.status_code}")
+        check("still one storage write", storage_calls('POST') == 1, f"{storage_calls('POST')} write(s)")
+
+        other = client.post(f"/api/v1/admin/assignments/{assignments[0]['id']}/files", data=os.urandom(1024),
+                            headers=dict(admin, **{'Content-Type': 'text/plain', 'X-File-Name': 'notes.txt'})).get_json()
+        check("different content stored separately", other.get('deduplicated') is False
+              and other.get('file_path') != rows[0].get('file_path'))
+
+        get_supabase_client().from_('assignment_files').delete().eq('blob_sha256', digest).execute()
+        def collect(grace_seconds=0):
+            job = client.post('/api/v1/admin/files/gc', headers=admin,
+                              json={'grace_seconds': grace_seconds}).get_json()
+            while job['status'] not in ('succeeded', 'failed'):
+                time.sleep(0.05)
+                job = client.get(f"/api/v1/admin/jobs/{job['id']}", headers=admin).get_json()
+            return job
+
+        time.sleep(1.1)
+        find_blob(digest)
+        check("gc spares a blob claimed for reuse", (collect(1).get('result') or {}).get('collected') == 0)
+
+        job = collect()
+        result = job.get('result') or {}
+        check("gc removes the unreferenced blob only", job['status'] == 'succeeded'
+              and result.get('paths') == [rows[0].get('file_path')]
+              and result.get('bytes_freed') == len(syllabus), f"collected {result.get('collected')}")
+        check("storage object deleted", storage_calls('DELETE') == 1)
+        check("second gc run is a no-op", (collect().get('result') or {}).get('collected') == 0)
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
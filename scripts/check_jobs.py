@@ -0,0 +1,156 @@
+"""
+Check the background job queue behind the slow admin endpoints.
+
+Starts the Supabase stand-in and, with the Flask test client:
+
+* creates an instructor: the endpoint answers 202 with a job (and a
+  Location header) before the auth account exists, and the job's result is
+  the instructor record;
+* repeats the request with the same Idempotency-Key (same job, no second
+  account), reuses the key for another body (422), and creates a duplicate
+  email (the job fails once, without retries);
+* makes the instructor insert fail once: the job rolls back the auth user,
+  retries, and succeeds on its second attempt;
+* queues bulk deletes side by side and checks that the worker threads ran
+  them concurrently, and imports students through a job (the body is
+  staged in storage, not carried in the job's arguments);
+* reads a job's status through a second backend with no state of its own,
+  as another gunicorn worker would.
+
+By default the queue is the stand-in's background_jobs table. With --redis
+URL the app only enqueues (JOB_WORKERS=0) into that Redis and two
+``worker.py`` processes run the jobs. Exits non-zero on any failure.
+Run from the repository root:
+
+    python scripts/check_jobs.py
+    python scripts/check_jobs.py --redis redis://localhost:6379/0
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.harness import Checks, standin_env
+from scripts.loadgen import start_process, stop_process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=4, help='concurrent bulk deletes (and worker threads)')
+    parser.add_argument('--redis', help='run the queue in this Redis with separate worker processes')
+    args = parser.parse_args()
+
+    check = Checks()
+    env = {'JOB_WORKERS': str(args.jobs)}
+    with standin_env(latency_ms=args.latency_ms, env=env) as standin_url, ExitStack() as workers:
+        if args.redis:
+            for _ in range(2):
+                workers.callback(stop_process, start_process([sys.executable, 'worker.py'],
+                                                             env={'REDIS_URL': args.redis}))
+            os.environ.update(REDIS_URL=args.redis, JOB_WORKERS='0')
+        from app import create_app, start_background_threads
+        from app.services import job_service
+        from app.services.jwt_service import create_access_token
+        from app.database.supabase_db import get_supabase_client
+        job_service.RETRY_BASE_DELAY = 0.5
+        app = create_app()
+        start_background_threads()
+        client = app.test_client()
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+        supabase = get_supabase_client()
+
+        def wait(job, timeout=30.0):
+            end = time.time() + timeout
+            while time.time() < end:
+                job = client.get(f"/api/v1/admin/jobs/{job['id']}", headers=admin).get_json()
+                if job['status'] in ('succeeded', 'failed'):
+                    break
+                time.sleep(0.05)
+            return job
+
+        def instructors(email):
+            return supabase.from_('instructors').select('id').eq('email', email).execute().data
+
+        email = f"{uuid.uuid4().hex[:8]}@example.com"
+        body = {'name': 'Ada', 'email': email, 'phone': '+21600000000', 'password': 'S3cure-pass!'}
+        key = {'Idempotency-Key': uuid.uuid4().hex}
+        start = time.perf_counter()
+        resp = client.post('/api/v1/admin/instructors', headers=dict(admin, **key), json=body)
+        accepted = time.perf_counter() - start
+        job = resp.get_json() or {}
+        check("create instructor answers 202", resp.status_code == 202 and job.get('status') == 'queued'
+              and resp.headers.get('Location', '').endswith(job.get('id', '?')),
+              f"{accepted * 1000:.0f} ms (round trip {args.latency_ms} ms)")
+        job = wait(job)
+        check("job creates the instructor", job['status'] == 'succeeded' and job['attempts'] == 1
+              and job['result'].get('email') == email and len(instructors(email)) == 1)
+        stored = supabase.from_('background_jobs').select('*').eq('id', job['id']).execute().data \
+            if not args.redis else []
+        check("password neither exposed nor queued", 'args' not in job and 'S3cure' not in str(job)
+              and 'S3cure' not in str(stored))
+        other_worker = job_service.make_job_backend(redis_url=args.redis)
+        check("status visible to another worker", job_service.public_job(other_worker.get(job['id'])) == job)
+
+        again = client.post('/api/v1/admin/instructors', headers=dict(admin, **key), json=body)
+        check("same idempotency key, same job", again.status_code == 202
+              and again.get_json()['id'] == job['id'] and len(instructors(email)) == 1)
+        reused = client.post('/api/v1/admin/instructors', headers=dict(admin, **key), json=dict(body, name='Bob'))
+        check("key reused for another body is 422", reused.status_code == 422)
+
+        duplicate = client.post('/api/v1/admin/instructors', headers=admin, json=body)
+        check("existing email refused in the request", duplicate.status_code == 400,
+              (duplicate.get_json() or {}).get('error'))
+
+        email = f"{uuid.uuid4().hex[:8]}@example.com"
+        httpx.post(f"{standin_url}/_standin/fail", json={'request': 'POST /rest/v1/instructors', 'times': 1})
+        retried = wait(client.post('/api/v1/admin/instructors', headers=admin,
+                                   json=dict(body, email=email)).get_json())
+        check("transient failure is retried", retried['status'] == 'succeeded' and retried['attempts'] == 2
+              and len(instructors(email)) == 1, f"{retried['attempts']} attempt(s)")
+
+        students = supabase.from_('students').select('id').limit(args.jobs * 5).execute().data
+        batches = [[s['id'] for s in students[i::args.jobs]] for i in range(args.jobs)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.jobs) as pool:
+            queued = list(pool.map(lambda ids: client.post('/api/v1/admin/students/bulk-delete', headers=admin,
+                                                           json={'ids': ids}).get_json(), batches))
+        done = [wait(job) for job in queued]
+        elapsed = time.perf_counter() - start
+        deleted = sum(len(job['result']['deleted']) for job in done if job['status'] == 'succeeded')
+        check(f"{args.jobs} bulk deletes as jobs", deleted == len(students), f"{deleted} deleted")
+        overlapping = sum(a['started_at'] < b['finished_at'] and b['started_at'] < a['finished_at']
+                          for i, a in enumerate(done) for b in done[i + 1:])
+        check("jobs ran concurrently", overlapping > 0,
+              f"{elapsed * 1000:.0f} ms for {args.jobs} x {args.latency_ms} ms")
+
+        csv = 'name,email,phone\n' + '\n'.join(f"Imported {i},imported{i}-{uuid.uuid4().hex[:6]}@example.com,+2161{i:07d}"
+                                               for i in range(20))
+        httpx.delete(f"{standin_url}/_standin/stats")
+        resp = client.post('/api/v1/admin/students/import', headers=dict(admin, **{'Content-Type': 'text/csv'}),
+                           data=csv)
+        report = wait(resp.get_json())
+        check("student import as a job", resp.status_code == 202 and report['status'] == 'succeeded'
+              and report['result']['created'] == 20, f"{(report.get('result') or {}).get('created')} created")
+        stats = httpx.get(f"{standin_url}/_standin/stats").json()
+        check("import body staged in storage, then removed",
+              any(key.startswith('POST /storage/v1/object/assignments/staging/import-') for key in stats)
+              and stats.get('DELETE /storage/v1/object/assignments') == 1)
+        resp = client.post('/api/v1/admin/students/import', headers=dict(admin, **{'Content-Type': 'text/plain'}),
+                           data=csv)
+        check("unsupported import format is 400", resp.status_code == 400)
+
+        resp = client.get(f"/api/v1/admin/jobs/{uuid.uuid4()}", headers=admin)
+        check("unknown job is 404", resp.status_code == 404)
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Check the resumable upload protocol end to end.
+
+Starts the Supabase stand-in and drives /api/v1/uploads with the Flask test
+client while tracing allocations:
+
+* a student uploads a large file in chunks; one chunk is cut off mid-way,
+  the client asks for the offset and resumes from there;
+* a chunk at the wrong offset gets 409, a bad Upload-Checksum gets 422;
+* another student cannot see or append to the session;
+* when storing the assembled file fails, an empty PATCH at the final
+  offset finishes it;
+* the assembled object has the right size and SHA-256, and the peak memory
+  traced during any request stays far below the chunk and file sizes.
+
+Exits non-zero on any failure. Run from the repository root:
+
+    python scripts/check_resumable_upload.py --size-mb 48 --chunk-mb 5
+"""
+import argparse
+import base64
+import hashlib
+import io
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.harness import Checks, standin_env
+
+
+class ChunkStream:
+    """Body that yields ``data`` and then drops the connection after ``cut`` bytes."""
+
+    def __init__(self, data, cut=None):
+        self.stream = io.BytesIO(data)
+        self.size = len(data)
+        self.cut = cut
+
+    def tell(self):
+        return self.stream.tell()
+
+    def seek(self, offset, whence=0):
+        return self.stream.seek(offset, whence)
+
+    def read(self, n=-1):
+        if self.cut is not None and self.stream.tell() >= self.cut:
+            from werkzeug.exceptions import ClientDisconnected
+            raise ClientDisconnected()
+        if self.cut is not None:
+            n = min(n if n and n > 0 else self.size, self.cut - self.stream.tell())
+        return self.stream.read(n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=48)
+    parser.add_argument('--chunk-mb', type=int, default=5)
+    args = parser.parse_args()
+
+    check = Checks()
+    env = {'MAX_FILE_SIZE_MB': str(args.size_mb + 1), 'UPLOAD_TMP_DIR': tempfile.mkdtemp(prefix='resumable-check-')}
+    with standin_env(latency_ms=0, env=env):
+        from app import create_app
+        from app.services.jwt_service import create_access_token
+        from scripts.supabase_standin import TABLES
+        app = create_app()
+        client = app.test_client()
+
+        submission = TABLES['assignment_submissions'][0]
+        owner = next(s for s in TABLES['students'] if s['id'] == submission['student_id'])
+        other = next(s for s in TABLES['students'] if s['id'] != submission['student_id'])
+        auth = {'Authorization': f"Bearer {create_access_token({'user_id': owner['user_id']})}"}
+        other_auth = {'Authorization': f"Bearer {create_access_token({'user_id': other['user_id']})}"}
+
+        size = args.size_mb * 1024 * 1024
+        chunk = args.chunk_mb * 1024 * 1024
+        rng = random.Random(7)
+        expected_sha256 = hashlib.sha256()
+
+        resp = client.post('/api/v1/uploads', headers=auth, json={
+            'submission_id': submission['id'], 'file_name': 'thesis.pdf',
+            'size': size, 'content_type': 'application/pdf'})
+        check("create upload session", resp.status_code == 201 and resp.headers.get('Upload-Offset') == '0',
+              f"status {resp.status_code}")
+        location = resp.headers['Location']
+
+        resp = client.post('/api/v1/uploads', headers=other_auth, json={
+            'submission_id': submission['id'], 'file_name': 'x.pdf', 'size': 10})
+        check("session on another student's submission", resp.status_code == 403, f"status {resp.status_code}")
+        resp = client.patch(location, headers=dict(other_auth, **{'Upload-Offset': '0'}), data=b'x')
+        check("other student cannot append", resp.status_code == 403, f"status {resp.status_code}")
+
+        def traced_patch(*a, **kw):
+            # Only the request is traced, not the test's own chunk buffers.
+            nonlocal peak
+            tracemalloc.start()
+            try:
+                return client.patch(*a, **kw)
+            finally:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+        peak = 0
+        offset, interrupted, completed, file_row = 0, False, 0, None
+        while offset < size:
+            data = rng.randbytes(min(chunk, size - offset))
+            expected_sha256.update(data)
+            pending = data
+            while pending:
+                headers = dict(auth, **{'Upload-Offset': str(offset)})
+                if not interrupted and offset >= size // 2:
+                    # Drop the connection half-way through this chunk.
+                    interrupted = True
+                    body = ChunkStream(pending, len(pending) // 2)
+                    resp = traced_patch(location, headers=headers, input_stream=body,
+                                        environ_overrides={'CONTENT_LENGTH': str(len(pending))})
+                    check("interrupted chunk reported", resp.status_code == 400, f"status {resp.status_code}")
+                    resp = client.head(location, headers=auth)
+                    resumed = int(resp.headers['Upload-Offset'])
+                    check("partial bytes kept for resume", resumed == offset + len(pending) // 2, f"offset {resumed}")
+                    pending = pending[resumed - offset:]
+                    offset = resumed
+                    continue
+                body = ChunkStream(pending)
+                resp = traced_patch(location, headers=headers, input_stream=body)
+                completed += resp.status_code in (201, 204)
+                if resp.status_code == 201:
+                    file_row = resp.get_json()
+                offset += len(pending)
+                pending = b''
+
+        check("all chunks accepted", file_row is not None, f"{completed} PATCH requests")
+        check("size and sha256 recorded", (file_row or {}).get('size') == size
+              and (file_row or {}).get('checksum_sha256') == expected_sha256.hexdigest())
+        check("attached to the submission", (file_row or {}).get('submission_id') == submission['id'])
+        check("peak traced memory per request < 8 MB", peak < 8 * 1024 * 1024, f"peak {peak / 1024 / 1024:.1f} MB")
+        resp = client.head(location, headers=auth)
+        check("finished session is gone", resp.status_code == 404, f"status {resp.status_code}")
+
+        resp = client.post('/api/v1/uploads', headers=auth, json={
+            'submission_id': submission['id'], 'file_name': 'notes.txt', 'size': 2048})
+        location = resp.headers['Location']
+        resp = client.patch(location, headers=dict(auth, **{'Upload-Offset': '100'}), data=b'a' * 100)
+        check("wrong offset rejected with current offset", resp.status_code == 409
+              and resp.headers.get('Upload-Offset') == '0', f"status {resp.status_code}")
+        bad = base64.b64encode(hashlib.sha256(b'other').digest()).decode()
+        resp = client.patch(location, headers=dict(auth, **{'Upload-Offset': '0', 'Upload-Checksum': f"sha256 {bad}"}),
+                            data=b'a' * 1024)
+        check("bad chunk checksum rejected", resp.status_code == 422, f"status {resp.status_code}")
+        good = base64.b64encode(hashlib.sha256(b'a' * 1024).digest()).decode()
+        resp = client.patch(location, headers=dict(auth, **{'Upload-Offset': '0', 'Upload-Checksum': f"sha256 {good}"}),
+                            data=b'a' * 1024)
+        check("good chunk checksum accepted", resp.status_code == 204
+              and resp.headers.get('Upload-Offset') == '1024', f"status {resp.status_code}")
+        resp = client.delete(location, headers=auth)
+        check("cancel upload", resp.status_code == 204 and client.head(location, headers=auth).status_code == 404)
+
+        import app.services.resumable_upload_service as resumable
+        resp = client.post('/api/v1/uploads', headers=auth, json={
+            'submission_id': submission['id'], 'file_name': 'retry.txt', 'size': 1024})
+        location = resp.headers['Location']
+        put_blob = resumable.put_blob
+
+        def storage_down(*a, **kw):
+            raise RuntimeError("storage returned 503")
+
+        resumable.put_blob = storage_down
+        try:
+            resp = client.patch(location, headers=dict(auth, **{'Upload-Offset': '0'}), data=b'r' * 1024)
+        finally:
+            resumable.put_blob = put_blob
+        offset = client.head(location, headers=auth).headers.get('Upload-Offset')
+        check("failed assembly keeps the complete session", resp.status_code == 500 and offset == '1024',
+              f"status {resp.status_code}, offset {offset}")
+        resp = client.patch(location, headers=dict(auth, **{'Upload-Offset': '1024'}), data=b'')
+        check("empty PATCH at the end retries assembly", resp.status_code == 201
+              and resp.get_json().get('size') == 1024, f"status {resp.status_code}")
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Check the signed-URL upload and download flow.
+
+Starts the Supabase stand-in and, with the Flask test client:
+
+* a student gets a signed upload URL, PUTs the file straight to (stand-in)
+  storage and completes with the ticket; completing reads only the
+  object's metadata and records the file as pending, and the verification
+  job hashes it, moves it to its blob path and points the row there;
+* a size that does not match is rejected at once; content that does not
+  match the declared digest fails its verification job, which removes the
+  staged object and the row; another user's ticket is refused;
+* an admin registering content that is already stored skips the transfer;
+* repeated download URL requests (single and batched) are served from the
+  signed URL cache, with one signing call per URL.
+
+Exits non-zero on any failure. Run from the repository root:
+
+    python scripts/check_signed_urls.py --downloads 50
+"""
+import argparse
+import hashlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.harness import Checks, standin_env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--downloads', type=int, default=50)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    def downloads():
+        stats = httpx.get(f"{standin_url}/_standin/stats").json()
+        return sum(n for key, n in stats.items() if key.startswith('GET /storage/v1/object/sign/'))
+
+    def sign_calls():
+        stats = httpx.get(f"{standin_url}/_standin/stats").json()
+        return sum(n for key, n in stats.items() if key.startswith('POST /storage/v1/object/sign/'))
+
+    with standin_env(latency_ms=0) as standin_url:
+        # No job workers run here: jobs are run one by one below, so the
+        # requests can be checked alone.
+        from app import create_app
+        from app.services.job_service import run_next_job
+        from app.services.jwt_service import create_access_token
+        from app.database.supabase_db import get_supabase_client
+        from scripts.supabase_standin import TABLES
+        app = create_app()
+        client = app.test_client()
+
+        def supabase_row(table, row_id):
+            rows = get_supabase_client().from_(table).select('*').eq('id', row_id).execute().data
+            return rows[0] if rows else {}
+
+        submission = TABLES['assignment_submissions'][0]
+        owner = next(s for s in TABLES['students'] if s['id'] == submission['student_id'])
+        other = next(s for s in TABLES['students'] if s['id'] != submission['student_id'])
+        student = {'Authorization': f"Bearer {create_access_token({'user_id': owner['user_id']})}"}
+        other_student = {'Authorization': f"Bearer {create_access_token({'user_id': other['user_id']})}"}
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+
+        content = os.urandom(512 * 1024)
+        digest = hashlib.sha256(content).hexdigest()
+        request_body = {'submission_id': submission['id'], 'file_name': 'essay.pdf', 'size': len(content),
+                        'sha256': digest, 'content_type': 'application/pdf'}
+
+        resp = client.post('/api/v1/files/upload-url', headers=student, json=request_body)
+        grant = resp.get_json() or {}
+        check("student gets a signed upload URL", resp.status_code == 200 and grant.get('upload_required') is True,
+              f"status {resp.status_code}")
+        put = httpx.put(grant['upload_url'], content=content)
+        check("direct PUT to storage", put.status_code == 200, f"status {put.status_code}")
+        resp = client.post('/api/v1/files/complete', headers=other_student, json={'ticket': grant['ticket']})
+        check("another user's ticket refused", resp.status_code == 403, f"status {resp.status_code}")
+        httpx.delete(f"{standin_url}/_standin/stats")
+        resp = client.post('/api/v1/files/complete', headers=student, json={'ticket': grant['ticket']})
+        student_file = resp.get_json() or {}
+        check("completion records a pending file, no download", resp.status_code == 201
+              and student_file.get('blob_sha256') is None and student_file.get('file_path') == grant['path']
+              and downloads() == 0, f"status {resp.status_code}, {downloads()} download(s)")
+        replay = client.post('/api/v1/files/complete', headers=student, json={'ticket': grant['ticket']})
+        check("replayed completion returns the same row and job", replay.status_code == 201
+              and (replay.get_json() or {}).get('id') == student_file.get('id')
+              and replay.get_json().get('verification_job_id') == student_file.get('verification_job_id')
+              and len(get_supabase_client().from_('assignment_files').select('id')
+                      .eq('staging_path', grant['path']).execute().data) == 1)
+        pending = client.get(f"/api/v1/files/{student_file['id']}/download-url", headers=student)
+        batch = client.post('/api/v1/files/download-urls', headers=student, json={'file_ids': [student_file['id']]})
+        check("no download URL before verification", pending.status_code == 409 and batch.get_json() == [],
+              f"status {pending.status_code}")
+        job = run_next_job()
+        row = supabase_row('assignment_files', student_file['id'])
+        check("verification job promotes the blob", job and job['status'] == 'succeeded'
+              and row.get('blob_sha256') == digest and row.get('file_path') != grant['path'],
+              f"job {job and job['status']}")
+        student_file = dict(student_file, **row)
+        replay = client.post('/api/v1/files/complete', headers=student, json={'ticket': grant['ticket']})
+        check("completion replayed after verification", replay.status_code == 201
+              and replay.get_json().get('id') == student_file['id'] and run_next_job() is None,
+              f"status {replay.status_code}")
+
+        short = dict(request_body, size=len(content) + 1)
+        grant = client.post('/api/v1/files/upload-url', headers=student, json=short).get_json()
+        httpx.put(grant['upload_url'], content=content)
+        resp = client.post('/api/v1/files/complete', headers=student, json={'ticket': grant['ticket']})
+        check("mismatching size rejected at once", resp.status_code == 400 and run_next_job() is None,
+              f"status {resp.status_code}")
+
+        bogus = dict(request_body, sha256=hashlib.sha256(b'something else').hexdigest())
+        grant = client.post('/api/v1/files/upload-url', headers=student, json=bogus).get_json()
+        httpx.put(grant['upload_url'], content=content)
+        resp = client.post('/api/v1/files/complete', headers=student, json={'ticket': grant['ticket']})
+        bogus_file = resp.get_json() or {}
+        job = run_next_job()
+        staged = httpx.get(f"{standin_url}/storage/v1/object/sign/assignments/{grant['path']}")
+        check("mismatching content removed with its row", resp.status_code == 201 and job['status'] == 'failed'
+              and staged.status_code == 400 and not supabase_row('assignment_files', bogus_file.get('id')),
+              f"job {job['status']}")
+
+        assignment_id = TABLES['assignments'][1]['id']
+        resp = client.post('/api/v1/files/upload-url', headers=admin, json={
+            'assignment_id': assignment_id, 'file_name': 'reading.pdf', 'size': len(content), 'sha256': digest})
+        grant = resp.get_json() or {}
+        check("admin skips the transfer for stored content", grant.get('upload_required') is False)
+        resp = client.post('/api/v1/files/complete', headers=admin, json={'ticket': grant['ticket']})
+        admin_file = resp.get_json() or {}
+        check("admin file registered on the shared blob", resp.status_code == 201
+              and admin_file.get('file_path') == student_file.get('file_path'), f"status {resp.status_code}")
+
+        resp = client.get(f"/api/v1/files/{student_file['id']}/download-url", headers=other_student)
+        check("submission file private to its student", resp.status_code == 403, f"status {resp.status_code}")
+
+        httpx.delete(f"{standin_url}/_standin/stats")
+        urls = {client.get(f"/api/v1/files/{admin_file['id']}/download-url", headers=student).get_json()['url']
+                for _ in range(args.downloads)}
+        check(f"{args.downloads} download URL requests", len(urls) == 1 and sign_calls() == 1,
+              f"{sign_calls()} signing call(s)")
+        downloaded = httpx.get(urls.pop())
+        check("signed URL serves the content", downloaded.content == content)
+
+        httpx.delete(f"{standin_url}/_standin/stats")
+        ids = [admin_file['id'], student_file['id'], admin_file['id'], '00000000-0000-0000-0000-000000000000']
+        batches = [client.post('/api/v1/files/download-urls', headers=student, json={'file_ids': ids}).get_json()
+                   for _ in range(3)]
+        check("batch keeps request order, drops unknown ids",
+              [u['file_id'] for u in batches[0]] == [admin_file['id'], student_file['id']])
+        check("batched URLs signed once", sign_calls() == 1 and batches[0] == batches[2],
+              f"{sign_calls()} signing call(s)")
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
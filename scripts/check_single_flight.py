@@ -0,0 +1,77 @@
+"""
+Check that identical concurrent course reads are coalesced.
+
+Starts the Supabase stand-in with a fixed round-trip latency, fires N
+concurrent GET /api/v1/courses/<course_id> requests for the same course
+(plus N concurrent async catalog reads), and counts how many Supabase
+requests each burst produced. Exits non-zero unless each burst made exactly
+one upstream call. Run from the repository root:
+
+    python scripts/check_single_flight.py --requests 50 --latency-ms 100
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.loadgen import app_env, start_standin, stop_process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--latency-ms', type=int, default=100, help='simulated Supabase round trip')
+    args = parser.parse_args()
+
+    standin, standin_url = start_standin(args.latency_ms)
+    failures = 0
+    try:
+        os.environ.update(app_env(standin_url))
+        from app import create_app
+        from app.services.courses_service import get_courses_service_async
+        from scripts.supabase_standin import TABLES
+        app = create_app()
+        course_id = TABLES['courses'][0]['id']
+        stats_url = f"{standin_url}/_standin/stats"
+
+        statuses = []
+        barrier = threading.Barrier(args.requests)
+
+        def request_course():
+            client = app.test_client()
+            barrier.wait()
+            statuses.append(client.get(f"/api/v1/courses/{course_id}").status_code)
+
+        httpx.delete(stats_url)
+        threads = [threading.Thread(target=request_course) for _ in range(args.requests)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        upstream = sum(httpx.get(stats_url).json().values())
+        ok = upstream == 1 and statuses.count(200) == args.requests
+        failures += not ok
+        print(f"GET /api/v1/courses/<id> x{args.requests}: {statuses.count(200)} ok, "
+              f"{upstream} upstream call(s)  {'ok' if ok else 'FAIL'}")
+
+        async def read_catalog():
+            return await asyncio.gather(*(get_courses_service_async() for _ in range(args.requests)))
+
+        httpx.delete(stats_url)
+        results = asyncio.run(read_catalog())
+        upstream = sum(httpx.get(stats_url).json().values())
+        ok = upstream == 1 and all(r is results[0] for r in results)
+        failures += not ok
+        print(f"get_courses_service_async x{args.requests}: {upstream} upstream call(s)  {'ok' if ok else 'FAIL'}")
+    finally:
+        stop_process(standin)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
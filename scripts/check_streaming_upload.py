@@ -0,0 +1,107 @@
+"""
+Check that assignment uploads stream with bounded memory.
+
+Starts the Supabase stand-in and pushes large generated bodies through the
+upload endpoints with the Flask test client while tracing allocations:
+
+* an upload just under the limit succeeds, with the right size and
+  SHA-256, and the peak traced memory stays far below the file size;
+* an over-limit upload sent without Content-Length is cut off with 413;
+* a student can attach a file to their own submission but not to another
+  student's.
+
+Exits non-zero on any failure. Run from the repository root:
+
+    python scripts/check_streaming_upload.py --size-mb 48
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.harness import Checks, standin_env
+
+
+class GeneratedStream:
+    """File-like body of ``size`` pseudo-random bytes, produced on demand."""
+
+    def __init__(self, size, seed=1):
+        self.size = size
+        self.position = 0
+        self.rng = random.Random(seed)
+        self.sha256 = hashlib.sha256()
+
+    # tell/seek only let the test client measure the length.
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=0):
+        self.position = self.size if whence == 2 else offset
+        return self.position
+
+    def read(self, n=-1):
+        remaining = self.size - self.position
+        if n is None or n < 0:
+            n = remaining
+        n = min(n, remaining, 1024 * 1024)
+        self.position += n
+        data = self.rng.randbytes(n)
+        self.sha256.update(data)
+        return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size-mb', type=int, default=48)
+    args = parser.parse_args()
+    limit_mb = args.size_mb + 1
+
+    check = Checks()
+
+    with standin_env(latency_ms=0, env={'MAX_FILE_SIZE_MB': str(limit_mb)}):
+        from app import create_app
+        from app.services.jwt_service import create_access_token
+        from scripts.supabase_standin import TABLES
+        app = create_app()
+        client = app.test_client()
+
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+        assignment_id = TABLES['assignments'][0]['id']
+        size = args.size_mb * 1024 * 1024
+
+        body = GeneratedStream(size)
+        tracemalloc.start()
+        resp = client.post(f"/api/v1/admin/assignments/{assignment_id}/files", input_stream=body,
+                           headers=dict(admin, **{'Content-Type': 'application/pdf', 'X-File-Name': 'syllabus.pdf'}))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        row = resp.get_json() or {}
+        check(f"{args.size_mb} MB assignment upload", resp.status_code == 201, f"status {resp.status_code}")
+        check("size and sha256 recorded", row.get('size') == size and row.get('checksum_sha256') == body.sha256.hexdigest())
+        check("peak traced memory < 8 MB", peak < 8 * 1024 * 1024, f"peak {peak / 1024 / 1024:.1f} MB")
+
+        oversize = GeneratedStream((limit_mb + 8) * 1024 * 1024)
+        resp = client.post(f"/api/v1/admin/assignments/{assignment_id}/files", input_stream=oversize,
+                           headers=dict(admin, **{'Content-Type': 'application/octet-stream', 'X-File-Name': 'big.bin'}),
+                           environ_overrides={'wsgi.input_terminated': True, 'CONTENT_LENGTH': ''})
+        check("chunked over-limit upload rejected", resp.status_code == 413, f"status {resp.status_code}")
+
+        submission = TABLES['assignment_submissions'][0]
+        owner = next(s for s in TABLES['students'] if s['id'] == submission['student_id'])
+        other = next(s for s in TABLES['students'] if s['id'] != submission['student_id'])
+        for label, user, expected in (("own submission upload", owner, 201), ("other student's submission", other, 403)):
+            token = create_access_token({'user_id': user['user_id']})
+            resp = client.post(f"/api/v1/student/submissions/{submission['id']}/files",
+                               input_stream=GeneratedStream(256 * 1024),
+                               headers={'Authorization': f"Bearer {token}", 'Content-Type': 'text/plain',
+                                        'X-File-Name': 'answer.txt'})
+            check(label, resp.status_code == expected, f"status {resp.status_code}")
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
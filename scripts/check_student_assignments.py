@@ -0,0 +1,114 @@
+"""
+Check the student-scoped assignment listing.
+
+Starts the Supabase stand-in and, with the Flask test client, lists a
+course's assignments as an enrolled student and checks:
+
+* each assignment carries that student's submission status and best grade
+  (and nobody else's), soonest due first, with X-Total-Count;
+* pages put together give the full listing;
+* a page costs one Supabase query when cold (plus the student id lookup,
+  once) and none when cached;
+* submitting, grading and adding an assignment show up on the next read.
+
+Exits non-zero on any failure. Run from the repository root:
+
+    python scripts/check_student_assignments.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.harness import Checks, standin_env
+
+
+def main():
+    check = Checks()
+
+    def round_trips():
+        stats = httpx.get(f"{standin_url}/_standin/stats").json()
+        return sum(n for key, n in stats.items() if ' /rest/v1/' in key)
+
+    with standin_env(latency_ms=0) as standin_url:
+        from app import create_app
+        from app.services import assignment_service
+        from app.services.jwt_service import create_access_token
+        from scripts.supabase_standin import TABLES
+        app = create_app()
+        client = app.test_client()
+        # Progress is kept by triggers on a migrated database; the stand-in
+        # has none, so leave it out of the round-trip counts.
+        assignment_service._progress_sql = True
+
+        per_course = {}
+        for assignment in TABLES['assignments']:
+            per_course.setdefault(assignment['course_id'], []).append(assignment)
+        enrollment = max(TABLES['enrollments'], key=lambda e: len(per_course.get(e['course_id'], [])))
+        course_id, student_pk = enrollment['course_id'], enrollment['student_id']
+        student = next(s for s in TABLES['students'] if s['id'] == student_pk)
+        headers = {'Authorization': f"Bearer {create_access_token({'user_id': student['user_id']})}"}
+        admin = {'Authorization': f"Bearer {create_access_token({'user_id': 'admin', 'isAdmin': True})}"}
+        url = f"/api/v1/student/assignments/{course_id}"
+
+        expected = {}
+        for submission in TABLES['assignment_submissions']:
+            if submission['student_id'] == student_pk:
+                expected.setdefault(submission['assignment_id'], []).append(submission)
+
+        httpx.delete(f"{standin_url}/_standin/stats")
+        resp = client.get(url, headers=headers)
+        listing = resp.get_json() or []
+        trips = round_trips()
+        total = int(resp.headers.get('X-Total-Count', -1))
+        check("listing with total", resp.status_code == 200 and total == len(per_course[course_id])
+              and len(listing) == total, f"{total} assignments")
+        check("cold read round trips", trips <= 2, f"{trips} round trip(s)")
+        check("soonest due first", [a['due_date'] for a in listing] == sorted(a['due_date'] for a in listing))
+        check("own submission status and best grade", all(
+            a['submission_status'] == ('not_submitted' if a['id'] not in expected else a['submission_status'])
+            and a['grade'] == max((s['grade'] for s in expected.get(a['id'], []) if s['grade'] is not None),
+                                  default=None)
+            for a in listing) and all('submissions' not in a for a in listing))
+        check("due states", all(a['due_state'] in ('no_due_date', 'upcoming', 'due_soon', 'past_due')
+                                and a['overdue'] == (a['due_state'] == 'past_due' and a['submission_id'] is None)
+                                for a in listing))
+
+        httpx.delete(f"{standin_url}/_standin/stats")
+        again = client.get(url, headers=headers).get_json()
+        check("cached read", again == listing and round_trips() == 0, f"{round_trips()} round trip(s)")
+
+        pages = []
+        for offset in range(0, total, 2):
+            pages += client.get(f"{url}?limit=2&offset={offset}", headers=headers).get_json()
+        check("pages add up to the listing", [a['id'] for a in pages] == [a['id'] for a in listing])
+        check("bad paging rejected", client.get(f"{url}?limit=0", headers=headers).status_code == 400)
+
+        target = next((a for a in listing if a['submission_status'] == 'not_submitted'), None)
+        if target:
+            resp = client.post('/api/v1/student/assignments/submit', headers=headers,
+                               json={'assignment_id': target['id'], 'submission_text': 'Done.'})
+            submission_id = (resp.get_json() or {}).get('id')
+            after = {a['id']: a for a in client.get(url, headers=headers).get_json()}
+            check("submission shows up", after[target['id']]['submission_id'] == submission_id
+                  and after[target['id']]['submission_status'] in ('submitted', 'late'))
+
+            client.post('/api/v1/admin/submissions/grades', headers=admin,
+                        json={'grades': [{'submission_id': submission_id, 'grade': 87}]})
+            after = {a['id']: a for a in client.get(url, headers=headers).get_json()}
+            check("grade shows up", after[target['id']]['grade'] == 87
+                  and after[target['id']]['submission_status'] == 'graded')
+
+        client.post(f"/api/v1/admin/courses/{course_id}/assignments", headers=admin,
+                    json={'title': 'Undated reading'})
+        resp = client.get(url, headers=headers)
+        latest = resp.get_json() or []
+        check("new assignment shows up, undated last", int(resp.headers['X-Total-Count']) == total + 1
+              and latest[-1]['title'] == 'Undated reading' and latest[-1]['due_state'] == 'no_due_date')
+    check.exit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Count Supabase round trips per admin operation.
+
+Runs the dashboard and each admin write service once against the local Supabase stand-in and
+reads the stand-in's request counters. Exits non-zero if an operation needs
+more round trips than its budget. Run from the repository root:
+
+    python scripts/count_admin_round_trips.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from scripts.loadgen import app_env, start_standin, stop_process
+
+
+def operations(tables):
+    from app.services.admin_service import (
+        get_dashboard_data_service, create_student_service, update_student_service, delete_student_service, delete_students_service
+    )
+    from app.services.courses_service import create_course_service, update_course_service, delete_course_service
+
+    course_id = tables['courses'][0]['id']
+    other_course_id = tables['courses'][1]['id']
+    instructor_id = tables['instructors'][0]['id']
+    student_id = tables['students'][0]['id']
+    student = {'name': 'Round Trip', 'phone': '+21600000000'}
+
+    # (label, budget, callable)
+    return [
+        ('dashboard', 4,
+         lambda: get_dashboard_data_service()),
+        ('create_student', 1,
+         lambda: create_student_service(dict(student, email='rt1@example.com'))),
+        ('create_student + course', 1,
+         lambda: create_student_service(dict(student, email='rt2@example.com', course_id=course_id))),
+        ('update_student', 1,
+         lambda: update_student_service(student_id, dict(student, email='rt3@example.com'))),
+        ('update_student + course', 1,
+         lambda: update_student_service(student_id, dict(student, email='rt3@example.com', course_id=other_course_id))),
+        ('create_course', 2,
+         lambda: create_course_service({'title': 'RT course', 'instructor_id': instructor_id, 'price': 0})),
+        ('update_course', 1,
+         lambda: update_course_service(course_id, {'title': 'RT course 2', 'instructor_id': instructor_id})),
+        ('delete_student', 1,
+         lambda: delete_student_service(student_id)),
+        ('delete_course', 1,
+         lambda: delete_course_service(other_course_id)),
+        ('bulk delete 300 students', 1,
+         lambda: delete_students_service([s['id'] for s in tables['students'][1:301]])),
+    ]
+
+
+def main():
+    standin, standin_url = start_standin(latency_ms=0)
+    failures = 0
+    try:
+        os.environ.update(app_env(standin_url))
+        from scripts.supabase_standin import TABLES
+        stats_url = f"{standin_url}/_standin/stats"
+
+        print(f"{'operation':<28}{'round trips':>12}{'budget':>8}")
+        for label, budget, op in operations(TABLES):
+            httpx.delete(stats_url)
+            op()
+            trips = sum(httpx.get(stats_url).json().values())
+            ok = trips <= budget
+            failures += not ok
+            print(f"{label:<28}{trips:>12}{budget:>8}  {'ok' if ok else 'OVER BUDGET'}")
+    finally:
+        stop_process(standin)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Helpers shared by the check scripts and the benchmarks that check results.
+
+``Checks`` prints one line per check and turns the failures into the exit
+status; ``standin_env`` runs the Supabase stand-in with the app's
+environment pointed at it.
+"""
+import os
+import sys
+from contextlib import contextmanager
+
+from scripts.loadgen import app_env, start_standin, stop_process
+
+
+class Checks:
+    """Call with ``(label, ok, detail='')`` for each check; ``exit()`` at the end."""
+
+    def __init__(self):
+        self.failures = 0
+
+    def __call__(self, label, ok, detail=''):
+        self.failures += not ok
+        print(f"{label:<52}{'ok' if ok else 'FAIL'}  {detail}")
+
+    def exit(self):
+        sys.exit(1 if self.failures else 0)
+
+
+@contextmanager
+def standin_env(env=None, **options):
+    """
+    Start the stand-in (``options`` as for ``start_standin``), point the app's
+    environment at it plus any extra ``env`` variables, and yield its base
+    URL. Import the app inside the block: it reads the environment then.
+    """
+    proc, url = start_standin(**options)
+    try:
+        os.environ.update(app_env(url), **(env or {}))
+        yield url
+    finally:
+        stop_process(proc)
@@ -0,0 +1,111 @@
+"""
+Helpers shared by the HTTP throughput benchmarks.
+
+Starts the Supabase stand-in and app servers as subprocesses and drives them
+with a closed-loop load generator built on ``httpx.AsyncClient``.
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STANDIN_PORT = 54321
+
+
+def start_process(args, env=None):
+    """Start ``args`` from the repository root with extra ``env`` variables."""
+    full_env = dict(os.environ, **(env or {}))
+    return subprocess.Popen(args, cwd=REPO_ROOT, env=full_env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_ready(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout}s")
+
+
+def stop_process(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def start_standin(latency_ms=40, rows=500, disabled_rpcs=(), courses=None):
+    """Start the Supabase stand-in and return ``(process, base_url)``."""
+    proc = start_process(
+        [sys.executable, '-m', 'uvicorn', 'scripts.supabase_standin:app',
+         '--port', str(STANDIN_PORT), '--log-level', 'warning'],
+        env={'STANDIN_LATENCY_MS': str(latency_ms), 'STANDIN_ROWS': str(rows),
+             'STANDIN_DISABLED_RPCS': ','.join(disabled_rpcs), 'STANDIN_COURSES': str(courses or 0)},
+    )
+    url = f"http://127.0.0.1:{STANDIN_PORT}"
+    wait_until_ready(url)
+    return proc, url
+
+
+def app_env(standin_url):
+    """Environment pointing the app at the stand-in."""
+    return {
+        'SUPABASE_URL': standin_url,
+        'SUPABASE_SERVICE_ROLE_KEY': os.getenv('SUPABASE_SERVICE_ROLE_KEY', 'standin-service-key'),
+        'SUPABASE_ANON_KEY': os.getenv('SUPABASE_ANON_KEY', 'standin-anon-key'),
+    }
+
+
+async def _run_load(url, concurrency, total, headers):
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async with httpx.AsyncClient(timeout=30.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    resp = await client.get(url, headers=headers)
+                    if resp.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': statistics.median(latencies) * 1e3 if latencies else 0.0,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1e3 if latencies else 0.0,
+    }
+
+
+def run_load(url, concurrency=32, total=1000, headers=None):
+    """Issue ``total`` GETs to ``url`` from ``concurrency`` clients; return stats."""
+    return asyncio.run(_run_load(url, concurrency, total, headers or {}))
+
+
+def format_row(label, stats):
+    return (f"{label:<42}{stats['rps']:>9.1f}{stats['p50_ms']:>10.1f}"
+            f"{stats['p95_ms']:>10.1f}{stats['errors']:>8}")
+
+
+HEADER = f"{'configuration':<42}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}"
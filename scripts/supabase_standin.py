@@ -0,0 +1,760 @@
+"""
+Local Supabase stand-in for benchmarks.
+
+A minimal PostgREST/Storage look-alike served over ASGI, with a configurable
+per-request latency to model the round trip to a hosted Supabase project. It
+understands just enough of the protocol for the app: ``eq.``, ``in.``,
+``ilike.`` and ``lt.``/``lte.``/``gt.``/``gte.`` filters, ``limit``/``offset``, ``order``, ``Prefer: count=exact``,
+single-object responses, inserts and ``on_conflict`` upserts, filtered
+updates and deletes on the in-memory tables, and Python emulations of some
+of the SQL functions shipped in ``supabase_migrations/`` (see ``RPCS``;
+``refresh_course_progress`` is left out so the app's Python fallback runs). Request counts per endpoint are
+exposed at ``/_standin/stats``. Auth sign-up and admin user deletion are
+emulated too, and ``POST /_standin/fail`` with ``{"request": "METHOD /path",
+"times": n}`` makes the next n such requests answer 503, to exercise retries.
+
+    STANDIN_LATENCY_MS=40 uvicorn scripts.supabase_standin:app --port 54321
+
+Point the app at it with ``SUPABASE_URL=http://127.0.0.1:54321``.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl
+
+LATENCY = float(os.getenv('STANDIN_LATENCY_MS', '40')) / 1000.0
+ROWS = int(os.getenv('STANDIN_ROWS', '500'))
+# Number of courses; defaults to a fifth of STANDIN_ROWS.
+COURSES = int(os.getenv('STANDIN_COURSES', '0')) or None
+# Comma-separated RPC names to answer as "not installed", to exercise fallbacks.
+DISABLED_RPCS = set(filter(None, os.getenv('STANDIN_DISABLED_RPCS', '').split(',')))
+
+
+def _ts(rng):
+    return (datetime(2025, 1, 1) + timedelta(seconds=rng.randint(0, 3 * 10 ** 7))).isoformat()
+
+
+COURSE_LEVELS = ['Introduction to', 'Foundations of', 'Advanced', 'Applied', 'Topics in',
+                 'Practical', 'History of', 'Workshop on']
+COURSE_SUBJECTS = ['Organic Chemistry', 'Linear Algebra', 'Machine Learning', 'French Literature',
+                   'Arabic Calligraphy', 'Microeconomics', 'Data Structures', 'Quantum Physics',
+                   'Molecular Biology', 'Public Speaking', 'Graphic Design', 'Web Development',
+                   'Statistics', 'Philosophy of Mind', 'Digital Marketing', 'Accounting',
+                   'Renewable Energy', 'Human Anatomy', 'Music Theory', 'Cybersecurity',
+                   'Project Management', 'Spanish Grammar', 'Constitutional Law', 'Astronomy',
+                   'Creative Writing', 'Cloud Computing', 'Sociology', 'Photography',
+                   'Database Systems', 'Mobile Development', 'Neuroscience', 'Entrepreneurship',
+                   'Geology', 'Robotics', 'Nutrition', 'Art History', 'Calculus',
+                   'Operating Systems', 'Climate Science', 'Supply Chain Management']
+
+
+def _course_text(i):
+    """A varied title and description for course ``i``, without the rng."""
+    subject = COURSE_SUBJECTS[i % len(COURSE_SUBJECTS)]
+    level = COURSE_LEVELS[(i // len(COURSE_SUBJECTS)) % len(COURSE_LEVELS)]
+    other = COURSE_SUBJECTS[(i * 7 + 3) % len(COURSE_SUBJECTS)]
+    return (f"{level} {subject} {i}",
+            f"Weekly lectures and exercises on {subject.lower()}, with examples from {other.lower()}.")
+
+
+def build_tables(rows=ROWS, seed=7, courses=COURSES):
+    """Generate related fixture tables."""
+    rng = random.Random(seed)
+    instructors = [{'id': str(uuid.UUID(int=rng.getrandbits(128))), 'name': f"Instructor {i}",
+                    'email': f"instructor{i}@example.com", 'phone': '', 'status': 'active',
+                    'created_at': _ts(rng)} for i in range(max(rows // 20, 1))]
+    courses = [{'id': str(uuid.UUID(int=rng.getrandbits(128))), 'title': _course_text(i)[0],
+                'description': _course_text(i)[1], 'price': 0,
+                'instructor_id': rng.choice(instructors)['id'], 'status': 'active',
+                'created_at': _ts(rng), 'updated_at': _ts(rng)} for i in range(courses or max(rows // 5, 1))]
+    students = [{'id': str(uuid.UUID(int=rng.getrandbits(128))), 'user_id': str(uuid.UUID(int=rng.getrandbits(128))),
+                 'name': f"Student {i}", 'email': f"student{i}@example.com", 'phone': '',
+                 'status': 'active', 'created_at': _ts(rng)} for i in range(rows)]
+    enrollments = []
+    for student in students:
+        for course in rng.sample(courses, k=min(3, len(courses))):
+            enrollments.append({'id': str(uuid.UUID(int=rng.getrandbits(128))), 'student_id': student['id'],
+                                'course_id': course['id'], 'status': 'active', 'created_at': _ts(rng),
+                                'enrolled_at': _ts(rng), 'course_title': course['title']})
+    assignments = [{'id': str(uuid.UUID(int=rng.getrandbits(128))), 'course_id': rng.choice(courses)['id'],
+                    'title': f"Assignment {i}", 'description': '', 'assignment_type': 'assignment',
+                    'due_date': _ts(rng), 'max_points': 100, 'created_at': _ts(rng)} for i in range(rows)]
+    # Past deadlines, as left by the deadline migration's backfill.
+    for assignment in assignments:
+        assignment['deadline_processed_at'] = assignment['due_date']
+    course_assignments = {}
+    for assignment in assignments:
+        course_assignments.setdefault(assignment['course_id'], []).append(assignment)
+    submissions = []
+    for enrollment in enrollments:
+        for assignment in course_assignments.get(enrollment['course_id'], []):
+            if rng.random() < 0.5:
+                graded = rng.random() < 0.5
+                submissions.append({'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                                    'assignment_id': assignment['id'], 'student_id': enrollment['student_id'],
+                                    'submission_text': '', 'submitted_at': _ts(rng),
+                                    'grade': rng.randint(40, 100) if graded else None, 'feedback': None,
+                                    'status': 'graded' if graded else 'submitted'})
+    return {'instructors': instructors, 'courses': courses, 'students': students,
+            'enrollments': enrollments, 'assignments': assignments,
+            'assignment_submissions': submissions, 'assignment_progress': [], 'course_progress': [],
+            'assignment_files': [], 'assignment_links': [], 'file_blobs': [], 'notifications': [],
+            'background_jobs': []}
+
+
+TABLES = build_tables()
+
+
+def _match(row, column, op_value):
+    op, _, value = op_value.partition('.')
+    field = row.get(column)
+    if op == 'eq':
+        return str(field) == value
+    if op == 'neq':
+        return str(field) != value
+    if op == 'in':
+        return str(field) in [v.strip('"') for v in value.strip('()').split(',')]
+    if op == 'ilike':
+        return value.replace('*', '').replace('%', '').lower() in str(field or '').lower()
+    if op == 'is':
+        return field is None if value == 'null' else str(field).lower() == value
+    if op in ('lt', 'lte', 'gt', 'gte'):
+        # ISO timestamps and same-width values compare as strings.
+        if field is None:
+            return False
+        return {'lt': str(field) < value, 'lte': str(field) <= value,
+                'gt': str(field) > value, 'gte': str(field) >= value}[op]
+    return True
+
+
+# Tables derived from the fixtures, standing in for trigger-maintained ones.
+DERIVED_TABLES = {
+    'dashboard_statistics': lambda: [{'key': name, 'value': len(TABLES[name])}
+                                     for name in ('students', 'courses', 'instructors')],
+}
+
+
+# Top-level embedded resources in a select, e.g. "student:students(name)".
+EMBED_RE = re.compile(r'(?:^|,)\s*(?:(\w+):)?(\w+)(?:!\w+)?\(')
+
+
+def _embed(rows, select, table=None, params=()):
+    """
+    Attach embeds: many-to-one when the row has ``<name minus trailing
+    s>_id``, otherwise one-to-many on ``<table minus trailing s>_id``.
+    Filters on ``alias.column`` apply to the embedded rows.
+    """
+    embeds = [(alias or name, name) for alias, name in EMBED_RE.findall(select or '')]
+    if not embeds:
+        return rows
+    embedded = []
+    for row in rows:
+        row = dict(row)
+        for alias, name in embeds:
+            fk_column = f"{name[:-1] if name.endswith('s') else name}_id"
+            if fk_column in row:
+                fk = row[fk_column]
+                row[alias] = next((r for r in TABLES.get(name, []) if r.get('id') == fk), None) \
+                    if fk is not None else None
+            elif table:
+                back_column = f"{table[:-1] if table.endswith('s') else table}_id"
+                children = [r for r in TABLES.get(name, []) if r.get(back_column) == row.get('id')]
+                for key, value in params:
+                    prefix, _, column = key.partition('.')
+                    if prefix == alias and column != 'order':
+                        children = [r for r in children if _match(r, column, value)]
+                row[alias] = children
+        embedded.append(row)
+    return embedded
+
+
+def query_table(table, params):
+    rows = DERIVED_TABLES[table]() if table in DERIVED_TABLES else TABLES.get(table, [])
+    limit = offset = None
+    order = None
+    select = None
+    for key, value in params:
+        if key == 'select':
+            select = value
+            continue
+        if key == 'limit':
+            limit = int(value)
+        elif key == 'offset':
+            offset = int(value)
+        elif key == 'order':
+            order = value
+        elif '.' not in key:
+            rows = [r for r in rows if _match(r, key, value)]
+    if order:
+        # "a.desc,b.asc.nullslast": stable sorts from the last key to the first.
+        for term in reversed(order.split(',')):
+            column, _, direction = term.partition('.')
+            descending = direction.startswith('desc')
+            nulls_last = direction.endswith('nullslast') if 'nulls' in direction else not descending
+            rows = sorted(rows, key=lambda r: str(r.get(column) or ''), reverse=descending)
+            rows = sorted(rows, key=lambda r: (r.get(column) is None) == nulls_last)
+    total = len(rows)
+    if offset:
+        rows = rows[offset:]
+    if limit is not None:
+        rows = rows[:limit]
+    return _embed(rows, select, table, params), total
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _now():
+    return datetime.utcnow().isoformat()
+
+
+# Column defaults applied to inserted rows, standing in for DEFAULT clauses.
+COLUMN_DEFAULTS = {
+    'file_blobs': lambda: {'ref_count': 0, 'orphaned_at': _now(), 'created_at': _now()},
+    'assignments': lambda: {'description': None, 'due_date': None, 'max_points': None,
+                            'deadline_processed_at': None, 'created_at': _now(), 'updated_at': _now()},
+    'notifications': lambda: {'payload': {}, 'created_at': _now(), 'sent_at': None},
+    'assignment_files': lambda: {'submission_id': None, 'created_at': _now()},
+    'assignment_links': lambda: {'title': None, 'created_at': _now(), 'updated_at': _now()},
+}
+
+
+def _set_defaults(table, row):
+    for column, value in COLUMN_DEFAULTS.get(table, dict)().items():
+        row.setdefault(column, value)
+
+
+def _active_course(student_id):
+    for enrollment in TABLES['enrollments']:
+        if enrollment['student_id'] == student_id and enrollment.get('status') == 'active':
+            course = next((c for c in TABLES['courses'] if c['id'] == enrollment['course_id']), None)
+            return {'id': course['id'], 'title': course['title']} if course else None
+    return None
+
+
+def rpc_admin_create_student(p_name, p_email, p_phone, p_course_id=None):
+    if any(s['email'] == p_email for s in TABLES['students']):
+        raise RpcError('23505', 'duplicate key value violates unique constraint "students_email_key"')
+    student = {'id': str(uuid.uuid4()), 'user_id': None, 'name': p_name, 'email': p_email, 'phone': p_phone,
+               'status': 'active', 'created_at': _now(), 'updated_at': _now()}
+    TABLES['students'].append(student)
+    course = next((c for c in TABLES['courses'] if c['id'] == p_course_id), None) if p_course_id else None
+    if course:
+        TABLES['enrollments'].append({'id': str(uuid.uuid4()), 'student_id': student['id'], 'course_id': course['id'],
+                                      'status': 'active', 'enrolled_at': _now(), 'created_at': _now(),
+                                      'course_title': course['title']})
+    return dict(student, course={'id': course['id'], 'title': course['title']} if course else None)
+
+
+def rpc_existing_student_emails(p_emails):
+    wanted = set(p_emails or ())
+    return sorted({s['email'].lower() for s in TABLES['students'] if (s.get('email') or '').lower() in wanted})
+
+
+def rpc_admin_update_student(p_student_id, p_name, p_email, p_phone, p_course_id=None):
+    course = None
+    if p_course_id:
+        course = next((c for c in TABLES['courses'] if c['id'] == p_course_id), None)
+        if course is None:
+            raise RpcError('P0002', 'Invalid course_id')
+    student = next((s for s in TABLES['students'] if s['id'] == p_student_id), None)
+    if student is None:
+        raise RpcError('P0002', 'Student not found')
+    student.update(name=p_name, email=p_email, phone=p_phone, updated_at=_now())
+    if course:
+        enrollment = next((e for e in TABLES['enrollments']
+                           if e['student_id'] == p_student_id and e.get('status') == 'active'), None)
+        if enrollment:
+            enrollment.update(course_id=course['id'], course_title=course['title'])
+        else:
+            TABLES['enrollments'].append({'id': str(uuid.uuid4()), 'student_id': p_student_id,
+                                          'course_id': course['id'], 'status': 'active', 'enrolled_at': _now(),
+                                          'created_at': _now(), 'course_title': course['title']})
+    return dict(student, course=_active_course(p_student_id))
+
+
+def _delete_where(table, predicate):
+    deleted = [row for row in TABLES[table] if predicate(row)]
+    TABLES[table] = [row for row in TABLES[table] if not predicate(row)]
+    return deleted
+
+
+def rpc_admin_delete_students(p_ids):
+    ids = set(p_ids)
+    _delete_where('enrollments', lambda e: e['student_id'] in ids)
+    return [row['id'] for row in _delete_where('students', lambda s: s['id'] in ids)]
+
+
+def rpc_admin_delete_courses(p_ids):
+    ids = set(p_ids)
+    _delete_where('enrollments', lambda e: e['course_id'] in ids)
+    _delete_where('assignments', lambda a: a['course_id'] in ids)
+    return [row['id'] for row in _delete_where('courses', lambda c: c['id'] in ids)]
+
+
+def rpc_admin_delete_instructors(p_ids=None, p_emails=None):
+    ids, emails = set(p_ids or []), set(p_emails or [])
+    targets = {i['id'] for i in TABLES['instructors'] if i['id'] in ids or i['email'] in emails}
+    blocked = {c['instructor_id'] for c in TABLES['courses'] if c['instructor_id'] in targets}
+    deleted = _delete_where('instructors', lambda i: i['id'] in targets and i['id'] not in blocked)
+    return {'deleted': [row['id'] for row in deleted], 'blocked': sorted(blocked)}
+
+
+def rpc_admin_grade_submissions(p_grades):
+    by_id = {row['id']: row for row in TABLES['assignment_submissions']}
+    graded = []
+    for entry in p_grades:
+        row = by_id.get(entry['submission_id'])
+        if row is not None:
+            row.update(grade=entry['grade'], feedback=entry['feedback'], status='graded')
+            graded.append(row)
+    return graded
+
+
+def rpc_claim_orphaned_file_blobs(p_grace_seconds, p_limit):
+    # Reference counts are derived from assignment_files instead of triggers.
+    referenced = {row.get('blob_sha256') for row in TABLES['assignment_files']}
+    cutoff = (datetime.utcnow() - timedelta(seconds=p_grace_seconds)).isoformat()
+    claimed = [blob for blob in TABLES['file_blobs']
+               if blob['sha256'] not in referenced and blob['orphaned_at'] <= cutoff][:p_limit]
+    shas = {blob['sha256'] for blob in claimed}
+    _delete_where('file_blobs', lambda row: row['sha256'] in shas)
+    return claimed
+
+
+def rpc_claim_file_blob(p_sha256):
+    # Without reference counts every claim restarts the grace period, which
+    # only matters to rpc_claim_orphaned_file_blobs for unreferenced blobs.
+    blob = next((b for b in TABLES['file_blobs'] if b['sha256'] == p_sha256), None)
+    if blob is None:
+        return []
+    blob['orphaned_at'] = _now()
+    return [blob]
+
+
+def _assignment_json(assignment_id):
+    return _embed([a for a in TABLES['assignments'] if a['id'] == assignment_id],
+                  'files:assignment_files(*),links:assignment_links(*)', 'assignments',
+                  [('files.submission_id', 'is.null')])[0]
+
+
+def _set_assignment_content(assignment_id, files, links):
+    if files is not None:
+        blobs = {blob['sha256']: blob for blob in TABLES['file_blobs']}
+        missing = next((f['sha256'] for f in files if f['sha256'] not in blobs), None)
+        if missing:
+            raise RpcError('22023', f"Unknown file content: {missing}")
+        wanted = {(f['sha256'], f['file_name']): f for f in files}
+        own = lambda row: row['assignment_id'] == assignment_id and row.get('submission_id') is None
+        _delete_where('assignment_files', lambda row: own(row)
+                      and (row.get('blob_sha256'), row['file_name']) not in wanted)
+        kept = {(row.get('blob_sha256'), row['file_name']) for row in TABLES['assignment_files'] if own(row)}
+        for (sha256, file_name), entry in wanted.items():
+            if (sha256, file_name) not in kept:
+                blob = blobs[sha256]
+                row = {'id': str(uuid.uuid4()), 'assignment_id': assignment_id, 'file_name': file_name,
+                       'file_path': blob['storage_path'], 'mime_type': entry.get('mime_type') or blob.get('mime_type'),
+                       'size': blob['size'], 'checksum_sha256': sha256, 'blob_sha256': sha256}
+                _set_defaults('assignment_files', row)
+                TABLES['assignment_files'].append(row)
+    if links is not None:
+        wanted = {(link['url'], link.get('title')) for link in links}
+        _delete_where('assignment_links', lambda row: row['assignment_id'] == assignment_id
+                      and (row['url'], row.get('title')) not in wanted)
+        kept = {(row['url'], row.get('title')) for row in TABLES['assignment_links']
+                if row['assignment_id'] == assignment_id}
+        for url, title in wanted - kept:
+            row = {'id': str(uuid.uuid4()), 'assignment_id': assignment_id, 'url': url, 'title': title}
+            _set_defaults('assignment_links', row)
+            TABLES['assignment_links'].append(row)
+
+
+def rpc_admin_create_assignment(p_assignment, p_files=(), p_links=()):
+    if not any(c['id'] == p_assignment.get('course_id') for c in TABLES['courses']):
+        raise RpcError('P0002', 'Course not found')
+    assignment = dict(p_assignment, id=str(uuid.uuid4()))
+    _set_defaults('assignments', assignment)
+    TABLES['assignments'].append(assignment)
+    try:
+        _set_assignment_content(assignment['id'], list(p_files or []), list(p_links or []))
+    except RpcError:
+        TABLES['assignments'].remove(assignment)
+        raise
+    return _assignment_json(assignment['id'])
+
+
+def rpc_admin_update_assignment(p_assignment_id, p_changes, p_files=None, p_links=None):
+    assignment = next((a for a in TABLES['assignments'] if a['id'] == p_assignment_id), None)
+    if assignment is None:
+        raise RpcError('P0002', 'Assignment not found')
+    _set_assignment_content(p_assignment_id, p_files, p_links)
+    _reset_deadline(assignment, p_changes)
+    assignment.update(p_changes, updated_at=_now())
+    return _assignment_json(p_assignment_id)
+
+
+def _reset_deadline(assignment, changes):
+    # The assignments_reset_deadline trigger.
+    if 'due_date' in changes and changes['due_date'] != assignment.get('due_date'):
+        assignment['deadline_processed_at'] = None
+
+
+def _utc(timestamp):
+    value = datetime.fromisoformat(timestamp)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def rpc_process_assignment_deadlines(p_assignment_ids):
+    now = datetime.now(timezone.utc)
+    wanted = set(p_assignment_ids)
+    due = [a for a in TABLES['assignments'] if a['id'] in wanted and a.get('deadline_processed_at') is None
+           and a.get('due_date') and _utc(a['due_date']) <= now]
+    results = []
+    for assignment in due:
+        assignment['deadline_processed_at'] = now.isoformat()
+        submissions = [s for s in TABLES['assignment_submissions'] if s['assignment_id'] == assignment['id']]
+        late = [s for s in submissions if s['status'] == 'submitted' and s.get('submitted_at')
+                and _utc(s['submitted_at']) > _utc(assignment['due_date'])]
+        for submission in late:
+            submission['status'] = 'late'
+        submitted = {s['student_id'] for s in submissions}
+        missing = [e['student_id'] for e in TABLES['enrollments'] if e['course_id'] == assignment['course_id']
+                   and e.get('status') == 'active' and e['student_id'] not in submitted]
+        queued = {(n['student_id'], n['assignment_id'], n['kind']) for n in TABLES['notifications']}
+        payload = {'title': assignment['title'], 'due_date': assignment['due_date']}
+        for student_id, kind in [(m, 'assignment_missing') for m in missing] \
+                + [(s['student_id'], 'submission_late') for s in late]:
+            if (student_id, assignment['id'], kind) not in queued:
+                row = {'id': str(uuid.uuid4()), 'student_id': student_id, 'assignment_id': assignment['id'],
+                       'kind': kind, 'payload': payload}
+                _set_defaults('notifications', row)
+                TABLES['notifications'].append(row)
+        results.append({'assignment_id': assignment['id'], 'course_id': assignment['course_id'],
+                        'late_marked': len(late), 'missing': len(missing)})
+    return results
+
+
+def rpc_reconcile_dashboard_statistics():
+    # Derived counters cannot drift.
+    return {}
+
+
+def _utc_now():
+    return datetime.now(timezone.utc)
+
+
+def rpc_enqueue_background_job(p_job, p_args, p_idempotency_key, p_ttl):
+    jobs = TABLES['background_jobs']
+    existing = next((row for row in jobs if p_idempotency_key and row['idempotency_key'] == p_idempotency_key), None)
+    if existing:
+        return {'job': existing['job'], 'created': False}
+    jobs.append({'id': p_job['id'], 'job': p_job, 'args': p_args, 'idempotency_key': p_idempotency_key,
+                 'run_at': _utc_now().isoformat(),
+                 'expires_at': (_utc_now() + timedelta(seconds=p_ttl)).isoformat()})
+    return {'job': p_job, 'created': True}
+
+
+def rpc_claim_background_job(p_lease):
+    now = _utc_now()
+    jobs = TABLES['background_jobs'] = [row for row in TABLES['background_jobs']
+                                        if datetime.fromisoformat(row['expires_at']) >= now]
+    due = [row for row in jobs if row['run_at'] and datetime.fromisoformat(row['run_at']) <= now]
+    if not due:
+        return None
+    row = min(due, key=lambda r: datetime.fromisoformat(r['run_at']))
+    row['run_at'] = (now + timedelta(seconds=p_lease)).isoformat()
+    return {'job': row['job'], 'args': row['args']}
+
+
+RPCS = {
+    'enqueue_background_job': rpc_enqueue_background_job,
+    'claim_background_job': rpc_claim_background_job,
+    'admin_create_student': rpc_admin_create_student,
+    'admin_update_student': rpc_admin_update_student,
+    'existing_student_emails': rpc_existing_student_emails,
+    'admin_delete_students': rpc_admin_delete_students,
+    'admin_delete_courses': rpc_admin_delete_courses,
+    'admin_delete_instructors': rpc_admin_delete_instructors,
+    'reconcile_dashboard_statistics': rpc_reconcile_dashboard_statistics,
+    'admin_grade_submissions': rpc_admin_grade_submissions,
+    'claim_orphaned_file_blobs': rpc_claim_orphaned_file_blobs,
+    'claim_file_blob': rpc_claim_file_blob,
+    'admin_create_assignment': rpc_admin_create_assignment,
+    'admin_update_assignment': rpc_admin_update_assignment,
+    'process_assignment_deadlines': rpc_process_assignment_deadlines,
+}
+
+# Requests served, per "METHOD /path"; read with GET /_standin/stats and
+# cleared with DELETE /_standin/stats.
+STATS = {}
+
+
+def _filters(params):
+    return [(k, v) for k, v in params if k not in ('select', 'limit', 'offset', 'order') and '.' not in k]
+
+
+async def handle_rest(scope, receive, headers, params):
+    """Return ``(status, payload, extra_headers)`` for a /rest/v1 request."""
+    path = scope['path']
+    method = scope['method']
+    extra = []
+
+    if path.startswith('/rest/v1/rpc/'):
+        name = path[len('/rest/v1/rpc/'):]
+        args = json.loads(await _read_body(receive) or b'{}')
+        if name not in RPCS or name in DISABLED_RPCS:
+            return 404, {'code': 'PGRST202', 'message': f"Could not find the function public.{name}",
+                         'details': None, 'hint': None}, extra
+        try:
+            return 200, RPCS[name](**args), extra
+        except RpcError as e:
+            return 400, {'code': e.code, 'message': e.message, 'details': None, 'hint': None}, extra
+
+    table = path[len('/rest/v1/'):]
+    if method in ('GET', 'HEAD'):
+        payload, total = query_table(table, params)
+        if 'count=exact' in headers.get('prefer', ''):
+            extra.append((b'content-range', f"0-{max(len(payload) - 1, 0)}/{total}".encode()))
+        if headers.get('accept', '').startswith('application/vnd.pgrst.object'):
+            if not payload:
+                return 406, {'message': 'JSON object requested, multiple (or no) rows returned',
+                             'code': 'PGRST116', 'details': 'The result contains 0 rows', 'hint': None}, extra
+            payload = payload[0]
+        return 200, payload, extra
+
+    body = json.loads(await _read_body(receive) or b'null')
+    rows = TABLES.setdefault(table, [])
+    if method == 'POST':
+        new_rows = body if isinstance(body, list) else [body]
+        on_conflict = dict(params).get('on_conflict')
+        if on_conflict and 'resolution=ignore-duplicates' in headers.get('prefer', ''):
+            columns = on_conflict.split(',')
+            existing = {tuple(str(row.get(c)) for c in columns) for row in rows}
+            written = []
+            for row in new_rows:
+                key = tuple(str(row.get(c)) for c in columns)
+                if key not in existing:
+                    existing.add(key)
+                    row.setdefault('id', str(uuid.uuid4()))
+                    _set_defaults(table, row)
+                    rows.append(row)
+                    written.append(row)
+            return 201, written, extra
+        if on_conflict and 'resolution=merge-duplicates' in headers.get('prefer', ''):
+            # Upsert: merge into rows matching on the conflict columns.
+            columns = on_conflict.split(',')
+            existing = {tuple(str(row.get(c)) for c in columns): row for row in rows}
+            written = []
+            for row in new_rows:
+                current = existing.get(tuple(str(row.get(c)) for c in columns))
+                if current is None:
+                    row.setdefault('id', str(uuid.uuid4()))
+                    _set_defaults(table, row)
+                    rows.append(row)
+                    current = existing[tuple(str(row.get(c)) for c in columns)] = row
+                else:
+                    current.update(row)
+                written.append(current)
+            return 201, written, extra
+        for row in new_rows:
+            row.setdefault('id', str(uuid.uuid4()))
+            _set_defaults(table, row)
+        rows.extend(new_rows)
+        return 201, new_rows, extra
+
+    matched, _ = query_table(table, _filters(params))
+    if method == 'PATCH':
+        for row in matched:
+            if table == 'assignments':
+                _reset_deadline(row, body or {})
+            row.update(body or {})
+        return 200, matched, extra
+    if method == 'DELETE':
+        ids = {id(row) for row in matched}
+        TABLES[table] = [row for row in rows if id(row) not in ids]
+        return 200, matched, extra
+    return 405, {'message': f"Unsupported method {method}"}, extra
+
+
+# Stored objects, per "bucket/path": only sizes are kept for API uploads
+# outside staging/; staged bodies and bodies PUT to signed upload URLs are
+# kept in CONTENTS so they can be downloaded again through signed URLs.
+STORAGE = {}
+CONTENTS = {}
+
+
+async def _read_all(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def _multipart_file(body, content_type):
+    """The ``file`` part of a multipart/form-data body, as storage3 uploads it."""
+    boundary = content_type.partition('boundary=')[2].strip('"').encode()
+    for part in body.split(b'--' + boundary):
+        head, _, content = part.partition(b'\r\n\r\n')
+        if b'name="file"' in head:
+            return content[:-2] if content.endswith(b'\r\n') else content
+    return body
+
+
+def _sign(key, kind):
+    return f"/object/{kind}/{key}?token={uuid.uuid4().hex}"
+
+
+async def handle_storage(scope, receive, headers):
+    """Return ``(status, payload)`` for a /storage/v1 request; bytes are sent raw."""
+    path = scope['path'][len('/storage/v1/'):]
+    method = scope['method']
+    if path.startswith('object/list/'):
+        return 200, []
+    if path.startswith('object/info/') and method == 'GET':
+        key = path[len('object/info/'):]
+        if key not in STORAGE:
+            return 400, {'statusCode': '404', 'error': 'not_found', 'message': 'Object not found'}
+        return 200, {'name': key.split('/', 1)[-1], 'size': STORAGE[key], 'metadata': {'size': STORAGE[key]}}
+    if path == 'object/move' and method == 'POST':
+        body = json.loads(await _read_body(receive) or b'{}')
+        source = f"{body['bucketId']}/{body['sourceKey']}"
+        destination = f"{body['bucketId']}/{body['destinationKey']}"
+        if source not in STORAGE:
+            return 400, {'statusCode': '404', 'error': 'not_found', 'message': 'Object not found'}
+        if destination in STORAGE:
+            return 400, {'statusCode': '409', 'error': 'Duplicate', 'message': 'The resource already exists'}
+        STORAGE[destination] = STORAGE.pop(source)
+        if source in CONTENTS:
+            CONTENTS[destination] = CONTENTS.pop(source)
+        return 200, {'message': 'Successfully moved'}
+    if path.startswith('object/upload/sign/'):
+        key = path[len('object/upload/sign/'):]
+        if method == 'POST':
+            return 200, {'url': _sign(key, 'upload/sign')}
+        if method == 'PUT':
+            CONTENTS[key] = await _read_all(receive)
+            STORAGE[key] = len(CONTENTS[key])
+            return 200, {'Key': key}
+    if path.startswith('object/sign/'):
+        key = path[len('object/sign/'):]
+        if method == 'POST':
+            body = json.loads(await _read_body(receive) or b'{}')
+            if 'paths' in body:
+                return 200, [{'path': p, 'signedURL': _sign(f"{key}/{p}", 'sign'), 'error': None}
+                             for p in body['paths']]
+            return 200, {'signedURL': _sign(key, 'sign')}
+        if method == 'GET':
+            if key not in STORAGE:
+                return 400, {'statusCode': '404', 'error': 'not_found', 'message': 'Object not found'}
+            return 200, CONTENTS.get(key, b'\0' * STORAGE[key])
+    if path.startswith('object/') and method in ('POST', 'PUT'):
+        key = path[len('object/'):]
+        if '/staging/' in key:
+            # Staged bodies (e.g. student imports) are read back by jobs.
+            content = _multipart_file(await _read_all(receive), headers.get('content-type', ''))
+            size = len(content)
+        else:
+            content = None
+            size = 0
+            while True:
+                message = await receive()
+                size += len(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+        if method == 'POST' and key in STORAGE and headers.get('x-upsert') != 'true':
+            return 400, {'statusCode': '409', 'error': 'Duplicate', 'message': 'The resource already exists'}
+        STORAGE[key] = size
+        if content is not None:
+            CONTENTS[key] = content
+        return 200, {'Key': key}
+    if path.startswith('object/') and method == 'DELETE':
+        bucket = path[len('object/'):].strip('/')
+        prefixes = json.loads(await _read_body(receive) or b'{}').get('prefixes', [])
+        removed = [p for p in prefixes if STORAGE.pop(f"{bucket}/{p}", None) is not None]
+        for p in removed:
+            CONTENTS.pop(f"{bucket}/{p}", None)
+        return 200, [{'name': p} for p in removed]
+    return 200, []
+
+
+# Auth users by id, created through /auth/v1/signup.
+AUTH_USERS = {}
+
+
+async def handle_auth(scope, receive):
+    path = scope['path']
+    if scope['method'] == 'POST' and path == '/auth/v1/signup':
+        body = json.loads(await _read_body(receive) or b'{}')
+        if any(user['email'] == body.get('email') for user in AUTH_USERS.values()):
+            return 422, {'code': 422, 'error_code': 'user_already_exists', 'msg': 'User already registered'}
+        user = {'id': str(uuid.uuid4()), 'aud': 'authenticated', 'role': 'authenticated',
+                'email': body.get('email'), 'app_metadata': {'provider': 'email'},
+                'user_metadata': body.get('data') or {}, 'created_at': _now()}
+        AUTH_USERS[user['id']] = user
+        return 200, user
+    if scope['method'] == 'DELETE' and path.startswith('/auth/v1/admin/users/'):
+        user = AUTH_USERS.pop(path.rsplit('/', 1)[-1], None)
+        return (200, user) if user else (404, {'code': 404, 'error_code': 'user_not_found', 'msg': 'User not found'})
+    return 404, {'code': 404, 'msg': f"Unsupported auth endpoint {path}"}
+
+
+# Remaining injected failures per "METHOD /path" (POST /_standin/fail).
+FAILURES = {}
+
+
+async def app(scope, receive, send):
+    if scope['type'] != 'http':
+        return
+
+    headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+    params = parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+    path = scope['path']
+
+    if path == '/_standin/stats':
+        if scope['method'] == 'DELETE':
+            STATS.clear()
+        status, payload, extra = 200, dict(STATS), []
+    elif path == '/_standin/fail':
+        body = json.loads(await _read_body(receive) or b'{}')
+        FAILURES[body['request']] = int(body.get('times', 1))
+        status, payload, extra = 200, FAILURES, []
+    else:
+        await asyncio.sleep(LATENCY)
+        key = f"{scope['method']} {path}"
+        STATS[key] = STATS.get(key, 0) + 1
+        status, payload, extra = 200, [], []
+        if FAILURES.get(key):
+            FAILURES[key] -= 1
+            status, payload = 503, {'message': 'Injected failure', 'code': '503', 'details': None, 'hint': None}
+        elif path.startswith('/auth/v1/'):
+            status, payload = await handle_auth(scope, receive)
+        elif path.startswith('/rest/v1/'):
+            status, payload, extra = await handle_rest(scope, receive, headers, params)
+        elif path.startswith('/storage/v1/'):
+            status, payload = await handle_storage(scope, receive, headers)
+
+    raw = isinstance(payload, bytes)
+    body = payload if raw else json.dumps(payload).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/octet-stream' if raw else b'application/json'),
+                            (b'content-length', str(len(body)).encode())] + extra})
+    await send({'type': 'http.response.body', 'body': body})
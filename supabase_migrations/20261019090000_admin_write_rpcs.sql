@@ -0,0 +1,106 @@
+-- Single round-trip admin write paths for students.
+-- Each function runs in one transaction and returns the written student
+-- together with its active course, so the API does not need to re-select.
+
+CREATE OR REPLACE FUNCTION public.admin_create_student(
+    p_name TEXT,
+    p_email TEXT,
+    p_phone TEXT,
+    p_course_id UUID DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_student students%ROWTYPE;
+    v_course_title TEXT;
+    v_course JSONB := NULL;
+BEGIN
+    INSERT INTO students (name, email, phone, status, created_at, updated_at)
+    VALUES (p_name, p_email, p_phone, 'active', NOW(), NOW())
+    RETURNING * INTO v_student;
+
+    -- An unknown course leaves the student created without an enrollment,
+    -- matching the previous behaviour of create_student_service.
+    IF p_course_id IS NOT NULL THEN
+        SELECT title INTO v_course_title FROM courses WHERE id = p_course_id;
+        IF FOUND THEN
+            INSERT INTO enrollments (student_id, course_id, enrolled_at, status, course_title)
+            VALUES (v_student.id, p_course_id, NOW(), 'active', COALESCE(v_course_title, 'Unknown Course'));
+            v_course := jsonb_build_object('id', p_course_id, 'title', COALESCE(v_course_title, 'Unknown Course'));
+        END IF;
+    END IF;
+
+    RETURN to_jsonb(v_student) || jsonb_build_object('course', v_course);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.admin_update_student(
+    p_student_id UUID,
+    p_name TEXT,
+    p_email TEXT,
+    p_phone TEXT,
+    p_course_id UUID DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_student students%ROWTYPE;
+    v_course_title TEXT;
+    v_enrollment_id UUID;
+    v_course JSONB := NULL;
+BEGIN
+    IF p_course_id IS NOT NULL THEN
+        SELECT title INTO v_course_title FROM courses WHERE id = p_course_id;
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'Invalid course_id' USING ERRCODE = 'P0002';
+        END IF;
+    END IF;
+
+    UPDATE students
+    SET name = p_name, email = p_email, phone = p_phone, updated_at = NOW()
+    WHERE id = p_student_id
+    RETURNING * INTO v_student;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Student not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    IF p_course_id IS NOT NULL THEN
+        SELECT id INTO v_enrollment_id
+        FROM enrollments
+        WHERE student_id = p_student_id AND status = 'active'
+        ORDER BY enrolled_at
+        LIMIT 1;
+
+        IF v_enrollment_id IS NOT NULL THEN
+            UPDATE enrollments
+            SET course_id = p_course_id, course_title = COALESCE(v_course_title, course_title)
+            WHERE id = v_enrollment_id;
+        ELSE
+            INSERT INTO enrollments (student_id, course_id, enrolled_at, status, course_title)
+            VALUES (p_student_id, p_course_id, NOW(), 'active', COALESCE(v_course_title, 'Unknown Course'));
+        END IF;
+        v_course := jsonb_build_object('id', p_course_id, 'title', v_course_title);
+    ELSE
+        SELECT jsonb_build_object('id', c.id, 'title', c.title) INTO v_course
+        FROM enrollments e
+        JOIN courses c ON c.id = e.course_id
+        WHERE e.student_id = p_student_id AND e.status = 'active'
+        ORDER BY e.enrolled_at
+        LIMIT 1;
+    END IF;
+
+    RETURN to_jsonb(v_student) || jsonb_build_object('course', v_course);
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.admin_create_student(TEXT, TEXT, TEXT, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.admin_update_student(UUID, TEXT, TEXT, TEXT, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.admin_create_student(TEXT, TEXT, TEXT, UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.admin_update_student(UUID, TEXT, TEXT, TEXT, UUID) TO service_role;
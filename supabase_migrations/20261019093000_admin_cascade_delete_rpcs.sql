@@ -0,0 +1,96 @@
+-- Transactional cascade deletes for the admin API.
+-- Each function takes a list so single and bulk deletes share one code path,
+-- runs in one transaction, and returns the ids that were actually deleted
+-- (and, for instructors, the ones that were not).
+
+CREATE OR REPLACE FUNCTION public.admin_delete_students(p_ids UUID[])
+RETURNS UUID[]
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_deleted UUID[];
+BEGIN
+    -- enrollments has no ON DELETE CASCADE; submissions and progress do.
+    DELETE FROM enrollments WHERE student_id = ANY(p_ids);
+
+    WITH deleted AS (
+        DELETE FROM students WHERE id = ANY(p_ids) RETURNING id
+    )
+    SELECT COALESCE(array_agg(id), '{}') INTO v_deleted FROM deleted;
+
+    RETURN v_deleted;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.admin_delete_courses(p_ids UUID[])
+RETURNS UUID[]
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_deleted UUID[];
+BEGIN
+    -- Assignments, submissions and course_progress cascade from courses.
+    DELETE FROM enrollments WHERE course_id = ANY(p_ids);
+
+    WITH deleted AS (
+        DELETE FROM courses WHERE id = ANY(p_ids) RETURNING id
+    )
+    SELECT COALESCE(array_agg(id), '{}') INTO v_deleted FROM deleted;
+
+    RETURN v_deleted;
+END;
+$$;
+
+-- Instructors are keyed by their auth user id (see create_instructor_service),
+-- so the auth users are removed in the same transaction. Instructors that
+-- still own courses are skipped rather than silently deleting the courses:
+-- returns {"deleted": [...], "blocked": [...]}. The target rows are locked
+-- first, so a course cannot be given to one of them between the check and
+-- the delete.
+CREATE OR REPLACE FUNCTION public.admin_delete_instructors(
+    p_ids UUID[] DEFAULT NULL,
+    p_emails TEXT[] DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, auth
+AS $$
+DECLARE
+    v_targets UUID[];
+    v_blocked UUID[];
+    v_deleted UUID[];
+BEGIN
+    WITH locked AS (
+        SELECT id FROM instructors
+        WHERE id = ANY(COALESCE(p_ids, '{}')) OR email = ANY(COALESCE(p_emails, '{}'))
+        FOR UPDATE
+    )
+    SELECT COALESCE(array_agg(id), '{}') INTO v_targets FROM locked;
+
+    SELECT COALESCE(array_agg(DISTINCT instructor_id), '{}') INTO v_blocked
+    FROM courses WHERE instructor_id = ANY(v_targets);
+
+    WITH deleted AS (
+        DELETE FROM instructors
+        WHERE id = ANY(v_targets) AND NOT id = ANY(v_blocked)
+        RETURNING id
+    )
+    SELECT COALESCE(array_agg(id), '{}') INTO v_deleted FROM deleted;
+
+    DELETE FROM auth.users WHERE id = ANY(v_deleted);
+
+    RETURN jsonb_build_object('deleted', to_jsonb(v_deleted), 'blocked', to_jsonb(v_blocked));
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.admin_delete_students(UUID[]) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.admin_delete_courses(UUID[]) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.admin_delete_instructors(UUID[], TEXT[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.admin_delete_students(UUID[]) TO service_role;
+GRANT EXECUTE ON FUNCTION public.admin_delete_courses(UUID[]) TO service_role;
+GRANT EXECUTE ON FUNCTION public.admin_delete_instructors(UUID[], TEXT[]) TO service_role;
@@ -0,0 +1,209 @@
+-- Denormalized counters for the admin dashboard.
+-- dashboard_statistics holds one row per counted table and
+-- course_enrollment_counts one row per course; both are maintained by
+-- statement-level triggers so bulk writes update each counter once.
+
+CREATE TABLE IF NOT EXISTS public.dashboard_statistics (
+    key TEXT PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS public.course_enrollment_counts (
+    course_id UUID PRIMARY KEY REFERENCES courses(id) ON DELETE CASCADE,
+    enrollment_count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE public.dashboard_statistics ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.course_enrollment_counts ENABLE ROW LEVEL SECURITY;
+
+-- A Supabase token's role is 'authenticated' or 'service_role', never
+-- 'admin': admins are the auth users listed in admins.
+CREATE POLICY "Admin read access to dashboard_statistics"
+ON public.dashboard_statistics
+FOR SELECT
+USING (
+  EXISTS (
+    SELECT 1 FROM admins WHERE user_id = auth.uid()
+  )
+);
+
+CREATE POLICY "Authenticated read access to course_enrollment_counts"
+ON public.course_enrollment_counts
+FOR SELECT
+USING (auth.role() = 'authenticated');
+
+-- --- Table row counters ---------------------------------------------------
+
+CREATE OR REPLACE FUNCTION public.bump_dashboard_statistic()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_delta BIGINT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT count(*) INTO v_delta FROM new_rows;
+    ELSE
+        SELECT -count(*) INTO v_delta FROM old_rows;
+    END IF;
+
+    IF v_delta <> 0 THEN
+        INSERT INTO dashboard_statistics (key, value, updated_at)
+        VALUES (TG_TABLE_NAME, v_delta, NOW())
+        ON CONFLICT (key) DO UPDATE
+        SET value = dashboard_statistics.value + EXCLUDED.value, updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['students', 'courses', 'instructors'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON public.%I', t || '_count_insert', t);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON public.%I', t || '_count_delete', t);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON public.%I REFERENCING NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION public.bump_dashboard_statistic()',
+            t || '_count_insert', t);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON public.%I REFERENCING OLD TABLE AS old_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION public.bump_dashboard_statistic()',
+            t || '_count_delete', t);
+    END LOOP;
+END;
+$$;
+
+-- --- Per-course enrollment counters -----------------------------------------
+
+CREATE OR REPLACE FUNCTION public.bump_course_enrollment_counts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE course_enrollment_counts c
+        SET enrollment_count = c.enrollment_count - d.n, updated_at = NOW()
+        FROM (SELECT course_id, count(*) AS n FROM old_rows GROUP BY course_id) d
+        WHERE c.course_id = d.course_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        -- Skip courses deleted in the same statement (cascade ordering).
+        INSERT INTO course_enrollment_counts (course_id, enrollment_count, updated_at)
+        SELECT n.course_id, count(*), NOW()
+        FROM new_rows n
+        JOIN courses ON courses.id = n.course_id
+        GROUP BY n.course_id
+        ON CONFLICT (course_id) DO UPDATE
+        SET enrollment_count = course_enrollment_counts.enrollment_count + EXCLUDED.enrollment_count,
+            updated_at = NOW();
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS enrollments_count_insert ON public.enrollments;
+DROP TRIGGER IF EXISTS enrollments_count_delete ON public.enrollments;
+DROP TRIGGER IF EXISTS enrollments_count_update ON public.enrollments;
+
+CREATE TRIGGER enrollments_count_insert
+AFTER INSERT ON public.enrollments
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.bump_course_enrollment_counts();
+
+CREATE TRIGGER enrollments_count_delete
+AFTER DELETE ON public.enrollments
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.bump_course_enrollment_counts();
+
+-- Moving a student to another course (admin_update_student) updates course_id.
+CREATE TRIGGER enrollments_count_update
+AFTER UPDATE ON public.enrollments
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.bump_course_enrollment_counts();
+
+-- --- Reconciliation -------------------------------------------------------
+
+-- Recompute every counter from the real tables, fix any drift, and return
+-- the counters that were wrong as {"key": {"stored": n, "actual": m}}.
+-- Each count and its stored counter are read in one statement, so from the
+-- same snapshot, and the difference is added as a delta: a trigger that
+-- bumps a counter concurrently (its rows are not in the snapshot) keeps
+-- its increment instead of being overwritten.
+CREATE OR REPLACE FUNCTION public.reconcile_dashboard_statistics()
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_drift JSONB := '{}'::JSONB;
+    v_row RECORD;
+BEGIN
+    FOR v_row IN
+        SELECT a.key, a.actual, s.value AS stored
+        FROM (
+            SELECT 'students' AS key, (SELECT count(*) FROM students) AS actual
+            UNION ALL SELECT 'courses', (SELECT count(*) FROM courses)
+            UNION ALL SELECT 'instructors', (SELECT count(*) FROM instructors)
+        ) a
+        LEFT JOIN dashboard_statistics s ON s.key = a.key
+        WHERE s.value IS DISTINCT FROM a.actual
+    LOOP
+        v_drift := v_drift || jsonb_build_object(
+            v_row.key, jsonb_build_object('stored', v_row.stored, 'actual', v_row.actual));
+        INSERT INTO dashboard_statistics (key, value, updated_at)
+        VALUES (v_row.key, v_row.actual - COALESCE(v_row.stored, 0), NOW())
+        ON CONFLICT (key) DO UPDATE
+        SET value = dashboard_statistics.value + EXCLUDED.value, updated_at = NOW();
+    END LOOP;
+
+    FOR v_row IN
+        SELECT c.id AS course_id, count(e.id) AS actual, cec.enrollment_count AS stored
+        FROM courses c
+        LEFT JOIN enrollments e ON e.course_id = c.id
+        LEFT JOIN course_enrollment_counts cec ON cec.course_id = c.id
+        GROUP BY c.id, cec.enrollment_count
+        HAVING cec.enrollment_count IS DISTINCT FROM count(e.id)
+    LOOP
+        v_drift := v_drift || jsonb_build_object(
+            'course:' || v_row.course_id, jsonb_build_object('stored', v_row.stored, 'actual', v_row.actual));
+        INSERT INTO course_enrollment_counts (course_id, enrollment_count, updated_at)
+        VALUES (v_row.course_id, v_row.actual - COALESCE(v_row.stored, 0), NOW())
+        ON CONFLICT (course_id) DO UPDATE
+        SET enrollment_count = course_enrollment_counts.enrollment_count + EXCLUDED.enrollment_count,
+            updated_at = NOW();
+    END LOOP;
+
+    RETURN v_drift;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.reconcile_dashboard_statistics() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.reconcile_dashboard_statistics() TO service_role;
+
+-- Backfill the counters.
+SELECT public.reconcile_dashboard_statistics();
+
+-- Re-verify every 15 minutes when pg_cron is available; otherwise the app's
+-- elected scheduler does (DASHBOARD_RECONCILE_INTERVAL).
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'reconcile-dashboard-statistics',
+            '*/15 * * * *',
+            'SELECT public.reconcile_dashboard_statistics()'
+        );
+    END IF;
+END;
+$$;
@@ -0,0 +1,209 @@
+-- Real course progress, materialized into course_progress.
+-- refresh_course_progress() aggregates assignments, assignment_submissions and
+-- assignment_progress for a set of (student, course) pairs and upserts the
+-- result; statement-level triggers call it for the pairs touched by each
+-- submission, grade, completion or assignment change, so reading progress
+-- is a single lookup on the (course_id, student_id) unique index.
+
+ALTER TABLE public.course_progress
+    ADD COLUMN IF NOT EXISTS completed_assignments INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS graded_assignments INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_assignments INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS average_grade NUMERIC(5, 2),
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+-- The trigger lookups go by student first.
+CREATE INDEX IF NOT EXISTS idx_submissions_student_assignment
+    ON public.assignment_submissions(student_id, assignment_id);
+CREATE INDEX IF NOT EXISTS idx_assignment_progress_student
+    ON public.assignment_progress(student_id, assignment_id);
+
+-- An assignment counts as completed once the student has submitted it or it
+-- is marked completed in assignment_progress. The grade of an assignment is
+-- the best grade among its submissions, as a percentage of max_points.
+CREATE OR REPLACE FUNCTION public.refresh_course_progress(p_student_ids UUID[], p_course_ids UUID[])
+RETURNS SETOF public.course_progress
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    RETURN QUERY
+    INSERT INTO course_progress AS cp (
+        course_id, student_id, progress_percentage, completed,
+        completed_assignments, graded_assignments, total_assignments,
+        average_grade, last_accessed, updated_at
+    )
+    SELECT
+        p.course_id,
+        p.student_id,
+        CASE WHEN agg.total = 0 THEN 0 ELSE round(100.0 * agg.done / agg.total)::INTEGER END,
+        agg.total > 0 AND agg.done >= agg.total,
+        agg.done,
+        agg.graded,
+        agg.total,
+        agg.average_grade,
+        NOW(),
+        NOW()
+    FROM (SELECT DISTINCT * FROM unnest(p_student_ids, p_course_ids) AS u(student_id, course_id)) p
+    -- Pairs whose student or course is being deleted are skipped (cascades).
+    JOIN students st ON st.id = p.student_id
+    JOIN courses c ON c.id = p.course_id
+    CROSS JOIN LATERAL (
+        SELECT
+            count(*)::INTEGER AS total,
+            (count(*) FILTER (WHERE s.assignment_id IS NOT NULL OR ap.completed))::INTEGER AS done,
+            (count(*) FILTER (WHERE s.grade IS NOT NULL))::INTEGER AS graded,
+            round(avg(s.grade * 100.0 / NULLIF(a.max_points, 0)) FILTER (WHERE s.grade IS NOT NULL), 2) AS average_grade
+        FROM assignments a
+        LEFT JOIN LATERAL (
+            SELECT sub.assignment_id, max(sub.grade) AS grade
+            FROM assignment_submissions sub
+            WHERE sub.assignment_id = a.id AND sub.student_id = p.student_id
+            GROUP BY sub.assignment_id
+        ) s ON true
+        LEFT JOIN assignment_progress ap
+            ON ap.assignment_id = a.id AND ap.student_id = p.student_id
+        WHERE a.course_id = p.course_id
+    ) agg
+    ON CONFLICT (course_id, student_id) DO UPDATE SET
+        progress_percentage = EXCLUDED.progress_percentage,
+        completed = EXCLUDED.completed,
+        completed_assignments = EXCLUDED.completed_assignments,
+        graded_assignments = EXCLUDED.graded_assignments,
+        total_assignments = EXCLUDED.total_assignments,
+        average_grade = EXCLUDED.average_grade,
+        last_accessed = EXCLUDED.last_accessed,
+        updated_at = EXCLUDED.updated_at
+    RETURNING cp.*;
+END;
+$$;
+
+-- Submissions and assignment completions: refresh the touched pairs.
+CREATE OR REPLACE FUNCTION public.refresh_course_progress_for_student_rows()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_student_ids UUID[];
+    v_course_ids UUID[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(t.student_id), array_agg(t.course_id) INTO v_student_ids, v_course_ids
+        FROM (SELECT DISTINCT r.student_id, a.course_id
+              FROM new_rows r JOIN assignments a ON a.id = r.assignment_id) t;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(t.student_id), array_agg(t.course_id) INTO v_student_ids, v_course_ids
+        FROM (SELECT DISTINCT r.student_id, a.course_id
+              FROM old_rows r JOIN assignments a ON a.id = r.assignment_id) t;
+    ELSE
+        SELECT array_agg(t.student_id), array_agg(t.course_id) INTO v_student_ids, v_course_ids
+        FROM (SELECT r.student_id, a.course_id
+              FROM new_rows r JOIN assignments a ON a.id = r.assignment_id
+              UNION
+              SELECT r.student_id, a.course_id
+              FROM old_rows r JOIN assignments a ON a.id = r.assignment_id) t;
+    END IF;
+
+    IF v_student_ids IS NOT NULL THEN
+        PERFORM refresh_course_progress(v_student_ids, v_course_ids);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Adding or removing assignments changes the total for everyone tracked in
+-- (or enrolled in) the course.
+CREATE OR REPLACE FUNCTION public.refresh_course_progress_for_assignments()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_student_ids UUID[];
+    v_course_ids UUID[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(t.student_id), array_agg(t.course_id) INTO v_student_ids, v_course_ids
+        FROM (SELECT e.student_id, e.course_id FROM enrollments e
+              WHERE e.course_id IN (SELECT course_id FROM new_rows)
+              UNION
+              SELECT cp.student_id, cp.course_id FROM course_progress cp
+              WHERE cp.course_id IN (SELECT course_id FROM new_rows)) t;
+    ELSE
+        SELECT array_agg(t.student_id), array_agg(t.course_id) INTO v_student_ids, v_course_ids
+        FROM (SELECT cp.student_id, cp.course_id FROM course_progress cp
+              WHERE cp.course_id IN (SELECT course_id FROM old_rows)) t;
+    END IF;
+
+    IF v_student_ids IS NOT NULL THEN
+        PERFORM refresh_course_progress(v_student_ids, v_course_ids);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS submissions_progress_insert ON public.assignment_submissions;
+DROP TRIGGER IF EXISTS submissions_progress_update ON public.assignment_submissions;
+DROP TRIGGER IF EXISTS submissions_progress_delete ON public.assignment_submissions;
+DROP TRIGGER IF EXISTS assignment_progress_insert ON public.assignment_progress;
+DROP TRIGGER IF EXISTS assignment_progress_update ON public.assignment_progress;
+DROP TRIGGER IF EXISTS assignment_progress_delete ON public.assignment_progress;
+DROP TRIGGER IF EXISTS assignments_progress_insert ON public.assignments;
+DROP TRIGGER IF EXISTS assignments_progress_delete ON public.assignments;
+
+CREATE TRIGGER submissions_progress_insert
+AFTER INSERT ON public.assignment_submissions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.refresh_course_progress_for_student_rows();
+
+-- Fires on grading as well as resubmission.
+CREATE TRIGGER submissions_progress_update
+AFTER UPDATE ON public.assignment_submissions
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.refresh_course_progress_for_student_rows();
+
+CREATE TRIGGER submissions_progress_delete
+AFTER DELETE ON public.assignment_submissions
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.refresh_course_progress_for_student_rows();
+
+CREATE TRIGGER assignment_progress_insert
+AFTER INSERT ON public.assignment_progress
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.refresh_course_progress_for_student_rows();
+
+CREATE TRIGGER assignment_progress_update
+AFTER UPDATE ON public.assignment_progress
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.refresh_course_progress_for_student_rows();
+
+CREATE TRIGGER assignment_progress_delete
+AFTER DELETE ON public.assignment_progress
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.refresh_course_progress_for_student_rows();
+
+CREATE TRIGGER assignments_progress_insert
+AFTER INSERT ON public.assignments
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.refresh_course_progress_for_assignments();
+
+CREATE TRIGGER assignments_progress_delete
+AFTER DELETE ON public.assignments
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.refresh_course_progress_for_assignments();
+
+REVOKE ALL ON FUNCTION public.refresh_course_progress(UUID[], UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.refresh_course_progress(UUID[], UUID[]) TO service_role;
+
+-- Backfill every enrolled pair.
+SELECT count(*)
+FROM (
+    SELECT array_agg(student_id) AS student_ids, array_agg(course_id) AS course_ids
+    FROM public.enrollments
+    WHERE student_id IS NOT NULL AND course_id IS NOT NULL
+) e,
+LATERAL public.refresh_course_progress(e.student_ids, e.course_ids);
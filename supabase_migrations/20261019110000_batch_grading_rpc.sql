@@ -0,0 +1,24 @@
+-- Batch grading in one statement.
+-- p_grades is a JSON array of {"submission_id", "grade", "feedback"}. All
+-- matching submissions are updated by a single UPDATE, so the statement-level
+-- progress triggers refresh course_progress once for the whole batch. Unknown
+-- submission ids are simply absent from the returned rows.
+
+CREATE OR REPLACE FUNCTION public.admin_grade_submissions(p_grades JSONB)
+RETURNS SETOF public.assignment_submissions
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE assignment_submissions s
+    SET grade = g.grade, feedback = g.feedback, status = 'graded'
+    FROM jsonb_to_recordset(p_grades) AS g(submission_id UUID, grade INTEGER, feedback TEXT)
+    WHERE s.id = g.submission_id
+    RETURNING s.*;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.admin_grade_submissions(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.admin_grade_submissions(JSONB) TO service_role;
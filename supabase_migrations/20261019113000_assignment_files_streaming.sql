@@ -0,0 +1,11 @@
+-- Metadata for streamed uploads.
+-- Files attached to a submission are recorded in assignment_files too, with
+-- submission_id set; checksum_sha256 is computed while the upload streams.
+
+ALTER TABLE public.assignment_files
+    ADD COLUMN IF NOT EXISTS submission_id UUID REFERENCES public.assignment_submissions(id) ON DELETE CASCADE,
+    ADD COLUMN IF NOT EXISTS checksum_sha256 TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_assignment_files_submission_id
+    ON public.assignment_files(submission_id)
+    WHERE submission_id IS NOT NULL;
@@ -0,0 +1,148 @@
+-- Content-addressed storage for assignment files.
+-- Uploaded bytes are stored once per SHA-256 under blobs/sha256/<ab>/<digest>
+-- in the assignments bucket and described by a file_blobs row; every
+-- assignment_files row that carries the same content references that blob.
+-- ref_count is maintained by statement-level triggers on assignment_files;
+-- blobs whose count has been zero for a grace period are claimed by
+-- claim_orphaned_file_blobs() and their objects removed by the app. Uploads
+-- reuse a stored blob only through claim_file_blob(), which keeps it from
+-- being collected meanwhile.
+--
+-- Rows recorded before this migration keep blob_sha256 NULL and their own
+-- per-upload object; they are not garbage-collected.
+
+CREATE TABLE IF NOT EXISTS public.file_blobs (
+    sha256 TEXT PRIMARY KEY CHECK (sha256 ~ '^[0-9a-f]{64}$'),
+    storage_path TEXT NOT NULL,
+    size BIGINT NOT NULL,
+    mime_type TEXT,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    -- Set while ref_count is zero: new blobs start orphaned until their
+    -- first assignment_files row lands, so a failed insert is collected too.
+    orphaned_at TIMESTAMPTZ DEFAULT NOW(),
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_file_blobs_orphaned
+    ON public.file_blobs(orphaned_at)
+    WHERE ref_count = 0;
+
+ALTER TABLE public.file_blobs ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE public.assignment_files
+    ADD COLUMN IF NOT EXISTS blob_sha256 TEXT REFERENCES public.file_blobs(sha256);
+
+CREATE INDEX IF NOT EXISTS idx_assignment_files_blob_sha256
+    ON public.assignment_files(blob_sha256)
+    WHERE blob_sha256 IS NOT NULL;
+
+-- Apply the net change in references per blob for one statement.
+CREATE OR REPLACE FUNCTION public.update_file_blob_ref_counts()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        WITH delta AS (
+            SELECT blob_sha256, count(*) AS n FROM new_rows
+            WHERE blob_sha256 IS NOT NULL GROUP BY blob_sha256
+        )
+        UPDATE file_blobs b
+        SET ref_count = b.ref_count + delta.n, orphaned_at = NULL
+        FROM delta WHERE b.sha256 = delta.blob_sha256;
+    ELSIF TG_OP = 'DELETE' THEN
+        WITH delta AS (
+            SELECT blob_sha256, count(*) AS n FROM old_rows
+            WHERE blob_sha256 IS NOT NULL GROUP BY blob_sha256
+        )
+        UPDATE file_blobs b
+        SET ref_count = greatest(b.ref_count - delta.n, 0),
+            orphaned_at = CASE WHEN b.ref_count - delta.n <= 0 THEN NOW() END
+        FROM delta WHERE b.sha256 = delta.blob_sha256;
+    ELSE
+        WITH delta AS (
+            SELECT blob_sha256, sum(n)::INTEGER AS n FROM (
+                SELECT blob_sha256, 1 AS n FROM new_rows WHERE blob_sha256 IS NOT NULL
+                UNION ALL
+                SELECT blob_sha256, -1 AS n FROM old_rows WHERE blob_sha256 IS NOT NULL
+            ) changes
+            GROUP BY blob_sha256
+            HAVING sum(n) <> 0
+        )
+        UPDATE file_blobs b
+        SET ref_count = greatest(b.ref_count + delta.n, 0),
+            orphaned_at = CASE WHEN b.ref_count + delta.n <= 0 THEN NOW() END
+        FROM delta WHERE b.sha256 = delta.blob_sha256;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS assignment_files_blob_refs_insert ON public.assignment_files;
+DROP TRIGGER IF EXISTS assignment_files_blob_refs_update ON public.assignment_files;
+DROP TRIGGER IF EXISTS assignment_files_blob_refs_delete ON public.assignment_files;
+
+CREATE TRIGGER assignment_files_blob_refs_insert
+AFTER INSERT ON public.assignment_files
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.update_file_blob_ref_counts();
+
+CREATE TRIGGER assignment_files_blob_refs_update
+AFTER UPDATE ON public.assignment_files
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.update_file_blob_ref_counts();
+
+-- Also fires for rows removed by ON DELETE CASCADE from assignments and
+-- submissions.
+CREATE TRIGGER assignment_files_blob_refs_delete
+AFTER DELETE ON public.assignment_files
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION public.update_file_blob_ref_counts();
+
+-- Delete up to p_limit blobs that have had no references for at least
+-- p_grace_seconds and return them, so the caller can remove their objects.
+-- Locked rows (a reference being inserted right now) are skipped, and the
+-- NOT EXISTS guard keeps a drifted counter from freeing referenced content.
+CREATE OR REPLACE FUNCTION public.claim_orphaned_file_blobs(p_grace_seconds INTEGER, p_limit INTEGER)
+RETURNS SETOF public.file_blobs
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    DELETE FROM file_blobs
+    WHERE sha256 IN (
+        SELECT b.sha256 FROM file_blobs b
+        WHERE b.ref_count = 0
+          AND b.orphaned_at < NOW() - make_interval(secs => p_grace_seconds)
+          AND NOT EXISTS (SELECT 1 FROM assignment_files f WHERE f.blob_sha256 = b.sha256)
+        ORDER BY b.orphaned_at
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *;
+$$;
+
+-- Take the blob p_sha256 for a new reference and return it (nothing if it
+-- is not stored). The row lock waits for a collection in progress, which
+-- deleted the row if it took it; otherwise an unreferenced blob's grace
+-- period starts over, so claim_orphaned_file_blobs leaves it alone while the
+-- reference is being recorded (which clears orphaned_at). A reference that
+-- never lands lets the blob be collected again after the grace period.
+CREATE OR REPLACE FUNCTION public.claim_file_blob(p_sha256 TEXT)
+RETURNS SETOF public.file_blobs
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    UPDATE file_blobs
+    SET orphaned_at = CASE WHEN ref_count = 0 THEN NOW() END
+    WHERE sha256 = p_sha256
+    RETURNING *;
+$$;
+
+REVOKE ALL ON FUNCTION public.claim_orphaned_file_blobs(INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.claim_file_blob(TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_orphaned_file_blobs(INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.claim_file_blob(TEXT) TO service_role;
@@ -0,0 +1,198 @@
+-- Assignment writes with their files and links in one transaction.
+-- admin_create_assignment() and admin_update_assignment() take the assignment
+-- fields plus JSON arrays of files and links, write everything with
+-- set-based statements and return the assignment with both embedded, so
+-- creating an assignment with N files and M links is one round trip instead
+-- of 1 + N + M inserts.
+--
+-- Files reference stored content by SHA-256 (file_blobs), as returned by the
+-- upload endpoints: [{"sha256", "file_name", "mime_type"?}]. Links are
+-- [{"url", "title"?}]. Unknown content raises 22023, a missing course or
+-- assignment P0002.
+
+-- The assignment as JSON, with its own files (not submission attachments)
+-- and links.
+CREATE OR REPLACE FUNCTION public.admin_assignment_json(p_assignment_id UUID)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT to_jsonb(a) || jsonb_build_object(
+        'files', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', f.id, 'file_name', f.file_name, 'file_path', f.file_path,
+                'mime_type', f.mime_type, 'size', f.size, 'blob_sha256', f.blob_sha256,
+                'created_at', f.created_at) ORDER BY f.created_at, f.file_name)
+            FROM assignment_files f
+            WHERE f.assignment_id = a.id AND f.submission_id IS NULL
+        ), '[]'::jsonb),
+        'links', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'id', l.id, 'url', l.url, 'title', l.title,
+                'created_at', l.created_at) ORDER BY l.created_at, l.url)
+            FROM assignment_links l
+            WHERE l.assignment_id = a.id
+        ), '[]'::jsonb)
+    )
+    FROM assignments a
+    WHERE a.id = p_assignment_id;
+$$;
+
+-- Make the assignment's files and links match the given arrays; NULL leaves
+-- that set untouched. Rows already matching (same content and name, same
+-- URL) are kept, so their ids and blob references do not churn.
+CREATE OR REPLACE FUNCTION public.admin_set_assignment_content(
+    p_assignment_id UUID,
+    p_files JSONB,
+    p_links JSONB
+)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_missing TEXT;
+BEGIN
+    IF p_files IS NOT NULL THEN
+        DELETE FROM assignment_files f
+        WHERE f.assignment_id = p_assignment_id
+          AND f.submission_id IS NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM jsonb_to_recordset(p_files) AS n(sha256 TEXT, file_name TEXT)
+              WHERE n.sha256 = COALESCE(f.blob_sha256, f.checksum_sha256) AND n.file_name = f.file_name
+          );
+
+        SELECT n.sha256 INTO v_missing
+        FROM jsonb_to_recordset(p_files) AS n(sha256 TEXT, file_name TEXT)
+        WHERE NOT EXISTS (SELECT 1 FROM file_blobs b WHERE b.sha256 = n.sha256)
+          AND NOT EXISTS (
+              SELECT 1 FROM assignment_files f
+              WHERE f.assignment_id = p_assignment_id AND f.submission_id IS NULL
+                AND COALESCE(f.blob_sha256, f.checksum_sha256) = n.sha256 AND f.file_name = n.file_name
+          )
+        LIMIT 1;
+        IF FOUND THEN
+            RAISE EXCEPTION 'Unknown file content: %', v_missing USING ERRCODE = '22023';
+        END IF;
+
+        INSERT INTO assignment_files (assignment_id, file_name, file_path, mime_type, size, checksum_sha256, blob_sha256)
+        SELECT DISTINCT ON (n.sha256, n.file_name)
+            p_assignment_id, n.file_name, b.storage_path, COALESCE(n.mime_type, b.mime_type), b.size, b.sha256, b.sha256
+        FROM jsonb_to_recordset(p_files) AS n(sha256 TEXT, file_name TEXT, mime_type TEXT)
+        JOIN file_blobs b ON b.sha256 = n.sha256
+        WHERE NOT EXISTS (
+            SELECT 1 FROM assignment_files f
+            WHERE f.assignment_id = p_assignment_id AND f.submission_id IS NULL
+              AND COALESCE(f.blob_sha256, f.checksum_sha256) = n.sha256 AND f.file_name = n.file_name
+        );
+    END IF;
+
+    IF p_links IS NOT NULL THEN
+        DELETE FROM assignment_links l
+        WHERE l.assignment_id = p_assignment_id
+          AND NOT EXISTS (
+              SELECT 1 FROM jsonb_to_recordset(p_links) AS n(url TEXT, title TEXT)
+              WHERE n.url = l.url AND n.title IS NOT DISTINCT FROM l.title
+          );
+
+        INSERT INTO assignment_links (assignment_id, url, title)
+        SELECT DISTINCT p_assignment_id, n.url, n.title
+        FROM jsonb_to_recordset(p_links) AS n(url TEXT, title TEXT)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM assignment_links l
+            WHERE l.assignment_id = p_assignment_id AND l.url = n.url AND l.title IS NOT DISTINCT FROM n.title
+        );
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.admin_create_assignment(
+    p_assignment JSONB,
+    p_files JSONB DEFAULT '[]'::jsonb,
+    p_links JSONB DEFAULT '[]'::jsonb
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_id UUID;
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM courses WHERE id = (p_assignment->>'course_id')::UUID) THEN
+        RAISE EXCEPTION 'Course not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO assignments (course_id, title, description, assignment_type, due_date, max_points)
+    SELECT a.course_id, a.title, a.description, a.assignment_type, a.due_date, a.max_points
+    FROM jsonb_to_record(p_assignment) AS a(
+        course_id UUID, title TEXT, description TEXT, assignment_type TEXT,
+        due_date TIMESTAMPTZ, max_points INTEGER
+    )
+    RETURNING id INTO v_id;
+
+    PERFORM admin_set_assignment_content(v_id, COALESCE(p_files, '[]'::jsonb), COALESCE(p_links, '[]'::jsonb));
+    RETURN admin_assignment_json(v_id);
+END;
+$$;
+
+-- p_changes holds only the fields to change; absent keys keep their value.
+CREATE OR REPLACE FUNCTION public.admin_update_assignment(
+    p_assignment_id UUID,
+    p_changes JSONB,
+    p_files JSONB DEFAULT NULL,
+    p_links JSONB DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_course_id UUID;
+    v_student_ids UUID[];
+    v_course_ids UUID[];
+BEGIN
+    UPDATE assignments SET
+        title = CASE WHEN p_changes ? 'title' THEN p_changes->>'title' ELSE title END,
+        description = CASE WHEN p_changes ? 'description' THEN p_changes->>'description' ELSE description END,
+        assignment_type = CASE WHEN p_changes ? 'assignment_type' THEN p_changes->>'assignment_type' ELSE assignment_type END,
+        due_date = CASE WHEN p_changes ? 'due_date' THEN (p_changes->>'due_date')::TIMESTAMPTZ ELSE due_date END,
+        max_points = CASE WHEN p_changes ? 'max_points' THEN (p_changes->>'max_points')::INTEGER ELSE max_points END,
+        updated_at = NOW()
+    WHERE id = p_assignment_id
+    RETURNING course_id INTO v_course_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Assignment not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    -- Grades are averaged as percentages of max_points; the progress
+    -- triggers only watch inserts and deletes of assignments.
+    IF p_changes ? 'max_points' THEN
+        SELECT array_agg(cp.student_id), array_agg(cp.course_id) INTO v_student_ids, v_course_ids
+        FROM course_progress cp
+        WHERE cp.course_id = v_course_id;
+        IF v_student_ids IS NOT NULL THEN
+            PERFORM refresh_course_progress(v_student_ids, v_course_ids);
+        END IF;
+    END IF;
+
+    PERFORM admin_set_assignment_content(p_assignment_id, p_files, p_links);
+    RETURN admin_assignment_json(p_assignment_id);
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_assignments_course_due_date
+    ON public.assignments(course_id, due_date);
+
+REVOKE ALL ON FUNCTION public.admin_assignment_json(UUID) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.admin_set_assignment_content(UUID, JSONB, JSONB) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.admin_create_assignment(JSONB, JSONB, JSONB) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.admin_update_assignment(UUID, JSONB, JSONB, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.admin_assignment_json(UUID) TO service_role;
+GRANT EXECUTE ON FUNCTION public.admin_set_assignment_content(UUID, JSONB, JSONB) TO service_role;
+GRANT EXECUTE ON FUNCTION public.admin_create_assignment(JSONB, JSONB, JSONB) TO service_role;
+GRANT EXECUTE ON FUNCTION public.admin_update_assignment(UUID, JSONB, JSONB, JSONB) TO service_role;
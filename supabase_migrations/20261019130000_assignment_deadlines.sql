@@ -0,0 +1,126 @@
+-- Deadline processing for assignments.
+-- The deadline scheduler keeps upcoming due dates in memory and, when they
+-- pass, calls process_assignment_deadlines() for a batch of assignments:
+-- submissions made after the due date are marked 'late', and a notification
+-- is queued for each enrolled student who has not submitted. Processed
+-- assignments are stamped so the scheduler only ever reads pending ones,
+-- through a partial index ordered by due date.
+
+ALTER TABLE public.assignments
+    ADD COLUMN IF NOT EXISTS deadline_processed_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS idx_assignments_pending_deadlines
+    ON public.assignments(due_date, id)
+    WHERE deadline_processed_at IS NULL AND due_date IS NOT NULL;
+
+-- Moving a due date makes the assignment pending again.
+CREATE OR REPLACE FUNCTION public.reset_assignment_deadline()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.due_date IS DISTINCT FROM OLD.due_date THEN
+        NEW.deadline_processed_at := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS assignments_reset_deadline ON public.assignments;
+CREATE TRIGGER assignments_reset_deadline
+BEFORE UPDATE OF due_date ON public.assignments
+FOR EACH ROW EXECUTE FUNCTION public.reset_assignment_deadline();
+
+-- Outgoing notifications, one per (student, assignment, kind); sent_at is
+-- set by whatever delivers them.
+CREATE TABLE IF NOT EXISTS public.notifications (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    student_id UUID NOT NULL REFERENCES public.students(id) ON DELETE CASCADE,
+    assignment_id UUID REFERENCES public.assignments(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    sent_at TIMESTAMP WITH TIME ZONE,
+    UNIQUE (student_id, assignment_id, kind)
+);
+
+CREATE INDEX IF NOT EXISTS idx_notifications_unsent
+    ON public.notifications(created_at)
+    WHERE sent_at IS NULL;
+
+ALTER TABLE public.notifications ENABLE ROW LEVEL SECURITY;
+
+-- Process the deadlines of the given assignments that have passed and are
+-- still pending; others are skipped (their due date moved, or another run
+-- got there first). One row per processed assignment.
+CREATE OR REPLACE FUNCTION public.process_assignment_deadlines(p_assignment_ids UUID[])
+RETURNS TABLE (assignment_id UUID, course_id UUID, late_marked INTEGER, missing INTEGER)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+#variable_conflict use_column
+BEGIN
+    -- Data-modifying CTEs all run to completion, including "queued".
+    RETURN QUERY
+    WITH due AS (
+        UPDATE assignments a
+        SET deadline_processed_at = NOW()
+        WHERE a.id = ANY(p_assignment_ids)
+          AND a.deadline_processed_at IS NULL
+          AND a.due_date <= NOW()
+        RETURNING a.id, a.course_id, a.title, a.due_date
+    ),
+    late AS (
+        UPDATE assignment_submissions s
+        SET status = 'late'
+        FROM due
+        WHERE s.assignment_id = due.id
+          AND s.status = 'submitted'
+          AND s.submitted_at > due.due_date
+        RETURNING s.assignment_id, s.student_id
+    ),
+    missing AS (
+        SELECT due.id AS assignment_id, e.student_id, due.title, due.due_date
+        FROM due
+        JOIN enrollments e ON e.course_id = due.course_id AND e.status = 'active'
+        WHERE NOT EXISTS (
+            SELECT 1 FROM assignment_submissions s
+            WHERE s.assignment_id = due.id AND s.student_id = e.student_id
+        )
+    ),
+    queued AS (
+        INSERT INTO notifications (student_id, assignment_id, kind, payload)
+        SELECT m.student_id, m.assignment_id, 'assignment_missing',
+               jsonb_build_object('title', m.title, 'due_date', m.due_date)
+        FROM missing m
+        UNION ALL
+        SELECT l.student_id, l.assignment_id, 'submission_late',
+               jsonb_build_object('title', due.title, 'due_date', due.due_date)
+        FROM late l JOIN due ON due.id = l.assignment_id
+        ON CONFLICT (student_id, assignment_id, kind) DO NOTHING
+        RETURNING 1
+    )
+    SELECT due.id, due.course_id,
+           (SELECT COUNT(*)::INTEGER FROM late WHERE late.assignment_id = due.id),
+           (SELECT COUNT(*)::INTEGER FROM missing WHERE missing.assignment_id = due.id)
+    FROM due;
+END;
+$$;
+
+-- Existing data: mark submissions that came in after their due date, and
+-- treat deadlines already past as processed instead of notifying about them.
+UPDATE public.assignment_submissions s
+SET status = 'late'
+FROM public.assignments a
+WHERE s.assignment_id = a.id
+  AND s.status = 'submitted'
+  AND a.due_date IS NOT NULL
+  AND s.submitted_at > a.due_date;
+
+UPDATE public.assignments
+SET deadline_processed_at = NOW()
+WHERE due_date <= NOW() AND deadline_processed_at IS NULL;
+
+REVOKE ALL ON FUNCTION public.process_assignment_deadlines(UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.process_assignment_deadlines(UUID[]) TO service_role;
@@ -0,0 +1,158 @@
+-- Change feed for cache invalidation (CHANGE_FEED=postgres).
+-- Statement-level triggers on the cached tables append one row per statement
+-- to the change_events outbox, in the writing transaction, and NOTIFY the
+-- 'cache_invalidation' channel, which is delivered on commit. Every app
+-- process LISTENs on a direct connection and evicts the affected keys; after
+-- a reconnect it replays the outbox from the last id it saw. Writes made by
+-- SQL functions or other clients are published the same way as the app's.
+-- The triggers run whatever CHANGE_FEED the app uses, so the outbox is
+-- pruned on a schedule of its own: by pg_cron when available, otherwise by
+-- the app's elected scheduler (CHANGE_EVENTS_PRUNE_INTERVAL).
+
+CREATE TABLE IF NOT EXISTS public.change_events (
+    id BIGSERIAL PRIMARY KEY,
+    topic TEXT NOT NULL,
+    -- NULL: any row of the topic may have changed.
+    ids JSONB,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_events_created_at ON public.change_events(created_at);
+
+ALTER TABLE public.change_events ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON TABLE public.change_events FROM PUBLIC, anon, authenticated;
+
+-- TG_ARGV: the topic, and the column whose values are the event ids.
+CREATE OR REPLACE FUNCTION public.publish_change_event()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_topic TEXT := TG_ARGV[0];
+    v_column TEXT := TG_ARGV[1];
+    v_ids JSONB;
+    v_id BIGINT;
+    v_at TIMESTAMP WITH TIME ZONE := clock_timestamp();
+    v_payload TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format('SELECT jsonb_agg(DISTINCT %I) FROM new_rows', v_column) INTO v_ids;
+    ELSIF TG_OP = 'DELETE' THEN
+        EXECUTE format('SELECT jsonb_agg(DISTINCT %I) FROM old_rows', v_column) INTO v_ids;
+    ELSE
+        -- Both sides: an update may move a row to another key (e.g. course).
+        EXECUTE format('SELECT jsonb_agg(DISTINCT k) FROM (SELECT %1$I AS k FROM old_rows '
+                       'UNION SELECT %1$I FROM new_rows) r', v_column) INTO v_ids;
+    END IF;
+
+    IF v_ids IS NULL THEN
+        RETURN NULL;  -- the statement changed no rows
+    END IF;
+    IF jsonb_array_length(v_ids) > 1000 THEN
+        v_ids := NULL;
+    END IF;
+
+    INSERT INTO change_events (topic, ids, created_at)
+    VALUES (v_topic, v_ids, v_at)
+    RETURNING id INTO v_id;
+
+    v_payload := jsonb_build_object('id', v_id, 'topic', v_topic, 'ids', v_ids,
+                                    'ts', EXTRACT(EPOCH FROM v_at))::text;
+    -- NOTIFY payloads are limited to 8000 bytes.
+    IF octet_length(v_payload) > 7900 THEN
+        v_payload := jsonb_build_object('id', v_id, 'topic', v_topic, 'ids', NULL,
+                                        'ts', EXTRACT(EPOCH FROM v_at))::text;
+    END IF;
+    PERFORM pg_notify('cache_invalidation', v_payload);
+    RETURN NULL;
+END;
+$$;
+
+-- A trigger with transition tables fires for one event only, so each table
+-- gets an INSERT, an UPDATE and a DELETE trigger.
+DO $$
+DECLARE
+    t RECORD;
+    v_op TEXT;
+    v_referencing TEXT;
+BEGIN
+    FOR t IN
+        SELECT * FROM (VALUES
+            ('students', 'students', 'id'),
+            ('courses', 'courses', 'id'),
+            ('instructors', 'instructors', 'id'),
+            ('enrollments', 'enrollments', 'student_id'),
+            ('assignments', 'course_assignments', 'course_id'),
+            ('assignment_submissions', 'student_assignments', 'student_id')
+        ) AS v(tbl, topic, col)
+    LOOP
+        FOREACH v_op IN ARRAY ARRAY['INSERT', 'UPDATE', 'DELETE'] LOOP
+            v_referencing := CASE v_op
+                WHEN 'INSERT' THEN 'NEW TABLE AS new_rows'
+                WHEN 'DELETE' THEN 'OLD TABLE AS old_rows'
+                ELSE 'OLD TABLE AS old_rows NEW TABLE AS new_rows'
+            END;
+            EXECUTE format('DROP TRIGGER IF EXISTS %I ON public.%I',
+                           t.tbl || '_change_events_' || lower(v_op), t.tbl);
+            EXECUTE format('CREATE TRIGGER %I AFTER %s ON public.%I REFERENCING %s '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION public.publish_change_event(%L, %L)',
+                           t.tbl || '_change_events_' || lower(v_op), v_op, t.tbl, v_referencing,
+                           t.topic, t.col);
+        END LOOP;
+    END LOOP;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.publish_change_event() FROM PUBLIC, anon, authenticated;
+
+-- Delete the events older than p_retention seconds; returns how many.
+CREATE OR REPLACE FUNCTION public.prune_change_events(p_retention INTEGER DEFAULT 86400)
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_deleted INTEGER;
+BEGIN
+    DELETE FROM change_events WHERE created_at < NOW() - make_interval(secs => p_retention);
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+    RETURN v_deleted;
+END;
+$$;
+
+-- Whether pg_cron runs the named job, in which case the app's scheduler
+-- leaves that task to it.
+CREATE OR REPLACE FUNCTION public.cron_job_scheduled(p_jobname TEXT)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        RETURN FALSE;
+    END IF;
+    RETURN EXISTS (SELECT 1 FROM cron.job WHERE jobname = p_jobname AND active);
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.prune_change_events(INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.cron_job_scheduled(TEXT) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.prune_change_events(INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.cron_job_scheduled(TEXT) TO service_role;
+
+-- Prune hourly when pg_cron is available.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+        PERFORM cron.schedule(
+            'prune-change-events',
+            '17 * * * *',
+            'SELECT public.prune_change_events()'
+        );
+    END IF;
+END;
+$$;
@@ -0,0 +1,80 @@
+-- Course search for GET /api/v1/courses/search.
+-- Titles (weight A) and descriptions (weight B) are indexed as a tsvector
+-- through an expression GIN index, and titles by trigrams for misspelled
+-- words. The 'simple' configuration is used because the catalog mixes
+-- French and English: no stemming, and the trigram match covers near forms.
+-- An expression index rather than a stored column keeps the tsvector out of
+-- the many select('*') reads of courses.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+CREATE OR REPLACE FUNCTION public.course_search_vector(p_title TEXT, p_description TEXT)
+RETURNS tsvector
+LANGUAGE sql
+IMMUTABLE
+PARALLEL SAFE
+AS $$
+    SELECT setweight(to_tsvector('simple'::regconfig, COALESCE(p_title, '')), 'A')
+        || setweight(to_tsvector('simple'::regconfig, COALESCE(p_description, '')), 'B');
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_courses_search_vector
+    ON public.courses USING GIN (public.course_search_vector(title, description));
+
+CREATE INDEX IF NOT EXISTS idx_courses_title_trgm
+    ON public.courses USING GIN (title extensions.gin_trgm_ops);
+
+-- Returns {"total": n, "results": [course + rank + highlights]}. A course
+-- matches when every query word is in its title or description, or when the
+-- query is close to words of its title (word_similarity, default 0.6).
+-- Highlights are HTML-escaped with the matched words in <mark>.
+CREATE OR REPLACE FUNCTION public.search_courses(
+    p_query TEXT,
+    p_limit INT DEFAULT 20,
+    p_offset INT DEFAULT 0
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SET search_path = public, extensions
+AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('simple', p_query) AS tsq
+    ),
+    matches AS (
+        SELECT c.*,
+               ts_rank_cd(course_search_vector(c.title, c.description), q.tsq)
+                   + word_similarity(p_query, c.title) AS rank
+        FROM courses c, q
+        WHERE course_search_vector(c.title, c.description) @@ q.tsq
+           OR p_query <% c.title
+    ),
+    page AS (
+        SELECT * FROM matches
+        ORDER BY rank DESC, id
+        LIMIT LEAST(GREATEST(p_limit, 1), 100) OFFSET GREATEST(p_offset, 0)
+    )
+    SELECT jsonb_build_object(
+        'total', (SELECT count(*) FROM matches),
+        'results', COALESCE((
+            SELECT jsonb_agg(
+                to_jsonb(page) || jsonb_build_object(
+                    'rank', round(page.rank::numeric, 4),
+                    'highlights', jsonb_build_object(
+                        'title', ts_headline('simple',
+                            replace(replace(replace(COALESCE(page.title, ''), '&', '&amp;'), '<', '&lt;'), '>', '&gt;'),
+                            q.tsq, 'StartSel=<mark>, StopSel=</mark>, HighlightAll=true'),
+                        'description', ts_headline('simple',
+                            replace(replace(replace(COALESCE(page.description, ''), '&', '&amp;'), '<', '&lt;'), '>', '&gt;'),
+                            q.tsq, 'StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15')
+                    )
+                )
+                ORDER BY page.rank DESC, page.id
+            )
+            FROM page, q
+        ), '[]'::jsonb)
+    );
+$$;
+
+REVOKE ALL ON FUNCTION public.search_courses(TEXT, INT, INT) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.search_courses(TEXT, INT, INT) TO anon, authenticated, service_role;
@@ -0,0 +1,18 @@
+-- Case-insensitive duplicate check for the student bulk import.
+-- Stored emails may differ in case from the (lowercased) import rows, so
+-- the import asks for matches on lower(email), served by this index.
+
+CREATE INDEX IF NOT EXISTS students_email_lower_idx ON public.students (lower(email));
+
+CREATE OR REPLACE FUNCTION public.existing_student_emails(p_emails TEXT[])
+RETURNS SETOF TEXT
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT DISTINCT lower(email) FROM students WHERE lower(email) = ANY(COALESCE(p_emails, '{}'));
+$$;
+
+REVOKE ALL ON FUNCTION public.existing_student_emails(TEXT[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.existing_student_emails(TEXT[]) TO service_role;
@@ -0,0 +1,82 @@
+-- Background job queue shared by every app process (JOB_QUEUE=database, the
+-- default without REDIS_URL). A job's status can be read from any worker,
+-- and a job whose worker died or was recycled is claimed again once its
+-- lease (run_at) has passed.
+
+CREATE TABLE IF NOT EXISTS public.background_jobs (
+    id UUID PRIMARY KEY,
+    -- The status record GET /api/v1/admin/jobs/<id> reports.
+    job JSONB NOT NULL,
+    -- The handler's arguments; NULL once the job has finished.
+    args JSONB,
+    idempotency_key TEXT UNIQUE,
+    -- When the job is due, or when its worker's lease ends; NULL once finished.
+    run_at TIMESTAMP WITH TIME ZONE,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_background_jobs_run_at
+    ON public.background_jobs(run_at)
+    WHERE run_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_background_jobs_expires_at ON public.background_jobs(expires_at);
+
+ALTER TABLE public.background_jobs ENABLE ROW LEVEL SECURITY;
+REVOKE ALL ON TABLE public.background_jobs FROM PUBLIC, anon, authenticated;
+
+-- Queue a job unless its idempotency key is taken; returns the job stored
+-- for the key and whether it was created now.
+CREATE OR REPLACE FUNCTION public.enqueue_background_job(
+    p_job JSONB, p_args JSONB, p_idempotency_key TEXT, p_ttl INTEGER
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_job JSONB;
+BEGIN
+    INSERT INTO background_jobs (id, job, args, idempotency_key, run_at, expires_at)
+    VALUES ((p_job->>'id')::UUID, p_job, p_args, p_idempotency_key, NOW(),
+            NOW() + make_interval(secs => p_ttl))
+    ON CONFLICT (idempotency_key) DO NOTHING;
+    IF FOUND THEN
+        RETURN jsonb_build_object('job', p_job, 'created', TRUE);
+    END IF;
+    SELECT job INTO v_job FROM background_jobs WHERE idempotency_key = p_idempotency_key;
+    RETURN jsonb_build_object('job', v_job, 'created', FALSE);
+END;
+$$;
+
+-- Lease the next due job to the caller for p_lease seconds; returns
+-- {job, args}, or NULL when nothing is due. Expired jobs are pruned on the way.
+CREATE OR REPLACE FUNCTION public.claim_background_job(p_lease INTEGER)
+RETURNS JSONB
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_claimed JSONB;
+BEGIN
+    DELETE FROM background_jobs
+    WHERE id IN (SELECT id FROM background_jobs WHERE expires_at < NOW() LIMIT 100);
+
+    UPDATE background_jobs
+    SET run_at = NOW() + make_interval(secs => p_lease)
+    WHERE id = (
+        SELECT id FROM background_jobs
+        WHERE run_at <= NOW()
+        ORDER BY run_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING jsonb_build_object('job', job, 'args', args) INTO v_claimed;
+    RETURN v_claimed;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.enqueue_background_job(JSONB, JSONB, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.claim_background_job(INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.enqueue_background_job(JSONB, JSONB, TEXT, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.claim_background_job(INTEGER) TO service_role;
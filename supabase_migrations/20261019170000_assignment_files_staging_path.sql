@@ -0,0 +1,10 @@
+-- Direct uploads (POST /api/v1/files/complete) record the staged object each
+-- assignment_files row was created from. The unique constraint makes
+-- completion idempotent: a replayed upload ticket finds the row recorded
+-- the first time instead of adding another. A row with staging_path set and
+-- blob_sha256 still NULL is waiting for its verification job and is not
+-- served for download (rows older than content-addressed storage have no
+-- staging_path).
+
+ALTER TABLE public.assignment_files
+    ADD COLUMN IF NOT EXISTS staging_path TEXT UNIQUE;
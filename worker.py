@@ -0,0 +1,50 @@
+"""
+Standalone background job worker.
+
+    REDIS_URL=redis://localhost:6379/0 JOB_WORKERS=4 python worker.py
+
+Claims jobs from the queue the web processes enqueue into (Redis with
+REDIS_URL, the background_jobs table otherwise), with JOB_WORKERS threads,
+until SIGTERM or Ctrl-C. Useful to take slow operations off the web
+workers (set JOB_WORKERS=0 on those). With JOB_QUEUE=memory jobs never
+leave the process that queued them, so there is nothing to do here.
+"""
+import os
+import signal
+import sys
+import threading
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from config.logging_config import init_logging
+from app.database.change_feed import configure_change_feed, make_transport
+from app.services.job_service import (
+    configure_jobs, start_job_workers, stop_job_workers, DEFAULT_JOB_WORKERS, DEFAULT_MAX_ATTEMPTS
+)
+
+if __name__ == '__main__':
+    init_logging()
+    if (os.getenv('JOB_QUEUE') or '').strip().lower() == 'memory':
+        sys.exit("JOB_QUEUE=memory: background jobs run inside the web processes.")
+
+    # Jobs write; the web processes holding caches must hear about it.
+    configure_change_feed(make_transport(
+        os.getenv('CHANGE_FEED'),
+        redis_url=os.getenv('REDIS_URL'),
+        database_url=os.getenv('DATABASE_URL'),
+        socket_dir=os.getenv('CHANGE_FEED_DIR')
+    ))
+    configure_jobs(
+        queue=os.getenv('JOB_QUEUE'),
+        redis_url=os.getenv('REDIS_URL'),
+        workers=int(os.getenv('JOB_WORKERS', DEFAULT_JOB_WORKERS)),
+        max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+    )
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    workers = start_job_workers()
+    print(f"Job worker {os.getpid()} running {len(workers)} thread(s)")
+    stop.wait()
+    stop_job_workers()